@@ -81,4 +81,19 @@ Your task is to format responses based on the user query by filtering the HEALTH
    - For availability schedules, format both start_time and end_time in 12-hour format
 2. When displaying doctor or service availability, clearly show the days and formatted time slots
 3. Present all information in a clear, organized manner that is easy for users to understand
-""" 
\ No newline at end of file
+""" 
+# Slim system prompt: only the providers retrieved for the request are injected
+DOCTOR_SERVICE_PROMPT_TEMPLATE = """
+Your task is to format the given healthcare provider data based on the user query.
+Current date: {current_date}
+Current time: {current_time}
+Current day: {current_day}
+These providers were retrieved for the query, best match first (JSON):
+{providers_data}
+Only use these providers. If none of them fits the user's request, say that no matching provider was found.
+
+# Important Formatting Instructions:
+1. Always convert all time values from 24-hour format to 12-hour format with AM/PM designation
+2. When displaying doctor or service availability, clearly show the days and formatted time slots
+3. Present all information in a clear, organized manner that is easy for users to understand
+"""
@@ -194,6 +194,8 @@ Follow the following steps to book an appointment for the user.
     * Include day and time slots based on the doctor's availability_schedule from the data
     * Each time slot should be a selectable option
   - When the user selects a time slot:
+    * IMMEDIATELY call the hold_appointment_slot tool with the doctor_id, appointment_date (YYYY-MM-DD) and appointment_time (HH:MM)
+    * If the hold fails (success: false), tell the user the slot is no longer available and present the other time slots again
     * Ask for user details in sequence (one question at a time) using TEXT format:
       * Name
       * Age
@@ -224,6 +226,7 @@ Follow the following steps to book an appointment for the user.
           * Include the doctor's name, hospital name, address, and contact number
           * Thank the user and offer to help with anything else
       * If failed (success: false):
+        - If the error is slot_taken, apologise that the slot was just booked by someone else and present the doctor's other time slots
         - Present an error message using TEXT format explaining what went wrong
         - Offer to try booking again or help with something else
 [SALT_END]
@@ -0,0 +1,48 @@
+"""
+Seed healthcare provider catalogue.
+
+This is the structured form of the provider data that is embedded in the Gemini
+prompt. It is used whenever no ingested provider snapshot is available.
+"""
+
+# Weekly schedule shared by the seed providers
+_STANDARD_WEEK = {
+    "Monday": ["9:00 AM - 12:00 PM", "2:00 PM - 5:00 PM"],
+    "Tuesday": ["9:00 AM - 12:00 PM", "2:00 PM - 5:00 PM"],
+    "Wednesday": ["9:00 AM - 12:00 PM", "2:00 PM - 5:00 PM"],
+    "Thursday": ["9:00 AM - 12:00 PM", "2:00 PM - 5:00 PM"],
+    "Friday": ["9:00 AM - 12:00 PM", "2:00 PM - 5:00 PM"],
+    "Saturday": ["9:00 AM - 12:00 PM", "2:00 PM - 5:00 PM"],
+    "Sunday": ["9:00 AM - 12:00 PM", "2:00 PM - 5:00 PM"]
+}
+
+HEALTHCARE_PROVIDERS_DATA = [
+    {
+        "provider_id": "prov-001",
+        "name": "Dr. John Doe",
+        "specialty": "Cardiologist",
+        "location": "New York, NY",
+        "availability": dict(_STANDARD_WEEK)
+    },
+    {
+        "provider_id": "prov-002",
+        "name": "Dr. Jane Smith",
+        "specialty": "Pediatrician",
+        "location": "Los Angeles, CA",
+        "availability": dict(_STANDARD_WEEK)
+    },
+    {
+        "provider_id": "prov-003",
+        "name": "Dr. Michael Brown",
+        "specialty": "Dermatologist",
+        "location": "Chicago, IL",
+        "availability": dict(_STANDARD_WEEK)
+    },
+    {
+        "provider_id": "prov-004",
+        "name": "Dr. Emily Johnson",
+        "specialty": "Neurologist",
+        "location": "San Francisco, CA",
+        "availability": dict(_STANDARD_WEEK)
+    }
+]
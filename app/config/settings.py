@@ -1,17 +1,20 @@
 import os
 import sys
 import logging
-from typing import Optional, List
+from typing import Dict, Optional, List
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from pydantic import Field
 
-# Try to load dotenv but don't fail if it doesn't work
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Load .env into os.environ once; services read some keys (e.g. GEMINI_API_KEY) from the environment directly
 try:
     from dotenv import load_dotenv
-    load_dotenv()
-    print("Environment variables loaded from .env file")
+    if load_dotenv():
+        logger.info("Environment variables loaded from .env file")
 except Exception as e:
-    print(f"Warning: Error loading .env file: {e}")
+    logger.warning(f"Error loading .env file: {e}")
     # If dotenv fails, try to load manually
     if os.path.exists(".env"):
         try:
@@ -25,10 +28,10 @@ except Exception as e:
                             value = value.strip()
                             os.environ[key] = value
                         except ValueError:
-                            print(f"Warning: Skipping invalid line in .env: {line}")
-            print("Loaded environment variables manually")
+                            logger.warning(f"Skipping invalid line in .env: {line}")
+            logger.info("Loaded environment variables manually")
         except Exception as e2:
-            print(f"Warning: Could not manually load .env file: {e2}")
+            logger.warning(f"Could not manually load .env file: {e2}")
 
 class Settings(BaseSettings):
     """Application settings loaded from environment variables"""
@@ -36,6 +39,7 @@ class Settings(BaseSettings):
     # OpenAI API settings
     OPENAI_API_KEY: str = Field(..., description="OpenAI API key")
     OPENAI_MODEL: str = Field("gpt-4.1-mini", description="Default OpenAI model to use")
+    OPENAI_BASE_URL: Optional[str] = Field(None, description="OpenAI-compatible API base URL, e.g. http://localhost:8090/v1 for benchmarks.upstream_stub (api.openai.com when unset)")
     MAX_TOKENS: int = Field(750, description="Maximum number of tokens to generate")
     TEMPERATURE: float = Field(0.7, description="Temperature for response generation")
     TOP_P: float = Field(1.0, description="Top-p sampling parameter")
@@ -63,6 +67,22 @@ class Settings(BaseSettings):
         60, 
         description="Number of requests allowed per minute"
     )
+    RATE_LIMIT_BURST: int = Field(
+        0,
+        description="Requests a client may send at once before the per-minute rate applies (0 = RATE_LIMIT_PER_MINUTE)"
+    )
+    RATE_LIMIT_PER_CALLER_PER_MINUTE: int = Field(
+        600,
+        description="Requests allowed per minute per API key (or client address without one), summed over all its users (0 = no limit)"
+    )
+    TRUSTED_PROXY_HOPS: int = Field(
+        1,
+        description="Proxies in front of the app that append to X-Forwarded-For; the client address is the hop the outermost one appended (0 = ignore the header)"
+    )
+    RATE_LIMIT_LOCAL_LEASE: int = Field(
+        10,
+        description="Tokens a worker may take from Redis at once for a client well under its limit (1 = check Redis on every request)"
+    )
     
     # Logging
     LOG_LEVEL: str = Field("INFO", description="Log level")
@@ -87,13 +107,81 @@ class Settings(BaseSettings):
     REDIS_DECODE_RESPONSES: bool = Field(True, description="Automatically decode Redis responses to Python strings")
     REDIS_CONVERSATIONS_TTL_HOURS: int = Field(24, description="TTL for conversation data in Redis (hours)")
     REDIS_MAX_CONVERSATIONS: int = Field(1000, description="Maximum number of conversations to store in Redis")
+    REDIS_MAX_CONNECTIONS: int = Field(100, description="Maximum connections in each Redis client's pool")
+    REDIS_POOL_TIMEOUT_SECONDS: float = Field(5.0, description="How long a Redis command waits for a free pooled connection")
+    REDIS_PROFILE_HEADERS: bool = Field(True, description="Send each API response's Redis round trip and command counts as X-Redis-Round-Trips and X-Redis-Commands")
+    REDIS_TRACE: bool = Field(False, description="Log a Redis command trace of every API request (DEVELOPMENT_MODE only; otherwise per request with the X-Redis-Trace: 1 header)")
 
+    # Provider catalogue settings
+    PROVIDER_SNAPSHOT_PATH: str = Field("data/providers.snapshot.json.gz", description="Provider snapshot written by data ingestion and loaded by the API")
+    PROVIDER_COLUMNAR_PATH: str = Field("data/providers.columns", description="Memory-mapped columnar provider snapshot, preferred over PROVIDER_SNAPSHOT_PATH when present")
+    PROVIDER_VECTOR_INDEX_PATH: str = Field("data/providers.vectors", description="Directory holding the provider vector index written by data ingestion")
+    VECTOR_IVF_THRESHOLD: int = Field(50000, description="Catalogue size from which provider search uses an IVF index instead of brute force")
+    VECTOR_NPROBE: int = Field(16, description="Number of IVF clusters scanned per provider search query")
+    PROVIDER_SEARCH_TOP_K: int = Field(5, description="Number of providers returned by provider search")
+    PROVIDER_SEARCH_CANDIDATES: int = Field(50, description="Candidates taken from each of the lexical and vector rankings before fusion")
+    PROVIDER_CACHE_ENABLED: bool = Field(True, description="Share get_service_info lookup results across conversations until the end of the availability slot")
+    PROVIDER_CACHE_LOCAL_MAX_SIZE: int = Field(1024, description="Maximum number of lookup results kept in each process in front of Redis")
+    
+    # Outbound HTTP and appointment confirmation settings
+    HTTP_POOL_SIZE: int = Field(100, description="Maximum pooled connections of the shared outbound HTTP session")
+    HTTP_TIMEOUT_SECONDS: float = Field(10.0, description="Total timeout for outbound HTTP requests")
+    CONFIRMATION_WEBHOOK_URL: str = Field(os.environ.get("CONFIRMATION_WEBHOOK_URL", "https://admin.n8n.healthnivaran.in/webhook/appointment/confirmation"), description="Webhook that receives appointment confirmations")
+    CONFIRMATION_OUTBOX_STREAM: str = Field("confirmations:outbox", description="Redis stream used as the appointment confirmation outbox")
+    CONFIRMATION_MAX_ATTEMPTS: int = Field(5, description="Delivery attempts before a confirmation is moved to the dead-letter stream")
+    CONFIRMATION_RETRY_SECONDS: float = Field(30.0, description="Delay before a failed confirmation delivery is retried")
+    CONFIRMATION_DEAD_LETTER_RETENTION_DAYS: float = Field(14.0, description="How long dead-lettered confirmations, which hold patient details, are kept for inspection")
+    SLOT_HOLD_TTL_SECONDS: float = Field(600.0, description="How long a selected appointment slot stays reserved before the booking is confirmed")
+    
+    # OpenAI and Gemini client transport settings
+    LLM_HTTP_MAX_CONNECTIONS: int = Field(100, description="Maximum connections in each LLM client's pool")
+    LLM_HTTP_MAX_KEEPALIVE_CONNECTIONS: int = Field(20, description="Idle connections each LLM client keeps open")
+    LLM_HTTP_KEEPALIVE_EXPIRY_SECONDS: float = Field(90.0, description="How long an idle LLM connection is kept before it is closed")
+    LLM_HTTP_CONNECT_TIMEOUT_SECONDS: float = Field(5.0, description="Timeout for opening a connection to an LLM API")
+    LLM_HTTP_READ_TIMEOUT_SECONDS: float = Field(60.0, description="Timeout for reading an LLM API response")
+    LLM_HTTP_POOL_TIMEOUT_SECONDS: float = Field(10.0, description="How long a request waits for a free pooled connection")
+    LLM_HTTP2: bool = Field(True, description="Use HTTP/2 for LLM APIs when the h2 package is installed")
+    LLM_WARMUP_CONNECTIONS: int = Field(2, description="Connections opened to each LLM API at startup")
+    LLM_KEEPALIVE_PING_SECONDS: float = Field(45.0, description="Re-warm an LLM client's connections after this much idle time (0 disables)")
+    
+    # Startup, readiness and shutdown settings
+    READINESS_CACHE_SECONDS: float = Field(2.0, description="How long /api/ready reuses its dependency checks")
+    READINESS_CHECK_TIMEOUT_SECONDS: float = Field(1.0, description="Timeout of each readiness dependency check")
+    SHUTDOWN_READINESS_DELAY_SECONDS: float = Field(
+        5.0,
+        description="After SIGTERM, how long /api/ready answers 503 while requests are still served, so load balancers stop routing first (0 where the platform stops routing before SIGTERM, e.g. Cloud Run)"
+    )
+    SHUTDOWN_DRAIN_SECONDS: float = Field(20.0, description="After the readiness delay, how long in-flight requests get to finish before the server stops")
+    WORKER_METRICS_INTERVAL_SECONDS: float = Field(10.0, description="How often each server worker publishes its stats to Redis")
+    EVENT_LOOP_LAG_INTERVAL_SECONDS: float = Field(0.5, description="How often each worker measures event loop lag (0 disables it)")
+    
+    # Request deadline settings
+    GENERATE_DEADLINE_SECONDS: float = Field(25.0, description="Time budget of one /api/generate request across all its upstream calls (0 disables it)")
+    DEADLINE_FOLLOWUP_MIN_SECONDS: float = Field(4.0, description="Budget needed to attempt the follow-up completion after tool calls; with less, tool results are answered directly")
+    DEADLINE_GEMINI_MIN_SECONDS: float = Field(3.0, description="Budget Gemini needs beyond DEADLINE_FOLLOWUP_MIN_SECONDS; with less, retrieved providers are listed without it")
+    
+    # Token usage and cost accounting settings
+    ADMIN_API_KEY: Optional[str] = Field(None, description="Key for the /api/admin endpoints, sent in the admin key header (API_KEY is checked when unset; without either the endpoints answer 403)")
+    ADMIN_API_KEY_HEADER: str = Field("X-Admin-Key", description="Header name for the admin API key")
+    METRICS_TOKEN: Optional[str] = Field(None, description="Bearer token the Prometheus scraper sends to /metrics (the admin key is checked when unset)")
+    USAGE_CONVERSATION_TTL_SECONDS: int = Field(30 * 86400, description="How long per-conversation usage counters are kept after the last call")
+    USAGE_RETENTION_DAYS: int = Field(90, description="How long daily usage counters are kept")
+    LLM_PRICES_PER_MILLION: Dict[str, Dict[str, float]] = Field(
+        {
+            "gpt-4.1-mini": {"input": 0.40, "cached_input": 0.10, "output": 1.60},
+            "gpt-4.1": {"input": 2.00, "cached_input": 0.50, "output": 8.00},
+            "gemini-2.0-flash": {"input": 0.10, "cached_input": 0.025, "output": 0.40}
+        },
+        description="USD per million input, cached input and output tokens, by model name prefix"
+    )
+    
     # Gemini API settings
     GEMINI_API_MODEL_NAME: str = Field("gemini-2.0-flash", description="Default Gemini model to use")
+    GEMINI_PROMPT_MAX_PROVIDERS: int = Field(10, description="Maximum number of retrieved provider records injected into the Gemini prompt")
+    GEMINI_BASE_URL: Optional[str] = Field(None, description="Gemini API base URL, e.g. http://localhost:8090 for benchmarks.upstream_stub (generativelanguage.googleapis.com when unset)")
     
+    # .env was already loaded into os.environ above, so it is not parsed a second time here
     model_config = SettingsConfigDict(
-        env_file=".env",
-        env_file_encoding="utf-8",
         case_sensitive=True,
         extra="ignore"
     )
@@ -101,15 +189,15 @@ class Settings(BaseSettings):
 # Create settings instance with error handling
 try:
     settings = Settings()
-    print(f"Settings loaded successfully. Using model: {settings.OPENAI_MODEL}")
-    print(f"Development mode: {'Enabled' if settings.DEVELOPMENT_MODE else 'Disabled'}")
+    logger.info(f"Settings loaded successfully. Using model: {settings.OPENAI_MODEL}")
+    logger.info(f"Development mode: {'Enabled' if settings.DEVELOPMENT_MODE else 'Disabled'}")
 except Exception as e:
-    print(f"Error loading settings: {e}")
+    logger.critical(f"Error loading settings: {e}")
     sys.exit(1)
 
 # Validate required settings
 if not settings.OPENAI_API_KEY:
-    logging.warning("OPENAI_API_KEY is not set. OpenAI API calls will fail.")
+    logger.warning("OPENAI_API_KEY is not set. OpenAI API calls will fail.")
 
 if not settings.PINECONE_API_KEY:
-    logging.warning("PINECONE_API_KEY is not set. Pinecone vector searches will fail.") 
\ No newline at end of file
+    logger.warning("PINECONE_API_KEY is not set. Pinecone vector searches will fail.") 
\ No newline at end of file
@@ -0,0 +1,219 @@
+"""
+Canonical vocabulary for normalising get_service_info tool arguments.
+
+Every entry has a stable canonical ID, the display name used in the provider
+catalogue, and aliases covering common English variants, old city names and
+Hindi written in Latin script. Aliases are matched after lowercasing and
+collapsing whitespace; misspellings are handled by the trigram index in
+app/utils/normalizer.py, so they do not need to be listed here.
+
+Cities and localities also carry approximate centre coordinates, used to
+geocode providers and requests that only name a place.
+"""
+
+# Cities: id -> display name, centre coordinates (latitude, longitude) and aliases
+CITIES = {
+    "mumbai": {"name": "Mumbai", "coordinates": (19.076, 72.8777), "aliases": ["bombay", "bambai", "mumbai city", "navi mumbai"]},
+    "delhi": {"name": "Delhi", "coordinates": (28.6139, 77.209), "aliases": ["new delhi", "dilli", "delhi ncr", "ncr"]},
+    "bengaluru": {"name": "Bengaluru", "coordinates": (12.9716, 77.5946), "aliases": ["bangalore", "banglore", "bengalooru"]},
+    "hyderabad": {"name": "Hyderabad", "coordinates": (17.385, 78.4867), "aliases": ["hyd", "secunderabad"]},
+    "chennai": {"name": "Chennai", "coordinates": (13.0827, 80.2707), "aliases": ["madras"]},
+    "kolkata": {"name": "Kolkata", "coordinates": (22.5726, 88.3639), "aliases": ["calcutta", "kolkatta"]},
+    "pune": {"name": "Pune", "coordinates": (18.5204, 73.8567), "aliases": ["poona"]},
+    "ahmedabad": {"name": "Ahmedabad", "coordinates": (23.0225, 72.5714), "aliases": ["amdavad", "ahmadabad"]},
+    "jaipur": {"name": "Jaipur", "coordinates": (26.9124, 75.7873), "aliases": ["pink city"]},
+    "lucknow": {"name": "Lucknow", "coordinates": (26.8467, 80.9462), "aliases": ["lakhnau"]},
+    "indore": {"name": "Indore", "coordinates": (22.7196, 75.8577), "aliases": []},
+    "nagpur": {"name": "Nagpur", "coordinates": (21.1458, 79.0882), "aliases": []},
+    "new york": {"name": "New York", "coordinates": (40.7128, -74.006), "aliases": ["nyc", "new york city", "manhattan"]},
+    "los angeles": {"name": "Los Angeles", "coordinates": (34.0522, -118.2437), "aliases": ["la", "l.a."]},
+    "chicago": {"name": "Chicago", "coordinates": (41.8781, -87.6298), "aliases": []},
+    "san francisco": {"name": "San Francisco", "coordinates": (37.7749, -122.4194), "aliases": ["sf", "san fran"]},
+}
+
+# Localities: id -> display name, centre coordinates, parent city id and aliases
+LOCALITIES = {
+    "andheri": {"name": "Andheri", "coordinates": (19.1197, 72.8468), "city": "mumbai", "aliases": ["andheri east", "andheri west"]},
+    "bandra": {"name": "Bandra", "coordinates": (19.0596, 72.8295), "city": "mumbai", "aliases": ["bandra west", "bandra east", "bkc", "bandra kurla complex"]},
+    "powai": {"name": "Powai", "coordinates": (19.1176, 72.906), "city": "mumbai", "aliases": []},
+    "juhu": {"name": "Juhu", "coordinates": (19.1075, 72.8263), "city": "mumbai", "aliases": []},
+    "dadar": {"name": "Dadar", "coordinates": (19.0178, 72.8478), "city": "mumbai", "aliases": []},
+    "borivali": {"name": "Borivali", "coordinates": (19.2307, 72.8567), "city": "mumbai", "aliases": ["borivli"]},
+    "colaba": {"name": "Colaba", "coordinates": (18.9067, 72.8147), "city": "mumbai", "aliases": []},
+    "connaught place": {"name": "Connaught Place", "coordinates": (28.6315, 77.2167), "city": "delhi", "aliases": ["cp", "rajiv chowk"]},
+    "saket": {"name": "Saket", "coordinates": (28.5245, 77.2066), "city": "delhi", "aliases": []},
+    "dwarka": {"name": "Dwarka", "coordinates": (28.5921, 77.046), "city": "delhi", "aliases": []},
+    "karol bagh": {"name": "Karol Bagh", "coordinates": (28.6519, 77.1909), "city": "delhi", "aliases": []},
+    "lajpat nagar": {"name": "Lajpat Nagar", "coordinates": (28.5677, 77.2433), "city": "delhi", "aliases": []},
+    "rohini": {"name": "Rohini", "coordinates": (28.7495, 77.0565), "city": "delhi", "aliases": []},
+    "koramangala": {"name": "Koramangala", "coordinates": (12.9352, 77.6245), "city": "bengaluru", "aliases": []},
+    "indiranagar": {"name": "Indiranagar", "coordinates": (12.9784, 77.6408), "city": "bengaluru", "aliases": ["indira nagar"]},
+    "whitefield": {"name": "Whitefield", "coordinates": (12.9698, 77.75), "city": "bengaluru", "aliases": []},
+    "jayanagar": {"name": "Jayanagar", "coordinates": (12.925, 77.5938), "city": "bengaluru", "aliases": []},
+    "hsr layout": {"name": "HSR Layout", "coordinates": (12.9121, 77.6446), "city": "bengaluru", "aliases": ["hsr"]},
+    "electronic city": {"name": "Electronic City", "coordinates": (12.8452, 77.6602), "city": "bengaluru", "aliases": []},
+    "banjara hills": {"name": "Banjara Hills", "coordinates": (17.4156, 78.4347), "city": "hyderabad", "aliases": []},
+    "jubilee hills": {"name": "Jubilee Hills", "coordinates": (17.4326, 78.4071), "city": "hyderabad", "aliases": []},
+    "gachibowli": {"name": "Gachibowli", "coordinates": (17.4401, 78.3489), "city": "hyderabad", "aliases": []},
+    "hitech city": {"name": "HITEC City", "coordinates": (17.4435, 78.3772), "city": "hyderabad", "aliases": ["hitec city", "madhapur"]},
+    "t nagar": {"name": "T. Nagar", "coordinates": (13.0418, 80.2341), "city": "chennai", "aliases": ["t. nagar", "thyagaraya nagar"]},
+    "adyar": {"name": "Adyar", "coordinates": (13.0012, 80.2565), "city": "chennai", "aliases": []},
+    "anna nagar": {"name": "Anna Nagar", "coordinates": (13.085, 80.2101), "city": "chennai", "aliases": []},
+    "velachery": {"name": "Velachery", "coordinates": (12.9815, 80.218), "city": "chennai", "aliases": []},
+    "salt lake": {"name": "Salt Lake", "coordinates": (22.5867, 88.4171), "city": "kolkata", "aliases": ["bidhannagar", "salt lake city"]},
+    "park street": {"name": "Park Street", "coordinates": (22.553, 88.352), "city": "kolkata", "aliases": []},
+    "kothrud": {"name": "Kothrud", "coordinates": (18.5074, 73.8077), "city": "pune", "aliases": []},
+    "hinjewadi": {"name": "Hinjewadi", "coordinates": (18.5913, 73.7389), "city": "pune", "aliases": ["hinjawadi"]},
+    "koregaon park": {"name": "Koregaon Park", "coordinates": (18.5362, 73.894), "city": "pune", "aliases": ["kp"]},
+    "baner": {"name": "Baner", "coordinates": (18.559, 73.7868), "city": "pune", "aliases": []},
+    "viman nagar": {"name": "Viman Nagar", "coordinates": (18.5679, 73.9143), "city": "pune", "aliases": []},
+}
+
+# Specialties: id -> catalogue name and aliases (English variants and Hindi in Latin script)
+SPECIALTIES = {
+    "cardiologist": {"name": "Cardiologist", "aliases": [
+        "cardiology", "cardiac", "heart", "heart doctor", "heart specialist", "dil", "dil ka doctor", "hriday rog"
+    ]},
+    "pediatrician": {"name": "Pediatrician", "aliases": [
+        "pediatrics", "paediatrician", "paediatrics", "child specialist", "children doctor", "kids doctor",
+        "baccho ka doctor", "bachchon ka doctor", "bal rog", "shishu rog"
+    ]},
+    "dermatologist": {"name": "Dermatologist", "aliases": [
+        "dermatology", "skin", "skin doctor", "skin specialist", "twacha", "twacha rog", "chamdi"
+    ]},
+    "neurologist": {"name": "Neurologist", "aliases": [
+        "neurology", "nerve specialist", "brain doctor", "dimag ka doctor", "nas rog"
+    ]},
+    "orthopedist": {"name": "Orthopedist", "aliases": [
+        "orthopedic", "orthopaedic", "orthopedics", "ortho", "bone doctor", "bone specialist", "haddi ka doctor", "haddi"
+    ]},
+    "gynecologist": {"name": "Gynecologist", "aliases": [
+        "gynaecologist", "gynecology", "gynaecology", "gyno", "gynae", "gynac", "obgyn", "women doctor",
+        "stri rog", "mahila doctor"
+    ]},
+    "ent specialist": {"name": "ENT Specialist", "aliases": [
+        "ent", "ear nose throat", "otolaryngologist", "kaan naak gala"
+    ]},
+    "ophthalmologist": {"name": "Ophthalmologist", "aliases": [
+        "ophthalmology", "eye doctor", "eye specialist", "aankh ka doctor", "aankh", "netra rog"
+    ]},
+    "psychiatrist": {"name": "Psychiatrist", "aliases": [
+        "psychiatry", "mental health", "mental health doctor", "manasik rog", "man ka doctor"
+    ]},
+    "dentist": {"name": "Dentist", "aliases": [
+        "dental", "teeth doctor", "tooth doctor", "daant ka doctor", "daant", "dant chikitsak"
+    ]},
+    "general physician": {"name": "General Physician", "aliases": [
+        "gp", "physician", "general doctor", "family doctor", "general practitioner", "sadharan doctor"
+    ]},
+    "gastroenterologist": {"name": "Gastroenterologist", "aliases": [
+        "gastroenterology", "gastro", "stomach doctor", "stomach specialist", "pet ka doctor", "pet rog"
+    ]},
+    "pulmonologist": {"name": "Pulmonologist", "aliases": [
+        "pulmonology", "lung specialist", "chest specialist", "chest physician", "fefde ka doctor", "saans rog"
+    ]},
+    "urologist": {"name": "Urologist", "aliases": [
+        "urology", "urine specialist", "peshab rog"
+    ]},
+    "endocrinologist": {"name": "Endocrinologist", "aliases": [
+        "endocrinology", "diabetes doctor", "diabetologist", "thyroid specialist", "hormone specialist", "sugar ka doctor"
+    ]},
+    "nephrologist": {"name": "Nephrologist", "aliases": [
+        "nephrology", "kidney doctor", "kidney specialist", "gurde ka doctor"
+    ]},
+    "oncologist": {"name": "Oncologist", "aliases": [
+        "oncology", "cancer doctor", "cancer specialist"
+    ]},
+    "rheumatologist": {"name": "Rheumatologist", "aliases": [
+        "rheumatology", "arthritis doctor", "joint pain specialist", "gathiya rog"
+    ]},
+}
+
+# Symptom phrases (English and Hindi in Latin script) -> specialty id
+SYMPTOM_SPECIALTIES = {
+    "chest pain": "cardiologist",
+    "palpitations": "cardiologist",
+    "high blood pressure": "cardiologist",
+    "bp": "cardiologist",
+    "seene mein dard": "cardiologist",
+    "dil ki dhadkan": "cardiologist",
+    "fever in child": "pediatrician",
+    "baby fever": "pediatrician",
+    "vaccination": "pediatrician",
+    "rash": "dermatologist",
+    "skin rash": "dermatologist",
+    "acne": "dermatologist",
+    "pimples": "dermatologist",
+    "itching": "dermatologist",
+    "eczema": "dermatologist",
+    "hair fall": "dermatologist",
+    "khujli": "dermatologist",
+    "daane": "dermatologist",
+    "headache": "neurologist",
+    "migraine": "neurologist",
+    "seizure": "neurologist",
+    "numbness": "neurologist",
+    "sar dard": "neurologist",
+    "chakkar": "neurologist",
+    "back pain": "orthopedist",
+    "knee pain": "orthopedist",
+    "fracture": "orthopedist",
+    "sprain": "orthopedist",
+    "kamar dard": "orthopedist",
+    "ghutne ka dard": "orthopedist",
+    "pregnancy": "gynecologist",
+    "irregular periods": "gynecologist",
+    "period pain": "gynecologist",
+    "ear pain": "ent specialist",
+    "sore throat": "ent specialist",
+    "blocked nose": "ent specialist",
+    "hearing loss": "ent specialist",
+    "kaan dard": "ent specialist",
+    "gale mein dard": "ent specialist",
+    "blurred vision": "ophthalmologist",
+    "red eye": "ophthalmologist",
+    "eye pain": "ophthalmologist",
+    "aankh mein dard": "ophthalmologist",
+    "anxiety": "psychiatrist",
+    "depression": "psychiatrist",
+    "insomnia": "psychiatrist",
+    "stress": "psychiatrist",
+    "neend nahi aati": "psychiatrist",
+    "toothache": "dentist",
+    "tooth pain": "dentist",
+    "bleeding gums": "dentist",
+    "daant dard": "dentist",
+    "fever": "general physician",
+    "cold": "general physician",
+    "cough": "general physician",
+    "body ache": "general physician",
+    "bukhar": "general physician",
+    "khansi": "general physician",
+    "zukam": "general physician",
+    "stomach pain": "gastroenterologist",
+    "acidity": "gastroenterologist",
+    "diarrhea": "gastroenterologist",
+    "constipation": "gastroenterologist",
+    "vomiting": "gastroenterologist",
+    "pet dard": "gastroenterologist",
+    "breathlessness": "pulmonologist",
+    "shortness of breath": "pulmonologist",
+    "asthma": "pulmonologist",
+    "wheezing": "pulmonologist",
+    "saans phoolna": "pulmonologist",
+    "burning urination": "urologist",
+    "kidney stone": "urologist",
+    "peshab mein jalan": "urologist",
+    "diabetes": "endocrinologist",
+    "thyroid": "endocrinologist",
+    "high sugar": "endocrinologist",
+    "sugar": "endocrinologist",
+    "kidney failure": "nephrologist",
+    "dialysis": "nephrologist",
+    "swelling in feet": "nephrologist",
+    "lump": "oncologist",
+    "tumor": "oncologist",
+    "joint pain": "rheumatologist",
+    "arthritis": "rheumatologist",
+    "jodon ka dard": "rheumatologist",
+}
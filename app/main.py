@@ -1,35 +1,42 @@
 import logging
-import time
 import os
-from fastapi import FastAPI, Request, Depends
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Depends
+from fastapi.responses import JSONResponse, PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
-from slowapi import Limiter, _rate_limit_exceeded_handler
-from slowapi.util import get_remote_address
-from slowapi.errors import RateLimitExceeded
+from starlette.datastructures import Headers, MutableHeaders
 
 from app.config.settings import settings
-from app.routers import generate_router, doctor_router
+from app.routers import generate_router, doctor_router, admin_router
+from app.routers.admin import verify_metrics_token
+from app.services.confirmation_outbox import confirmation_outbox
+from app.services.lifecycle import DRAINING, lifecycle
+from app.services.llm_transport import llm_transport
+from app.services.provider_cache import provider_result_cache
+from app.services.rate_limiter import rate_limiter
+from app.services.usage_tracker import usage_tracker
+from app.services.worker_metrics import worker_metrics
+from app.utils import redis_profiler, request_timing
 from app.utils.error_handlers import register_exception_handlers
-from app.config.prompts import DEFAULT_SYSTEM_PROMPT
-import datetime
-now = datetime.datetime.now()
-current_date = now.strftime("%d-%m-%Y")
-current_time = now.strftime("%H:%M")
-current_day = now.strftime("%A")
+from app.utils.metrics import metrics
 
 # Configure logging
 logging.basicConfig(level=getattr(logging, settings.LOG_LEVEL))
 logger = logging.getLogger(__name__)
 
-
-# Create rate limiter
-limiter = Limiter(key_func=get_remote_address)
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Connect and warm every dependency before serving, and drain before releasing them."""
+    await lifecycle.startup()
+    yield
+    await lifecycle.shutdown()
 
 # Create FastAPI app
 app = FastAPI(
     title="Nivaran AI API",
     description=__doc__,
     version="0.1.0",
+    lifespan=lifespan,
     docs_url="/docs" if os.environ.get("ENVIRONMENT") != "production" else None,
     redoc_url="/redoc" if os.environ.get("ENVIRONMENT") != "production" else None
 )
@@ -46,26 +53,72 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Add rate limiting middleware
-app.state.limiter = limiter
-app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
-
-# Add optimized request timing middleware
-@app.middleware("http")
-async def add_process_time_header(request: Request, call_next):
-    # Skip timing for non-API routes to reduce overhead
-    if not request.url.path.startswith("/api/"):
-        return await call_next(request)
-        
-    # Time the request processing
-    start_time = time.time()
-    response = await call_next(request)
-    process_time = time.time() - start_time
-    
-    # Only add timing header for API routes
-    response.headers["X-Process-Time"] = str(process_time)
-    
-    return response
+# Request metrics, exported at /metrics
+http_requests = metrics.counter("http_requests_total", "API requests, by method, route and status", ("method", "route", "status"))
+http_request_duration = metrics.histogram(
+    "http_request_duration_seconds", "API request latency until the response is sent, by method and route", ("method", "route")
+)
+
+# Request timing middleware (pure ASGI, so responses are not re-streamed through a task)
+class RequestTimingMiddleware:
+    """Time API requests, track them for the drain, and report spans as Server-Timing."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        # Skip timing for non-API routes to reduce overhead
+        if scope["type"] != "http" or not scope["path"].startswith("/api/"):
+            await self.app(scope, receive, send)
+            return
+
+        # While draining, requests are still served, but keep-alive clients are sent to reconnect elsewhere
+        draining = lifecycle.state == DRAINING
+
+        token = request_timing.begin_request()
+        timing = request_timing.current()
+        # Command traces carry keys, so they are only recorded in development
+        trace = settings.DEVELOPMENT_MODE and (settings.REDIS_TRACE or Headers(scope=scope).get("x-redis-trace") == "1")
+        redis_token = redis_profiler.begin_request(trace)
+        redis_profile = redis_profiler.current()
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                nonlocal status
+                status = str(message["status"])
+                total_ms = timing.elapsed_ms()
+                headers = MutableHeaders(scope=message)
+                headers["X-Process-Time"] = str(total_ms / 1000)
+                headers["Server-Timing"] = timing.server_timing(total_ms)
+                if settings.REDIS_PROFILE_HEADERS:
+                    headers["X-Redis-Round-Trips"] = str(redis_profile.round_trips)
+                    headers["X-Redis-Commands"] = str(redis_profile.commands)
+                if draining:
+                    headers["Connection"] = "close"
+            await send(message)
+
+        status = "500"
+        lifecycle.request_started()
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            lifecycle.request_finished()
+            request_timing.end_request(token)
+            # The router stores the matched route in the scope; label by its template, not the raw path
+            route = getattr(scope.get("route"), "path", "unmatched")
+            redis_profiler.end_request(redis_token, route, f"{scope['method']} {scope['path']} -> {status}")
+            http_requests.inc(scope["method"], route, status)
+            http_request_duration.observe(timing.elapsed_ms() / 1000, scope["method"], route)
+
+app.add_middleware(RequestTimingMiddleware)
+
+# Per-worker stats, aggregated across workers in /api/health/workers
+worker_metrics.register("startup_ms", lambda: dict(lifecycle.startup_ms))
+worker_metrics.register("provider_cache", provider_result_cache.stats)
+worker_metrics.register("confirmation_outbox", confirmation_outbox.stats)
+worker_metrics.register("llm_transport", llm_transport.stats)
+worker_metrics.register("rate_limiter", rate_limiter.stats)
+worker_metrics.register("usage_tracker", usage_tracker.stats)
 
 # Add health check endpoint
 @app.get("/api/health", tags=["Health"])
@@ -73,12 +126,48 @@ async def health_check():
     """Health check endpoint"""
     return {
         "status": "healthy",
-        "version": "1.0.0"
+        "version": "1.0.0",
+        "state": lifecycle.state
     }
 
+# Add cross-worker metrics endpoint
+@app.get("/api/health/workers", tags=["Health"])
+async def worker_health_check(authenticated: bool = Depends(verify_metrics_token)):
+    """Stats of every live server worker, with their counters summed"""
+    try:
+        return await worker_metrics.collect()
+    except Exception as e:
+        logger.error(f"Failed to collect worker metrics: {str(e)}")
+        return JSONResponse({"detail": "Worker metrics are unavailable"}, status_code=503)
+
+# Add Prometheus metrics endpoint
+@app.get("/metrics", include_in_schema=False)
+async def prometheus_metrics(authenticated: bool = Depends(verify_metrics_token)):
+    """Metrics of every server worker in the Prometheus text format, including those that stopped"""
+    try:
+        workers = await worker_metrics.live_snapshots()
+        body = metrics.render(
+            {worker_id: snapshot.get("metrics", {}) for worker_id, snapshot in workers.items()},
+            stats=worker_metrics.totals(workers),
+            retired=await worker_metrics.retired_metrics()
+        )
+    except Exception as e:
+        # Without Redis, report this worker alone rather than nothing
+        logger.warning(f"Serving metrics of this worker only: {str(e)}")
+        body = metrics.render({worker_metrics.worker_id: metrics.snapshot()}, stats=worker_metrics.local_stats())
+    return PlainTextResponse(body, media_type="text/plain; version=0.0.4")
+
+# Add readiness endpoint
+@app.get("/api/ready", tags=["Health"])
+async def readiness_check():
+    """Readiness probe: 200 once startup finished and dependencies answer, 503 otherwise"""
+    ready, report = await lifecycle.readiness()
+    return JSONResponse(report, status_code=200 if ready else 503)
+
 # Include routers
 app.include_router(generate_router)
 app.include_router(doctor_router)
+app.include_router(admin_router)
 
 if __name__ == "__main__":
     import uvicorn
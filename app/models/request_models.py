@@ -1,4 +1,4 @@
-from typing import Optional
+from typing import List, Optional
 from pydantic import BaseModel, Field, ConfigDict
 
 class GenerateRequest(BaseModel):
@@ -17,4 +17,18 @@ class GenerateRequest(BaseModel):
                 "previous_response_id": None
             }
         }
-    ) 
\ No newline at end of file
+    ) 
+
+class BulkAvailabilityRequest(BaseModel):
+    """Request model for resolving availability of many providers at once"""
+    provider_ids: List[str] = Field(..., description="Provider IDs to look up", min_length=1, max_length=500)
+    day_of_week: Optional[str] = Field(None, description="Optional specific day to query (e.g., \"Monday\")")
+    
+    model_config = ConfigDict(
+        json_schema_extra={
+            "example": {
+                "provider_ids": ["prov-001", "prov-003"],
+                "day_of_week": "Monday"
+            }
+        }
+    )
@@ -1,3 +1,4 @@
 # Routers package initialization
 from app.routers.generate import router as generate_router
-from app.routers.doctor import router as doctor_router 
\ No newline at end of file
+from app.routers.doctor import router as doctor_router
+from app.routers.admin import router as admin_router
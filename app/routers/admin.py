@@ -0,0 +1,115 @@
+import hmac
+import logging
+from typing import Any, Dict
+from fastapi import APIRouter, Depends, Query, Request, status
+
+from app.config.settings import settings
+from app.routers.generate import verify_api_key
+from app.services.usage_tracker import usage_tracker
+from app.utils.error_handlers import APIError
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Create router
+router = APIRouter(
+    prefix="/api/admin",
+    tags=["admin"],
+    responses={404: {"description": "Not found"}},
+)
+
+# Admin key authentication dependency
+async def verify_admin_key(request: Request):
+    """Verify the admin key; without ADMIN_API_KEY the regular API key check applies, and without either access is denied"""
+    admin_key = settings.ADMIN_API_KEY
+
+    if not admin_key:
+        if not settings.API_KEY:
+            # Usage data must not be open just because no key was configured
+            raise APIError(
+                status_code=status.HTTP_403_FORBIDDEN,
+                message="Admin endpoints are disabled; set ADMIN_API_KEY or API_KEY"
+            )
+        return await verify_api_key(request)
+
+    request_admin_key = request.headers.get(settings.ADMIN_API_KEY_HEADER)
+    if not request_admin_key:
+        raise APIError(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            message="Admin key is required"
+        )
+
+    if request_admin_key != admin_key:
+        raise APIError(
+            status_code=status.HTTP_403_FORBIDDEN,
+            message="Invalid admin key"
+        )
+
+    return True
+
+# Metrics scraper authentication dependency
+async def verify_metrics_token(request: Request):
+    """Verify the bearer token sent to /metrics; without METRICS_TOKEN the admin key check applies"""
+    token = settings.METRICS_TOKEN
+
+    if not token:
+        return await verify_admin_key(request)
+
+    scheme, _, request_token = request.headers.get("Authorization", "").partition(" ")
+    if scheme.lower() != "bearer" or not request_token:
+        raise APIError(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            message="Metrics token is required"
+        )
+
+    if not hmac.compare_digest(request_token.encode(), token.encode()):
+        raise APIError(
+            status_code=status.HTTP_403_FORBIDDEN,
+            message="Invalid metrics token"
+        )
+
+    return True
+
+@router.get("/usage/conversations/{conversation_id}", response_model=Dict[str, Any])
+async def get_conversation_usage(
+    conversation_id: str,
+    authenticated: bool = Depends(verify_admin_key)
+) -> Dict[str, Any]:
+    """Token usage, latency and estimated cost of one conversation's LLM calls
+
+    Args:
+        conversation_id: The conversation to report on
+
+    Returns:
+        Totals and a breakdown by call (openai, openai_followup, gemini) and model
+    """
+    try:
+        return await usage_tracker.conversation_usage(conversation_id)
+    except Exception as e:
+        logger.error(f"Error reading usage of conversation {conversation_id}: {str(e)}")
+        raise APIError(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            message="Usage data is unavailable"
+        )
+
+@router.get("/usage/daily", response_model=Dict[str, Any])
+async def get_daily_usage(
+    days: int = Query(7, ge=1, le=366, description="Number of UTC days to report, ending today"),
+    authenticated: bool = Depends(verify_admin_key)
+) -> Dict[str, Any]:
+    """Token usage, latency and estimated cost of all LLM calls per UTC day, newest first
+
+    Args:
+        days: Number of days to report, ending today
+
+    Returns:
+        One entry per day with totals and a breakdown by call and model
+    """
+    try:
+        return {"days": await usage_tracker.daily_usage(days)}
+    except Exception as e:
+        logger.error(f"Error reading daily usage: {str(e)}")
+        raise APIError(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            message="Usage data is unavailable"
+        )
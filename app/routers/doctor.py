@@ -1,10 +1,15 @@
 import logging
-from fastapi import APIRouter, Depends, HTTPException
+from datetime import datetime
+from email.utils import format_datetime, parsedate_to_datetime
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from fastapi.responses import JSONResponse
 from typing import Dict, Any, Optional
 
-# Vector store functionality has been removed
-# from app.utils.vector_store import vector_store
+from app.models.request_models import BulkAvailabilityRequest
 from app.routers.generate import verify_api_key
+from app.services.provider_store import provider_store
+from app.utils.availability import parse_day
+from app.utils.error_handlers import APIError
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -19,36 +24,126 @@ router = APIRouter(
     }
 )
 
+def _validate_day(day_of_week: Optional[str]) -> None:
+    """Reject unknown day names with a 400 error"""
+    if day_of_week:
+        try:
+            parse_day(day_of_week)
+        except ValueError:
+            raise APIError(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                message=f"Invalid day_of_week: {day_of_week}"
+            )
+
+def _not_modified(request: Request, etag: str, last_modified: datetime) -> bool:
+    """Evaluate If-None-Match / If-Modified-Since against the current catalogue version"""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        candidates = [tag.strip() for tag in if_none_match.split(",")]
+        return "*" in candidates or etag in candidates or f"W/{etag}" in candidates
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since:
+        try:
+            return last_modified <= parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+
+    return False
+
 @router.get("/availability/{provider_id}", response_model=Dict[str, Any])
 async def get_doctor_availability(
     provider_id: str,
+    request: Request,
     day_of_week: Optional[str] = None,
     authenticated: bool = Depends(verify_api_key)
-) -> Dict[str, Any]:
+) -> Response:
     """
     Get doctor availability information by provider_id.
-    
+
+    Supports conditional requests: the response carries ETag and Last-Modified
+    headers derived from the provider catalogue version, and a matching
+    If-None-Match or If-Modified-Since yields 304 Not Modified.
+
     Args:
         provider_id: The provider ID of the doctor
         day_of_week: Optional specific day to query (e.g., "Monday", "Tuesday")
-        
+
     Returns:
         Doctor information with availability details
     """
     try:
         logger.info(f"Doctor availability endpoint called for provider_id: {provider_id}, day: {day_of_week or 'all days'}")
-        logger.warning("Vector store functionality has been removed. Doctor availability data is no longer available.")
-        
-        # Return a message indicating functionality is no longer available
-        return {
-            "status": "info",
-            "message": "Doctor availability functionality has been removed. Please contact healthcare providers directly for availability information."
+        _validate_day(day_of_week)
+
+        provider = provider_store.availability_view(provider_id, day_of_week)
+        if provider is None:
+            raise APIError(
+                status_code=status.HTTP_404_NOT_FOUND,
+                message=f"Provider {provider_id} not found"
+            )
+
+        etag = f'"{provider_store.version}"'
+        headers = {
+            "ETag": etag,
+            "Last-Modified": format_datetime(provider_store.last_modified, usegmt=True),
+            "Cache-Control": "no-cache"
         }
-            
+
+        if _not_modified(request, etag, provider_store.last_modified):
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+        return JSONResponse(
+            content={"status": "success", "provider": provider},
+            headers=headers
+        )
+
+    except APIError:
+        raise
     except Exception as e:
         # Log error
         logger.error(f"Error in doctor availability endpoint: {str(e)}")
         raise HTTPException(
             status_code=500,
             detail=f"An error occurred while retrieving doctor availability: {str(e)}"
-        ) 
\ No newline at end of file
+        )
+
+@router.post("/availability", response_model=Dict[str, Any])
+async def get_bulk_doctor_availability(
+    request_data: BulkAvailabilityRequest,
+    authenticated: bool = Depends(verify_api_key)
+) -> Dict[str, Any]:
+    """
+    Get availability for many providers in one call.
+
+    Args:
+        request_data: Provider IDs to resolve and an optional day filter
+
+    Returns:
+        Availability keyed by provider_id, plus the IDs that were not found
+    """
+    try:
+        logger.info(f"Bulk doctor availability endpoint called for {len(request_data.provider_ids)} providers")
+        _validate_day(request_data.day_of_week)
+
+        found, missing = provider_store.get_many(request_data.provider_ids)
+
+        return {
+            "status": "success",
+            "version": provider_store.version,
+            "providers": {
+                provider_id: provider_store.availability_view(provider_id, request_data.day_of_week)
+                for provider_id in found
+            },
+            "not_found": missing
+        }
+
+    except APIError:
+        raise
+    except Exception as e:
+        # Log error
+        logger.error(f"Error in bulk doctor availability endpoint: {str(e)}")
+        raise HTTPException(
+            status_code=500,
+            detail=f"An error occurred while retrieving doctor availability: {str(e)}"
+        )
@@ -1,6 +1,6 @@
 import logging
 from typing import Any, Dict, Optional
-from fastapi import APIRouter, Depends, Request, status
+from fastapi import APIRouter, Depends, Request, Response, status
 from fastapi.responses import JSONResponse
 from pydantic import BaseModel, Field
 
@@ -8,6 +8,8 @@ from app.config.settings import settings
 from app.models.request_models import GenerateRequest
 from app.models.response_models import StructuredResponse
 from app.services.ai_service import ai_service
+from app.services.rate_limiter import rate_limiter
+from app.utils import deadline, request_timing
 from app.utils.error_handlers import APIError
 
 # Configure logging
@@ -41,10 +43,65 @@ async def verify_api_key(request: Request):
     
     return True
 
+def client_address(request: Request) -> Optional[str]:
+    """
+    Address of the client, as seen by the outermost trusted proxy.
+
+    Clients can send any X-Forwarded-For they like; each proxy appends the
+    address it received the request from, so only the last TRUSTED_PROXY_HOPS
+    entries can be trusted, and the first of those is the client.
+    """
+    hops = [hop.strip() for hop in request.headers.get("X-Forwarded-For", "").split(",") if hop.strip()]
+    if settings.TRUSTED_PROXY_HOPS > 0 and hops:
+        return hops[-min(settings.TRUSTED_PROXY_HOPS, len(hops))]
+    return request.client.host if request.client else None
+
+# Rate limiting dependency, per API key and end user, and per API key overall
+async def enforce_rate_limit(request: Request, response: Response):
+    """Apply RATE_LIMIT_PER_MINUTE per API key and user_id, and RATE_LIMIT_PER_CALLER_PER_MINUTE per API key"""
+    user_id = None
+    if request.method == "POST":
+        try:
+            # The body is cached on the request, so the endpoint does not read it again
+            body = await request.json()
+            if isinstance(body, dict) and isinstance(body.get("user_id"), str):
+                user_id = body["user_id"]
+        except ValueError:
+            pass
+    
+    # Only a key that verify_api_key accepts names the caller; without API_KEY any value passes, so key on the address
+    api_key = request.headers.get(settings.API_KEY_HEADER)
+    if not settings.API_KEY or api_key != settings.API_KEY:
+        api_key = None
+    address = client_address(request)
+    client_key = rate_limiter.client_key(api_key, user_id, address)
+    caller_key = rate_limiter.caller_key(api_key, address)
+    decision = await rate_limiter.check(client_key)
+    if decision.allowed and caller_key != client_key and settings.RATE_LIMIT_PER_CALLER_PER_MINUTE > 0:
+        # user_id comes from the body, so a caller could otherwise send a new one with every request
+        caller = await rate_limiter.check(caller_key, settings.RATE_LIMIT_PER_CALLER_PER_MINUTE)
+        if not caller.allowed or caller.remaining < decision.remaining:
+            decision = caller
+    headers = {
+        "X-RateLimit-Limit": str(decision.limit),
+        "X-RateLimit-Remaining": str(decision.remaining)
+    }
+    if not decision.allowed:
+        retry_after = max(int(decision.retry_after + 0.999), 1)
+        raise APIError(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            message="Rate limit exceeded",
+            details={"retry_after_seconds": retry_after},
+            headers={**headers, "Retry-After": str(retry_after)}
+        )
+    response.headers.update(headers)
+
 @router.post("/generate", response_model=None)
 async def generate(
     request_data: GenerateRequest,
-    authenticated: bool = Depends(verify_api_key)
+    response: Response,
+    authenticated: bool = Depends(verify_api_key),
+    rate_limited: None = Depends(enforce_rate_limit)
 ) -> StructuredResponse:
     """Generate AI responses from user input
     
@@ -61,16 +118,19 @@ async def generate(
     try:
         logger.info(f"Generate endpoint called for user {request_data.user_id}")
         
-        # Call the AI service to generate a structured response
-        structured_response = await ai_service.generate_response(
-            prompt=request_data.text,
-            conversation_id=request_data.conversation_id,
-            user_id=request_data.user_id,
-            previous_response_id=request_data.previous_response_id
-        )
+        # Call the AI service to generate a structured response within the request's time budget
+        with deadline.scope(settings.GENERATE_DEADLINE_SECONDS):
+            structured_response = await ai_service.generate_response(
+                prompt=request_data.text,
+                conversation_id=request_data.conversation_id,
+                user_id=request_data.user_id,
+                previous_response_id=request_data.previous_response_id
+            )
         
-        # Return the structured response directly
-        return structured_response
+        # Serialise here rather than in FastAPI so the time shows up as its own span;
+        # headers set by dependencies (rate limit) are carried over
+        with request_timing.span("serialize"):
+            return JSONResponse(structured_response.model_dump(mode="json"), headers=dict(response.headers))
             
     except Exception as e:
         # Log error
@@ -80,7 +140,8 @@ async def generate(
 @router.delete("/conversations/{conversation_id}", response_model=Dict[str, Any])
 async def clear_conversation(
     conversation_id: str,
-    authenticated: bool = Depends(verify_api_key)
+    authenticated: bool = Depends(verify_api_key),
+    rate_limited: None = Depends(enforce_rate_limit)
 ) -> Dict[str, Any]:
     """Clear the conversation history for a given conversation ID
     
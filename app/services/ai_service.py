@@ -9,23 +9,31 @@ import json
 import uuid
 import asyncio
 import datetime
-import aiohttp
-from typing import Dict, Any, List, Optional
-from openai import AsyncOpenAI
-from openai import APIError, RateLimitError, APIConnectionError, AuthenticationError
+import threading
+import time
+from typing import Dict, Any, List, Optional, Tuple
 
 from app.config.settings import settings
 from app.config.prompts import DEFAULT_SYSTEM_PROMPT
 from app.models.response_models import StructuredResponse, TextResponse, TextContent
-from app.services.memory_service import MemoryService
+from app.services.memory_service import memory_service
+from app.services.confirmation_outbox import confirmation_outbox
 from app.services.gemini_service import gemini_service
+from app.services.llm_transport import llm_transport
+from app.services.provider_cache import provider_result_cache
+from app.services.provider_search import provider_search
+from app.services.provider_store import provider_store
+from app.services.slot_reservations import HELD, INVALID, TAKEN, UNAVAILABLE, slot_reservations
+from app.services.usage_tracker import usage_tracker
+from app.utils.geo import parse_coordinates
+from app.utils import deadline, request_timing
+from app.utils.metrics import metrics
+from app.utils.normalizer import query_normalizer
+from app.utils.prompt_template import PromptTemplate, datetime_values
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
-# Initialize memory service
-memory_service = MemoryService()
-
 # Constants for message roles
 ROLE_SYSTEM = "system"
 ROLE_USER = "user"
@@ -42,19 +50,53 @@ TYPE_FUNCTION = "function"
 # Constants for function names
 FUNCTION_GET_SERVICE_INFO = "get_service_info"
 FUNCTION_GET_CONFIRMATION = "get_confirmation"
+FUNCTION_HOLD_SLOT = "hold_appointment_slot"
+
+# Answer when the request deadline runs out before any result is available
+DEADLINE_MESSAGE = "This is taking longer than usual. Please try again in a moment."
+
+# Tool calls requested by the model, by function name
+tool_call_counter = metrics.counter("tool_calls_total", "Tool calls requested by the model, by function", ("function",))
+
+# Tool results for slot reservation outcomes
+SLOT_HOLD_RESULTS = {
+    HELD: {
+        "success": True,
+        "status": "held",
+        "message": f"The slot is reserved for {settings.SLOT_HOLD_TTL_SECONDS // 60:.0f} minutes while the booking is completed"
+    },
+    TAKEN: {
+        "success": False,
+        "error": "slot_taken",
+        "message": "This slot has just been booked by someone else. Please choose another time."
+    },
+    INVALID: {
+        "success": False,
+        "error": "invalid_slot",
+        "message": "The selected slot is not valid or not within the doctor's availability."
+    },
+    UNAVAILABLE: {
+        "success": True,
+        "status": "not_reserved",
+        "message": "The slot could not be reserved right now, but the booking can continue"
+    }
+}
+
+def _openai_errors() -> Tuple[type, ...]:
+    """OpenAI exception types; only evaluated once a call has failed, so the SDK is already imported."""
+    from openai import APIConnectionError, APIError, AuthenticationError, RateLimitError
+    return APIError, RateLimitError, APIConnectionError, AuthenticationError
 
 class AIService:
     def __init__(self):
+        self._system_prompt: Optional[PromptTemplate] = None
         self.openai_api_key = os.environ.get("OPENAI_API_KEY", settings.OPENAI_API_KEY)
         if not self.openai_api_key:
             logger.error("OPENAI_API_KEY not found. AIService may not function correctly.")
-            self.client = None
-        else:
-            try:
-                self.client = AsyncOpenAI(api_key=self.openai_api_key)
-            except Exception as e:
-                logger.error(f"Failed to initialize OpenAI client: {e}")
-                self.client = None
+        # The OpenAI SDK is slow to import, so the client is created on first use
+        self._client = None
+        self._client_failed = False
+        self._client_lock = threading.Lock()
         
         # Define tools for function calling
         self.tools = [
@@ -81,12 +123,53 @@ class AIService:
                             "symptoms": {
                                 "type": "string",
                                 "description": "Symptoms the user is experiencing"
+                            },
+                            "latitude": {
+                                "type": "number",
+                                "description": "User's latitude, only if the user has shared their exact location"
+                            },
+                            "longitude": {
+                                "type": "number",
+                                "description": "User's longitude, only if the user has shared their exact location"
+                            },
+                            "radius_km": {
+                                "type": "number",
+                                "description": "Maximum distance in km, if the user asked for doctors within a distance"
+                            },
+                            "available_now": {
+                                "type": "boolean",
+                                "description": "True if the user needs a doctor who is available right now"
                             }
                         },
                         "required": ["query"]
                     }
                 }
             },
+            {
+                "type": TYPE_FUNCTION,
+                "function": {
+                    "name": FUNCTION_HOLD_SLOT,
+                    "description": "Reserve the appointment slot the user selected while their details are collected. Call it as soon as the user picks a time slot.",
+                    "parameters": {
+                        "type": "object",
+                        "properties": {
+                            "doctor_id": {
+                                "type": "string",
+                                "description": "ID of the selected doctor"
+                            },
+                            "appointment_date": {
+                                "type": "string",
+                                "description": "Date of the appointment (YYYY-MM-DD)"
+                            },
+                            "appointment_time": {
+                                "type": "string",
+                                "description": "Time of the appointment (HH:MM)"
+                            }
+                        },
+                        "required": ["doctor_id", "appointment_date", "appointment_time"]
+                    }
+                }
+            },
             {
                 "type": TYPE_FUNCTION,
                 "function": {
@@ -237,7 +320,7 @@ class AIService:
         if self.client is None:
             logger.error("OpenAI client is not initialized. Cannot generate response.")
             # Ensure conversation_id is generated if None, for the error response
-            effective_conversation_id = conversation_id or memory_service.generate_conversation_id(user_id)
+            effective_conversation_id = conversation_id or await memory_service.generate_conversation_id(user_id)
             return TextResponse(
                 response_id=response_id,
                 conversation_id=effective_conversation_id,
@@ -249,7 +332,7 @@ class AIService:
             # Handle conversation ID and user association
             if conversation_id is None:
                 # No conversation ID provided, create a new one
-                conversation_id = memory_service.generate_conversation_id(user_id)
+                conversation_id = await memory_service.generate_conversation_id(user_id)
                 logger.info(f"Created new conversation with ID: {conversation_id}")
             elif user_id is not None:
                 # Both conversation_id and user_id provided - check if this is a new conversation for this user
@@ -278,14 +361,17 @@ class AIService:
             
             # Generate response from OpenAI with function calling
             try:
-                response = await self.client.chat.completions.create(
-                    model=settings.OPENAI_MODEL,
-                    messages=messages,
-                    temperature=settings.TEMPERATURE,
-                    response_format={"type": "json_object"},
-                    tools=self.tools,
-                    tool_choice="auto"
-                )
+                started = time.perf_counter()
+                with request_timing.span("openai"):
+                    response = await deadline.run("openai", self.client.chat.completions.create(
+                        model=settings.OPENAI_MODEL,
+                        messages=messages,
+                        temperature=settings.TEMPERATURE,
+                        response_format={"type": "json_object"},
+                        tools=self.tools,
+                        tool_choice="auto"
+                    ))
+                usage_tracker.record_openai("openai", response, (time.perf_counter() - started) * 1000, conversation_id)
                 
                 # Log response structure only in development mode
                 if settings.DEVELOPMENT_MODE:
@@ -372,6 +458,11 @@ class AIService:
                     
                     # Generate a second response that includes the function results
                     try:
+                        if not deadline.has_budget(settings.DEADLINE_FOLLOWUP_MIN_SECONDS):
+                            # Too little time left for another completion; answer from the tool results
+                            deadline.degrade("followup_skipped")
+                            raise deadline.DeadlineExceeded("openai_followup")
+                        
                         # Add a reminder about JSON schema for the second response
                         reminder_message = {
                             "role": ROLE_SYSTEM,
@@ -379,15 +470,23 @@ class AIService:
                         }
                         updated_messages.append(reminder_message)
                         
-                        second_response = await self.client.chat.completions.create(
-                            model=settings.OPENAI_MODEL,
-                            messages=updated_messages,
-                            temperature=settings.TEMPERATURE,
-                            response_format={"type": "json_object"}
+                        started = time.perf_counter()
+                        with request_timing.span("openai_followup"):
+                            second_response = await deadline.run("openai_followup", self.client.chat.completions.create(
+                                model=settings.OPENAI_MODEL,
+                                messages=updated_messages,
+                                temperature=settings.TEMPERATURE,
+                                response_format={"type": "json_object"}
+                            ))
+                        usage_tracker.record_openai(
+                            "openai_followup", second_response, (time.perf_counter() - started) * 1000, conversation_id
                         )
                         
                         # Extract the content from the second response
                         content = self._extract_json_content_from_response(second_response)
+                    except deadline.DeadlineExceeded:
+                        logger.warning(f"Answering conversation {conversation_id} from tool results to meet the request deadline")
+                        content = self._content_from_tool_results(tool_call_results)
                     except Exception as second_call_error:
                         logger.error(f"Error in second API call after tool response: {str(second_call_error)}", exc_info=True)
                         # Fallback response when the tool call flow breaks
@@ -451,7 +550,9 @@ class AIService:
                 # Return the structured response
                 return structured_response
                 
-            except (APIError, RateLimitError, APIConnectionError, AuthenticationError) as api_error:
+            except _openai_errors() as api_error:
+                from openai import APIConnectionError, AuthenticationError, RateLimitError
+                
                 # Handle different types of OpenAI errors with appropriate messages
                 error_message = "I'm sorry, I encountered an error processing your request."
                 
@@ -475,18 +576,144 @@ class AIService:
                     content=TextContent(text=error_message)
                 )
                 
+        except deadline.DeadlineExceeded as e:
+            logger.warning(f"Generate request ran out of time: {str(e)}")
+            return TextResponse(
+                response_id=response_id,
+                conversation_id=conversation_id or await memory_service.generate_conversation_id(user_id),
+                previous_response_id=previous_response_id,
+                content=TextContent(text=DEADLINE_MESSAGE)
+            )
         except Exception as e:
             logger.error(f"Error generating response: {str(e)}", exc_info=True)
             # Create a fallback text response
             return TextResponse(
                 response_id=response_id,
-                conversation_id=conversation_id or memory_service.generate_conversation_id(user_id),
+                conversation_id=conversation_id or await memory_service.generate_conversation_id(user_id),
                 previous_response_id=previous_response_id,
                 content=TextContent(
                     text="I'm sorry, I encountered an error processing your request. Please try again."
                 )
             )
     
+    async def _lookup_service_info(
+        self,
+        query: str,
+        specialty: str,
+        location: str,
+        symptoms: str,
+        coordinates: Optional[Tuple[float, float]],
+        nearest: bool,
+        radius_km: Optional[float],
+        available_now: bool,
+        conversation_id: Optional[str] = None
+    ) -> Tuple[Dict[str, Any], bool]:
+        """
+        Find providers for a get_service_info call and have Gemini format the answer.
+        
+        Args:
+            query: Raw query text
+            specialty: Canonical (or raw, if unrecognised) specialty
+            location: Canonical (or raw, if unrecognised) location
+            symptoms: Symptoms described by the user
+            coordinates: Optional (latitude, longitude) to rank or filter by distance
+            nearest: Rank purely by distance from coordinates
+            radius_km: Optional maximum distance from coordinates
+            available_now: Only return providers available at the current time
+            conversation_id: Conversation the Gemini call's usage is recorded for
+            
+        Returns:
+            Tuple of (result with service_info and providers, whether the result may be cached)
+        """
+        cacheable = True
+        
+        # Find matching providers in the local catalogue; they are also the only
+        # providers Gemini sees, so retrieve enough for both uses
+        prompt_providers = None
+        try:
+            matches = provider_search.search(
+                query=query,
+                specialty=specialty,
+                location=location,
+                symptoms=symptoms,
+                k=max(settings.PROVIDER_SEARCH_TOP_K, settings.GEMINI_PROMPT_MAX_PROVIDERS),
+                coordinates=coordinates,
+                nearest=nearest,
+                radius_km=radius_km,
+                available_now=available_now
+            )
+            providers = matches[:settings.PROVIDER_SEARCH_TOP_K]
+            # Gemini needs each provider's schedule, which search results leave out
+            prompt_providers = [
+                {**(provider_store.get(match["provider_id"]) or {}), **match}
+                for match in matches[:settings.GEMINI_PROMPT_MAX_PROVIDERS]
+            ]
+        except Exception as search_error:
+            # Without retrieval, Gemini falls back to the full provider data prompt
+            logger.error(f"Provider search error for {FUNCTION_GET_SERVICE_INFO}: {str(search_error)}", exc_info=True)
+            providers = []
+            cacheable = False
+
+        # Ensure we have a valid query
+        if not query:
+            query = "information about doctors"
+        
+        # Build a comprehensive prompt for Gemini using joined parts for cleaner construction
+        gemini_prompt_parts = ["I need information about"]
+        
+        if specialty:
+            gemini_prompt_parts.append(f"{specialty} doctors")
+        else:
+            gemini_prompt_parts.append("doctors")
+        
+        if location:
+            gemini_prompt_parts.append(f"in {location}")
+        
+        if symptoms:
+            gemini_prompt_parts.append(f"for treating {symptoms}")
+        
+        # Add the main query at the end
+        gemini_prompt_parts.append(f". {query}")
+        
+        # Join all parts with spaces
+        gemini_prompt = " ".join(gemini_prompt_parts)
+        
+        # Log the constructed prompt
+        logger.info(f"Constructed Gemini prompt: {gemini_prompt[:500]}...")
+        
+        # Without time for both Gemini and the follow-up completion, list the retrieved providers directly
+        if not deadline.has_budget(settings.DEADLINE_GEMINI_MIN_SECONDS + settings.DEADLINE_FOLLOWUP_MIN_SECONDS):
+            deadline.degrade("providers_without_gemini")
+            return {"service_info": self._summarise_providers(providers), "providers": providers}, False
+        
+        # Get service info from Gemini
+        try:
+            gemini_response = await gemini_service.get_service_info(gemini_prompt, prompt_providers, conversation_id)
+            
+            # Handle structured response from Gemini service
+            if not gemini_response["success"] and gemini_response.get("error") == "deadline_exceeded":
+                deadline.degrade("providers_without_gemini")
+                service_info = self._summarise_providers(providers)
+                cacheable = False
+            elif gemini_response["success"]:
+                service_info = gemini_response["data"]
+                
+                # Ensure service_info is a string
+                if not isinstance(service_info, str):
+                    logger.warning(f"Gemini service_info is not a string: {type(service_info)}. Attempting to convert to string.")
+                    service_info = str(service_info)
+            else:
+                # Use the error message from the structured response
+                logger.warning(f"Received error from Gemini service: {gemini_response['error']}")
+                service_info = gemini_response["message"]
+                cacheable = False
+        except Exception as gemini_error:
+            logger.error(f"Gemini service error for {FUNCTION_GET_SERVICE_INFO}: {str(gemini_error)}", exc_info=True)
+            service_info = "I'm sorry, I encountered a technical issue retrieving healthcare information. Please try again."
+            cacheable = False
+        
+        return {"service_info": service_info, "providers": providers}, cacheable
+
     async def _handle_tool_call(self, function_call, user_id: Optional[str] = None, conversation_id: Optional[str] = None) -> str:
         """
         Handle a single function call from the OpenAI response.
@@ -500,6 +727,9 @@ class AIService:
             Result from the function call as a JSON string
         """
         result = {}
+        # Names come from the model; keep unknown ones out of the label values
+        known = function_call.name in (FUNCTION_GET_SERVICE_INFO, FUNCTION_GET_CONFIRMATION, FUNCTION_HOLD_SLOT)
+        tool_call_counter.inc(function_call.name if known else "unknown")
         
         try:
             if function_call.name == FUNCTION_GET_SERVICE_INFO:
@@ -527,61 +757,72 @@ class AIService:
                 specialty = args.get("specialty", "").strip()
                 symptoms = args.get("symptoms", "").strip()
                 
-                # Ensure we have a valid query
-                if not query:
-                    query = "information about doctors"
-                
-                # Build a comprehensive prompt for Gemini using joined parts for cleaner construction
-                gemini_prompt_parts = ["I need information about"]
-                
-                if specialty:
-                    gemini_prompt_parts.append(f"{specialty} doctors")
-                else:
-                    gemini_prompt_parts.append("doctors")
-                
-                if location:
-                    gemini_prompt_parts.append(f"in {location}")
-                
-                if symptoms:
-                    gemini_prompt_parts.append(f"for treating {symptoms}")
-                
-                # Add the main query at the end
-                gemini_prompt_parts.append(f". {query}")
+                # Map free-text arguments (misspellings, Hindi in Latin script) onto canonical names
+                normalised = query_normalizer.normalise(query, location, specialty, symptoms)
+                canonical_specialty = normalised.specialty or specialty
+                canonical_location = normalised.location or location
+                logger.info(f"Normalised tool arguments: {normalised.as_dict()}")
                 
-                # Join all parts with spaces
-                gemini_prompt = " ".join(gemini_prompt_parts)
-                
-                # Log the constructed prompt
-                logger.info(f"Constructed Gemini prompt: {gemini_prompt[:500]}...")
-                
-                # Get service info from Gemini
+                # Prefer the user's shared coordinates over the centre of the place they named
+                explicit_coordinates = parse_coordinates(args)
+                coordinates = explicit_coordinates or normalised.coordinates
                 try:
-                    gemini_response = await gemini_service.get_service_info(gemini_prompt)
-                    
-                    # Handle structured response from Gemini service
-                    if gemini_response["success"]:
-                        service_info = gemini_response["data"]
-                        
-                        # Ensure service_info is a string
-                        if not isinstance(service_info, str):
-                            logger.warning(f"Gemini service_info is not a string: {type(service_info)}. Attempting to convert to string.")
-                            service_info = str(service_info)
-                    else:
-                        # Use the error message from the structured response
-                        logger.warning(f"Received error from Gemini service: {gemini_response['error']}")
-                        service_info = gemini_response["message"]
-                except Exception as gemini_error:
-                    logger.error(f"Gemini service error for {function_call.name}: {str(gemini_error)}", exc_info=True)
-                    service_info = "I'm sorry, I encountered a technical issue retrieving healthcare information. Please try again."
-                
+                    radius_km = float(args["radius_km"]) if args.get("radius_km") else None
+                except (TypeError, ValueError):
+                    radius_km = None
+                available_now = bool(args.get("available_now"))
+
+                if not provider_search.ready:
+                    # Loading or building the search indexes takes seconds on a large catalogue
+                    await asyncio.to_thread(provider_search.ensure_index)
+
+                # Identical lookups in the same availability slot share one result across all users
+                cache_key, cache_ttl = provider_result_cache.key(
+                    normalised, query, symptoms, specialty, location, explicit_coordinates, radius_km, available_now
+                )
+                lookup = await provider_result_cache.get(cache_key)
+                if lookup is None:
+                    lookup, cacheable = await self._lookup_service_info(
+                        query, canonical_specialty, canonical_location, symptoms,
+                        coordinates, normalised.nearest, radius_km, available_now, conversation_id
+                    )
+                    if cacheable:
+                        await provider_result_cache.set(cache_key, lookup, cache_ttl)
+                else:
+                    logger.info(f"Provider result cache hit for {normalised.as_dict()}")
+
                 # Store result
                 result = {
-                    "service_info": service_info,
+                    **lookup,
+                    "normalised": normalised.as_dict(),
                     "location": location,
                     "specialty": specialty,
                     "symptoms": symptoms,
-                    "query": query
+                    "query": query or "information about doctors"
                 }
+            elif function_call.name == FUNCTION_HOLD_SLOT:
+                try:
+                    args = json.loads(function_call.arguments) if isinstance(function_call.arguments, str) else function_call.arguments
+                except json.JSONDecodeError as e:
+                    logger.error(f"Failed to parse slot hold arguments: {str(e)}")
+                    return json.dumps({
+                        "success": False,
+                        "error": "invalid_arguments",
+                        "message": "Failed to parse the selected appointment slot."
+                    })
+
+                holder = conversation_id or user_id
+                if not holder:
+                    return json.dumps({
+                        "success": False,
+                        "error": "missing_fields",
+                        "message": "A conversation is required to reserve an appointment slot."
+                    })
+
+                status = await slot_reservations.hold(
+                    str(args.get("doctor_id") or ""), args.get("appointment_date", ""), args.get("appointment_time", ""), holder
+                )
+                result = SLOT_HOLD_RESULTS[status]
             elif function_call.name == FUNCTION_GET_CONFIRMATION:
                 # Parse arguments
                 try:
@@ -614,64 +855,80 @@ class AIService:
                         "message": "Missing required fields in appointment confirmation request."
                     })
 
-                try:
-                    # Prepare the request payload
-                    payload = {
-                        "user_id": api_user_id,
-                        "conversation_id": api_conversation_id,
-                        "patient_details": patient_details,
-                        "appointment_details": appointment_details
-                    }
+                # Book the slot held for this conversation before anyone else can
+                slot = (
+                    str(appointment_details.get("doctor_id") or ""),
+                    appointment_details.get("appointment_date", ""),
+                    appointment_details.get("appointment_time", "")
+                )
+                booking = await slot_reservations.confirm(*slot, api_conversation_id)
+                if booking in (TAKEN, INVALID):
+                    return json.dumps(SLOT_HOLD_RESULTS[booking])
+                if booking == UNAVAILABLE:
+                    logger.warning("Slot reservations unavailable, confirming without a reservation")
 
-                    # Log the payload for debugging
-                    if settings.DEVELOPMENT_MODE:
-                        logger.info(f"Sending confirmation payload: {json.dumps(payload)}")
+                # Prepare the request payload
+                payload = {
+                    "user_id": api_user_id,
+                    "conversation_id": api_conversation_id,
+                    "patient_details": patient_details,
+                    "appointment_details": appointment_details
+                }
 
-                    # Make the POST request to the confirmation endpoint
-                    async with aiohttp.ClientSession() as session:
-                        async with session.post(
-                            "https://admin.n8n.healthnivaran.in/webhook/appointment/confirmation",
-                            json=payload,
-                            headers={"Content-Type": "application/json"}
-                        ) as response:
-                            response_text = await response.text()
-                            
-                            # Try to parse as JSON first
-                            try:
-                                response_data = json.loads(response_text)
-                            except json.JSONDecodeError:
-                                # If not JSON, use the text response
-                                response_data = {"message": response_text}
+                # Log the payload for debugging
+                if settings.DEVELOPMENT_MODE:
+                    logger.info(f"Queueing confirmation payload: {json.dumps(payload)}")
 
-                            if response.status == 200:
-                                return json.dumps({
-                                    "success": True,
-                                    "message": "Appointment confirmed successfully",
-                                    "data": response_data
-                                })
-                            else:
-                                logger.error(f"Confirmation API error: Status {response.status}, Response: {response_text}")
-                                return json.dumps({
-                                    "success": False,
-                                    "error": "api_error",
-                                    "message": f"Failed to confirm appointment. Status: {response.status}"
-                                })
+                # Queue the confirmation; the outbox worker delivers it to the webhook with retries
+                confirmation_id = await confirmation_outbox.enqueue(payload)
+                if confirmation_id:
+                    return json.dumps({
+                        "success": True,
+                        "status": "queued",
+                        "confirmation_id": confirmation_id,
+                        "message": "Appointment confirmation received and is being processed"
+                    })
 
-                except aiohttp.ClientError as e:
-                    logger.error(f"Network error during confirmation request: {str(e)}")
+                # Without the outbox, deliver directly so the confirmation is not lost
+                try:
+                    delivered, status, response_data = await deadline.run("webhook", confirmation_outbox.deliver_inline(payload))
+                except deadline.DeadlineExceeded:
+                    await slot_reservations.release(*slot, api_conversation_id)
                     return json.dumps({
                         "success": False,
-                        "error": "network_error",
-                        "message": "Failed to connect to confirmation service. Please try again."
+                        "error": "timeout",
+                        "message": "The confirmation service did not answer in time. Please try again."
                     })
                 except Exception as e:
                     logger.error(f"Unexpected error during confirmation: {str(e)}")
+                    await slot_reservations.release(*slot, api_conversation_id)
                     return json.dumps({
                         "success": False,
                         "error": "unexpected_error",
                         "message": "An unexpected error occurred during appointment confirmation."
                     })
 
+                if delivered:
+                    return json.dumps({
+                        "success": True,
+                        "message": "Appointment confirmed successfully",
+                        "data": response_data
+                    })
+                # The appointment was not confirmed, so free the slot for others
+                await slot_reservations.release(*slot, api_conversation_id)
+                if status == 0:
+                    return json.dumps({
+                        "success": False,
+                        "error": "network_error",
+                        "message": "Failed to connect to confirmation service. Please try again."
+                    })
+                logger.error(f"Confirmation API error: Status {status}, Response: {response_data}")
+                return json.dumps({
+                    "success": False,
+                    "error": "api_error",
+                    "message": f"Failed to confirm appointment. Status: {status}"
+                })
+
             else:
                 # Handle unknown function calls
                 logger.warning(f"Unknown function call encountered: {function_call.name}")
@@ -684,6 +941,30 @@ class AIService:
     
         return json.dumps(result)
     
+    def _summarise_providers(self, providers: List[Dict[str, Any]]) -> str:
+        """Plain list of retrieved providers, used instead of Gemini's answer when time is short."""
+        if not providers:
+            return "No matching providers were found."
+        lines = ["Matching providers:"]
+        for provider in providers:
+            details = [provider.get(field) for field in ("specialty", "hospital", "location") if provider.get(field)]
+            if provider.get("distance_km") is not None:
+                details.append(f"{provider['distance_km']} km away")
+            lines.append(f"- {provider.get('name', 'Unknown provider')}" + (f" ({', '.join(details)})" if details else ""))
+        return "\n".join(lines)
+
+    def _content_from_tool_results(self, tool_call_results: List[Dict[str, Any]]) -> str:
+        """Text response built from tool results, used when there is no time for the follow-up completion."""
+        texts = []
+        for result in tool_call_results:
+            try:
+                data = json.loads(result["result"])
+            except (TypeError, ValueError):
+                continue
+            if isinstance(data, dict) and (data.get("service_info") or data.get("message")):
+                texts.append(str(data.get("service_info") or data.get("message")))
+        return json.dumps({"type": TYPE_TEXT, "content": {"text": "\n\n".join(texts) or DEADLINE_MESSAGE}})
+
     def _needs_doctor_info(self, prompt: str, conversation_history: List[Dict[str, Any]]) -> bool:
         """
         Determine if doctor information is needed based on the prompt and conversation history.
@@ -712,6 +993,30 @@ class AIService:
             
         return False
         
+    @property
+    def client(self):
+        """OpenAI client, created (and the SDK imported) on first use; None if it cannot be created."""
+        if self._client is None and self.openai_api_key and not self._client_failed:
+            with self._client_lock:
+                if self._client is None and not self._client_failed:
+                    try:
+                        from openai import AsyncOpenAI, DefaultAsyncHttpxClient
+                        base_url = (settings.OPENAI_BASE_URL or "https://api.openai.com/v1").rstrip("/")
+                        self._client = AsyncOpenAI(
+                            api_key=self.openai_api_key,
+                            base_url=base_url,
+                            http_client=llm_transport.create_client("openai", DefaultAsyncHttpxClient, f"{base_url}/models")
+                        )
+                    except Exception as e:
+                        logger.error(f"Failed to initialize OpenAI client: {e}")
+                        self._client_failed = True
+        return self._client
+    
+    def warm_up(self) -> None:
+        """Compile the system prompt template ahead of the first request."""
+        if self._system_prompt is None:
+            self._system_prompt = PromptTemplate(DEFAULT_SYSTEM_PROMPT)
+    
     def _prepare_messages(self, conversation_history: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """
         Prepare messages for the OpenAI API.
@@ -723,16 +1028,9 @@ class AIService:
             List of messages for the OpenAI API
         """
         
-        # Get current date and time information
-        now = datetime.datetime.now()
-        current_date = now.strftime("%d-%m-%Y")
-        current_time = now.strftime("%H:%M")
-        current_day = now.strftime("%A")
-        
-        # Replace placeholders in the system prompt
-        system_prompt = DEFAULT_SYSTEM_PROMPT.replace("{current_date}", current_date)
-        system_prompt = system_prompt.replace("{current_time}", current_time)
-        system_prompt = system_prompt.replace("{current_day}", current_day)
+        # Fill the current date and time into the precompiled system prompt
+        self.warm_up()
+        system_prompt = self._system_prompt.render(**datetime_values(datetime.datetime.now()))
         
         messages = [{"role": ROLE_SYSTEM, "content": system_prompt}]
         
@@ -0,0 +1,285 @@
+"""
+Durable outbox for appointment confirmations.
+
+get_confirmation appends the confirmation to a Redis stream and returns
+immediately. A background worker in every API process reads the stream via a
+consumer group and posts each entry to the confirmation webhook through the
+shared HTTP session. Failed deliveries stay pending and are reclaimed after
+CONFIRMATION_RETRY_SECONDS. After CONFIRMATION_MAX_ATTEMPTS attempts they are
+moved to a dead-letter stream and their slot reservation is released. Entries
+claimed by a crashed worker are picked up the same way. Dead letters carry
+patient details, so entries older than CONFIRMATION_DEAD_LETTER_RETENTION_DAYS
+are trimmed when one is added and hourly by the worker.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import socket
+import statistics
+import time
+from collections import deque
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.config.settings import settings
+from app.services.http_client import HTTPClient, http_client
+from app.services.memory_service import MemoryService, memory_service
+from app.services.slot_reservations import slot_reservations
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Consumer group shared by all API processes
+CONSUMER_GROUP = "confirmation-workers"
+# Entries read or reclaimed per round trip
+BATCH_SIZE = 10
+# How long a worker blocks waiting for new entries (ms)
+BLOCK_MS = 2000
+# Approximate cap on stream length, so delivered history does not grow unbounded
+STREAM_MAXLEN = 100000
+# How often a worker trims expired dead letters
+DEAD_LETTER_TRIM_SECONDS = 3600
+# Delivery latencies kept for percentiles
+LATENCY_SAMPLES = 1000
+
+
+class ConfirmationOutbox:
+    """Redis stream outbox plus the background worker that drains it."""
+
+    def __init__(self, memory: MemoryService, client: HTTPClient):
+        self.memory = memory
+        self.client = client
+        self.stream = settings.CONFIRMATION_OUTBOX_STREAM
+        self.dead_letter_stream = f"{self.stream}:dead"
+        # Named when the worker starts: with a preloaded app this object is created before the fork
+        self.consumer = ""
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = asyncio.Event()
+        self._group_ready = False
+        self._trimmed_at = 0.0
+
+        # Delivery metrics for this process
+        self.enqueued = 0
+        self.delivered = 0
+        self.failed_attempts = 0
+        self.retries = 0
+        self.dead_lettered = 0
+        self.inline_deliveries = 0
+        self._latencies: deque = deque(maxlen=LATENCY_SAMPLES)
+
+    async def _redis(self):
+        return await self.memory._setup_redis_connection()
+
+    async def _ensure_group(self, redis_client) -> None:
+        if self._group_ready:
+            return
+        try:
+            await redis_client.xgroup_create(self.stream, CONSUMER_GROUP, id="0", mkstream=True)
+        except Exception as e:
+            # BUSYGROUP: another process created it first
+            if "BUSYGROUP" not in str(e):
+                raise
+        self._group_ready = True
+
+    async def enqueue(self, payload: Dict[str, Any]) -> Optional[str]:
+        """
+        Append a confirmation to the outbox.
+
+        Args:
+            payload: JSON-serialisable webhook payload
+
+        Returns:
+            Stream entry ID, or None if Redis is unavailable
+        """
+        try:
+            redis_client = await self._redis()
+            await self._ensure_group(redis_client)
+            entry_id = await redis_client.xadd(
+                self.stream,
+                {"payload": json.dumps(payload), "enqueued_at": repr(time.time())},
+                maxlen=STREAM_MAXLEN,
+                approximate=True
+            )
+            self.enqueued += 1
+            return entry_id
+        except Exception as e:
+            logger.error(f"Failed to enqueue appointment confirmation: {str(e)}")
+            return None
+
+    async def deliver(self, payload: Dict[str, Any]) -> Tuple[bool, int, Any]:
+        """
+        Post a confirmation to the webhook.
+
+        Returns:
+            Tuple of (delivered, HTTP status or 0 on network error, parsed response body)
+        """
+        import aiohttp
+
+        session = await self.client.session()
+        try:
+            async with session.post(settings.CONFIRMATION_WEBHOOK_URL, json=payload) as response:
+                response_text = await response.text()
+                try:
+                    response_data = json.loads(response_text)
+                except json.JSONDecodeError:
+                    response_data = {"message": response_text}
+                return 200 <= response.status < 300, response.status, response_data
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            logger.warning(f"Network error posting appointment confirmation: {str(e)}")
+            return False, 0, {"message": str(e)}
+
+    async def deliver_inline(self, payload: Dict[str, Any]) -> Tuple[bool, int, Any]:
+        """Deliver without the outbox, used when Redis is unavailable."""
+        self.inline_deliveries += 1
+        start = time.time()
+        delivered, status, response_data = await self.deliver(payload)
+        if delivered:
+            self.delivered += 1
+            self._latencies.append(time.time() - start)
+        else:
+            self.failed_attempts += 1
+        return delivered, status, response_data
+
+    def _dead_letter_min_id(self) -> str:
+        """Oldest dead-letter entry ID to keep; stream IDs start with their time in ms."""
+        cutoff = time.time() - settings.CONFIRMATION_DEAD_LETTER_RETENTION_DAYS * 86400
+        return f"{int(cutoff * 1000)}-0"
+
+    async def _dead_letter(self, redis_client, fields: Dict[str, str]) -> None:
+        """Add an entry to the dead-letter stream, dropping those past the retention period."""
+        await redis_client.xadd(self.dead_letter_stream, fields, minid=self._dead_letter_min_id(), approximate=False)
+
+    async def _trim_dead_letters(self, redis_client) -> None:
+        """Drop expired dead letters, at most every DEAD_LETTER_TRIM_SECONDS; adding one also trims."""
+        if time.time() - self._trimmed_at < DEAD_LETTER_TRIM_SECONDS:
+            return
+        self._trimmed_at = time.time()
+        removed = await redis_client.xtrim(self.dead_letter_stream, minid=self._dead_letter_min_id(), approximate=False)
+        if removed:
+            logger.info(f"Removed {removed} expired entries from {self.dead_letter_stream}")
+
+    async def _process(self, redis_client, entry_id: str, fields: Dict[str, str], attempt: int) -> None:
+        """Deliver one stream entry and acknowledge, keep pending, or dead-letter it."""
+        try:
+            payload = json.loads(fields["payload"])
+        except (KeyError, json.JSONDecodeError):
+            logger.error(f"Dropping malformed confirmation outbox entry {entry_id}")
+            await self._dead_letter(redis_client, {**fields, "error": "malformed"})
+            await self._acknowledge(redis_client, entry_id)
+            return
+
+        delivered, status, _ = await self.deliver(payload)
+        if delivered:
+            self.delivered += 1
+            self._latencies.append(time.time() - float(fields.get("enqueued_at", time.time())))
+            await self._acknowledge(redis_client, entry_id)
+            logger.info(f"Delivered appointment confirmation {entry_id} on attempt {attempt}")
+            return
+
+        self.failed_attempts += 1
+        if attempt >= settings.CONFIRMATION_MAX_ATTEMPTS:
+            self.dead_lettered += 1
+            await self._dead_letter(redis_client, {**fields, "attempts": str(attempt), "last_status": str(status)})
+            await self._acknowledge(redis_client, entry_id)
+            logger.error(f"Appointment confirmation {entry_id} failed {attempt} times (last status {status}), moved to {self.dead_letter_stream}")
+            # The booking never reached the backend, so give the slot back
+            await slot_reservations.release_confirmation(payload)
+        else:
+            # Left pending; reclaimed for another attempt after the retry delay
+            logger.warning(f"Appointment confirmation {entry_id} attempt {attempt} failed with status {status}, will retry")
+
+    async def _acknowledge(self, redis_client, entry_id: str) -> None:
+        pipeline = redis_client.pipeline()
+        pipeline.xack(self.stream, CONSUMER_GROUP, entry_id)
+        pipeline.xdel(self.stream, entry_id)
+        await pipeline.execute()
+
+    async def _reclaim(self, redis_client) -> List[Tuple[str, Dict[str, str], int]]:
+        """Claim entries whose last attempt is older than the retry delay."""
+        claimed = await redis_client.xautoclaim(
+            self.stream, CONSUMER_GROUP, self.consumer,
+            min_idle_time=int(settings.CONFIRMATION_RETRY_SECONDS * 1000),
+            start_id="0-0", count=BATCH_SIZE
+        )
+        entries = [(entry_id, fields) for entry_id, fields in claimed[1] if fields]
+        if not entries:
+            return []
+        # XAUTOCLAIM counted this claim as a delivery, so times_delivered is this attempt's number
+        pending = await redis_client.xpending_range(
+            self.stream, CONSUMER_GROUP, min=entries[0][0], max=entries[-1][0], count=len(entries) * 2
+        )
+        attempts = {item["message_id"]: item["times_delivered"] for item in pending}
+        self.retries += len(entries)
+        return [(entry_id, fields, attempts.get(entry_id, 2)) for entry_id, fields in entries]
+
+    async def run(self) -> None:
+        """Drain the outbox until stop() is called."""
+        logger.info(f"Confirmation outbox worker {self.consumer} started on {self.stream}")
+        while not self._stopping.is_set():
+            try:
+                redis_client = await self._redis()
+                await self._ensure_group(redis_client)
+                await self._trim_dead_letters(redis_client)
+
+                for entry_id, fields, attempt in await self._reclaim(redis_client):
+                    await self._process(redis_client, entry_id, fields, attempt)
+
+                response = await redis_client.xreadgroup(
+                    CONSUMER_GROUP, self.consumer, {self.stream: ">"}, count=BATCH_SIZE, block=BLOCK_MS
+                )
+                for _, entries in response or []:
+                    for entry_id, fields in entries:
+                        await self._process(redis_client, entry_id, fields, 1)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self._group_ready = False
+                logger.error(f"Confirmation outbox worker error: {str(e)}")
+                try:
+                    await asyncio.wait_for(self._stopping.wait(), timeout=settings.CONFIRMATION_RETRY_SECONDS)
+                except asyncio.TimeoutError:
+                    pass
+        logger.info(f"Confirmation outbox worker {self.consumer} stopped")
+
+    def start(self) -> None:
+        """Start the background worker on the running event loop."""
+        if self._task is None or self._task.done():
+            self.consumer = f"{socket.gethostname()}-{os.getpid()}"
+            self._stopping = asyncio.Event()
+            self._task = asyncio.create_task(self.run())
+
+    async def stop(self, timeout: float = 5.0) -> None:
+        """Stop the worker, letting an in-flight delivery finish within timeout."""
+        if self._task is None:
+            return
+        self._stopping.set()
+        try:
+            await asyncio.wait_for(self._task, timeout=timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError):
+            self._task.cancel()
+        self._task = None
+
+    def stats(self) -> Dict[str, Any]:
+        """Delivery counters of this process and enqueue-to-delivery latency in ms."""
+        latencies = sorted(self._latencies)
+        latency = {}
+        if latencies:
+            latency = {
+                "mean": round(statistics.mean(latencies) * 1000, 1),
+                "p95": round(latencies[max(int(len(latencies) * 0.95) - 1, 0)] * 1000, 1),
+                "max": round(latencies[-1] * 1000, 1)
+            }
+        return {
+            "enqueued": self.enqueued,
+            "delivered": self.delivered,
+            "failed_attempts": self.failed_attempts,
+            "retries": self.retries,
+            "dead_lettered": self.dead_lettered,
+            "inline_deliveries": self.inline_deliveries,
+            "delivery_latency_ms": latency
+        }
+
+
+# Create singleton instance
+confirmation_outbox = ConfirmationOutbox(memory_service, http_client)
@@ -6,37 +6,72 @@ import logging
 import os
 import datetime
 import json
-from typing import Optional, Dict, Any
+import math
+import threading
+import time
+from typing import Optional, Dict, Any, List
 
-from google import genai
-from google.genai import types
-
-from app.config.gemini_prompts import DOCTOR_SERVICE_PROMPT
+from app.config.gemini_prompts import DOCTOR_SERVICE_PROMPT, DOCTOR_SERVICE_PROMPT_TEMPLATE
 from app.config.settings import settings
+from app.services.llm_transport import llm_transport
+from app.services.provider_store import provider_store
+from app.services.usage_tracker import usage_tracker
+from app.utils import deadline, request_timing
+from app.utils.prompt_template import DATETIME_FIELDS, PromptTemplate, datetime_values
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
+# Provider fields injected into the slim prompt
+PROMPT_PROVIDER_FIELDS = ("name", "specialty", "hospital", "location", "availability", "distance_km")
+# Rough characters per token for prompt size estimates (no tokenizer call on the hot path)
+CHARS_PER_TOKEN = 4
+
+def estimate_tokens(text: str) -> int:
+    """Estimate the number of tokens in a prompt from its length."""
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
 class GeminiService:
     """Service for retrieving doctor information using Google's Generative AI API."""
     
     def __init__(self):
         """Initialize Gemini service with API key and client."""
+        self._templates: Optional[Dict[str, PromptTemplate]] = None
+        
         # Get API key from environment variables
         self.api_key = os.environ.get("GEMINI_API_KEY")
         
         if not self.api_key:
             logger.error("GEMINI_API_KEY not found in environment variables. Gemini service will not function properly.")
-            self.client = None # Ensure client is set to None
-            return
-            
-        # Configure Gemini client with the API key
-        try:
-            self.client = genai.Client(api_key=self.api_key)
-            logger.info("Gemini API client configured successfully")
-        except Exception as e:
-            logger.error(f"Failed to initialize Gemini client: {str(e)}", exc_info=True)
-            self.client = None
+        
+        # The google-genai SDK is slow to import, so the client is created on first use
+        self._client = None
+        self._client_failed = False
+        self._client_lock = threading.Lock()
+    
+    @property
+    def client(self):
+        """Gemini client, created (and the SDK imported) on first use; None if it cannot be created."""
+        if self._client is None and self.api_key and not self._client_failed:
+            with self._client_lock:
+                if self._client is None and not self._client_failed:
+                    try:
+                        import httpx
+                        from google import genai
+                        from google.genai import types
+                        
+                        base_url = settings.GEMINI_BASE_URL or "https://generativelanguage.googleapis.com/"
+                        http_options = types.HttpOptions(
+                            base_url=base_url,
+                            timeout=int(settings.LLM_HTTP_READ_TIMEOUT_SECONDS * 1000),
+                            httpx_async_client=llm_transport.create_client("gemini", httpx.AsyncClient, base_url)
+                        )
+                        self._client = genai.Client(api_key=self.api_key, http_options=http_options)
+                        logger.info("Gemini API client configured successfully")
+                    except Exception as e:
+                        logger.error(f"Failed to initialize Gemini client: {str(e)}", exc_info=True)
+                        self._client_failed = True
+        return self._client
     
     def _clean_response_text(self, response_text: str) -> str:
         """
@@ -70,18 +105,75 @@ class GeminiService:
             # If not valid JSON, just return as plain text
             return response_text
     
-    async def get_service_info(self, prompt: str) -> Dict[str, Any]:
+    def warm_up(self) -> None:
+        """Compile the system prompt templates ahead of the first request."""
+        if self._templates is None:
+            self._templates = {
+                "full": PromptTemplate(DOCTOR_SERVICE_PROMPT),
+                "retrieved": PromptTemplate(DOCTOR_SERVICE_PROMPT_TEMPLATE, DATETIME_FIELDS + ("providers_data",))
+            }
+    
+    def _build_system_prompt(self, providers: Optional[List[Dict[str, Any]]], now: datetime.datetime) -> str:
+        """
+        Build the system prompt for a request.
+        
+        Args:
+            providers: Provider records retrieved for the request, best first, or None
+                to fall back to the full DOCTOR_SERVICE_PROMPT
+            now: Current date and time
+            
+        Returns:
+            System prompt text
+        """
+        self.warm_up()
+        values = datetime_values(now)
+        if providers is None:
+            system_prompt = self._templates["full"].render(**values)
+            logger.info(f"Gemini system prompt: ~{estimate_tokens(system_prompt)} tokens (full provider data)")
+            return system_prompt
+        
+        # Inject only the retrieved providers, capped, with the fields needed for the answer
+        records = [
+            {field: provider[field] for field in PROMPT_PROVIDER_FIELDS if provider.get(field) not in (None, "")}
+            for provider in providers[:settings.GEMINI_PROMPT_MAX_PROVIDERS]
+        ]
+        records_json = [json.dumps(record, ensure_ascii=False, separators=(",", ":")) for record in records]
+        template = self._templates["retrieved"]
+        system_prompt = template.render(providers_data="[" + ",".join(records_json) + "]", **values)
+        
+        # Compare against injecting the whole catalogue, extrapolated from the records actually sent
+        after_tokens = estimate_tokens(system_prompt)
+        if records_json:
+            per_record = sum(estimate_tokens(record) for record in records_json) / len(records_json)
+            before_tokens = math.ceil(template.static_length / CHARS_PER_TOKEN) + math.ceil(per_record * max(len(provider_store), len(records)))
+        else:
+            before_tokens = after_tokens
+        logger.info(
+            f"Gemini system prompt: ~{after_tokens} tokens with {len(records)} of {len(providers)} retrieved providers "
+            f"(full catalogue of {len(provider_store)} providers: ~{before_tokens} tokens)"
+        )
+        return system_prompt
+    
+    async def get_service_info(
+        self,
+        prompt: str,
+        providers: Optional[List[Dict[str, Any]]] = None,
+        conversation_id: Optional[str] = None
+    ) -> Dict[str, Any]:
         """
         Get healthcare service information using the Gemini API.
         
         Args:
             prompt: The user's input containing healthcare service query
+            providers: Optional provider records retrieved for the query, best first;
+                only these (up to GEMINI_PROMPT_MAX_PROVIDERS) are sent to Gemini
+            conversation_id: Optional conversation the call's token usage is recorded for
             
         Returns:
             A dictionary with either service data or error information
         """
         # Check if client is properly initialized
-        if not hasattr(self, 'client') or self.client is None:
+        if self.client is None:
             logger.error("Gemini client not initialized - cannot process request")
             return {
                 "success": False,
@@ -90,23 +182,13 @@ class GeminiService:
             }
             
         try:
+            from google.genai import types
+            
             # Log the input prompt for debugging
             logger.info(f"Sending prompt to Gemini: {prompt[:100]}...")
             
-            # Get current date and time information
-            now = datetime.datetime.now()
-            current_date = now.strftime("%d-%m-%Y")
-            current_time = now.strftime("%H:%M")
-            current_day = now.strftime("%A")
-            
-            # Instead of using string formatting with placeholders, construct the prompt directly
-            # This avoids issues with curly braces in the template string
-            system_prompt = DOCTOR_SERVICE_PROMPT.replace("{current_date}", current_date)
-            system_prompt = system_prompt.replace("{current_time}", current_time)
-            system_prompt = system_prompt.replace("{current_day}", current_day)
-            
             # Set up system instruction
-            system_instruction = system_prompt
+            system_instruction = self._build_system_prompt(providers, datetime.datetime.now())
             
             # Set up content with user prompt
             contents = [
@@ -153,11 +235,19 @@ class GeminiService:
             
             # Make the API call
             try:
-                response = self.client.models.generate_content(
-                    model=model_name,
-                    contents=contents,
-                    config=generate_content_config,
-                )
+                started = time.perf_counter()
+                with request_timing.span("gemini"):
+                    # Keep back enough of the request's budget for the follow-up completion
+                    response = await deadline.run(
+                        "gemini",
+                        self.client.aio.models.generate_content(
+                            model=model_name,
+                            contents=contents,
+                            config=generate_content_config,
+                        ),
+                        reserve=settings.DEADLINE_FOLLOWUP_MIN_SECONDS
+                    )
+                usage_tracker.record_gemini(model_name, response, (time.perf_counter() - started) * 1000, conversation_id)
                 
                 # Log the response for debugging
                 logger.info(f"Gemini raw response: {str(response)[:200]}...")
@@ -184,6 +274,13 @@ class GeminiService:
                     "query": prompt
                 }
                 
+            except deadline.DeadlineExceeded:
+                logger.warning("Gemini call cut off by the request deadline")
+                return {
+                    "success": False,
+                    "error": "deadline_exceeded",
+                    "message": "Healthcare information took too long to retrieve."
+                }
             except Exception as api_e:
                 logger.error(f"API call error: {str(api_e)}", exc_info=True)
                 return {
@@ -0,0 +1,65 @@
+"""
+Shared HTTP client for outbound webhook calls.
+
+One long-lived aiohttp session (and its connection pool) is created in the
+application lifespan and reused by every request, instead of opening a new
+session, DNS lookup and TLS handshake per call.
+"""
+
+import logging
+from typing import TYPE_CHECKING, Optional
+
+from app.config.settings import settings
+
+if TYPE_CHECKING:
+    import aiohttp
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+
+class HTTPClient:
+    """Owner of the application's pooled aiohttp session."""
+
+    def __init__(self):
+        self._session: Optional["aiohttp.ClientSession"] = None
+
+    async def start(self) -> "aiohttp.ClientSession":
+        """Create the pooled session if it does not exist yet."""
+        if self._session is None or self._session.closed:
+            # Imported here to keep aiohttp off the application's import path
+            import aiohttp
+
+            connector = aiohttp.TCPConnector(
+                limit=settings.HTTP_POOL_SIZE,
+                ttl_dns_cache=300,
+                keepalive_timeout=30
+            )
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=settings.HTTP_TIMEOUT_SECONDS),
+                headers={"Content-Type": "application/json"}
+            )
+            logger.info(f"Created pooled HTTP session (pool size {settings.HTTP_POOL_SIZE})")
+        return self._session
+
+    async def session(self) -> "aiohttp.ClientSession":
+        """
+        Get the pooled session.
+
+        Returns:
+            The session created at startup, or a new one when used outside the
+            application lifespan (e.g. from a script)
+        """
+        return await self.start()
+
+    async def close(self) -> None:
+        """Close the session and its pooled connections."""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+            logger.info("Closed pooled HTTP session")
+        self._session = None
+
+
+# Create singleton instance
+http_client = HTTPClient()
@@ -0,0 +1,242 @@
+"""
+Application startup, readiness and shutdown.
+
+The FastAPI lifespan calls startup() before the server accepts traffic. It
+connects Redis, opens the webhook HTTP pool, loads the provider catalogue and
+search indexes, compiles the prompt templates and starts the confirmation
+worker. The OpenAI and Gemini SDKs are slow to import, so their clients are
+built and their connections warmed in the background once the process is
+ready (a request that needs them first builds them itself). /api/ready
+reports whether the process should receive traffic. Its dependency checks
+are cached for READINESS_CACHE_SECONDS and shared by concurrent probes.
+
+The server only runs the lifespan shutdown after it has closed its listener
+and finished every request, which is too late to tell load balancers
+anything. So SIGTERM starts the drain instead: /api/ready answers 503 for
+SHUTDOWN_READINESS_DELAY_SECONDS while requests are still served, then
+in-flight requests get up to SHUTDOWN_DRAIN_SECONDS, and only then is the
+server told to stop. The lifespan shutdown then closes workers and pools.
+"""
+
+import asyncio
+import logging
+import signal
+import time
+from typing import Any, Dict, Optional, Tuple
+
+from app.config.settings import settings
+from app.services.ai_service import ai_service
+from app.services.confirmation_outbox import confirmation_outbox
+from app.services.gemini_service import gemini_service
+from app.services.http_client import http_client
+from app.services.llm_transport import llm_transport
+from app.services.loop_monitor import loop_monitor
+from app.services.memory_service import MemoryService, memory_service
+from app.services.provider_search import provider_search
+from app.services.usage_tracker import usage_tracker
+from app.services.worker_metrics import worker_metrics
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Lifecycle states
+STARTING = "starting"
+READY = "ready"
+DRAINING = "draining"
+STOPPED = "stopped"
+
+# How long shutdown waits for the background LLM client warm-up to finish
+LLM_WARMUP_SHUTDOWN_SECONDS = 5.0
+# Allowance for closing workers, pools and connections after the drain
+CLOSE_SECONDS = 5.0
+
+
+def shutdown_seconds() -> float:
+    """Longest time a process takes from SIGTERM to exit; the server's kill timeout must exceed it."""
+    return (
+        settings.SHUTDOWN_READINESS_DELAY_SECONDS + settings.SHUTDOWN_DRAIN_SECONDS
+        + LLM_WARMUP_SHUTDOWN_SECONDS + CLOSE_SECONDS
+    )
+
+
+class Lifecycle:
+    """Owns startup warm-up, readiness checks and the shutdown drain of one API process."""
+
+    def __init__(self, memory: MemoryService):
+        self.memory = memory
+        self.state = STARTING
+        self.in_flight = 0
+        self.startup_ms: Dict[str, float] = {}
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self._checked_at = 0.0
+        self._checks: Dict[str, Any] = {}
+        self._check_lock: Optional[asyncio.Lock] = None
+        self._llm_task: Optional[asyncio.Task] = None
+        self._drain_task: Optional[asyncio.Task] = None
+
+    async def _step(self, name: str, action) -> None:
+        """Run one startup step, recording its duration; failures are logged, not fatal."""
+        start = time.perf_counter()
+        try:
+            result = action()
+            if asyncio.iscoroutine(result):
+                await result
+        except Exception as e:
+            logger.error(f"Startup step {name} failed: {str(e)}")
+        self.startup_ms[name] = round((time.perf_counter() - start) * 1000, 1)
+
+    async def startup(self) -> None:
+        """Connect and warm every dependency, then mark the process ready."""
+        self.state = STARTING
+        start = time.perf_counter()
+        await self._step("redis", self.memory._setup_redis_connection)
+        await self._step("http_pools", http_client.start)
+        await self._step("indexes", lambda: asyncio.to_thread(provider_search.ensure_index))
+        await self._step("prompts", self._compile_prompts)
+        await self._step("workers", self._start_workers)
+        self._install_signal_handler()
+        self.state = READY
+        logger.info(f"Startup complete in {(time.perf_counter() - start) * 1000:.0f} ms: {self.startup_ms}")
+        self._llm_task = asyncio.create_task(self._step("llm_clients", self._warm_llm_clients))
+
+    def preload(self) -> None:
+        """
+        Load read-only data before the server forks its workers.
+        
+        Used by gunicorn.conf.py: workers then share the catalogue, indexes and
+        compiled prompts copy-on-write, and their own startup finds them loaded.
+        """
+        start = time.perf_counter()
+        provider_search.ensure_index()
+        self._compile_prompts()
+        logger.info(f"Preloaded catalogue, indexes and prompts in {(time.perf_counter() - start) * 1000:.0f} ms")
+
+    def _start_workers(self) -> None:
+        confirmation_outbox.start()
+        worker_metrics.start()
+        loop_monitor.start()
+
+    async def _warm_llm_clients(self) -> None:
+        # Importing the SDKs in a thread keeps the event loop serving requests meanwhile
+        await asyncio.to_thread(lambda: (ai_service.client, gemini_service.client))
+        await llm_transport.start()
+
+    def _compile_prompts(self) -> None:
+        ai_service.warm_up()
+        gemini_service.warm_up()
+
+    def _install_signal_handler(self) -> None:
+        """Run the drain on SIGTERM, then pass the signal on to the server's own handler."""
+        loop = asyncio.get_running_loop()
+        try:
+            server_handler = signal.getsignal(signal.SIGTERM)
+            signal.signal(
+                signal.SIGTERM,
+                lambda signum, frame: loop.call_soon_threadsafe(self._on_sigterm, server_handler, signum, frame)
+            )
+        except ValueError:
+            # Signals can only be handled in the main thread, which a test client does not run in
+            logger.debug("Not in the main thread, SIGTERM will not drain")
+
+    def _on_sigterm(self, server_handler, signum, frame) -> None:
+        def stop_server():
+            if callable(server_handler):
+                server_handler(signum, frame)
+            else:
+                signal.signal(signum, server_handler)
+                signal.raise_signal(signum)
+
+        if self._drain_task is not None:
+            # A second SIGTERM skips what is left of the drain
+            self._drain_task.cancel()
+            stop_server()
+            return
+        self._drain_task = asyncio.create_task(self._drain(stop_server))
+
+    async def _drain(self, stop_server) -> None:
+        """Report not ready while still serving, let in-flight requests finish, then stop the server."""
+        self.state = DRAINING
+        logger.info(f"SIGTERM received, reporting not ready for {settings.SHUTDOWN_READINESS_DELAY_SECONDS:.0f}s before stopping")
+        await asyncio.sleep(settings.SHUTDOWN_READINESS_DELAY_SECONDS)
+        if self.in_flight:
+            logger.info(f"Draining {self.in_flight} in-flight requests")
+            try:
+                await asyncio.wait_for(self._idle.wait(), timeout=settings.SHUTDOWN_DRAIN_SECONDS)
+            except asyncio.TimeoutError:
+                logger.warning(f"Stopping with {self.in_flight} requests still in flight")
+        stop_server()
+
+    async def shutdown(self) -> None:
+        """Release workers and pools; the server has already drained its connections."""
+        self.state = DRAINING
+        if self._llm_task is not None:
+            # An SDK import running in a thread cannot be interrupted; let it finish so its client is closed below
+            await asyncio.wait({self._llm_task}, timeout=LLM_WARMUP_SHUTDOWN_SECONDS)
+        await confirmation_outbox.stop()
+        await worker_metrics.stop()
+        await loop_monitor.stop()
+        await usage_tracker.flush()
+        await llm_transport.close()
+        await http_client.close()
+        await self.memory.close()
+        self.state = STOPPED
+        logger.info("Shutdown complete")
+
+    def request_started(self) -> None:
+        self.in_flight += 1
+        self._idle.clear()
+
+    def request_finished(self) -> None:
+        self.in_flight -= 1
+        if self.in_flight <= 0:
+            self.in_flight = 0
+            self._idle.set()
+
+    async def _check_redis(self) -> Tuple[bool, str]:
+        try:
+            redis_client = await self.memory._setup_redis_connection()
+            await asyncio.wait_for(redis_client.ping(), timeout=settings.READINESS_CHECK_TIMEOUT_SECONDS)
+            return True, "ok"
+        except Exception as e:
+            return False, str(e) or type(e).__name__
+
+    async def _run_checks(self) -> Dict[str, Any]:
+        redis_ok, redis_detail = await self._check_redis()
+        return {
+            "redis": {"ok": redis_ok, "detail": redis_detail},
+            "indexes": {"ok": provider_search.index is not None, "providers": len(provider_search.ids)},
+            # Checked without touching the clients, which would import the SDKs on the event loop
+            "openai": {"ok": bool(ai_service.openai_api_key) and not ai_service._client_failed, "loaded": ai_service._client is not None},
+            # Provider lookups still return search results without Gemini, so it does not gate readiness
+            "gemini": {"ok": bool(gemini_service.api_key) and not gemini_service._client_failed, "loaded": gemini_service._client is not None, "required": False}
+        }
+
+    async def readiness(self) -> Tuple[bool, Dict[str, Any]]:
+        """
+        Check whether this process should receive traffic.
+
+        Returns:
+            Tuple of (ready, report with the state and each dependency check)
+        """
+        if self.state != READY:
+            return False, {"status": self.state}
+
+        if self._check_lock is None:
+            self._check_lock = asyncio.Lock()
+        async with self._check_lock:
+            # Probes arriving while a check runs reuse its result
+            if time.monotonic() - self._checked_at >= settings.READINESS_CACHE_SECONDS:
+                self._checks = await self._run_checks()
+                self._checked_at = time.monotonic()
+
+        ready = all(check["ok"] for check in self._checks.values() if check.get("required", True))
+        return ready, {
+            "status": READY if ready else "unavailable",
+            "checked_seconds_ago": round(time.monotonic() - self._checked_at, 2),
+            "checks": self._checks
+        }
+
+
+# Create singleton instance
+lifecycle = Lifecycle(memory_service)
@@ -0,0 +1,264 @@
+"""
+Pooled, keep-alive HTTP transport shared by the OpenAI and Gemini clients.
+
+Both SDKs talk HTTP through an httpx-style AsyncClient. This module builds
+those clients from one set of settings: pool limits, keep-alive expiry,
+connect/read/pool timeouts, and HTTP/2 when the h2 package is installed.
+At startup it opens a few connections to each API, so the first request
+does not pay for DNS, TCP and TLS setup. A background task re-warms a client
+after it has been idle for LLM_KEEPALIVE_PING_SECONDS.
+
+Each client's transport is wrapped to count requests, new connections, TLS
+handshakes, pool timeouts and in-flight requests. These are reported under
+llm_transport in /api/health/workers. Warm-up requests are only counted in
+warmup_requests (and the connections they open in warmup_connections), so
+they neither inflate the request counts nor hold off the keep-warm pings.
+"""
+
+import asyncio
+import importlib.util
+import logging
+import sys
+import time
+from typing import Any, Dict, Optional
+
+from app.config.settings import settings
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Request extension marking warm-up requests, which the metered transport counts apart
+WARMUP_EXTENSION = "nivaran_warmup"
+
+
+def _httpx_module(client_class: type):
+    """
+    Find the httpx-compatible package a client class is built on.
+
+    The OpenAI and Gemini SDKs may pin different httpx distributions, so limits,
+    timeouts and transports must come from the package of the client's own base class.
+    """
+    for base in client_class.__mro__:
+        module = sys.modules.get(base.__module__.split(".")[0])
+        if module is not None and all(hasattr(module, name) for name in ("Limits", "Timeout", "AsyncHTTPTransport")):
+            return module
+    raise TypeError(f"{client_class.__name__} is not an httpx AsyncClient")
+
+
+class TransportMetrics:
+    """Connection and request counters of one pooled client."""
+
+    def __init__(self, max_connections: int):
+        self.max_connections = max_connections
+        self.requests = 0
+        self.warmup_requests = 0
+        self.warmup_connections = 0
+        self.new_connections = 0
+        self.tls_handshakes = 0
+        self.pool_timeouts = 0
+        self.errors = 0
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.last_request_at = 0.0
+
+    async def trace(self, event: str, info: Dict[str, Any]) -> None:
+        """httpcore trace hook; connection events only fire when a new connection is opened."""
+        if event == "connection.connect_tcp.complete":
+            self.new_connections += 1
+        elif event == "connection.start_tls.complete":
+            self.tls_handshakes += 1
+
+    async def warmup_trace(self, event: str, info: Dict[str, Any]) -> None:
+        """trace() for warm-up requests, which also counts the connections they open."""
+        if event == "connection.connect_tcp.complete":
+            self.warmup_connections += 1
+        await self.trace(event, info)
+
+
+class _MeteredTransport:
+    """Wraps an httpx AsyncHTTPTransport to record pool usage."""
+
+    def __init__(self, inner, metrics: TransportMetrics, pool_timeout: type):
+        self.inner = inner
+        self.metrics = metrics
+        self._pool_timeout = pool_timeout
+
+    async def handle_async_request(self, request):
+        metrics = self.metrics
+        if request.extensions.get(WARMUP_EXTENSION):
+            request.extensions["trace"] = metrics.warmup_trace
+            return await self.inner.handle_async_request(request)
+        metrics.requests += 1
+        metrics.in_flight += 1
+        metrics.peak_in_flight = max(metrics.peak_in_flight, metrics.in_flight)
+        metrics.last_request_at = time.time()
+        request.extensions["trace"] = metrics.trace
+        try:
+            return await self.inner.handle_async_request(request)
+        except self._pool_timeout:
+            metrics.pool_timeouts += 1
+            raise
+        except Exception:
+            metrics.errors += 1
+            raise
+        finally:
+            # Counted until the response headers arrive
+            metrics.in_flight -= 1
+
+    def pool_snapshot(self) -> Dict[str, int]:
+        """Open, idle and queued connections of the underlying httpcore pool."""
+        pool = getattr(self.inner, "_pool", None)
+        if pool is None:
+            return {}
+        try:
+            connections = list(pool.connections)
+            return {
+                "open": len(connections),
+                "idle": sum(1 for connection in connections if connection.is_idle()),
+                "queued_requests": sum(1 for request in getattr(pool, "_requests", []) if request.is_queued())
+            }
+        except Exception:
+            return {}
+
+    async def __aenter__(self):
+        await self.inner.__aenter__()
+        return self
+
+    async def __aexit__(self, *args) -> None:
+        await self.inner.__aexit__(*args)
+
+    async def aclose(self) -> None:
+        await self.inner.aclose()
+
+
+class LLMTransport:
+    """Registry of the pooled clients used by the LLM services."""
+
+    def __init__(self):
+        self._clients: Dict[str, Dict[str, Any]] = {}
+        self._task: Optional[asyncio.Task] = None
+        self.http2 = settings.LLM_HTTP2 and importlib.util.find_spec("h2") is not None
+        if settings.LLM_HTTP2 and not self.http2:
+            logger.warning("LLM_HTTP2 is enabled but the h2 package is not installed; using HTTP/1.1")
+
+    def create_client(self, name: str, client_class: type, warmup_url: str, **kwargs):
+        """
+        Create and register a pooled client.
+
+        Args:
+            name: Name reported in the metrics
+            client_class: httpx AsyncClient (sub)class expected by the SDK
+            warmup_url: URL requested to open connections ahead of real traffic
+            **kwargs: Extra arguments for client_class
+
+        Returns:
+            The client, to be passed to the SDK
+        """
+        httpx = _httpx_module(client_class)
+        metrics = TransportMetrics(settings.LLM_HTTP_MAX_CONNECTIONS)
+        inner = httpx.AsyncHTTPTransport(
+            http2=self.http2,
+            limits=httpx.Limits(
+                max_connections=settings.LLM_HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.LLM_HTTP_MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=settings.LLM_HTTP_KEEPALIVE_EXPIRY_SECONDS
+            )
+        )
+        transport = _MeteredTransport(inner, metrics, httpx.PoolTimeout)
+        client = client_class(
+            transport=transport,
+            timeout=httpx.Timeout(
+                settings.LLM_HTTP_READ_TIMEOUT_SECONDS,
+                connect=settings.LLM_HTTP_CONNECT_TIMEOUT_SECONDS,
+                pool=settings.LLM_HTTP_POOL_TIMEOUT_SECONDS
+            ),
+            **kwargs
+        )
+        self._clients[name] = {"client": client, "transport": transport, "metrics": metrics, "warmup_url": warmup_url}
+        logger.info(f"Created pooled {name} client (max {settings.LLM_HTTP_MAX_CONNECTIONS} connections, HTTP/2 {'on' if self.http2 else 'off'})")
+        return client
+
+    async def _warm(self, name: str, connections: int) -> None:
+        entry = self._clients[name]
+        metrics: TransportMetrics = entry["metrics"]
+
+        async def request() -> None:
+            metrics.warmup_requests += 1
+            # Any response will do: the point is an open, TLS-established connection
+            await entry["client"].head(
+                entry["warmup_url"], timeout=settings.LLM_HTTP_CONNECT_TIMEOUT_SECONDS * 2, extensions={WARMUP_EXTENSION: True}
+            )
+
+        # HTTP/2 multiplexes everything over one connection
+        count = 1 if self.http2 else max(connections, 1)
+        results = await asyncio.gather(*[request() for _ in range(count)], return_exceptions=True)
+        failures = [result for result in results if isinstance(result, Exception)]
+        if failures:
+            logger.warning(f"Warming {name} connections failed: {str(failures[0])}")
+
+    async def warm_up(self) -> None:
+        """Open connections to every registered API."""
+        if settings.LLM_WARMUP_CONNECTIONS <= 0 or not self._clients:
+            return
+        start = time.time()
+        await asyncio.gather(*[self._warm(name, settings.LLM_WARMUP_CONNECTIONS) for name in self._clients])
+        logger.info(f"Warmed LLM connections in {(time.time() - start) * 1000:.0f} ms")
+
+    async def _keep_warm(self) -> None:
+        interval = settings.LLM_KEEPALIVE_PING_SECONDS
+        while True:
+            await asyncio.sleep(interval)
+            idle = [
+                name for name, entry in self._clients.items()
+                if time.time() - entry["metrics"].last_request_at >= interval
+            ]
+            for name in idle:
+                await self._warm(name, 1)
+
+    async def start(self) -> None:
+        """Warm connections and start the keep-warm task on the running event loop."""
+        await self.warm_up()
+        if settings.LLM_KEEPALIVE_PING_SECONDS > 0 and (self._task is None or self._task.done()):
+            self._task = asyncio.create_task(self._keep_warm())
+
+    async def close(self) -> None:
+        """Stop the keep-warm task and close every pooled client."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        for name, entry in self._clients.items():
+            try:
+                await entry["client"].aclose()
+            except Exception as e:
+                logger.warning(f"Failed to close {name} client: {str(e)}")
+
+    def stats(self) -> Dict[str, Any]:
+        """Pool saturation and connection reuse per client."""
+        stats = {"http2": self.http2}
+        for name, entry in self._clients.items():
+            metrics: TransportMetrics = entry["metrics"]
+            # Connections opened by warm-up requests are there to be reused
+            reused = max(metrics.requests - (metrics.new_connections - metrics.warmup_connections), 0)
+            stats[name] = {
+                "requests": metrics.requests,
+                "warmup_requests": metrics.warmup_requests,
+                "warmup_connections": metrics.warmup_connections,
+                "new_connections": metrics.new_connections,
+                "tls_handshakes": metrics.tls_handshakes,
+                "connection_reuse_rate": round(reused / metrics.requests, 3) if metrics.requests else 0.0,
+                "in_flight": metrics.in_flight,
+                "saturation": round(metrics.in_flight / metrics.max_connections, 3),
+                "peak_saturation": round(metrics.peak_in_flight / metrics.max_connections, 3),
+                "pool_timeouts": metrics.pool_timeouts,
+                "errors": metrics.errors,
+                "pool": entry["transport"].pool_snapshot()
+            }
+        return stats
+
+
+# Create singleton instance
+llm_transport = LLMTransport()
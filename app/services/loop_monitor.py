@@ -0,0 +1,64 @@
+"""
+Event loop lag monitor.
+
+Sleeps for EVENT_LOOP_LAG_INTERVAL_SECONDS in a loop and measures how late
+each wake-up is. A late wake-up means something held the loop: a blocking
+call, a long CPU-bound section, or too many ready callbacks. All requests in
+the worker wait for as long as the loop is held. The lag is observed in the
+event_loop_lag_seconds histogram at /metrics.
+"""
+
+import asyncio
+import logging
+import time
+from typing import Optional
+
+from app.config.settings import settings
+from app.utils.metrics import metrics
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Lag worth a warning in the logs (seconds)
+WARN_LAG_SECONDS = 0.5
+LAG_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+loop_lag = metrics.histogram("event_loop_lag_seconds", "How late the event loop woke up a sleeping task", buckets=LAG_BUCKETS)
+
+
+class LoopMonitor:
+    """Background task measuring event loop lag in this worker."""
+
+    def __init__(self):
+        self._task: Optional[asyncio.Task] = None
+
+    async def run(self) -> None:
+        """Measure until cancelled."""
+        interval = settings.EVENT_LOOP_LAG_INTERVAL_SECONDS
+        while True:
+            start = time.perf_counter()
+            await asyncio.sleep(interval)
+            lag = max(time.perf_counter() - start - interval, 0.0)
+            loop_lag.observe(lag)
+            if lag >= WARN_LAG_SECONDS:
+                logger.warning(f"Event loop was blocked for {lag * 1000:.0f} ms")
+
+    def start(self) -> None:
+        """Start measuring on the running event loop."""
+        if settings.EVENT_LOOP_LAG_INTERVAL_SECONDS <= 0:
+            return
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self.run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+# Create singleton instance
+loop_monitor = LoopMonitor()
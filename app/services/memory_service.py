@@ -4,19 +4,85 @@ Provides efficient Redis-backed memory for conversations.
 """
 
 import logging
+import sys
 import uuid
 import json
 import time
-import redis.asyncio as redis
-import atexit
-from typing import Dict, List, Any, Optional, Set
+from typing import TYPE_CHECKING, Dict, List, Any, Optional, Set
 from datetime import datetime, timedelta
 
 from app.config.settings import settings
+from app.utils.deadline import bounded
+from app.utils import redis_profiler
+from app.utils.metrics import metrics
+from app.utils.request_timing import timed
+
+if TYPE_CHECKING:
+    import redis.asyncio as redis
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
+# Shortest timeout a memory call gets near the request deadline; finishing a write keeps the history consistent
+MEMORY_MIN_TIMEOUT_SECONDS = 0.5
+
+# Redis command metrics, for every service sharing this client
+redis_command_duration = metrics.histogram("redis_command_duration_seconds", "Redis command latency, by command", ("command",))
+redis_command_errors = metrics.counter("redis_command_errors_total", "Redis commands that raised, by command", ("command",))
+
+_instrumented_client_class = None
+
+
+def _instrumented_redis_class():
+    """redis.asyncio.Redis subclass that times and profiles every command and pipeline; built on first use."""
+    global _instrumented_client_class
+    if _instrumented_client_class is not None:
+        return _instrumented_client_class
+
+    import redis.asyncio as redis
+
+    class InstrumentedRedis(redis.Redis):
+        async def execute_command(self, *args, **options):
+            command = str(args[0]).upper() if args else "UNKNOWN"
+            # The awaiting frame is the caller, or redis code the profiler skips
+            site = redis_profiler.call_site(sys._getframe(1))
+            start = time.perf_counter()
+            try:
+                return await super().execute_command(*args, **options)
+            except Exception:
+                redis_command_errors.inc(command)
+                raise
+            finally:
+                duration = time.perf_counter() - start
+                redis_command_duration.observe(duration, command)
+                redis_profiler.record(site, command, duration, args=args)
+
+        def pipeline(self, transaction: bool = True, shard_hint: Optional[str] = None):
+            pipe = super().pipeline(transaction, shard_hint)
+            execute = pipe.execute
+
+            async def timed_execute(raise_on_error: bool = True):
+                site = redis_profiler.call_site(sys._getframe(1))
+                # The stack is cleared by execute()
+                stack = [args for args, _ in pipe.command_stack]
+                start = time.perf_counter()
+                try:
+                    return await execute(raise_on_error)
+                except Exception:
+                    redis_command_errors.inc("PIPELINE")
+                    raise
+                finally:
+                    duration = time.perf_counter() - start
+                    redis_command_duration.observe(duration, "PIPELINE")
+                    if stack:
+                        redis_profiler.record(site, "PIPELINE", duration, commands=len(stack), args=stack)
+
+            pipe.execute = timed_execute
+            return pipe
+
+    _instrumented_client_class = InstrumentedRedis
+    return InstrumentedRedis
+
 class MemoryService:
     """Service for managing conversation memory using Redis as a backend."""
     
@@ -47,6 +113,9 @@ class MemoryService:
         if self.redis is not None:
             # Already connected
             return self.redis
+        
+        # Imported on first connection to keep redis off the application's import path
+        import redis.asyncio as redis
             
         # First, try with the configured settings
         try:
@@ -64,12 +133,9 @@ class MemoryService:
             logger.info(f"Connecting to Redis at {settings.REDIS_HOST}:{settings.REDIS_PORT} {ssl_status}")
             
             # Try to establish connection
-            self.redis = redis.Redis(**connection_params)
+            self.redis = self._create_client(connection_params)
             await self.redis.ping()
             logger.info(f"Successfully connected to Redis at {settings.REDIS_HOST}:{settings.REDIS_PORT}")
-            
-            # Register cleanup on application exit
-            atexit.register(self._close_redis_connection)
             return self.redis
             
         except redis.ConnectionError as e:
@@ -79,12 +145,9 @@ class MemoryService:
                 try:
                     # Try again without SSL
                     connection_params["ssl"] = False
-                    self.redis = redis.Redis(**connection_params)
+                    self.redis = self._create_client(connection_params)
                     await self.redis.ping()
                     logger.info(f"Successfully connected to Redis at {settings.REDIS_HOST}:{settings.REDIS_PORT} without SSL")
-                    
-                    # Register cleanup on application exit
-                    atexit.register(self._close_redis_connection)
                     return self.redis
                 except Exception as e2:
                     logger.error(f"Non-SSL Redis connection also failed: {str(e2)}")
@@ -93,27 +156,37 @@ class MemoryService:
             logger.error(f"Failed to connect to Redis: {str(e)}")
             raise
     
-    def _close_redis_connection(self):
-        """Close the Redis connection when the application exits."""
-        async def close_async():
-            try:
-                if hasattr(self, 'redis') and self.redis:
-                    await self.redis.close()
-                    logger.info("Redis connection closed")
-            except Exception as e:
-                logger.error(f"Error closing Redis connection: {e}")
+    def _create_client(self, connection_params: Dict[str, Any]) -> "redis.Redis":
+        """
+        Create a Redis client over a bounded connection pool.
         
-        # We need to run the async close in a new event loop
-        # This is generally not ideal, but for cleanup on app exit it's acceptable
-        import asyncio
+        Under bursts, commands wait up to REDIS_POOL_TIMEOUT_SECONDS for a free
+        connection instead of failing with "Too many connections". Every command
+        is timed into the redis_command_* metrics.
+        """
+        import redis.asyncio as redis
+        
+        params = dict(connection_params)
+        use_ssl = params.pop("ssl", False)
+        pool = redis.BlockingConnectionPool(
+            connection_class=redis.SSLConnection if use_ssl else redis.Connection,
+            max_connections=settings.REDIS_MAX_CONNECTIONS,
+            timeout=settings.REDIS_POOL_TIMEOUT_SECONDS,
+            **params
+        )
+        return _instrumented_redis_class()(connection_pool=pool)
+    
+    async def close(self) -> None:
+        """Close the Redis connection pool; called from the application lifespan on shutdown."""
+        if self.redis is None:
+            return
         try:
-            loop = asyncio.get_event_loop()
-            if loop.is_running():
-                loop.create_task(close_async())
-            else:
-                asyncio.run(close_async())
+            await self.redis.aclose()
+            logger.info("Redis connection closed")
         except Exception as e:
-            logger.error(f"Error in Redis cleanup: {e}")
+            logger.error(f"Error closing Redis connection: {e}")
+        finally:
+            self.redis = None
     
     def _get_conv_meta_key(self, conversation_id: str) -> str:
         """Get the Redis key for conversation metadata."""
@@ -291,6 +364,8 @@ class MemoryService:
         
         logger.debug(f"Deleted conversation {conversation_id}")
     
+    @timed("memory")
+    @bounded("memory", floor=MEMORY_MIN_TIMEOUT_SECONDS)
     async def add_message(self, conversation_id: str, message: Dict[str, Any], user_id: Optional[str] = None) -> bool:
         """
         Add a message to the conversation history in Redis.
@@ -525,6 +600,8 @@ class MemoryService:
         
         return topics
     
+    @timed("memory")
+    @bounded("memory", floor=MEMORY_MIN_TIMEOUT_SECONDS)
     async def get_conversation_state(self, conversation_id: str) -> Dict[str, Any]:
         """
         Get the tracked state for a conversation.
@@ -570,6 +647,8 @@ class MemoryService:
                 
         return state
     
+    @timed("memory")
+    @bounded("memory", floor=MEMORY_MIN_TIMEOUT_SECONDS)
     async def get_messages(self, conversation_id: str) -> List[Dict[str, Any]]:
         """
         Get all messages for a conversation thread.
@@ -607,6 +686,8 @@ class MemoryService:
         # Deserialize each message
         return [self._deserialize_message(msg_str) for msg_str in message_strings]
     
+    @timed("memory")
+    @bounded("memory", floor=MEMORY_MIN_TIMEOUT_SECONDS)
     async def clear_conversation(self, conversation_id: str) -> bool:
         """
         Clear the conversation history for a thread.
@@ -684,6 +765,8 @@ class MemoryService:
             
         return await self.redis.get(self._get_user_conv_key(user_id))
     
+    @timed("memory")
+    @bounded("memory", floor=MEMORY_MIN_TIMEOUT_SECONDS)
     async def generate_conversation_id(self, user_id: Optional[str] = None) -> str:
         """
         Generate a unique conversation ID.
@@ -757,6 +840,8 @@ class MemoryService:
             # Check if we have cached results
         return doctor_search_results.get(cache_key)
 
+    @timed("memory")
+    @bounded("memory", floor=MEMORY_MIN_TIMEOUT_SECONDS)
     async def associate_conversation_with_user(self, conversation_id: str, user_id: str) -> bool:
         """
         Associate a conversation with a user and determine if this is a new conversation for this user.
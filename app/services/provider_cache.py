@@ -0,0 +1,210 @@
+"""
+Shared cache for get_service_info lookup results.
+
+A lookup (provider search plus the Gemini answer) depends only on the tool
+arguments, the catalogue version and the current availability slot, so results
+are shared across conversations and workers through Redis. Recognised places
+and specialties are keyed by their canonical IDs; the query and symptoms are
+keyed as canonical text, since the Gemini answer is written for them.
+Keys embed the slot, and entries expire at the slot boundary, so a cached
+answer never outlives the availability it was computed for. When Redis is
+unreachable, the bounded in-process cache in front of it keeps working alone.
+"""
+
+import hashlib
+import json
+import logging
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional, Tuple
+
+from app.config.settings import settings
+from app.services.memory_service import MemoryService, memory_service
+from app.services.provider_store import ProviderStore, provider_store
+from app.utils.metrics import metrics
+from app.utils.normalizer import NormalisedArguments, canonical_text
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Redis key prefix for cached lookups (String, JSON value)
+CACHE_KEY_PREFIX = "provider:results:"
+# Seconds to skip Redis after a failed command before trying it again
+REDIS_RETRY_SECONDS = 30
+# Log the hit ratio every this many lookups
+STATS_LOG_INTERVAL = 500
+
+# Lookups by result (local_hit, hit, miss); hit ratio = (local_hit + hit) / all
+cache_lookups = metrics.counter("cache_lookups_total", "Result cache lookups, by cache and result", ("cache", "result"))
+
+
+class ProviderResultCache:
+    """Global, time-slot-aware cache for provider lookup results."""
+
+    def __init__(self, memory: MemoryService, store: ProviderStore, max_local_entries: Optional[int] = None):
+        self.memory = memory
+        self.store = store
+        self.max_local_entries = max_local_entries or settings.PROVIDER_CACHE_LOCAL_MAX_SIZE
+        self._local: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._redis_retry_at = 0.0
+        self.hits = 0
+        self.local_hits = 0
+        self.misses = 0
+
+    def time_bucket(self, now: Optional[datetime] = None) -> Tuple[str, float]:
+        """
+        Availability slot containing a moment.
+
+        Args:
+            now: Moment to bucket; defaults to the current local time
+
+        Returns:
+            Tuple of (bucket ID, seconds until the bucket ends)
+        """
+        now = now or datetime.now()
+        slot_minutes = self.store.availability.slot_minutes if self.store.availability else 15
+        minute = now.hour * 60 + now.minute
+        slot = minute // slot_minutes
+        slot_start = now.replace(hour=0, minute=0, second=0, microsecond=0) + timedelta(minutes=slot * slot_minutes)
+        remaining = (slot_start + timedelta(minutes=slot_minutes) - now).total_seconds()
+        return f"{now:%Y%m%d}.{slot}", max(remaining, 1.0)
+
+    def key(
+        self,
+        normalised: NormalisedArguments,
+        query: str = "",
+        symptoms: str = "",
+        specialty: str = "",
+        location: str = "",
+        coordinates: Optional[Tuple[float, float]] = None,
+        radius_km: Optional[float] = None,
+        available_now: bool = False,
+        now: Optional[datetime] = None
+    ) -> Tuple[str, float]:
+        """
+        Build the cache key for a lookup.
+
+        Args:
+            normalised: Normalised tool arguments
+            query: Raw query text; part of the Gemini prompt, so always part of the key
+            symptoms: Raw symptoms text; part of the Gemini prompt, so always part of the key
+            specialty: Raw specialty; only part of the key when normalisation did not recognise it
+            location: Raw location; only part of the key when normalisation recognised no city
+            coordinates: Explicit user coordinates (rounded to ~100 m)
+            radius_km: Optional search radius
+            available_now: Whether only currently available providers are requested
+            now: Moment of the lookup; defaults to the current local time
+
+        Returns:
+            Tuple of (Redis key, seconds until the entry must expire)
+        """
+        self.store.ensure_loaded()
+        bucket, ttl = self.time_bucket(now)
+        unmatched_specialty = "" if normalised.specialty_id else canonical_text(specialty)
+        unmatched_location = "" if normalised.city_id else canonical_text(location)
+        point = [round(coordinates[0], 3), round(coordinates[1], 3)] if coordinates else None
+        parts = [
+            *normalised.cache_key, unmatched_specialty, unmatched_location, canonical_text(symptoms), canonical_text(query),
+            point, radius_km, bool(available_now)
+        ]
+        digest = hashlib.sha1(json.dumps(parts, separators=(",", ":")).encode("utf-8")).hexdigest()[:20]
+        return f"{CACHE_KEY_PREFIX}{self.store.version}:{bucket}:{digest}", ttl
+
+    async def _redis(self):
+        """Redis client, or None while Redis is marked unavailable."""
+        if time.monotonic() < self._redis_retry_at:
+            return None
+        try:
+            return await self.memory._setup_redis_connection()
+        except Exception as e:
+            self._redis_unavailable(e)
+            return None
+
+    def _redis_unavailable(self, error: Exception) -> None:
+        logger.warning(f"Redis unavailable for provider result cache, using local cache for {REDIS_RETRY_SECONDS}s: {str(error)}")
+        self._redis_retry_at = time.monotonic() + REDIS_RETRY_SECONDS
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Look up a cached result.
+
+        Returns:
+            The cached result, or None on a miss
+        """
+        if not settings.PROVIDER_CACHE_ENABLED:
+            return None
+
+        value = None
+        result = "hit"
+        entry = self._local.get(key)
+        if entry is not None and entry[0] > time.time():
+            self._local.move_to_end(key)
+            value = entry[1]
+            self.local_hits += 1
+            result = "local_hit"
+        elif entry is not None:
+            del self._local[key]
+
+        if value is None:
+            client = await self._redis()
+            if client is not None:
+                try:
+                    raw = await client.get(key)
+                    if raw:
+                        value = json.loads(raw)
+                        # Keep a local copy until the end of the current slot
+                        self._store_local(key, value, self.time_bucket()[1])
+                except Exception as e:
+                    self._redis_unavailable(e)
+
+        if value is None:
+            self.misses += 1
+            cache_lookups.inc("provider", "miss")
+        else:
+            self.hits += 1
+            cache_lookups.inc("provider", result)
+        if (self.hits + self.misses) % STATS_LOG_INTERVAL == 0:
+            logger.info(f"Provider result cache: {self.stats()}")
+        return value
+
+    async def set(self, key: str, value: Dict[str, Any], ttl: float) -> None:
+        """
+        Store a result until the end of its time bucket.
+
+        Args:
+            key: Key from key()
+            value: JSON-serialisable result
+            ttl: Seconds until the entry expires
+        """
+        if not settings.PROVIDER_CACHE_ENABLED:
+            return
+
+        self._store_local(key, value, ttl)
+        client = await self._redis()
+        if client is not None:
+            try:
+                await client.set(key, json.dumps(value), px=max(int(ttl * 1000), 1))
+            except Exception as e:
+                self._redis_unavailable(e)
+
+    def _store_local(self, key: str, value: Dict[str, Any], ttl: float) -> None:
+        self._local[key] = (time.time() + ttl, value)
+        self._local.move_to_end(key)
+        while len(self._local) > self.max_local_entries:
+            self._local.popitem(last=False)
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit and miss counts of this process, with the hit ratio; local_hits were served without Redis."""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "local_hits": self.local_hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "local_entries": len(self._local)
+        }
+
+
+# Create singleton instance
+provider_result_cache = ProviderResultCache(memory_service, provider_store)
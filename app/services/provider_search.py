@@ -0,0 +1,262 @@
+"""
+Provider search service.
+
+Retrieves providers relevant to a request with hybrid ranking: a fielded BM25
+index and the local vector index each rank candidates, and the rankings are
+fused with reciprocal rank fusion. When the request has coordinates, a
+distance ranking from the geo index joins the fusion, or replaces it for
+"nearest" requests. Recognised cities and specialties pre-filter every
+retriever through the availability index masks.
+"""
+
+import logging
+import os
+import threading
+import time
+from typing import Any, Container, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.config.settings import settings
+from app.services.provider_store import ProviderStore, provider_store
+from app.utils.availability import normalise_key
+from app.utils.bm25 import BM25Index, Clause, provider_fields, reciprocal_rank_fusion
+from app.utils.geo import GeoIndex, haversine_km, record_coordinates
+from app.utils.vector_index import (
+    HashingEmbedder,
+    VectorIndex,
+    build_index,
+    embedder_from_config,
+    load_index,
+    provider_document
+)
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Fields returned for every matched provider
+RESULT_FIELDS = ("provider_id", "name", "specialty", "hospital", "location")
+
+# BM25 field boosts for each get_service_info tool argument
+FIELD_BOOSTS: Dict[str, Dict[str, float]] = {
+    "query": {"name": 1.0, "specialty": 1.0, "hospital": 1.0, "location": 1.0},
+    "specialty": {"specialty": 3.0},
+    "location": {"location": 2.0, "hospital": 0.5},
+    "symptoms": {"specialty": 1.5, "name": 0.5}
+}
+
+
+class ProviderSearchService:
+    """Service for hybrid lexical and semantic provider retrieval over the provider store."""
+
+    def __init__(self, store: ProviderStore):
+        self.store = store
+        self.embedder = HashingEmbedder()
+        self.index: Optional[VectorIndex] = None
+        self.lexical: Optional[BM25Index] = None
+        self.geo: Optional[GeoIndex] = None
+        self.ids: Sequence[str] = []
+        self.version: str = ""
+        self._lock = threading.Lock()
+
+    @property
+    def ready(self) -> bool:
+        """Whether the indexes match the loaded catalogue, so search() does no loading or building."""
+        return self.index is not None and self.store.availability is not None and self.version == self.store.version
+
+    def ensure_index(self) -> None:
+        """Load or build the vector, BM25 and geo indexes for the current catalogue version."""
+        with self._lock:
+            self._ensure_index()
+
+    def _ensure_index(self) -> None:
+        self.store.ensure_loaded()
+        if self.index is not None and self.version == self.store.version:
+            return
+
+        version = self.store.version
+        ids = self.store.availability.provider_ids
+        index = lexical = geo = None
+        # Resolve the published directory once, so all three indexes come from the same version
+        path = os.path.realpath(settings.PROVIDER_VECTOR_INDEX_PATH) if settings.PROVIDER_VECTOR_INDEX_PATH else ""
+
+        if path and os.path.exists(os.path.join(path, "meta.json")):
+            try:
+                mapped, mapped_ids, meta = load_index(path)
+                if meta["version"] == version and np.array_equal(mapped_ids, ids):
+                    self.embedder = embedder_from_config(meta["embedder"])
+                    index = mapped
+                    logger.info(f"Mapped {meta['kind']} vector index with {len(mapped_ids)} providers from {path}")
+                else:
+                    logger.warning(f"Vector index {path} is for catalogue version {meta['version']}, rebuilding in memory")
+            except Exception as e:
+                logger.error(f"Failed to load vector index {path}: {str(e)}", exc_info=True)
+
+        # The BM25 and geo indexes share the vector index's row order, so only use them alongside it
+        if index is not None:
+            lexical = self._load_sidecar(BM25Index, path, "bm25.json", version)
+            geo = self._load_sidecar(GeoIndex, path, "geo.json", version)
+
+        if index is None or lexical is None or geo is None:
+            start = time.perf_counter()
+            records = [self.store.get(pid) for pid in ids]
+            if index is None:
+                self.embedder = HashingEmbedder()
+                vectors = self.embedder.embed([provider_document(record) for record in records])
+                index = build_index(vectors, settings.VECTOR_IVF_THRESHOLD, settings.VECTOR_NPROBE)
+            if lexical is None:
+                lexical = BM25Index.build(provider_fields(record) for record in records)
+            if geo is None:
+                geo = GeoIndex.build(record_coordinates(record) for record in records)
+            logger.info(f"Built search indexes for {len(records)} providers in {(time.perf_counter() - start) * 1000:.0f} ms")
+
+        self._swap(index, lexical, geo, ids, version)
+
+    def _load_sidecar(self, index_class, path: str, meta_file: str, version: str):
+        """Memory-map a BM25 or geo index saved next to the vector index, if it matches the catalogue version."""
+        if not os.path.exists(os.path.join(path, meta_file)):
+            return None
+        try:
+            index, index_version = index_class.load(path)
+            return index if index_version == version else None
+        except Exception as e:
+            logger.error(f"Failed to load {meta_file} index from {path}: {str(e)}", exc_info=True)
+            return None
+
+    def _swap(self, index: VectorIndex, lexical: BM25Index, geo: GeoIndex, ids: Sequence[str], version: str) -> None:
+        self.index = index
+        self.lexical = lexical
+        self.geo = geo
+        self.ids = ids
+        self.version = version
+
+    def _resolve_filter(self, value: Optional[str], known: Container[str]) -> Optional[str]:
+        """
+        Map a free-text city or specialty onto a key present in the index.
+
+        Comma-separated parts are tried individually so "Andheri, Mumbai"
+        resolves to "mumbai". Returns None when nothing matches, in which case
+        the filter is not applied.
+        """
+        if not value:
+            return None
+        for candidate in [value, *value.split(",")]:
+            key = normalise_key(candidate)
+            if key in known:
+                return key
+        return None
+
+    def filter_rows(self, specialty: Optional[str] = None, city: Optional[str] = None) -> Optional[np.ndarray]:
+        """
+        Build a boolean row mask for the recognised filters.
+
+        Returns:
+            The mask, or None if neither filter was recognised
+        """
+        availability = self.store.availability
+        specialty_key = self._resolve_filter(specialty, availability.specialty_masks)
+        city_key = self._resolve_filter(city, availability.city_masks)
+        if specialty_key is None and city_key is None:
+            return None
+        packed = availability.filter_mask(specialty=specialty_key, city=city_key)
+        return np.unpackbits(packed, count=len(availability), bitorder="little").astype(bool)
+
+    def _clauses(self, query: str, specialty: str, location: str, symptoms: str) -> List[Clause]:
+        """Map tool arguments onto fielded BM25 query clauses."""
+        arguments = {"query": query, "specialty": specialty, "location": location, "symptoms": symptoms}
+        return [(text, FIELD_BOOSTS[name]) for name, text in arguments.items() if text]
+
+    def search(
+        self,
+        query: str = "",
+        specialty: str = "",
+        location: str = "",
+        symptoms: str = "",
+        k: Optional[int] = None,
+        coordinates: Optional[Tuple[float, float]] = None,
+        nearest: bool = False,
+        radius_km: Optional[float] = None,
+        available_now: bool = False
+    ) -> List[Dict[str, Any]]:
+        """
+        Find the providers most relevant to a request.
+
+        Args:
+            query: Free-text description of what the user is looking for
+            specialty: Optional specialty; restricts results when it is a known specialty
+            location: Optional city or locality; restricts results when it names a known city
+            symptoms: Optional symptoms described by the user
+            k: Number of providers to return; defaults to settings.PROVIDER_SEARCH_TOP_K
+            coordinates: Optional (latitude, longitude) of the user; adds a distance ranking
+            nearest: Rank purely by distance from coordinates
+            radius_km: Optional maximum distance from coordinates
+            available_now: Only return providers available at the current time
+
+        Returns:
+            Matched providers, best first, each with its fused ranking score
+            and, when coordinates are given, its distance in km
+        """
+        if not self.ready:
+            self.ensure_index()
+        k = k or settings.PROVIDER_SEARCH_TOP_K
+        candidates = max(k, settings.PROVIDER_SEARCH_CANDIDATES)
+        start = time.perf_counter()
+        if coordinates and not self.geo.located:
+            # No provider has coordinates, so distance cannot rank or filter anything
+            logger.debug("Ignoring coordinates: no provider in the catalogue is located")
+            coordinates = None
+
+        mask = self.filter_rows(specialty, location)
+        if available_now:
+            available = np.zeros(len(self.ids), dtype=bool)
+            available[self.store.availability.available_ordinals()] = True
+            mask = available if mask is None else mask & available
+        if coordinates and radius_km:
+            inside = np.zeros(len(self.ids), dtype=bool)
+            inside[self.geo.within(coordinates[0], coordinates[1], radius_km, mask)[0]] = True
+            mask = inside
+        if mask is not None and not mask.any():
+            return []
+
+        rankings = []
+        timings: Dict[str, float] = {}
+        stage_start = time.perf_counter()
+        if coordinates:
+            geo_rows, _ = self.geo.nearest(coordinates[0], coordinates[1], k if nearest else candidates, mask)
+            rankings.append(geo_rows)
+            timings["geo"] = time.perf_counter() - stage_start
+        if not (coordinates and nearest):
+            stage_start = time.perf_counter()
+            lexical_rows, _ = self.lexical.search(self._clauses(query, specialty, location, symptoms), candidates, mask)
+            timings["lexical"] = time.perf_counter() - stage_start
+
+            stage_start = time.perf_counter()
+            text = " ".join(part for part in (query, specialty, symptoms, location) if part)
+            semantic_rows, semantic_scores = self.index.search(self.embedder.embed([text])[0], candidates, mask)
+            # Rows with no feature in common with the query are not matches
+            rankings.extend([lexical_rows, semantic_rows[semantic_scores > 0]])
+            timings["semantic"] = time.perf_counter() - stage_start
+
+        fused = reciprocal_rank_fusion(rankings)[:k]
+
+        results = []
+        for row, score in fused:
+            record = self.store.get(str(self.ids[row]))
+            if record is None:
+                continue
+            match = {field: record.get(field, "") for field in RESULT_FIELDS}
+            match["city"] = record.get("city") or (record.get("location") or "").split(",")[0].strip()
+            match["score"] = round(score, 4)
+            if coordinates and not np.isnan(self.geo.latitudes[row]):
+                distance = haversine_km(coordinates[0], coordinates[1], self.geo.latitudes[row:row + 1], self.geo.longitudes[row:row + 1])
+                match["distance_km"] = round(float(distance[0]), 2)
+            results.append(match)
+
+        elapsed = time.perf_counter() - start
+        stages = ", ".join(f"{name} {seconds * 1000:.2f} ms" for name, seconds in timings.items())
+        logger.info(f"Provider search ranked {len(results)} results in {elapsed * 1000:.2f} ms ({stages})")
+        return results
+
+
+# Create singleton instance
+provider_search = ProviderSearchService(provider_store)
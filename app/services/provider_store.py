@@ -0,0 +1,185 @@
+"""
+In-memory provider store.
+
+Holds the provider catalogue keyed by provider_id together with the derived
+availability index, and exposes a content version used for HTTP caching.
+"""
+
+import logging
+import os
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Tuple
+
+from app.config.providers import HEALTHCARE_PROVIDERS_DATA
+from app.config.settings import settings
+from app.utils.availability import AvailabilityIndex
+from app.utils.columnar_snapshot import ColumnarSnapshot
+from app.utils.provider_snapshot import compute_version, read_snapshot
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+
+class ProviderStore:
+    """Service for O(1) provider lookups and availability queries."""
+
+    def __init__(self):
+        self._providers: Mapping[str, Dict[str, Any]] = {}
+        self.availability: Optional[AvailabilityIndex] = None
+        self.version: str = ""
+        self.last_modified: Optional[datetime] = None
+        self.source: str = ""
+
+    def load(
+        self,
+        records: Iterable[Dict[str, Any]],
+        source: str = "memory",
+        version: Optional[str] = None,
+        last_modified: Optional[datetime] = None
+    ) -> int:
+        """
+        Replace the catalogue with the given provider records.
+
+        Args:
+            records: Provider records, each with a unique provider_id
+            source: Human-readable description of where the records came from
+            version: Optional content version; computed from the records if omitted
+            last_modified: Optional modification time; defaults to now
+
+        Returns:
+            Number of providers loaded
+        """
+        providers = {}
+        for record in records:
+            provider_id = str(record.get("provider_id") or "")
+            if not provider_id:
+                logger.warning("Skipping provider record without provider_id")
+                continue
+            providers[provider_id] = record
+
+        if version is None:
+            version = compute_version(list(providers.values()))
+
+        # Build the derived index before swapping so readers never see a partial catalogue
+        availability = AvailabilityIndex.from_providers(providers.values())
+
+        self._providers = providers
+        self.availability = availability
+        self.version = version
+        self.last_modified = (last_modified or datetime.now(timezone.utc)).replace(microsecond=0)
+        self.source = source
+
+        logger.info(f"Loaded {len(providers)} providers from {source} (version {version})")
+        return len(providers)
+
+    def load_snapshot(self, path: str) -> int:
+        """
+        Replace the catalogue with the contents of a snapshot written by data ingestion.
+
+        Returns:
+            Number of providers loaded
+        """
+        providers, metadata = read_snapshot(path)
+        return self.load(
+            providers,
+            source=path,
+            version=metadata["version"],
+            last_modified=datetime.fromisoformat(metadata["created_at"])
+        )
+
+    def load_columnar(self, path: str) -> int:
+        """
+        Serve the catalogue from a memory-mapped columnar snapshot.
+
+        Opening the snapshot only maps the file; records and availability are
+        read from the mapped pages on demand, so this costs the same for any
+        catalogue size.
+
+        Returns:
+            Number of providers in the snapshot
+        """
+        snapshot = ColumnarSnapshot(path)
+        self._providers = snapshot
+        self.availability = snapshot.availability_index()
+        self.version = snapshot.version
+        self.last_modified = snapshot.created_at.replace(microsecond=0)
+        self.source = path
+
+        logger.info(f"Mapped {len(snapshot)} providers from {path} (version {snapshot.version})")
+        return len(snapshot)
+
+    def ensure_loaded(self) -> None:
+        """Load the configured snapshot, or the seed catalogue if there is none, on first use."""
+        if self.availability is not None:
+            return
+
+        loaders = (
+            (settings.PROVIDER_COLUMNAR_PATH, self.load_columnar),
+            (settings.PROVIDER_SNAPSHOT_PATH, self.load_snapshot),
+        )
+        for path, loader in loaders:
+            if path and os.path.exists(path):
+                try:
+                    loader(path)
+                    return
+                except Exception as e:
+                    logger.error(f"Failed to load provider snapshot {path}: {str(e)}", exc_info=True)
+
+        self.load(HEALTHCARE_PROVIDERS_DATA, source="seed data")
+
+    def __len__(self) -> int:
+        return len(self._providers)
+
+    def get(self, provider_id: str) -> Optional[Dict[str, Any]]:
+        """Return the provider record for provider_id, or None if unknown."""
+        self.ensure_loaded()
+        return self._providers.get(provider_id)
+
+    def get_many(self, provider_ids: Iterable[str]) -> Tuple[Dict[str, Dict[str, Any]], List[str]]:
+        """
+        Resolve many provider IDs at once.
+
+        Returns:
+            Tuple of (found records keyed by provider_id, IDs that were not found)
+        """
+        self.ensure_loaded()
+        found = {}
+        missing = []
+        for provider_id in provider_ids:
+            record = self._providers.get(provider_id)
+            if record is None:
+                missing.append(provider_id)
+            else:
+                found[provider_id] = record
+        return found, missing
+
+    def all(self) -> List[Dict[str, Any]]:
+        """Return all provider records."""
+        self.ensure_loaded()
+        return list(self._providers.values())
+
+    def availability_view(self, provider_id: str, day_of_week: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """
+        Build the public availability representation of a provider.
+
+        Args:
+            provider_id: Provider to describe
+            day_of_week: Optional day to restrict the schedule to
+
+        Returns:
+            Provider details with parsed availability, or None if unknown
+
+        Raises:
+            ValueError: If day_of_week is not a weekday
+        """
+        record = self.get(provider_id)
+        if record is None:
+            return None
+
+        view = {key: value for key, value in record.items() if key != "availability"}
+        view["availability"] = self.availability.weekly_schedule(provider_id, day_of_week)
+        return view
+
+
+# Create singleton instance
+provider_store = ProviderStore()
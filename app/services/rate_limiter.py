@@ -0,0 +1,215 @@
+"""
+Distributed rate limiting.
+
+Each client (API key plus end user) has a token bucket of RATE_LIMIT_BURST
+tokens refilled at RATE_LIMIT_PER_MINUTE, and each caller (API key, or client
+address without one) a bucket refilled at RATE_LIMIT_PER_CALLER_PER_MINUTE
+across all its users, so changing user_id does not escape the limit. Only a
+validated API key names a caller: without API_KEY configured any header value
+is accepted, so callers are told apart by address. Buckets
+are stored in Redis as a single GCRA timestamp (the
+theoretical arrival time of the next request). A Lua script checks and
+updates it in one round trip using Redis server time, so every instance and
+worker enforces the same limit.
+
+Local fast path: while a client has more than half of its bucket left, the
+script hands out a small lease of up to RATE_LIMIT_LOCAL_LEASE tokens. The
+process serves the following requests from that lease without touching
+Redis. Close to the limit the lease shrinks to one token, so every request
+is checked centrally. Leased tokens that are not used before the lease expires
+are simply lost, so a lease can only make the limit stricter.
+"""
+
+import hashlib
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from app.config.settings import settings
+from app.services.memory_service import MemoryService, memory_service
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Redis key prefix for rate limit buckets (String: GCRA theoretical arrival time in ms)
+RATE_LIMIT_PREFIX = "ratelimit:"
+# How long a local lease may be used (seconds)
+LEASE_SECONDS = 2.0
+# Clients with a local lease kept per process
+MAX_LOCAL_LEASES = 10000
+# Seconds to skip Redis after an error before trying again
+REDIS_BACKOFF_SECONDS = 5.0
+
+# KEYS[1] bucket; ARGV[1] emission interval ms, ARGV[2] burst, ARGV[3] maximum lease.
+# Returns {tokens granted (0 when limited), tokens left after the grant, retry after ms}.
+_GCRA_SCRIPT = """
+local time = redis.call('TIME')
+local now = tonumber(time[1]) * 1000 + math.floor(tonumber(time[2]) / 1000)
+local interval = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local tat = tonumber(redis.call('GET', KEYS[1]) or now)
+if tat < now then
+    tat = now
+end
+local available = math.floor((now + burst * interval - tat) / interval)
+if available < 1 then
+    return {0, 0, tat - (burst - 1) * interval - now}
+end
+local grant = math.min(tonumber(ARGV[3]), available - math.ceil(burst / 2))
+if grant < 1 then
+    grant = 1
+end
+tat = tat + grant * interval
+redis.call('SET', KEYS[1], tat, 'PX', tat - now + interval)
+return {grant, available - grant, 0}
+"""
+
+
+class RateLimitDecision:
+    """Outcome of one rate limit check."""
+
+    __slots__ = ("allowed", "remaining", "retry_after", "limit")
+
+    def __init__(self, allowed: bool, remaining: int, retry_after: float = 0.0, limit: int = 0):
+        self.allowed = allowed
+        self.remaining = remaining
+        self.retry_after = retry_after
+        self.limit = limit
+
+
+class RateLimiter:
+    """Redis-backed token bucket limiter with a per-process lease fast path."""
+
+    def __init__(self, memory: MemoryService):
+        self.memory = memory
+        self._script = None
+        # key -> [tokens left, remaining reported by Redis, lease expiry]
+        self._leases: "OrderedDict[str, list]" = OrderedDict()
+        self._redis_retry_at = 0.0
+
+        # Limiter metrics for this process
+        self.checks = 0
+        self.local_hits = 0
+        self.redis_calls = 0
+        self.limited = 0
+        self.errors = 0
+
+    @staticmethod
+    def client_key(api_key: Optional[str], user_id: Optional[str], address: Optional[str]) -> str:
+        """
+        Build the bucket key for a client.
+
+        Args:
+            api_key: API key presented with the request, if any
+            user_id: End user the request is for, if known
+            address: Client address, used when there is neither
+
+        Returns:
+            Redis key of the client's bucket
+        """
+        parts = []
+        if api_key:
+            # Never store the key itself
+            parts.append("k" + hashlib.sha1(api_key.encode("utf-8")).hexdigest()[:16])
+        if user_id:
+            parts.append("u" + user_id)
+        if not parts:
+            parts.append("ip" + (address or "unknown"))
+        return RATE_LIMIT_PREFIX + ":".join(parts)
+
+    @staticmethod
+    def caller_key(api_key: Optional[str], address: Optional[str]) -> str:
+        """
+        Build the bucket key shared by every user of a caller.
+
+        Args:
+            api_key: API key presented with the request, if any
+            address: Client address, used when there is no API key
+
+        Returns:
+            Redis key of the caller's bucket
+        """
+        if api_key:
+            return RATE_LIMIT_PREFIX + "k" + hashlib.sha1(api_key.encode("utf-8")).hexdigest()[:16]
+        return RATE_LIMIT_PREFIX + "ip" + (address or "unknown")
+
+    def _take_local(self, key: str, limit: int) -> Optional[RateLimitDecision]:
+        lease = self._leases.get(key)
+        if lease is None:
+            return None
+        if lease[0] <= 0 or lease[2] < time.monotonic():
+            del self._leases[key]
+            return None
+        lease[0] -= 1
+        self._leases.move_to_end(key)
+        return RateLimitDecision(True, lease[1] + lease[0], limit=limit)
+
+    async def check(self, key: str, limit: Optional[int] = None) -> RateLimitDecision:
+        """
+        Take one token from a bucket.
+
+        Args:
+            key: Bucket key from client_key() or caller_key()
+            limit: Requests per minute, also the burst; defaults to
+                RATE_LIMIT_PER_MINUTE with RATE_LIMIT_BURST
+
+        Returns:
+            The decision; requests are allowed when Redis is unavailable
+        """
+        if limit is None:
+            limit = settings.RATE_LIMIT_PER_MINUTE
+            burst = settings.RATE_LIMIT_BURST or limit
+        else:
+            burst = limit
+        self.checks += 1
+        local = self._take_local(key, limit)
+        if local is not None:
+            self.local_hits += 1
+            return local
+
+        if limit <= 0 or time.monotonic() < self._redis_retry_at:
+            return RateLimitDecision(True, burst, limit=limit)
+
+        try:
+            redis_client = await self.memory._setup_redis_connection()
+            if self._script is None:
+                self._script = redis_client.register_script(_GCRA_SCRIPT)
+            self.redis_calls += 1
+            granted, remaining, retry_after_ms = await self._script(
+                keys=[key],
+                args=[max(int(60000 / limit), 1), burst, max(settings.RATE_LIMIT_LOCAL_LEASE, 1)]
+            )
+        except Exception as e:
+            self.errors += 1
+            self._redis_retry_at = time.monotonic() + REDIS_BACKOFF_SECONDS
+            logger.warning(f"Rate limiter unavailable, allowing requests for {REDIS_BACKOFF_SECONDS:.0f}s: {str(e)}")
+            return RateLimitDecision(True, burst, limit=limit)
+
+        granted, remaining = int(granted), int(remaining)
+        if granted == 0:
+            self.limited += 1
+            return RateLimitDecision(False, 0, max(int(retry_after_ms), 0) / 1000, limit)
+
+        if granted > 1:
+            # One token is this request; keep the rest for the next requests
+            self._leases[key] = [granted - 1, remaining, time.monotonic() + LEASE_SECONDS]
+            self._leases.move_to_end(key)
+            while len(self._leases) > MAX_LOCAL_LEASES:
+                self._leases.popitem(last=False)
+        return RateLimitDecision(True, remaining + granted - 1, limit=limit)
+
+    def stats(self) -> Dict[str, Any]:
+        """Limiter counters of this process."""
+        return {
+            "checks": self.checks,
+            "local_hits": self.local_hits,
+            "redis_calls": self.redis_calls,
+            "limited": self.limited,
+            "errors": self.errors,
+            "local_leases": len(self._leases)
+        }
+
+
+# Create singleton instance
+rate_limiter = RateLimiter(memory_service)
@@ -0,0 +1,234 @@
+"""
+Appointment slot reservations.
+
+Each (doctor, date, time) slot is one Redis key whose value is
+"held|<holder>" or "booked|<holder>", where the holder is the conversation
+booking it. Requested times are snapped down to the start of the
+availability slot they fall in, so "10:00", "10:00 AM" and "10:07" all
+reserve the same key. Holds are taken with SET NX PX, so exactly one of any number of
+concurrent requests wins, and abandoned holds expire on their own after
+SLOT_HOLD_TTL_SECONDS. Converting a hold into a booking and releasing a slot
+are Lua scripts that only act for the current holder.
+"""
+
+import logging
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional, Tuple
+
+from app.config.settings import settings
+from app.services.memory_service import MemoryService, memory_service
+from app.services.provider_store import ProviderStore, provider_store
+from app.utils.availability import DEFAULT_SLOT_MINUTES, format_minutes, parse_time
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Redis key prefix for slot reservations (String)
+SLOT_KEY_PREFIX = "slot:"
+
+# Reservation outcomes
+HELD = "held"
+BOOKED = "booked"
+TAKEN = "taken"
+INVALID = "invalid"
+UNAVAILABLE = "unavailable"
+
+# KEYS[1] slot; ARGV[1] holder, ARGV[2] hold TTL in ms.
+# Returns 1 for a new hold, 2 if the holder already holds or booked the slot, 0 if someone else has it.
+_HOLD_SCRIPT = """
+if redis.call('SET', KEYS[1], 'held|' .. ARGV[1], 'NX', 'PX', ARGV[2]) then
+    return 1
+end
+local current = redis.call('GET', KEYS[1])
+if current == 'held|' .. ARGV[1] then
+    redis.call('PEXPIRE', KEYS[1], ARGV[2])
+    return 2
+end
+if current == 'booked|' .. ARGV[1] then
+    return 2
+end
+return 0
+"""
+
+# KEYS[1] slot; ARGV[1] holder, ARGV[2] booking TTL in ms.
+# Books the slot if the holder holds it or it is free; returns 1 when booked (or already booked), 0 otherwise.
+_CONFIRM_SCRIPT = """
+local current = redis.call('GET', KEYS[1])
+if current == 'booked|' .. ARGV[1] then
+    return 1
+end
+if (not current) or current == 'held|' .. ARGV[1] then
+    redis.call('SET', KEYS[1], 'booked|' .. ARGV[1], 'PX', ARGV[2])
+    return 1
+end
+return 0
+"""
+
+# KEYS[1] slot; ARGV[1] holder. Deletes the slot only if this holder holds or booked it.
+_RELEASE_SCRIPT = """
+local current = redis.call('GET', KEYS[1])
+if current == 'held|' .. ARGV[1] or current == 'booked|' .. ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+
+class SlotReservationService:
+    """Service for atomic appointment slot holds and bookings in Redis."""
+
+    def __init__(self, memory: MemoryService, store: ProviderStore):
+        self.memory = memory
+        self.store = store
+        self._scripts: Dict[str, Any] = {}
+
+    async def _script(self, name: str, source: str):
+        """Register a Lua script once per connection; EVALSHA is used afterwards."""
+        redis_client = await self.memory._setup_redis_connection()
+        if name not in self._scripts:
+            self._scripts[name] = redis_client.register_script(source)
+        return self._scripts[name]
+
+    def parse_slot(self, doctor_id: str, appointment_date: str, appointment_time: str) -> Tuple[str, datetime]:
+        """
+        Validate a requested slot.
+
+        Args:
+            doctor_id: Provider ID
+            appointment_date: Date as YYYY-MM-DD
+            appointment_time: Time such as "14:30" or "2:30 PM"
+
+        Returns:
+            Tuple of (Redis key, slot start)
+
+        Raises:
+            ValueError: If the slot is malformed, in the past, or outside the doctor's schedule
+        """
+        if not doctor_id:
+            raise ValueError("doctor_id is required")
+        start = self.slot_start(appointment_date, appointment_time)
+        if start < datetime.now():
+            raise ValueError(f"Slot {appointment_date} {appointment_time} is in the past")
+
+        if doctor_id in self.store.availability:
+            if not self.store.availability.is_available(doctor_id, start):
+                raise ValueError(f"Doctor {doctor_id} is not available at {start:%A} {format_minutes(start.hour * 60 + start.minute)}")
+        else:
+            logger.warning(f"Reserving slot for doctor {doctor_id}, who is not in the provider catalogue")
+
+        return self.slot_key(doctor_id, start), start
+
+    def slot_start(self, appointment_date: str, appointment_time: str) -> datetime:
+        """
+        Start of the availability slot a requested time falls in.
+
+        Raises:
+            ValueError: If the date or time cannot be parsed
+        """
+        day = datetime.strptime((appointment_date or "").strip(), "%Y-%m-%d")
+        minutes = parse_time(appointment_time or "")
+        self.store.ensure_loaded()
+        slot_minutes = self.store.availability.slot_minutes if self.store.availability else DEFAULT_SLOT_MINUTES
+        return day + timedelta(minutes=minutes - minutes % slot_minutes)
+
+    @staticmethod
+    def slot_key(doctor_id: str, start: datetime) -> str:
+        return f"{SLOT_KEY_PREFIX}{doctor_id}:{start:%Y-%m-%d}:{start:%H:%M}"
+
+    async def hold(self, doctor_id: str, appointment_date: str, appointment_time: str, holder: str) -> str:
+        """
+        Hold a slot for a conversation until it is booked or the hold expires.
+
+        Args:
+            doctor_id: Provider ID
+            appointment_date: Date as YYYY-MM-DD
+            appointment_time: Time of day
+            holder: Conversation holding the slot
+
+        Returns:
+            HELD if the slot is (now) held or booked by this holder, TAKEN if someone
+            else has it, INVALID for a bad slot, UNAVAILABLE if Redis is unreachable
+        """
+        try:
+            key, _ = self.parse_slot(doctor_id, appointment_date, appointment_time)
+        except ValueError as e:
+            logger.info(f"Rejected slot hold: {str(e)}")
+            return INVALID
+
+        try:
+            script = await self._script("hold", _HOLD_SCRIPT)
+            outcome = await script(keys=[key], args=[holder, int(settings.SLOT_HOLD_TTL_SECONDS * 1000)])
+        except Exception as e:
+            logger.error(f"Failed to hold slot {key}: {str(e)}")
+            return UNAVAILABLE
+
+        if outcome == 0:
+            logger.info(f"Slot {key} is already taken")
+            return TAKEN
+        logger.info(f"Slot {key} held for {holder}")
+        return HELD
+
+    async def confirm(self, doctor_id: str, appointment_date: str, appointment_time: str, holder: str) -> str:
+        """
+        Convert a hold into a booking.
+
+        A free slot (e.g. after the hold expired) is booked directly.
+
+        Returns:
+            BOOKED, TAKEN, INVALID or UNAVAILABLE
+        """
+        try:
+            key, start = self.parse_slot(doctor_id, appointment_date, appointment_time)
+        except ValueError as e:
+            logger.info(f"Rejected booking: {str(e)}")
+            return INVALID
+
+        # Keep the booking until a day after the appointment
+        ttl_ms = max(int((start + timedelta(days=1) - datetime.now()).total_seconds() * 1000), 1)
+        try:
+            script = await self._script("confirm", _CONFIRM_SCRIPT)
+            outcome = await script(keys=[key], args=[holder, ttl_ms])
+        except Exception as e:
+            logger.error(f"Failed to book slot {key}: {str(e)}")
+            return UNAVAILABLE
+
+        if outcome == 0:
+            logger.info(f"Slot {key} is held or booked by another conversation")
+            return TAKEN
+        logger.info(f"Slot {key} booked for {holder}")
+        return BOOKED
+
+    async def release(self, doctor_id: str, appointment_date: str, appointment_time: str, holder: str) -> bool:
+        """
+        Release a hold or booking made by a holder.
+
+        Returns:
+            True if the slot was released
+        """
+        try:
+            # The slot may be in the past by now, so build the key without validation
+            key = self.slot_key(doctor_id, self.slot_start(appointment_date, appointment_time))
+            script = await self._script("release", _RELEASE_SCRIPT)
+            released = bool(await script(keys=[key], args=[holder]))
+        except Exception as e:
+            logger.error(f"Failed to release slot for doctor {doctor_id}: {str(e)}")
+            return False
+        if released:
+            logger.info(f"Slot {key} released by {holder}")
+        return released
+
+    async def release_confirmation(self, payload: Dict[str, Any]) -> bool:
+        """Release the slot of a confirmation payload that could not be delivered."""
+        details: Optional[Dict[str, Any]] = payload.get("appointment_details")
+        if not details or not payload.get("conversation_id"):
+            return False
+        return await self.release(
+            str(details.get("doctor_id") or ""),
+            details.get("appointment_date", ""),
+            details.get("appointment_time", ""),
+            payload["conversation_id"]
+        )
+
+
+# Create singleton instance
+slot_reservations = SlotReservationService(memory_service, provider_store)
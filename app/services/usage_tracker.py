@@ -0,0 +1,201 @@
+"""
+Token usage and cost accounting for the OpenAI and Gemini calls.
+
+Every upstream call records its model, prompt, cached and completion tokens,
+latency and estimated cost. The counters go into two Redis hashes, one for
+the conversation and one for the UTC day, written as a single pipelined
+batch of HINCRBY commands. The write runs in the background so the request
+does not wait for it. Hash fields are "<call>:<model>:<counter>", where call
+is openai, openai_followup or gemini. The admin endpoints (app/routers/admin.py)
+read the hashes back, and the same numbers feed the llm_* metrics at /metrics.
+"""
+
+import asyncio
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from app.config.settings import settings
+from app.services.memory_service import MemoryService, memory_service
+from app.utils.metrics import metrics
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Redis key prefixes for usage counters (Hash of "<call>:<model>:<counter>" -> integer)
+CONVERSATION_USAGE_PREFIX = "usage:conversation:"
+DAILY_USAGE_PREFIX = "usage:day:"
+# Counters kept per call and model; cost is in millionths of a USD so it stays an integer
+COUNTERS = ("calls", "prompt_tokens", "cached_tokens", "completion_tokens", "latency_ms", "cost_micro_usd")
+
+llm_tokens = metrics.counter("llm_tokens_total", "Tokens used by upstream LLM calls, by call, model and kind", ("call", "model", "kind"))
+llm_cost = metrics.counter("llm_cost_micro_usd_total", "Estimated cost of upstream LLM calls in millionths of a USD", ("call", "model"))
+
+
+def _usage_value(usage: Any, *names: str) -> int:
+    """First non-empty integer attribute of an SDK usage object (the SDKs name their fields differently)."""
+    for name in names:
+        value = getattr(usage, name, None)
+        if value:
+            return int(value)
+    return 0
+
+
+class UsageTracker:
+    """Records LLM usage into per-conversation and per-day Redis counters."""
+
+    def __init__(self, memory: MemoryService):
+        self.memory = memory
+        self._pending: Set[asyncio.Task] = set()
+        self._prices: Dict[str, Optional[Dict[str, float]]] = {}
+
+        # Tracker metrics for this process
+        self.recorded = 0
+        self.write_errors = 0
+
+    def _price(self, model: str) -> Optional[Dict[str, float]]:
+        """Prices of a model: the longest LLM_PRICES_PER_MILLION prefix of its name (e.g. dated versions)."""
+        if model not in self._prices:
+            matches = [prefix for prefix in settings.LLM_PRICES_PER_MILLION if model.startswith(prefix)]
+            self._prices[model] = settings.LLM_PRICES_PER_MILLION[max(matches, key=len)] if matches else None
+        return self._prices[model]
+
+    def cost_micro_usd(self, model: str, prompt_tokens: int, cached_tokens: int, completion_tokens: int) -> int:
+        """Estimated cost of a call in millionths of a USD (0 for models without prices)."""
+        price = self._price(model)
+        if price is None:
+            return 0
+        # Per-million prices times tokens gives millionths of a USD directly
+        cost = (
+            (prompt_tokens - cached_tokens) * price.get("input", 0.0)
+            + cached_tokens * price.get("cached_input", price.get("input", 0.0))
+            + completion_tokens * price.get("output", 0.0)
+        )
+        return round(cost)
+
+    def record(
+        self,
+        call: str,
+        model: str,
+        prompt_tokens: int,
+        cached_tokens: int,
+        completion_tokens: int,
+        latency_ms: float,
+        conversation_id: Optional[str] = None
+    ) -> None:
+        """
+        Record one upstream call; the Redis write happens in the background.
+
+        Args:
+            call: Which call this was (openai, openai_followup, gemini)
+            model: Model that served the call
+            prompt_tokens: Input tokens, including cached ones
+            cached_tokens: Input tokens served from the provider's prompt cache
+            completion_tokens: Output tokens
+            latency_ms: Time the call took
+            conversation_id: Conversation the call was made for, if any
+        """
+        cost = self.cost_micro_usd(model, prompt_tokens, cached_tokens, completion_tokens)
+        llm_tokens.inc(call, model, "prompt", amount=prompt_tokens - cached_tokens)
+        llm_tokens.inc(call, model, "cached", amount=cached_tokens)
+        llm_tokens.inc(call, model, "completion", amount=completion_tokens)
+        llm_cost.inc(call, model, amount=cost)
+        self.recorded += 1
+
+        values = (1, prompt_tokens, cached_tokens, completion_tokens, int(latency_ms), cost)
+        try:
+            task = asyncio.get_running_loop().create_task(self._write(call, model, values, conversation_id))
+        except RuntimeError:
+            # No running loop (e.g. a script); metrics are recorded, Redis counters are skipped
+            return
+        self._pending.add(task)
+        task.add_done_callback(self._pending.discard)
+
+    def record_openai(self, call: str, response: Any, latency_ms: float, conversation_id: Optional[str] = None) -> None:
+        """Record a chat.completions response's usage."""
+        usage = getattr(response, "usage", None)
+        if usage is None:
+            return
+        cached = _usage_value(getattr(usage, "prompt_tokens_details", None), "cached_tokens")
+        self.record(
+            call, getattr(response, "model", None) or settings.OPENAI_MODEL,
+            _usage_value(usage, "prompt_tokens"), cached, _usage_value(usage, "completion_tokens"),
+            latency_ms, conversation_id
+        )
+
+    def record_gemini(self, model: str, response: Any, latency_ms: float, conversation_id: Optional[str] = None) -> None:
+        """Record a generate_content response's usage."""
+        usage = getattr(response, "usage_metadata", None)
+        if usage is None:
+            return
+        # Thinking tokens are billed as output
+        completion = _usage_value(usage, "candidates_token_count") + _usage_value(usage, "thoughts_token_count")
+        self.record(
+            "gemini", getattr(response, "model_version", None) or model,
+            _usage_value(usage, "prompt_token_count"), _usage_value(usage, "cached_content_token_count"), completion,
+            latency_ms, conversation_id
+        )
+
+    async def _write(self, call: str, model: str, values: Tuple[int, ...], conversation_id: Optional[str]) -> None:
+        try:
+            redis_client = await self.memory._setup_redis_connection()
+            day_key = DAILY_USAGE_PREFIX + datetime.now(timezone.utc).strftime("%Y-%m-%d")
+            keys = [(day_key, settings.USAGE_RETENTION_DAYS * 86400)]
+            if conversation_id:
+                keys.append((CONVERSATION_USAGE_PREFIX + conversation_id, settings.USAGE_CONVERSATION_TTL_SECONDS))
+
+            pipeline = redis_client.pipeline(transaction=False)
+            for key, ttl in keys:
+                for counter, value in zip(COUNTERS, values):
+                    if value:
+                        pipeline.hincrby(key, f"{call}:{model}:{counter}", value)
+                pipeline.expire(key, ttl)
+            await pipeline.execute()
+        except Exception as e:
+            self.write_errors += 1
+            logger.warning(f"Failed to record LLM usage: {str(e)}")
+
+    async def flush(self) -> None:
+        """Wait for background writes; called on shutdown."""
+        if self._pending:
+            await asyncio.wait(set(self._pending), timeout=5)
+
+    @staticmethod
+    def summarise(fields: Dict[str, str]) -> Dict[str, Any]:
+        """Turn a usage hash into totals plus a breakdown by call and model."""
+        totals = {counter: 0 for counter in COUNTERS}
+        breakdown: Dict[str, Dict[str, Dict[str, int]]] = {}
+        for field, value in fields.items():
+            # Call and counter names have no colons; fine-tuned model names may
+            call_model, _, counter = field.rpartition(":")
+            call, _, model = call_model.partition(":")
+            breakdown.setdefault(call, {}).setdefault(model, {})[counter] = int(value)
+            totals[counter] = totals.get(counter, 0) + int(value)
+        totals["cost_usd"] = round(totals["cost_micro_usd"] / 1_000_000, 6)
+        totals["mean_latency_ms"] = round(totals["latency_ms"] / totals["calls"], 1) if totals["calls"] else 0.0
+        return {"totals": totals, "by_call": breakdown}
+
+    async def conversation_usage(self, conversation_id: str) -> Dict[str, Any]:
+        """Usage of one conversation."""
+        redis_client = await self.memory._setup_redis_connection()
+        fields = await redis_client.hgetall(CONVERSATION_USAGE_PREFIX + conversation_id)
+        return {"conversation_id": conversation_id, **self.summarise(fields)}
+
+    async def daily_usage(self, days: int) -> List[Dict[str, Any]]:
+        """Usage of each of the last days UTC days, newest first."""
+        redis_client = await self.memory._setup_redis_connection()
+        today = datetime.now(timezone.utc).date()
+        dates = [(today - timedelta(days=offset)).isoformat() for offset in range(days)]
+        pipeline = redis_client.pipeline(transaction=False)
+        for date in dates:
+            pipeline.hgetall(DAILY_USAGE_PREFIX + date)
+        results = await pipeline.execute()
+        return [{"date": date, **self.summarise(fields)} for date, fields in zip(dates, results)]
+
+    def stats(self) -> Dict[str, Any]:
+        """Tracker counters of this process."""
+        return {"recorded": self.recorded, "write_errors": self.write_errors, "pending_writes": len(self._pending)}
+
+
+# Create singleton instance
+usage_tracker = UsageTracker(memory_service)
@@ -0,0 +1,244 @@
+"""
+Per-worker metrics, aggregated across processes through Redis.
+
+Every service keeps its counters in-process, so with several server workers
+each process only knows its own. Each worker publishes a snapshot of its
+stats to one Redis hash (field = worker ID) every
+WORKER_METRICS_INTERVAL_SECONDS. /api/health/workers reads all live snapshots
+and sums their integer counters. Ratios, latencies and other floats are only
+meaningful per worker and are not summed. Snapshots from workers that stopped
+publishing are dropped after three intervals. Each snapshot also carries the
+metrics registry (app/utils/metrics.py), which /metrics merges the same way.
+
+Counters and histograms must not drop when a worker exits, so a worker that
+stops, or whose snapshot goes stale, has them added to a retired total in
+Redis, which /metrics adds in. Retiring compares the snapshot with the one
+read, so concurrent scrapes add it once. A worker that was only paused and
+publishes again is told its values were retired and counts on from zero.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import socket
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from app.config.settings import settings
+from app.services.memory_service import MemoryService, memory_service
+from app.utils.metrics import metrics
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Redis hash of worker ID -> JSON stats snapshot
+WORKER_METRICS_KEY = "metrics:workers"
+# Snapshots older than this many intervals belong to stopped workers
+STALE_INTERVALS = 3
+# Redis hash of the summed counters and histograms of stopped workers (MetricsRegistry.retired_fields)
+RETIRED_METRICS_KEY = "metrics:retired"
+# Marks a worker whose stale snapshot was retired, in case it was only paused
+RETIRED_WORKER_KEY = "metrics:retired:{}"
+RETIRED_WORKER_TTL_SECONDS = 86400
+
+# KEYS[1] worker hash, KEYS[2] retired total, KEYS[3] retired marker; ARGV[1] worker ID, ARGV[2] the
+# snapshot as read, ARGV[3] marker TTL in seconds (0 for none), then field/amount pairs.
+# Retires the snapshot only if it is still the one read; returns 1 if it did.
+_RETIRE_SCRIPT = """
+if redis.call('HGET', KEYS[1], ARGV[1]) ~= ARGV[2] then
+    return 0
+end
+redis.call('HDEL', KEYS[1], ARGV[1])
+for i = 4, #ARGV, 2 do
+    redis.call('HINCRBYFLOAT', KEYS[2], ARGV[i], ARGV[i + 1])
+end
+if tonumber(ARGV[3]) > 0 then
+    redis.call('SET', KEYS[3], '1', 'EX', ARGV[3])
+end
+return 1
+"""
+
+# KEYS[1] worker hash, KEYS[2] retired marker; ARGV[1] worker ID, ARGV[2] snapshot.
+# Returns 0 without publishing if the worker's values were retired meanwhile.
+_PUBLISH_SCRIPT = """
+if redis.call('DEL', KEYS[2]) == 1 then
+    return 0
+end
+redis.call('HSET', KEYS[1], ARGV[1], ARGV[2])
+return 1
+"""
+
+resident_memory = metrics.gauge("process_resident_memory_bytes", "Resident memory of the worker process")
+
+
+def _resident_memory_bytes() -> int:
+    """Current resident set size of this process (peak RSS where /proc is unavailable)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        import resource
+        # ru_maxrss is in KB on Linux
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def _sum_counters(total: Dict[str, Any], stats: Dict[str, Any]) -> None:
+    """Add the integer counters of a stats dict into total, recursing into nested dicts."""
+    for name, value in stats.items():
+        if isinstance(value, dict):
+            _sum_counters(total.setdefault(name, {}), value)
+        elif isinstance(value, int) and not isinstance(value, bool):
+            total[name] = total.get(name, 0) + value
+
+
+class WorkerMetrics:
+    """Publishes this worker's stats to Redis and aggregates every worker's."""
+
+    def __init__(self, memory: MemoryService):
+        self.memory = memory
+        self._sources: Dict[str, Callable[[], Dict[str, Any]]] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._scripts: Dict[str, Any] = {}
+        self.started_at = time.time()
+
+    @property
+    def worker_id(self) -> str:
+        # Read on every call: with a preloaded app this object is created before the fork
+        return f"{socket.gethostname()}-{os.getpid()}"
+
+    def register(self, name: str, source: Callable[[], Dict[str, Any]]) -> None:
+        """Add a stats() callable whose result is published under name."""
+        self._sources[name] = source
+
+    def local_stats(self) -> Dict[str, Any]:
+        """Stats of this worker from every registered source."""
+        stats = {}
+        for name, source in self._sources.items():
+            try:
+                stats[name] = source()
+            except Exception as e:
+                logger.error(f"Failed to collect {name} stats: {str(e)}")
+        return stats
+
+    async def _script(self, name: str, source: str):
+        """Register a Lua script once per connection; EVALSHA is used afterwards."""
+        redis_client = await self.memory._setup_redis_connection()
+        if name not in self._scripts:
+            self._scripts[name] = redis_client.register_script(source)
+        return self._scripts[name]
+
+    def _snapshot(self) -> str:
+        return json.dumps({
+            "updated_at": time.time(),
+            "started_at": self.started_at,
+            "stats": self.local_stats(),
+            "metrics": metrics.snapshot()
+        })
+
+    async def publish(self) -> str:
+        """Write this worker's snapshot to Redis and return it."""
+        resident_memory.set(_resident_memory_bytes())
+        script = await self._script("publish", _PUBLISH_SCRIPT)
+        keys = [WORKER_METRICS_KEY, RETIRED_WORKER_KEY.format(self.worker_id)]
+        raw = self._snapshot()
+        if not await script(keys=keys, args=[self.worker_id, raw]):
+            # This worker stopped publishing long enough to be taken for stopped; its values so far are in the retired total
+            logger.warning(f"Metrics of worker {self.worker_id} were retired while it was paused, counting on from zero")
+            metrics.reset()
+            raw = self._snapshot()
+            await script(keys=keys, args=[self.worker_id, raw])
+        return raw
+
+    async def _retire(self, worker_id: str, raw: str, marker_seconds: int) -> bool:
+        """Add a worker's counters and histograms to the retired total and remove its snapshot."""
+        snapshot = json.loads(raw)
+        args: List[Any] = [worker_id, raw, marker_seconds]
+        for field, amount in metrics.retired_fields(snapshot.get("metrics", {})).items():
+            args += [field, amount]
+        script = await self._script("retire", _RETIRE_SCRIPT)
+        keys = [WORKER_METRICS_KEY, RETIRED_METRICS_KEY, RETIRED_WORKER_KEY.format(worker_id)]
+        return bool(await script(keys=keys, args=args))
+
+    async def retired_metrics(self) -> Dict[str, Dict[str, Any]]:
+        """Summed counters and histograms of every stopped worker, in the metrics snapshot format."""
+        redis_client = await self.memory._setup_redis_connection()
+        return metrics.retired_snapshot(await redis_client.hgetall(RETIRED_METRICS_KEY))
+
+    async def live_snapshots(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Read every live worker's snapshot, retiring those of stopped workers.
+
+        Returns:
+            Worker ID -> snapshot with stats and metrics
+        """
+        # Include this worker's current numbers even if its last publish is a few seconds old
+        await self.publish()
+        redis_client = await self.memory._setup_redis_connection()
+        entries = await redis_client.hgetall(WORKER_METRICS_KEY)
+
+        cutoff = time.time() - settings.WORKER_METRICS_INTERVAL_SECONDS * STALE_INTERVALS
+        workers = {}
+        for worker_id, raw in entries.items():
+            snapshot = json.loads(raw)
+            if snapshot["updated_at"] < cutoff:
+                if await self._retire(worker_id, raw, RETIRED_WORKER_TTL_SECONDS):
+                    logger.info(f"Retired the metrics of stopped worker {worker_id}")
+                continue
+            workers[worker_id] = snapshot
+        return workers
+
+    async def collect(self) -> Dict[str, Any]:
+        """
+        Read every live worker's stats.
+
+        Returns:
+            Dict with per-worker stats snapshots and the summed integer counters
+        """
+        workers = await self.live_snapshots()
+        for snapshot in workers.values():
+            # The metrics registry is served at /metrics
+            snapshot.pop("metrics", None)
+        return {"worker_count": len(workers), "totals": self.totals(workers), "workers": workers}
+
+    @staticmethod
+    def totals(workers: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+        """Integer counters of the workers' stats, summed."""
+        totals = {}
+        for snapshot in workers.values():
+            _sum_counters(totals, snapshot["stats"])
+        return totals
+
+    async def run(self) -> None:
+        """Publish until cancelled."""
+        while True:
+            try:
+                await self.publish()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Failed to publish worker metrics: {str(e)}")
+            await asyncio.sleep(settings.WORKER_METRICS_INTERVAL_SECONDS)
+
+    def start(self) -> None:
+        """Start publishing on the running event loop."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self.run())
+
+    async def stop(self) -> None:
+        """Stop publishing and move this worker's counters and histograms into the retired total."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        try:
+            await self._retire(self.worker_id, await self.publish(), 0)
+        except Exception as e:
+            logger.warning(f"Failed to retire worker metrics: {str(e)}")
+
+
+# Create singleton instance
+worker_metrics = WorkerMetrics(memory_service)
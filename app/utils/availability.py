@@ -0,0 +1,614 @@
+"""
+Precomputed availability index for healthcare providers.
+
+Provider availability is stored as free-text ranges such as "9:00 AM - 12:00 PM"
+per weekday. The ranges are parsed once into per-provider week-minute intervals
+and per-slot provider bitmaps, so "who is available now" and "next available
+slot" queries never re-interpret the text.
+"""
+
+import bisect
+import heapq
+import logging
+import re
+from datetime import datetime, timedelta
+from functools import lru_cache
+from itertools import islice
+from typing import Any, Dict, Iterable, Iterator, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+DAYS_OF_WEEK = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+MINUTES_PER_DAY = 24 * 60
+MINUTES_PER_WEEK = 7 * MINUTES_PER_DAY
+DEFAULT_SLOT_MINUTES = 15
+
+_DAY_LOOKUP = {}
+for _index, _day in enumerate(DAYS_OF_WEEK):
+    _DAY_LOOKUP[_day.lower()] = _index
+    _DAY_LOOKUP[_day[:3].lower()] = _index
+
+_TIME_PATTERN = re.compile(r"^(\d{1,2})(?:[:.](\d{2}))?\s*([ap])?\.?\s*(?:m\.?)?$", re.IGNORECASE)
+_RANGE_SEPARATOR = re.compile(r"\s*(?:-|–|—|\bto\b)\s*", re.IGNORECASE)
+
+
+def parse_time(text: str) -> int:
+    """
+    Parse a time of day such as "9:00 AM", "12 PM" or "14:30" into minutes since midnight.
+
+    Raises:
+        ValueError: If the text is not a recognised time of day
+    """
+    match = _TIME_PATTERN.match(text.strip())
+    if not match:
+        raise ValueError(f"Unrecognised time: {text!r}")
+
+    hour = int(match.group(1))
+    minute = int(match.group(2) or 0)
+    meridiem = (match.group(3) or "").lower()
+
+    if meridiem:
+        if not 1 <= hour <= 12:
+            raise ValueError(f"Invalid 12-hour time: {text!r}")
+        hour = hour % 12 + (12 if meridiem == "p" else 0)
+    elif hour > 24 or (hour == 24 and minute):
+        raise ValueError(f"Invalid 24-hour time: {text!r}")
+
+    if minute >= 60:
+        raise ValueError(f"Invalid minutes in time: {text!r}")
+
+    return hour * 60 + minute
+
+
+@lru_cache(maxsize=4096)
+def parse_time_range(text: str) -> Tuple[int, int]:
+    """
+    Parse a range such as "9:00 AM - 12:00 PM" into (start, end) minutes since midnight.
+
+    Ranges that end at or before their start run past midnight, so the end is
+    returned as a value greater than MINUTES_PER_DAY. Results are cached since
+    catalogues repeat the same handful of ranges many times.
+
+    Raises:
+        ValueError: If the text is not a recognised time range
+    """
+    parts = _RANGE_SEPARATOR.split(text.strip(), maxsplit=1)
+    if len(parts) != 2:
+        raise ValueError(f"Unrecognised time range: {text!r}")
+
+    start = parse_time(parts[0])
+    end = parse_time(parts[1])
+    if end <= start:
+        end += MINUTES_PER_DAY
+    return start, end
+
+
+def parse_day(name: str) -> int:
+    """
+    Convert a weekday name ("Monday", "mon") into its index, Monday being 0.
+
+    Raises:
+        ValueError: If the name is not a weekday
+    """
+    try:
+        return _DAY_LOOKUP[name.strip().lower()]
+    except KeyError:
+        raise ValueError(f"Unrecognised day of week: {name!r}")
+
+
+def format_minutes(minutes: int) -> str:
+    """Format minutes since midnight as a 12-hour time, e.g. 870 -> "2:30 PM"."""
+    minutes %= MINUTES_PER_DAY
+    hour, minute = divmod(minutes, 60)
+    meridiem = "AM" if hour < 12 else "PM"
+    return f"{hour % 12 or 12}:{minute:02d} {meridiem}"
+
+
+def week_minute(when: datetime) -> int:
+    """Minutes elapsed since Monday 00:00 of the week containing `when`."""
+    return when.weekday() * MINUTES_PER_DAY + when.hour * 60 + when.minute
+
+
+def normalise_key(value: Optional[str]) -> str:
+    """Normalise a specialty or city name for exact-match filtering."""
+    return " ".join((value or "").lower().split())
+
+
+def provider_city(record: Dict[str, Any]) -> str:
+    """Return the normalised city of a provider record ("Chicago, IL" -> "chicago")."""
+    city = record.get("city")
+    if not city:
+        city = (record.get("location") or "").split(",")[0]
+    return normalise_key(city)
+
+
+def parse_weekly_availability(availability: Dict[str, Iterable[str]]) -> List[Tuple[int, int]]:
+    """
+    Parse a weekday -> ranges mapping into sorted, merged week-minute intervals.
+
+    Invalid days or ranges are logged and skipped. Ranges that run past the end
+    of Sunday wrap around to Monday morning.
+
+    Args:
+        availability: Mapping such as {"Monday": ["9:00 AM - 12:00 PM"]}
+
+    Returns:
+        Non-overlapping (start, end) intervals in minutes since Monday 00:00
+    """
+    intervals = []
+    for day_name, ranges in (availability or {}).items():
+        try:
+            day_offset = parse_day(day_name) * MINUTES_PER_DAY
+        except ValueError as e:
+            logger.warning(f"Skipping availability entry: {e}")
+            continue
+
+        if isinstance(ranges, str):
+            ranges = [ranges]
+
+        for time_range in ranges or []:
+            try:
+                start, end = parse_time_range(time_range)
+            except ValueError as e:
+                logger.warning(f"Skipping availability range for {day_name}: {e}")
+                continue
+
+            start += day_offset
+            end += day_offset
+            if end > MINUTES_PER_WEEK:
+                intervals.append((start, MINUTES_PER_WEEK))
+                intervals.append((0, end - MINUTES_PER_WEEK))
+            else:
+                intervals.append((start, end))
+
+    # Merge overlapping or touching intervals
+    merged = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+class AvailabilityIndex:
+    """
+    Immutable index over provider availability.
+
+    Each provider is stored as a run of week-minute intervals (CSR layout:
+    offsets/starts/ends arrays). Every slot of the week additionally carries a
+    packed bitmap of the providers available during it, and every specialty and
+    city carries a packed provider mask, so filters are bitwise ANDs.
+    """
+
+    def __init__(self, slot_minutes: int = DEFAULT_SLOT_MINUTES):
+        if slot_minutes <= 0 or MINUTES_PER_DAY % slot_minutes:
+            raise ValueError("slot_minutes must be a positive divisor of 1440")
+
+        self.slot_minutes = slot_minutes
+        self.slots_per_week = MINUTES_PER_WEEK // slot_minutes
+
+        self.provider_ids: Sequence[str] = []
+        self._ordinals: Mapping[str, int] = {}
+        self._aligned = True
+
+        self._interval_offsets = np.zeros(1, dtype=np.int32)
+        self._interval_starts = np.zeros(0, dtype=np.int32)
+        self._interval_ends = np.zeros(0, dtype=np.int32)
+
+        self._slot_bits = np.zeros((self.slots_per_week, 0), dtype=np.uint8)
+        self._all_mask = np.zeros(0, dtype=np.uint8)
+        self._specialty_masks: Dict[str, np.ndarray] = {}
+        self._city_masks: Dict[str, np.ndarray] = {}
+
+    @classmethod
+    def from_providers(
+        cls,
+        providers: Iterable[Dict[str, Any]],
+        slot_minutes: int = DEFAULT_SLOT_MINUTES
+    ) -> "AvailabilityIndex":
+        """
+        Build an index from provider records.
+
+        Records need a `provider_id` and an `availability` mapping; `specialty`
+        and `city`/`location` are used for filtering. Records without an ID or
+        with a duplicate ID are skipped.
+        """
+        index = cls(slot_minutes)
+
+        specialty_members: Dict[str, List[int]] = {}
+        city_members: Dict[str, List[int]] = {}
+        offsets = [0]
+        starts: List[int] = []
+        ends: List[int] = []
+
+        for record in providers:
+            provider_id = str(record.get("provider_id") or "")
+            if not provider_id or provider_id in index._ordinals:
+                logger.warning(f"Skipping provider with missing or duplicate provider_id: {provider_id!r}")
+                continue
+
+            ordinal = len(index.provider_ids)
+            index._ordinals[provider_id] = ordinal
+            index.provider_ids.append(provider_id)
+
+            for start, end in parse_weekly_availability(record.get("availability") or {}):
+                starts.append(start)
+                ends.append(end)
+                if start % slot_minutes or end % slot_minutes:
+                    index._aligned = False
+            offsets.append(len(starts))
+
+            specialty_members.setdefault(normalise_key(record.get("specialty")), []).append(ordinal)
+            city_members.setdefault(provider_city(record), []).append(ordinal)
+
+        index._interval_offsets = np.asarray(offsets, dtype=np.int32)
+        index._interval_starts = np.asarray(starts, dtype=np.int32)
+        index._interval_ends = np.asarray(ends, dtype=np.int32)
+        index._build_bitmaps(specialty_members, city_members)
+        return index
+
+    @classmethod
+    def from_arrays(
+        cls,
+        provider_ids: Sequence[str],
+        ordinals: Mapping[str, int],
+        arrays: Dict[str, np.ndarray],
+        specialty_masks: Dict[str, np.ndarray],
+        city_masks: Dict[str, np.ndarray],
+        slot_minutes: int = DEFAULT_SLOT_MINUTES,
+        aligned: bool = True
+    ) -> "AvailabilityIndex":
+        """
+        Wrap prebuilt arrays (e.g. views over a memory-mapped snapshot) without copying.
+
+        Args:
+            provider_ids: Sequence mapping ordinal -> provider_id
+            ordinals: Mapping provider_id -> ordinal
+            arrays: The arrays produced by to_arrays()
+            specialty_masks: Normalised specialty -> packed provider mask
+            city_masks: Normalised city -> packed provider mask
+            slot_minutes: Slot size the arrays were built with
+            aligned: Whether every interval is aligned to the slot grid
+        """
+        index = cls(slot_minutes)
+        index.provider_ids = provider_ids
+        index._ordinals = ordinals
+        index._aligned = aligned
+        index._interval_offsets = arrays["interval_offsets"]
+        index._interval_starts = arrays["interval_starts"]
+        index._interval_ends = arrays["interval_ends"]
+        index._slot_bits = arrays["slot_bits"]
+        index._all_mask = arrays["all_mask"]
+        index._specialty_masks = specialty_masks
+        index._city_masks = city_masks
+        return index
+
+    def to_arrays(self) -> Dict[str, np.ndarray]:
+        """Return the index arrays for serialisation (see from_arrays)."""
+        return {
+            "interval_offsets": self._interval_offsets,
+            "interval_starts": self._interval_starts,
+            "interval_ends": self._interval_ends,
+            "slot_bits": self._slot_bits,
+            "all_mask": self._all_mask
+        }
+
+    @property
+    def aligned(self) -> bool:
+        """Whether every interval starts and ends on the slot grid."""
+        return self._aligned
+
+    @property
+    def specialty_masks(self) -> Dict[str, np.ndarray]:
+        """Normalised specialty -> packed provider mask."""
+        return self._specialty_masks
+
+    @property
+    def city_masks(self) -> Dict[str, np.ndarray]:
+        """Normalised city -> packed provider mask."""
+        return self._city_masks
+
+    def _build_bitmaps(self, specialty_members: Dict[str, List[int]], city_members: Dict[str, List[int]]):
+        """Build the per-slot provider bitmaps and the category masks."""
+        count = len(self.provider_ids)
+        covered = np.zeros((count, self.slots_per_week), dtype=bool)
+        slot = self.slot_minutes
+
+        for ordinal in range(count):
+            lo, hi = self._interval_offsets[ordinal], self._interval_offsets[ordinal + 1]
+            for start, end in zip(self._interval_starts[lo:hi], self._interval_ends[lo:hi]):
+                # Mark every slot the interval overlaps; exact bounds are checked on lookup when unaligned
+                covered[ordinal, start // slot:-(-end // slot)] = True
+
+        # Shape (slots, bytes): one packed provider bitmap per slot of the week
+        self._slot_bits = np.ascontiguousarray(np.packbits(covered, axis=0, bitorder="little").T)
+        self._all_mask = self._pack(range(count))
+        self._specialty_masks = {key: self._pack(members) for key, members in specialty_members.items() if key}
+        self._city_masks = {key: self._pack(members) for key, members in city_members.items() if key}
+
+    def _pack(self, ordinals: Iterable[int]) -> np.ndarray:
+        """Pack a collection of provider ordinals into a bitmap."""
+        flags = np.zeros(len(self.provider_ids), dtype=bool)
+        flags[list(ordinals)] = True
+        return np.packbits(flags, bitorder="little")
+
+    def _unpack(self, bits: np.ndarray) -> np.ndarray:
+        """Return the provider ordinals set in a bitmap."""
+        return np.flatnonzero(np.unpackbits(bits, count=len(self.provider_ids), bitorder="little"))
+
+    def __len__(self) -> int:
+        return len(self.provider_ids)
+
+    def __contains__(self, provider_id: str) -> bool:
+        return provider_id in self._ordinals
+
+    @property
+    def specialties(self) -> List[str]:
+        """Normalised specialties present in the index."""
+        return sorted(self._specialty_masks)
+
+    @property
+    def cities(self) -> List[str]:
+        """Normalised cities present in the index."""
+        return sorted(self._city_masks)
+
+    def filter_mask(
+        self,
+        specialty: Optional[str] = None,
+        city: Optional[str] = None,
+        provider_ids: Optional[Iterable[str]] = None
+    ) -> np.ndarray:
+        """
+        Build a packed provider mask for the given filters.
+
+        Unknown specialties, cities or provider IDs simply match nothing.
+        """
+        mask = self._all_mask
+        empty = np.zeros_like(self._all_mask)
+
+        if specialty:
+            mask = mask & self._specialty_masks.get(normalise_key(specialty), empty)
+        if city:
+            mask = mask & self._city_masks.get(normalise_key(city), empty)
+        if provider_ids is not None:
+            ordinals = [self._ordinals[pid] for pid in provider_ids if pid in self._ordinals]
+            mask = mask & self._pack(ordinals)
+        return mask
+
+    def _intervals(self, ordinal: int) -> Tuple[List[int], List[int]]:
+        lo, hi = self._interval_offsets[ordinal], self._interval_offsets[ordinal + 1]
+        return self._interval_starts[lo:hi].tolist(), self._interval_ends[lo:hi].tolist()
+
+    def _contains(self, ordinal: int, minute: int) -> bool:
+        """Check whether a provider is available at the given week minute."""
+        starts, ends = self._intervals(ordinal)
+        position = bisect.bisect_right(starts, minute) - 1
+        return position >= 0 and ends[position] > minute
+
+    def _iter_slots(self, ordinal: int, minute: int) -> Iterator[Tuple[int, int, int]]:
+        """
+        Yield a provider's bookable slots over the next week, earliest first.
+
+        Slots are `slot_minutes` long and laid out from the start of each
+        interval. Yields (minutes_from_now, slot_start, slot_end) where start
+        and end are week minutes (end may exceed MINUTES_PER_WEEK on wrap).
+        """
+        starts, ends = self._intervals(ordinal)
+        slot = self.slot_minutes
+        horizon = minute + MINUTES_PER_WEEK
+
+        # First interval that has not finished yet, then wrap around into next week
+        first = bisect.bisect_right(ends, minute)
+        order = [(i, 0) for i in range(first, len(starts))]
+        order += [(i, MINUTES_PER_WEEK) for i in range(0, min(first + 1, len(starts)))]
+
+        for i, base in order:
+            start, end = starts[i] + base, ends[i] + base
+            if start < minute:
+                start += -(-(minute - start) // slot) * slot
+            while start + slot <= end and start < horizon:
+                yield start - minute, start, start + slot
+                start += slot
+
+    def _tagged_slots(self, ordinal: int, minute: int) -> Iterator[Tuple[int, int, int, int]]:
+        """Slot stream keyed for merging: (minutes_from_now, ordinal, start, end)."""
+        for offset, start, end in self._iter_slots(ordinal, minute):
+            yield offset, ordinal, start, end
+
+    def _slot_result(self, ordinal: int, offset: int, start: int, end: int, now: datetime) -> Dict[str, Any]:
+        start_at = now.replace(second=0, microsecond=0) + timedelta(minutes=offset)
+        return {
+            "provider_id": self.provider_ids[ordinal],
+            "day": DAYS_OF_WEEK[(start % MINUTES_PER_WEEK) // MINUTES_PER_DAY],
+            "start": format_minutes(start),
+            "end": format_minutes(end),
+            "start_at": start_at.isoformat(),
+            "minutes_from_now": offset
+        }
+
+    def is_available(self, provider_id: str, when: Optional[datetime] = None) -> bool:
+        """Check whether a single provider is available at `when` (default: now)."""
+        ordinal = self._ordinals.get(provider_id)
+        if ordinal is None:
+            return False
+        return self._contains(ordinal, week_minute(when or datetime.now()))
+
+    def available_ordinals(
+        self,
+        when: Optional[datetime] = None,
+        specialty: Optional[str] = None,
+        city: Optional[str] = None
+    ) -> np.ndarray:
+        """Return the ordinals of providers available at `when` (default: now), in index order."""
+        minute = week_minute(when or datetime.now())
+        bits = self._slot_bits[minute // self.slot_minutes] & self.filter_mask(specialty, city)
+        ordinals = self._unpack(bits)
+
+        if not self._aligned:
+            ordinals = np.asarray([o for o in ordinals if self._contains(o, minute)], dtype=np.int64)
+        return ordinals
+
+    def available_now(
+        self,
+        when: Optional[datetime] = None,
+        specialty: Optional[str] = None,
+        city: Optional[str] = None
+    ) -> List[str]:
+        """
+        Return the IDs of providers available at `when` (default: now).
+
+        Args:
+            when: Point in time to check
+            specialty: Optional specialty filter
+            city: Optional city filter
+
+        Returns:
+            Provider IDs in index order
+        """
+        return [self.provider_ids[o] for o in self.available_ordinals(when, specialty, city)]
+
+    def next_available(
+        self,
+        when: Optional[datetime] = None,
+        specialty: Optional[str] = None,
+        city: Optional[str] = None,
+        provider_ids: Optional[Iterable[str]] = None
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Find the earliest bookable slot among the matching providers.
+
+        The week's slot bitmaps are scanned forward from `when` a day at a time
+        to find the first slot with any matching provider; only the providers
+        set in that slot are then expanded into exact slots.
+
+        Returns:
+            The earliest slot, or None if no matching provider has availability
+        """
+        now = when or datetime.now()
+        minute = week_minute(now)
+        mask = self.filter_mask(specialty, city, provider_ids)
+        if not mask.any():
+            return None
+
+        slots_per_day = MINUTES_PER_DAY // self.slot_minutes
+        if self._aligned:
+            # Slots start on the grid, so the first bookable one starts at the next boundary
+            first_slot = -(-minute // self.slot_minutes)
+            lookahead = 1
+        else:
+            # Unaligned intervals may only partially cover a slot, so look a little further
+            first_slot = minute // self.slot_minutes
+            lookahead = 3
+
+        for day in range(8):
+            order = (first_slot + np.arange(day * slots_per_day, (day + 1) * slots_per_day)) % self.slots_per_week
+            hits = np.flatnonzero((self._slot_bits[order] & mask).any(axis=1))
+            if not len(hits):
+                continue
+
+            candidates = set()
+            for hit in order[hits[:lookahead]]:
+                candidates.update(self._unpack(self._slot_bits[hit] & mask).tolist())
+
+            best = None
+            for ordinal in candidates:
+                slot = next(self._iter_slots(ordinal, minute), None)
+                if slot is not None and (best is None or (slot[0], ordinal) < (best[0][0], best[1])):
+                    best = (slot, ordinal)
+            if best is not None:
+                return self._slot_result(best[1], *best[0], now)
+            break
+
+        # Fall back to the exhaustive merge for pathological schedules
+        slots = self.earliest_slots(1, now, specialty, city, provider_ids)
+        return slots[0] if slots else None
+
+    def _prune_for_earliest(self, mask: np.ndarray, minute: int, k: int) -> np.ndarray:
+        """
+        Narrow a provider mask to the providers that can hold one of the k earliest slots.
+
+        With slot-aligned intervals every set bit in a slot bitmap is a bookable
+        slot, so once k distinct providers have been seen while scanning forward
+        no other provider can start earlier. Only valid when the index is aligned.
+        """
+        first_slot = -(-minute // self.slot_minutes)
+        seen = np.zeros_like(mask)
+
+        for step in range(self.slots_per_week):
+            seen |= self._slot_bits[(first_slot + step) % self.slots_per_week] & mask
+            if np.count_nonzero(np.unpackbits(seen)) >= k:
+                return seen
+        return mask
+
+    def earliest_slots(
+        self,
+        k: int = 5,
+        when: Optional[datetime] = None,
+        specialty: Optional[str] = None,
+        city: Optional[str] = None,
+        provider_ids: Optional[Iterable[str]] = None,
+        max_per_provider: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Return the k earliest bookable slots across all matching providers.
+
+        Each provider contributes a lazily generated, time-ordered stream of
+        slots and the streams are combined with a heap merge, so only as many
+        slots as needed are ever materialised.
+
+        Args:
+            k: Number of slots to return
+            when: Start of the search window (default: now)
+            specialty: Optional specialty filter
+            city: Optional city filter
+            provider_ids: Optional restriction to specific providers
+            max_per_provider: Optional cap on slots returned per provider
+
+        Returns:
+            Slot dictionaries ordered by start time
+        """
+        now = when or datetime.now()
+        minute = week_minute(now)
+        mask = self.filter_mask(specialty, city, provider_ids)
+        if self._aligned:
+            mask = self._prune_for_earliest(mask, minute, k)
+        ordinals = self._unpack(mask).tolist()
+
+        streams = []
+        for ordinal in ordinals:
+            slots = self._tagged_slots(ordinal, minute)
+            if max_per_provider:
+                slots = islice(slots, max_per_provider)
+            streams.append(slots)
+
+        return [
+            self._slot_result(ordinal, offset, start, end, now)
+            for offset, ordinal, start, end in islice(heapq.merge(*streams), k)
+        ]
+
+    def weekly_schedule(self, provider_id: str, day_of_week: Optional[str] = None) -> Dict[str, List[str]]:
+        """
+        Return a provider's schedule as formatted ranges per weekday.
+
+        Args:
+            provider_id: Provider to look up
+            day_of_week: Optional day to restrict the schedule to
+
+        Raises:
+            KeyError: If the provider is not indexed
+            ValueError: If day_of_week is not a weekday
+        """
+        ordinal = self._ordinals[provider_id]
+        only_day = parse_day(day_of_week) if day_of_week else None
+
+        schedule: Dict[str, List[str]] = {}
+        for start, end in zip(*self._intervals(ordinal)):
+            day = start // MINUTES_PER_DAY
+            if only_day is not None and day != only_day:
+                continue
+            schedule.setdefault(DAYS_OF_WEEK[day], []).append(f"{format_minutes(start)} - {format_minutes(end)}")
+        return schedule
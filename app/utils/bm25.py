@@ -0,0 +1,217 @@
+"""
+Fielded BM25 inverted index and reciprocal rank fusion.
+
+Each field (name, specialty, hospital, location) has its own postings in CSR
+layout: for term id t, `offsets[t]:offsets[t + 1]` slices the rows containing
+the term and their term frequencies. Queries are a list of clauses, each a piece
+of text with per-field boosts, so structured tool arguments can weight the
+fields they describe.
+"""
+
+import json
+import logging
+import os
+import re
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+BM25_FIELDS = ("name", "specialty", "hospital", "location")
+RRF_K = 60
+
+_TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+_STOPWORDS = frozenset({
+    "a", "an", "and", "at", "by", "doctor", "doctors", "dr", "for", "in", "me", "my",
+    "near", "nearby", "of", "on", "the", "to", "with", "find", "need", "want", "about", "information"
+})
+
+# A query clause: text plus the boost applied to each field it should match
+Clause = Tuple[str, Dict[str, float]]
+
+
+def provider_fields(record: Dict[str, str]) -> Dict[str, str]:
+    """Extract the indexed fields of a provider record; the city is folded into location."""
+    location = record.get("location") or ""
+    city = record.get("city") or ""
+    if city and city.lower() not in location.lower():
+        location = f"{location} {city}".strip()
+    return {
+        "name": record.get("name") or "",
+        "specialty": record.get("specialty") or "",
+        "hospital": record.get("hospital") or "",
+        "location": location
+    }
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    """Lowercase text and split it into alphanumeric terms, dropping stopwords."""
+    return [token for token in _TOKEN_PATTERN.findall((text or "").lower()) if token not in _STOPWORDS]
+
+
+class BM25Index:
+    """Immutable fielded BM25 index over a fixed set of rows."""
+
+    def __init__(
+        self,
+        vocabulary: Dict[str, int],
+        arrays: Dict[str, np.ndarray],
+        count: int,
+        k1: float = 1.2,
+        b: float = 0.75
+    ):
+        self.vocabulary = vocabulary
+        self.arrays = arrays
+        self.count = count
+        self.k1 = k1
+        self.b = b
+        self._average_lengths = {
+            field: float(arrays[f"{field}_lengths"].mean()) if count else 0.0
+            for field in BM25_FIELDS
+        }
+
+    @classmethod
+    def build(cls, documents: Iterable[Dict[str, str]], k1: float = 1.2, b: float = 0.75) -> "BM25Index":
+        """
+        Build an index from documents, one per row.
+
+        Args:
+            documents: Mappings of field name to text, in row order
+            k1: Term frequency saturation
+            b: Length normalisation strength
+        """
+        vocabulary: Dict[str, int] = {}
+        postings: Dict[str, Dict[int, Dict[int, int]]] = {field: {} for field in BM25_FIELDS}
+        lengths: Dict[str, List[int]] = {field: [] for field in BM25_FIELDS}
+
+        count = 0
+        for row, document in enumerate(documents):
+            count += 1
+            for field in BM25_FIELDS:
+                tokens = tokenize(document.get(field))
+                lengths[field].append(len(tokens))
+                field_postings = postings[field]
+                for token in tokens:
+                    term = vocabulary.setdefault(token, len(vocabulary))
+                    rows = field_postings.setdefault(term, {})
+                    rows[row] = rows.get(row, 0) + 1
+
+        arrays: Dict[str, np.ndarray] = {}
+        for field in BM25_FIELDS:
+            offsets = np.zeros(len(vocabulary) + 1, dtype=np.int64)
+            row_chunks: List[List[int]] = []
+            tf_chunks: List[List[int]] = []
+            for term in range(len(vocabulary)):
+                rows = postings[field].get(term, {})
+                offsets[term + 1] = offsets[term] + len(rows)
+                row_chunks.append(list(rows.keys()))
+                tf_chunks.append(list(rows.values()))
+            arrays[f"{field}_offsets"] = offsets
+            arrays[f"{field}_rows"] = np.fromiter((r for chunk in row_chunks for r in chunk), dtype=np.int32)
+            arrays[f"{field}_tfs"] = np.fromiter((t for chunk in tf_chunks for t in chunk), dtype=np.float32)
+            arrays[f"{field}_lengths"] = np.asarray(lengths[field], dtype=np.float32)
+
+        return cls(vocabulary, arrays, count, k1, b)
+
+    def __len__(self) -> int:
+        return self.count
+
+    def scores(self, clauses: Sequence[Clause], mask: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Score every row against the query clauses.
+
+        Args:
+            clauses: (text, {field: boost}) pairs
+            mask: Optional boolean array; rows where it is False score zero
+
+        Returns:
+            Float32 array of scores, one per row
+        """
+        scores = np.zeros(self.count, dtype=np.float32)
+        for text, boosts in clauses:
+            for token in tokenize(text):
+                term = self.vocabulary.get(token)
+                if term is None:
+                    continue
+                for field, boost in boosts.items():
+                    offsets = self.arrays[f"{field}_offsets"]
+                    start, end = offsets[term], offsets[term + 1]
+                    if start == end:
+                        continue
+                    rows = self.arrays[f"{field}_rows"][start:end]
+                    tfs = self.arrays[f"{field}_tfs"][start:end]
+                    idf = np.log(1.0 + (self.count - (end - start) + 0.5) / ((end - start) + 0.5))
+                    norm = self.k1 * (1.0 - self.b + self.b * self.arrays[f"{field}_lengths"][rows] / self._average_lengths[field])
+                    # Rows are unique within a posting list, so fancy-index addition is safe
+                    scores[rows] += boost * idf * tfs * (self.k1 + 1.0) / (tfs + norm)
+        if mask is not None:
+            scores[~mask] = 0.0
+        return scores
+
+    def search(self, clauses: Sequence[Clause], k: int, mask: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Find the k best-scoring rows with a non-zero score.
+
+        Returns:
+            Tuple of (row numbers, scores), best first
+        """
+        scores = self.scores(clauses, mask)
+        matched = np.flatnonzero(scores)
+        if len(matched) > k:
+            matched = matched[np.argpartition(-scores[matched], k - 1)[:k]]
+        best = matched[np.argsort(-scores[matched], kind="stable")]
+        return best, scores[best]
+
+    def save(self, path: str, version: str) -> None:
+        """
+        Save the index into a directory as bm25_*.npy arrays plus a vocabulary file.
+
+        Write into a new directory (see vector_index.staging_directory), never
+        one a running process has mapped: the arrays are overwritten in place.
+        """
+        os.makedirs(path, exist_ok=True)
+        for name, array in self.arrays.items():
+            np.save(os.path.join(path, f"bm25_{name}.npy"), np.ascontiguousarray(array))
+        meta = {"version": version, "count": self.count, "k1": self.k1, "b": self.b, "vocabulary": self.vocabulary}
+        tmp_path = os.path.join(path, "bm25.json.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(meta, f, separators=(",", ":"))
+        os.replace(tmp_path, os.path.join(path, "bm25.json"))
+        logger.info(f"Wrote BM25 index with {self.count} rows and {len(self.vocabulary)} terms to {path}")
+
+    @classmethod
+    def load(cls, path: str) -> Tuple["BM25Index", str]:
+        """
+        Memory-map an index saved by save.
+
+        Returns:
+            Tuple of (index, catalogue version it was built from)
+        """
+        with open(os.path.join(path, "bm25.json"), encoding="utf-8") as f:
+            meta = json.load(f)
+        arrays = {
+            f"{field}_{part}": np.load(os.path.join(path, f"bm25_{field}_{part}.npy"), mmap_mode="r")
+            for field in BM25_FIELDS
+            for part in ("offsets", "rows", "tfs", "lengths")
+        }
+        return cls(meta["vocabulary"], arrays, meta["count"], meta["k1"], meta["b"]), meta["version"]
+
+
+def reciprocal_rank_fusion(rankings: Sequence[Sequence[int]], k: int = RRF_K) -> List[Tuple[int, float]]:
+    """
+    Fuse ranked lists with reciprocal rank fusion (score = sum of 1 / (k + rank)).
+
+    Args:
+        rankings: Ranked row lists, best first
+        k: Rank smoothing constant
+
+    Returns:
+        (row, fused score) pairs, best first
+    """
+    fused: Dict[int, float] = {}
+    for ranking in rankings:
+        for rank, row in enumerate(ranking, start=1):
+            fused[int(row)] = fused.get(int(row), 0.0) + 1.0 / (k + rank)
+    return sorted(fused.items(), key=lambda item: (-item[1], item[0]))
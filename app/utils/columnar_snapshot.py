@@ -0,0 +1,347 @@
+"""
+Memory-mapped columnar provider snapshot.
+
+The provider catalogue is laid out on disk as fixed-width columns so the API
+can open it with mmap and read records straight from the mapped pages: opening
+costs the same regardless of catalogue size, and the pages are shared by every
+worker process through the OS page cache.
+
+File layout (all integers little-endian):
+
+    magic "NVPC" | u32 format version | u64 header length | JSON header | padding
+    data sections, each 8-byte aligned
+
+The JSON header holds the snapshot metadata and a table of sections
+(relative offset, dtype, shape). Columns are:
+
+- provider_id, name: string tables (int64 offsets + UTF-8 blob)
+- specialty, city, location, hospital: int32 codes into a string dictionary
+- extra: string table of JSON objects holding any remaining record fields
+- id_hash: open-addressing hash table (crc32 of provider_id -> ordinal)
+- availability: interval CSR arrays, per-slot provider bitmaps and the
+  per-specialty / per-city provider masks of the AvailabilityIndex
+"""
+
+import json
+import logging
+import mmap
+import os
+import struct
+import zlib
+from collections.abc import Mapping
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.utils.availability import AvailabilityIndex
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+MAGIC = b"NVPC"
+COLUMNAR_FORMAT_VERSION = 1
+_PREAMBLE = struct.Struct("<4sIQ")
+_ALIGNMENT = 8
+
+# Columns stored as plain string tables
+_STRING_COLUMNS = ("provider_id", "name")
+# Low-cardinality columns stored as dictionary codes
+_DICT_COLUMNS = ("specialty", "city", "location", "hospital")
+# Fields with a dedicated representation; everything else goes to the "extra" column
+_KNOWN_FIELDS = set(_STRING_COLUMNS) | set(_DICT_COLUMNS) | {"availability"}
+
+
+def _align(offset: int) -> int:
+    return -(-offset // _ALIGNMENT) * _ALIGNMENT
+
+
+def _string_table(values: Sequence[str]) -> Tuple[np.ndarray, np.ndarray]:
+    """Encode strings as (int64 offsets, uint8 UTF-8 blob)."""
+    encoded = [value.encode("utf-8") for value in values]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(value) for value in encoded], out=offsets[1:])
+    blob = np.frombuffer(b"".join(encoded), dtype=np.uint8)
+    return offsets, blob
+
+
+def _hash_table(provider_ids: Sequence[str]) -> np.ndarray:
+    """Build an open-addressing table of provider ordinals keyed by crc32(provider_id)."""
+    size = 1
+    while size < 2 * max(len(provider_ids), 1):
+        size <<= 1
+    table = np.full(size, -1, dtype=np.int32)
+    mask = size - 1
+    for ordinal, provider_id in enumerate(provider_ids):
+        slot = zlib.crc32(provider_id.encode("utf-8")) & mask
+        while table[slot] != -1:
+            slot = (slot + 1) & mask
+        table[slot] = ordinal
+    return table
+
+
+def write_columnar_snapshot(
+    providers: List[Dict[str, Any]],
+    path: str,
+    version: str,
+    index: Optional[AvailabilityIndex] = None
+) -> Dict[str, Any]:
+    """
+    Write provider records as a memory-mappable columnar snapshot.
+
+    Args:
+        providers: Normalised provider records with unique provider_ids
+        path: Destination file path
+        version: Content version to record (normally the JSON snapshot version)
+        index: Optional prebuilt availability index over the same records
+
+    Returns:
+        The snapshot metadata
+    """
+    index = index or AvailabilityIndex.from_providers(providers)
+    by_id = {record["provider_id"]: record for record in providers}
+    # Column order follows the availability index so ordinals agree everywhere
+    records = [by_id[provider_id] for provider_id in index.provider_ids]
+
+    sections: Dict[str, np.ndarray] = {}
+    dictionaries: Dict[str, List[str]] = {}
+
+    for column in _STRING_COLUMNS:
+        sections[f"{column}.offsets"], sections[f"{column}.blob"] = _string_table(
+            [str(record.get(column) or "") for record in records]
+        )
+
+    for column in _DICT_COLUMNS:
+        values = [str(record.get(column) or "") for record in records]
+        dictionary = sorted(set(values))
+        codes = {value: code for code, value in enumerate(dictionary)}
+        sections[f"{column}.codes"] = np.asarray([codes[value] for value in values], dtype=np.int32)
+        dictionaries[column] = dictionary
+
+    extras = [
+        {key: value for key, value in record.items() if key not in _KNOWN_FIELDS}
+        for record in records
+    ]
+    sections["extra.offsets"], sections["extra.blob"] = _string_table(
+        [json.dumps(extra, separators=(",", ":")) if extra else "" for extra in extras]
+    )
+
+    sections["id_hash"] = _hash_table(index.provider_ids)
+
+    for name, array in index.to_arrays().items():
+        sections[f"availability.{name}"] = array
+
+    specialty_keys = sorted(index.specialty_masks)
+    city_keys = sorted(index.city_masks)
+    empty_masks = np.zeros((0, len(index.to_arrays()["all_mask"])), dtype=np.uint8)
+    sections["availability.specialty_masks"] = (
+        np.stack([index.specialty_masks[key] for key in specialty_keys]) if specialty_keys else empty_masks
+    )
+    sections["availability.city_masks"] = (
+        np.stack([index.city_masks[key] for key in city_keys]) if city_keys else empty_masks
+    )
+
+    # Lay out the sections relative to the start of the data area
+    table = {}
+    offset = 0
+    for name, array in sections.items():
+        array = np.ascontiguousarray(array)
+        sections[name] = array
+        table[name] = {"offset": offset, "dtype": array.dtype.str, "shape": list(array.shape)}
+        offset = _align(offset + array.nbytes)
+
+    header = {
+        "format": "nivaran-providers-columnar",
+        "version": version,
+        "created_at": datetime.now(timezone.utc).replace(microsecond=0).isoformat(),
+        "count": len(records),
+        "slot_minutes": index.slot_minutes,
+        "aligned": index.aligned,
+        "dictionaries": dictionaries,
+        "specialty_keys": specialty_keys,
+        "city_keys": city_keys,
+        "sections": table
+    }
+    header_bytes = json.dumps(header, separators=(",", ":")).encode("utf-8")
+    data_start = _align(_PREAMBLE.size + len(header_bytes))
+
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(_PREAMBLE.pack(MAGIC, COLUMNAR_FORMAT_VERSION, len(header_bytes)))
+        f.write(header_bytes)
+        for name, array in sections.items():
+            f.seek(data_start + table[name]["offset"])
+            f.write(array.tobytes())
+        # Pad to the end of the last aligned section so every view stays inside the file
+        f.truncate(data_start + offset)
+    os.replace(tmp_path, path)
+
+    metadata = {key: header[key] for key in ("version", "created_at", "count")}
+    logger.info(f"Wrote columnar snapshot {path} with {len(records)} providers (version {version})")
+    return metadata
+
+
+class _StringColumn(Sequence):
+    """Read-only string column backed by a mapped offsets array and UTF-8 blob."""
+
+    def __init__(self, buffer: mmap.mmap, offsets: np.ndarray, blob_start: int):
+        self._buffer = buffer
+        self._offsets = offsets
+        self._blob_start = blob_start
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def raw(self, ordinal: int) -> bytes:
+        start = self._blob_start + int(self._offsets[ordinal])
+        end = self._blob_start + int(self._offsets[ordinal + 1])
+        return self._buffer[start:end]
+
+    def __getitem__(self, ordinal: int) -> str:
+        if not -len(self) <= ordinal < len(self):
+            raise IndexError(ordinal)
+        return self.raw(ordinal % len(self)).decode("utf-8")
+
+
+class _HashIndex(Mapping):
+    """Read-only provider_id -> ordinal mapping backed by the mapped hash table."""
+
+    def __init__(self, table: np.ndarray, ids: _StringColumn):
+        self._table = table
+        self._mask = len(table) - 1
+        self._ids = ids
+
+    def __getitem__(self, provider_id: str) -> int:
+        key = provider_id.encode("utf-8")
+        slot = zlib.crc32(key) & self._mask
+        while True:
+            ordinal = int(self._table[slot])
+            if ordinal == -1:
+                raise KeyError(provider_id)
+            if self._ids.raw(ordinal) == key:
+                return ordinal
+            slot = (slot + 1) & self._mask
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._ids)
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+
+class ColumnarSnapshot(Mapping):
+    """
+    A memory-mapped columnar provider snapshot.
+
+    Behaves as a read-only mapping of provider_id -> provider record; records
+    are materialised from the mapped columns on access.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            self._buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, format_version, header_length = _PREAMBLE.unpack_from(self._buffer, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a columnar provider snapshot")
+        if format_version != COLUMNAR_FORMAT_VERSION:
+            raise ValueError(f"Unsupported columnar snapshot version: {format_version}")
+
+        self.header = json.loads(self._buffer[_PREAMBLE.size:_PREAMBLE.size + header_length])
+        self._data_start = _align(_PREAMBLE.size + header_length)
+        self.version: str = self.header["version"]
+        self.created_at = datetime.fromisoformat(self.header["created_at"])
+
+        self._dictionaries = self.header["dictionaries"]
+        self._strings = {
+            column: _StringColumn(
+                self._buffer,
+                self._section(f"{column}.offsets"),
+                self._data_start + self.header["sections"][f"{column}.blob"]["offset"]
+            )
+            for column in _STRING_COLUMNS + ("extra",)
+        }
+        self._codes = {column: self._section(f"{column}.codes") for column in _DICT_COLUMNS}
+        self.provider_ids = self._strings["provider_id"]
+        self._ordinals = _HashIndex(self._section("id_hash"), self.provider_ids)
+
+    def _section(self, name: str) -> np.ndarray:
+        """Return a zero-copy numpy view of a section of the mapped file."""
+        spec = self.header["sections"][name]
+        dtype = np.dtype(spec["dtype"])
+        count = int(np.prod(spec["shape"])) if spec["shape"] else 1
+        array = np.frombuffer(self._buffer, dtype=dtype, count=count, offset=self._data_start + spec["offset"])
+        return array.reshape(spec["shape"])
+
+    def __len__(self) -> int:
+        return len(self.provider_ids)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.provider_ids)
+
+    def __contains__(self, provider_id: object) -> bool:
+        return isinstance(provider_id, str) and provider_id in self._ordinals
+
+    def __getitem__(self, provider_id: str) -> Dict[str, Any]:
+        return self.record(self._ordinals[provider_id])
+
+    def ordinal(self, provider_id: str) -> Optional[int]:
+        """Return the ordinal of a provider, or None if unknown."""
+        return self._ordinals.get(provider_id)
+
+    def field(self, ordinal: int, column: str) -> str:
+        """Read a single string field without materialising the whole record."""
+        if column in self._codes:
+            return self._dictionaries[column][int(self._codes[column][ordinal])]
+        return self._strings[column][ordinal]
+
+    def record(self, ordinal: int) -> Dict[str, Any]:
+        """Materialise the provider record stored at an ordinal."""
+        record: Dict[str, Any] = {column: self.field(ordinal, column) for column in _STRING_COLUMNS}
+        for column in _DICT_COLUMNS:
+            value = self.field(ordinal, column)
+            if value:
+                record[column] = value
+
+        extra = self._strings["extra"][ordinal]
+        if extra:
+            record.update(json.loads(extra))
+
+        record["availability"] = self.availability_index().weekly_schedule(record["provider_id"])
+        return record
+
+    def availability_index(self) -> AvailabilityIndex:
+        """Return an AvailabilityIndex reading directly from the mapped arrays."""
+        index = getattr(self, "_availability", None)
+        if index is None:
+            arrays = {
+                name: self._section(f"availability.{name}")
+                for name in ("interval_offsets", "interval_starts", "interval_ends", "slot_bits", "all_mask")
+            }
+            specialty_masks = self._section("availability.specialty_masks")
+            city_masks = self._section("availability.city_masks")
+            index = AvailabilityIndex.from_arrays(
+                self.provider_ids,
+                self._ordinals,
+                arrays,
+                {key: specialty_masks[i] for i, key in enumerate(self.header["specialty_keys"])},
+                {key: city_masks[i] for i, key in enumerate(self.header["city_keys"])},
+                slot_minutes=self.header["slot_minutes"],
+                aligned=self.header["aligned"]
+            )
+            self._availability = index
+        return index
+
+    def close(self) -> None:
+        """
+        Release the mapping if nothing still references it.
+
+        Numpy views over the mapping keep it alive; in that case the pages are
+        released once the last view is garbage collected.
+        """
+        try:
+            self._buffer.close()
+        except BufferError:
+            logger.debug(f"Columnar snapshot {self.path} still has live views; leaving it mapped")
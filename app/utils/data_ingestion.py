@@ -1,56 +1,450 @@
 import json
 import os
+import re
 import logging
+import shutil
 import time
-from typing import List, Dict, Any
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from typing import List, Dict, Any, Iterator, Optional, Tuple
 import asyncio
 
-# Vector store functionality has been removed
-# from app.services.vector_store import vector_store
+from app.config.settings import settings
+from app.utils.availability import DAYS_OF_WEEK, AvailabilityIndex, format_minutes, parse_day, parse_time_range, provider_city
+from app.utils.bm25 import BM25Index, provider_fields
+from app.utils.columnar_snapshot import write_columnar_snapshot
+from app.utils.geo import GeoIndex, parse_coordinates, record_coordinates
+from app.utils.normalizer import query_normalizer
+from app.utils.provider_snapshot import write_snapshot
+from app.utils.vector_index import (
+    HashingEmbedder,
+    build_index,
+    provider_document,
+    publish_directory,
+    save_index,
+    staging_directory
+)
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
-async def ingest_doctor_data(data_file: str) -> int:
+# Number of records sent to a worker process at a time
+DEFAULT_CHUNK_SIZE = 2000
+
+# Read size used when streaming JSON array files
+_READ_SIZE = 1 << 20
+_WHITESPACE = re.compile(r"\s*")
+_SEPARATORS = re.compile(r"[\s,]*")
+
+# Alternative field names seen in provider catalogue dumps
+_ID_FIELDS = ("provider_id", "id", "doctor_id")
+
+class IngestionStats:
+    """Counters collected while ingesting provider data"""
+
+    def __init__(self):
+        self.read = 0
+        self.valid = 0
+        self.invalid = 0
+        self.duplicates = 0
+        self.unique = 0
+        self.started_at = time.perf_counter()
+        self.elapsed = 0.0
+
+    @property
+    def records_per_second(self) -> float:
+        elapsed = self.elapsed or (time.perf_counter() - self.started_at)
+        return self.read / elapsed if elapsed > 0 else 0.0
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "read": self.read,
+            "valid": self.valid,
+            "invalid": self.invalid,
+            "duplicates": self.duplicates,
+            "unique": self.unique,
+            "elapsed_seconds": round(self.elapsed, 3),
+            "records_per_second": round(self.records_per_second, 1)
+        }
+
+def _iter_jsonl(path: str) -> Iterator[str]:
+    """Yield the raw non-empty lines of a JSONL file without loading the file."""
+    with open(path, "r", encoding="utf-8-sig") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                yield line
+
+def _iter_json_array(path: str) -> Iterator[Any]:
+    """
+    Incrementally decode the elements of a top-level JSON array.
+
+    The file is read in fixed-size blocks and each element is decoded as soon
+    as it is complete, so memory use is bounded by the block and record size.
+    """
+    decoder = json.JSONDecoder()
+    buffer = ""
+    position = 0
+    eof = False
+    started = False
+
+    with open(path, "r", encoding="utf-8-sig") as f:
+        while True:
+            position = (_SEPARATORS if started else _WHITESPACE).match(buffer, position).end()
+            if position >= len(buffer):
+                if eof:
+                    return
+                buffer = f.read(_READ_SIZE)
+                position = 0
+                eof = not buffer
+                continue
+
+            if not started:
+                if buffer[position] != "[":
+                    raise ValueError(f"{path} does not contain a JSON array")
+                started = True
+                position += 1
+                continue
+
+            if buffer[position] == "]":
+                return
+
+            try:
+                element, position = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                # Element is incomplete, keep the unread tail and read more of the file
+                block = f.read(_READ_SIZE)
+                eof = not block
+                buffer = buffer[position:] + block
+                position = 0
+                continue
+
+            yield element
+
+def iter_raw_records(path: str) -> Iterator[Any]:
+    """Stream raw records from a JSON array or JSONL file (JSONL lines are yielded undecoded)."""
+    if path.endswith(".jsonl"):
+        return _iter_jsonl(path)
+    return _iter_json_array(path)
+
+def _normalise_availability(availability: Any) -> Dict[str, List[str]]:
+    """Validate availability ranges and rewrite them in the canonical "9:00 AM - 12:00 PM" form."""
+    normalised: Dict[str, List[str]] = {}
+    if not isinstance(availability, dict):
+        return normalised
+
+    for day_name, ranges in availability.items():
+        try:
+            day = DAYS_OF_WEEK[parse_day(str(day_name))]
+        except ValueError:
+            continue
+
+        if isinstance(ranges, str):
+            ranges = [ranges]
+
+        for time_range in ranges or []:
+            canonical = _canonical_range(str(time_range))
+            if canonical:
+                normalised.setdefault(day, []).append(canonical)
+
+    return normalised
+
+@lru_cache(maxsize=4096)
+def _canonical_range(time_range: str) -> Optional[str]:
+    """Canonical form of a time range, or None if it cannot be parsed."""
+    try:
+        start, end = parse_time_range(time_range)
+    except ValueError:
+        return None
+    return f"{format_minutes(start)} - {format_minutes(end)}"
+
+def normalise_provider(raw: Any) -> Optional[Dict[str, Any]]:
+    """
+    Validate and normalise a single provider record.
+
+    Args:
+        raw: A decoded record or an undecoded JSON line
+
+    Returns:
+        The normalised record, or None if the record is invalid
+    """
+    if isinstance(raw, str):
+        try:
+            raw = json.loads(raw)
+        except json.JSONDecodeError:
+            return None
+
+    if not isinstance(raw, dict):
+        return None
+
+    provider_id = next((str(raw[field]).strip() for field in _ID_FIELDS if raw.get(field)), "")
+    name = " ".join(str(raw.get("name") or "").split())
+    if not provider_id or not name:
+        return None
+
+    record = {
+        "provider_id": provider_id,
+        "name": name,
+        "specialty": " ".join(str(raw.get("specialty") or "").split()).title(),
+        "location": " ".join(str(raw.get("location") or "").split()),
+        "availability": _normalise_availability(raw.get("availability"))
+    }
+
+    if raw.get("hospital") or raw.get("hospital_name"):
+        record["hospital"] = " ".join(str(raw.get("hospital") or raw.get("hospital_name")).split())
+    record["city"] = provider_city({"city": raw.get("city"), "location": record["location"]}).title()
+
+    # Use the record's own coordinates, falling back to the gazetteer centre of its locality or city
+    coordinates = parse_coordinates(raw)
+    if coordinates:
+        record["latitude"], record["longitude"] = coordinates
+        record["geo_precision"] = "exact"
+    else:
+        geocoded = query_normalizer.geocode(f"{record['location']}, {record['city']}")
+        if geocoded:
+            record["latitude"], record["longitude"], record["geo_precision"] = geocoded
+
+    return record
+
+def _normalise_chunk(chunk: List[Any]) -> Tuple[List[Dict[str, Any]], int]:
+    """Worker entry point: normalise a chunk of raw records, returning (valid records, invalid count)."""
+    valid = []
+    invalid = 0
+    for raw in chunk:
+        record = normalise_provider(raw)
+        if record is None:
+            invalid += 1
+        else:
+            valid.append(record)
+    return valid, invalid
+
+def _chunks(records: Iterator[Any], size: int) -> Iterator[List[Any]]:
+    chunk = []
+    for record in records:
+        chunk.append(record)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def sidecar_paths(snapshot_path: str) -> Tuple[str, str]:
+    """
+    Columnar snapshot and index directory paths next to a snapshot path.
+
+    "out/providers.snapshot.json.gz" gives "out/providers.columns" and
+    "out/providers.vectors", matching the default settings.
+
+    Returns:
+        Tuple of (columnar snapshot path, vector index directory)
+    """
+    base = snapshot_path
+    for suffix in (".gz", ".jsonl", ".json", ".snapshot"):
+        if base.endswith(suffix) and len(base) > len(suffix):
+            base = base[:-len(suffix)]
+    return f"{base}.columns", f"{base}.vectors"
+
+def run_ingestion(
+    paths: List[str],
+    snapshot_path: Optional[str] = None,
+    workers: Optional[int] = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    progress_every: int = 50000,
+    columnar_path: Optional[str] = None,
+    vector_path: Optional[str] = None,
+    force: bool = False
+) -> Tuple[Dict[str, int], IngestionStats]:
     """
-    Ingest doctor data from a JSON file into the vector database.
-    
+    Stream, normalise, deduplicate and snapshot provider data from several files.
+
+    Raw records are streamed from each file and normalised in chunks by a
+    process pool, with a bounded number of chunks in flight. Records are
+    deduplicated by provider_id (the last occurrence wins) and written as a
+    single versioned snapshot, plus the memory-mapped columnar form and the
+    provider search indexes the API serves from.
+
     Args:
-        data_file: Path to the JSON file containing doctor data
-        
+        paths: JSON or JSONL files to ingest, in order
+        snapshot_path: Destination snapshot; defaults to settings.PROVIDER_SNAPSHOT_PATH
+        workers: Worker processes; 1 normalises in-process. Defaults to the CPU count
+        chunk_size: Records per worker task
+        progress_every: Log progress every this many records read
+        columnar_path: Destination columnar snapshot; defaults to settings.PROVIDER_COLUMNAR_PATH, or to
+            a path next to snapshot_path when that is given (see sidecar_paths)
+        vector_path: Destination vector and BM25 index directory; defaults like columnar_path
+        force: Write the outputs even when no valid record was read
+
+    Returns:
+        Tuple of (valid records per file, overall statistics)
+
+    Raises:
+        ValueError: If no valid record was read and force is not set, so an
+            empty or unreadable dump never replaces a good catalogue
+    """
+    # The API prefers the columnar snapshot, so it must never be left behind when the snapshot moves
+    if snapshot_path:
+        default_columnar, default_vectors = sidecar_paths(snapshot_path)
+    else:
+        snapshot_path = settings.PROVIDER_SNAPSHOT_PATH
+        default_columnar, default_vectors = settings.PROVIDER_COLUMNAR_PATH, settings.PROVIDER_VECTOR_INDEX_PATH
+    columnar_path = columnar_path or default_columnar
+    vector_path = vector_path or default_vectors
+    workers = workers or os.cpu_count() or 1
+    stats = IngestionStats()
+    per_file: Dict[str, int] = {}
+    providers: Dict[str, Dict[str, Any]] = {}
+    next_report = progress_every
+
+    def collect(result: Tuple[List[Dict[str, Any]], int], path: str, size: int):
+        nonlocal next_report
+        valid, invalid = result
+        stats.read += size
+        stats.invalid += invalid
+        stats.valid += len(valid)
+        per_file[path] += len(valid)
+        for record in valid:
+            if record["provider_id"] in providers:
+                stats.duplicates += 1
+            providers[record["provider_id"]] = record
+        if progress_every and stats.read >= next_report:
+            next_report += progress_every
+            logger.info(f"Ingested {stats.read} records ({stats.records_per_second:,.0f} records/s)")
+
+    executor = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+    try:
+        for path in paths:
+            logger.info(f"Ingesting provider data from {path}")
+            per_file[path] = 0
+            pending = []
+            for chunk in _chunks(iter_raw_records(path), chunk_size):
+                if executor is None:
+                    collect(_normalise_chunk(chunk), path, len(chunk))
+                    continue
+                pending.append((executor.submit(_normalise_chunk, chunk), len(chunk)))
+                # Keep a bounded number of chunks in flight so memory stays flat
+                if len(pending) >= workers * 2:
+                    future, size = pending.pop(0)
+                    collect(future.result(), path, size)
+            for future, size in pending:
+                collect(future.result(), path, size)
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+    if not providers and not force:
+        raise ValueError(
+            f"No valid provider records in {len(paths)} file(s) ({stats.read} read, {stats.invalid} invalid); "
+            f"keeping the existing snapshot at {snapshot_path}"
+        )
+
+    records = list(providers.values())
+    metadata = write_snapshot(records, snapshot_path)
+    if columnar_path:
+        write_columnar_snapshot(records, columnar_path, metadata["version"], AvailabilityIndex.from_providers(records))
+    if vector_path:
+        # A running API process maps the current index files, so write a new directory and swap it in
+        staging = staging_directory(vector_path)
+        try:
+            embedder = HashingEmbedder()
+            vectors = embedder.embed([provider_document(record) for record in records])
+            index = build_index(vectors, settings.VECTOR_IVF_THRESHOLD, settings.VECTOR_NPROBE)
+            save_index(index, [record["provider_id"] for record in records], staging, metadata["version"], embedder)
+            BM25Index.build(provider_fields(record) for record in records).save(staging, metadata["version"])
+            GeoIndex.build(record_coordinates(record) for record in records).save(staging, metadata["version"])
+            publish_directory(staging, vector_path)
+        except BaseException:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+    stats.unique = len(providers)
+    stats.elapsed = time.perf_counter() - stats.started_at
+    logger.info(f"Ingestion finished: {stats.as_dict()}")
+    return per_file, stats
+
+def _data_files(data_dir: str) -> List[str]:
+    return sorted(
+        os.path.join(data_dir, name)
+        for name in os.listdir(data_dir)
+        if name.endswith((".json", ".jsonl"))
+    )
+
+async def ingest_doctor_data(data_file: str, snapshot_path: Optional[str] = None, workers: Optional[int] = None) -> int:
+    """
+    Ingest doctor data from a JSON or JSONL file into a provider snapshot.
+
+    Args:
+        data_file: Path to the JSON/JSONL file containing doctor data
+        snapshot_path: Optional destination snapshot path
+        workers: Optional number of worker processes
+
     Returns:
         Number of successfully ingested records
+
+    Raises:
+        ValueError: If the file holds no valid record
     """
-    logger.warning("Vector store functionality has been removed. Doctor data ingestion is no longer supported.")
-    return 0
+    per_file, _ = await asyncio.to_thread(run_ingestion, [data_file], snapshot_path, workers)
+    return per_file[data_file]
 
-async def ingest_all_data(data_dir: str) -> Dict[str, int]:
+async def ingest_all_data(data_dir: str, snapshot_path: Optional[str] = None, workers: Optional[int] = None) -> Dict[str, int]:
     """
-    Ingest all JSON and JSONL files from a directory into the vector database.
-    
+    Ingest all JSON and JSONL files from a directory into a single provider snapshot.
+
     Args:
         data_dir: Directory containing data files
-        
+        snapshot_path: Optional destination snapshot path
+        workers: Optional number of worker processes
+
     Returns:
         Dictionary with file names and success counts
+
+    Raises:
+        ValueError: If the files hold no valid record
     """
-    logger.warning("Vector store functionality has been removed. Data ingestion is no longer supported.")
-    return {}
+    per_file, _ = await asyncio.to_thread(run_ingestion, _data_files(data_dir), snapshot_path, workers)
+    return {os.path.basename(path): count for path, count in per_file.items()}
 
 # Command-line execution
 if __name__ == "__main__":
     import argparse
-    
+
     # Set up logging
-    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
-    
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s', force=True)
+
     # Parse command-line arguments
-    parser = argparse.ArgumentParser(description='Ingest doctor data into vector database')
+    parser = argparse.ArgumentParser(description='Ingest doctor data into a provider snapshot')
     parser.add_argument('--file', help='Path to JSON/JSONL file containing doctor data')
     parser.add_argument('--dir', help='Directory containing JSON/JSONL files')
-    
+    parser.add_argument('--output', help='Snapshot path (defaults to PROVIDER_SNAPSHOT_PATH)')
+    parser.add_argument('--columnar-output', help='Columnar snapshot path (defaults to PROVIDER_COLUMNAR_PATH, or next to --output)')
+    parser.add_argument('--vector-output', help='Vector index directory (defaults to PROVIDER_VECTOR_INDEX_PATH, or next to --output)')
+    parser.add_argument('--workers', type=int, help='Number of worker processes (default: CPU count)')
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE, help='Records per worker task')
+    parser.add_argument('--progress-every', type=int, default=50000, help='Report progress every N records')
+    parser.add_argument('--force', action='store_true', help='Write the outputs even if no valid record was read')
+
     args = parser.parse_args()
-    
-    print("Vector store functionality has been removed. Data ingestion is no longer supported.")
-    if args.file or args.dir:
-        print("The requested operation cannot be completed as vector store functionality has been removed.") 
\ No newline at end of file
+
+    paths = []
+    if args.file:
+        paths.append(args.file)
+    if args.dir:
+        paths.extend(_data_files(args.dir))
+    if not args.file and not args.dir:
+        parser.error("Provide --file and/or --dir")
+
+    try:
+        per_file, stats = run_ingestion(
+            paths, args.output, args.workers, args.chunk_size, args.progress_every, args.columnar_output,
+            args.vector_output, args.force
+        )
+    except ValueError as e:
+        parser.exit(1, f"Ingestion failed: {str(e)}\n")
+    for path, count in per_file.items():
+        print(f"{path}: {count} valid records")
+    print(
+        f"Read {stats.read} records in {stats.elapsed:.2f}s ({stats.records_per_second:,.0f} records/s): "
+        f"{stats.valid} valid, {stats.invalid} invalid, {stats.duplicates} duplicates, "
+        f"{stats.unique} unique written to {args.output or settings.PROVIDER_SNAPSHOT_PATH}"
+    )
@@ -0,0 +1,113 @@
+"""
+Request deadlines.
+
+The generate endpoint opens a deadline scope for GENERATE_DEADLINE_SECONDS.
+The deadline lives in a context variable, so every await below the endpoint
+can read the remaining budget without it being passed around: memory calls,
+the OpenAI and Gemini calls, and inline webhook delivery. run() and @bounded()
+turn the remaining budget into a per-call timeout and raise DeadlineExceeded
+when it runs out. has_budget() lets callers degrade before starting work they
+cannot finish. Outside a deadline scope (background workers, scripts) all of
+them are no-ops.
+
+Timeouts are counted in deadline_exceeded_total by stage. Degraded outcomes
+are counted in deadline_degraded_total by action.
+"""
+
+import asyncio
+import functools
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable, Iterator, Optional
+
+from app.utils.metrics import metrics
+
+deadline_exceeded = metrics.counter("deadline_exceeded_total", "Calls cut off by the request deadline, by stage", ("stage",))
+deadline_degraded = metrics.counter(
+    "deadline_degraded_total", "Work skipped or replaced to stay within the request deadline, by action", ("action",)
+)
+
+# Monotonic time by which the current request must finish, or None
+_deadline: ContextVar[Optional[float]] = ContextVar("deadline", default=None)
+
+
+class DeadlineExceeded(Exception):
+    """The request's time budget ran out during a stage."""
+
+    def __init__(self, stage: str):
+        self.stage = stage
+        super().__init__(f"Request deadline exceeded during {stage}")
+
+
+@contextmanager
+def scope(seconds: float) -> Iterator[None]:
+    """Run the enclosed block under a deadline seconds from now (0 or less: no deadline)."""
+    token = _deadline.set(time.monotonic() + seconds if seconds > 0 else None)
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def remaining() -> Optional[float]:
+    """Seconds left until the deadline, or None without one."""
+    deadline = _deadline.get()
+    if deadline is None:
+        return None
+    return deadline - time.monotonic()
+
+
+def has_budget(seconds: float) -> bool:
+    """Whether at least seconds are left (always True without a deadline)."""
+    left = remaining()
+    return left is None or left >= seconds
+
+
+def degrade(action: str) -> None:
+    """Count work skipped or replaced to stay within the deadline."""
+    deadline_degraded.inc(action)
+
+
+async def run(stage: str, awaitable: Awaitable, reserve: float = 0.0, floor: float = 0.0) -> Any:
+    """
+    Await with the remaining budget as timeout.
+
+    Args:
+        stage: Name the timeout is counted under
+        awaitable: Call to bound
+        reserve: Seconds to keep back for work after this call
+        floor: Minimum timeout, for short calls whose completion keeps state consistent
+
+    Returns:
+        The awaitable's result
+
+    Raises:
+        DeadlineExceeded: When the budget runs out first
+    """
+    left = remaining()
+    if left is None:
+        return await awaitable
+    timeout = max(left - reserve, floor)
+    if timeout <= 0:
+        if asyncio.iscoroutine(awaitable):
+            awaitable.close()
+        deadline_exceeded.inc(stage)
+        raise DeadlineExceeded(stage)
+    try:
+        return await asyncio.wait_for(awaitable, timeout)
+    except asyncio.TimeoutError:
+        deadline_exceeded.inc(stage)
+        raise DeadlineExceeded(stage)
+
+
+def bounded(stage: str, floor: float = 0.0) -> Callable:
+    """Decorator applying run() to every call of an async function."""
+    def decorator(func: Callable) -> Callable:
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            if _deadline.get() is None:
+                return await func(*args, **kwargs)
+            return await run(stage, func(*args, **kwargs), floor=floor)
+        return wrapper
+    return decorator
@@ -1,9 +1,9 @@
 import logging
+import sys
 from typing import Callable, Dict, Any, Union
 from fastapi import Request, FastAPI, HTTPException, status
 from fastapi.responses import JSONResponse
 from pydantic import ValidationError
-import openai
 
 from app.models.response_models import ErrorResponse
 
@@ -12,12 +12,24 @@ logger = logging.getLogger(__name__)
 
 class APIError(Exception):
     """Base class for API errors with status code and detail"""
-    def __init__(self, status_code: int, message: str, details: Dict[str, Any] = None):
+    def __init__(self, status_code: int, message: str, details: Dict[str, Any] = None, headers: Dict[str, str] = None):
         self.status_code = status_code
         self.message = message
         self.details = details
+        self.headers = headers
         super().__init__(message)
 
+def _openai_error_response(exc: Exception) -> JSONResponse:
+    """Handle OpenAI API errors"""
+    logger.error(f"OpenAI API Error: {str(exc)}")
+    return JSONResponse(
+        status_code=status.HTTP_502_BAD_GATEWAY,
+        content=ErrorResponse(
+            error=True,
+            message=f"OpenAI API error: {str(exc)}"
+        ).model_dump()
+    )
+
 def register_exception_handlers(app: FastAPI) -> None:
     """Register exception handlers for the FastAPI app"""
     
@@ -31,7 +43,8 @@ def register_exception_handlers(app: FastAPI) -> None:
                 error=True,
                 message=exc.message,
                 details=exc.details
-            ).model_dump()
+            ).model_dump(),
+            headers=exc.headers
         )
     
     @app.exception_handler(HTTPException)
@@ -60,21 +73,14 @@ def register_exception_handlers(app: FastAPI) -> None:
             ).model_dump()
         )
     
-    @app.exception_handler(openai.OpenAIError)
-    async def openai_error_handler(request: Request, exc: openai.OpenAIError) -> JSONResponse:
-        """Handle OpenAI API errors"""
-        logger.error(f"OpenAI API Error: {str(exc)}")
-        return JSONResponse(
-            status_code=status.HTTP_502_BAD_GATEWAY,
-            content=ErrorResponse(
-                error=True,
-                message=f"OpenAI API error: {str(exc)}"
-            ).model_dump()
-        )
-    
     @app.exception_handler(Exception)
     async def general_exception_handler(request: Request, exc: Exception) -> JSONResponse:
         """Handle general exceptions"""
+        # OpenAI errors map to 502; the SDK is imported lazily, so only check once it is loaded
+        openai = sys.modules.get("openai")
+        if openai is not None and isinstance(exc, openai.OpenAIError):
+            return _openai_error_response(exc)
+        
         logger.error(f"Unhandled Exception: {str(exc)}", exc_info=True)
         return JSONResponse(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -0,0 +1,253 @@
+"""
+Geospatial index for nearest-provider and radius queries.
+
+Providers with coordinates are bucketed into a fixed latitude/longitude grid.
+Cells are keyed `lat_cell * lon_cells + lon_cell` and stored sorted (CSR layout:
+`cell_offsets` into `cell_rows`), so every latitude band of a query's bounding
+box is one contiguous slice found with two binary searches. Candidates are then
+filtered by exact haversine distance.
+"""
+
+import json
+import logging
+import math
+import os
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+import numpy as np
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180.0
+DEFAULT_CELL_DEGREES = 0.05
+# Masks with at most this many rows are scanned directly instead of through the grid
+BRUTE_FORCE_ROWS = 2048
+
+_GEO_ARRAYS = ("latitudes", "longitudes", "cell_keys", "cell_offsets", "cell_rows")
+
+
+def haversine_km(latitude: float, longitude: float, latitudes: np.ndarray, longitudes: np.ndarray) -> np.ndarray:
+    """Great-circle distance in km from one point to arrays of points."""
+    lat1 = math.radians(latitude)
+    lat2 = np.radians(latitudes)
+    dlat = lat2 - lat1
+    dlon = np.radians(longitudes) - math.radians(longitude)
+    a = np.sin(dlat / 2) ** 2 + math.cos(lat1) * np.cos(lat2) * np.sin(dlon / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+def parse_coordinates(raw: Dict[str, Any]) -> Optional[Tuple[float, float]]:
+    """
+    Read coordinates from a raw provider record.
+
+    Accepts latitude/longitude, lat/lng or lat/lon fields, or a "coordinates"
+    value given as {"lat": .., "lng": ..} or [lat, lon].
+
+    Returns:
+        Tuple of (latitude, longitude), or None if absent or out of range
+    """
+    coordinates = raw.get("coordinates")
+    if isinstance(coordinates, dict):
+        raw = coordinates
+    elif isinstance(coordinates, (list, tuple)) and len(coordinates) == 2:
+        raw = {"latitude": coordinates[0], "longitude": coordinates[1]}
+
+    latitude = next((raw[key] for key in ("latitude", "lat") if raw.get(key) is not None), None)
+    longitude = next((raw[key] for key in ("longitude", "lng", "lon") if raw.get(key) is not None), None)
+    try:
+        latitude, longitude = float(latitude), float(longitude)
+    except (TypeError, ValueError):
+        return None
+    if not (-90.0 <= latitude <= 90.0 and -180.0 <= longitude <= 180.0):
+        return None
+    return latitude, longitude
+
+
+class GeoIndex:
+    """Immutable grid index over provider coordinates; rows without coordinates are never returned."""
+
+    def __init__(self, arrays: Dict[str, np.ndarray], cell_degrees: float = DEFAULT_CELL_DEGREES):
+        self.latitudes = arrays["latitudes"]
+        self.longitudes = arrays["longitudes"]
+        self.cell_keys = arrays["cell_keys"]
+        self.cell_offsets = arrays["cell_offsets"]
+        self.cell_rows = arrays["cell_rows"]
+        self.cell_degrees = cell_degrees
+        self.lon_cells = int(math.ceil(360.0 / cell_degrees))
+
+    @classmethod
+    def build(
+        cls,
+        coordinates: Iterable[Optional[Tuple[float, float]]],
+        cell_degrees: float = DEFAULT_CELL_DEGREES
+    ) -> "GeoIndex":
+        """
+        Build an index from per-row coordinates.
+
+        Args:
+            coordinates: (latitude, longitude) per row in row order, or None for unknown
+            cell_degrees: Grid cell size in degrees
+        """
+        points = [point or (math.nan, math.nan) for point in coordinates]
+        latitudes = np.asarray([p[0] for p in points], dtype=np.float64)
+        longitudes = np.asarray([p[1] for p in points], dtype=np.float64)
+
+        rows = np.flatnonzero(~np.isnan(latitudes))
+        lon_cells = int(math.ceil(360.0 / cell_degrees))
+        keys = cls._cell(latitudes[rows], -90.0, cell_degrees) * lon_cells + cls._cell(longitudes[rows], -180.0, cell_degrees)
+        order = np.argsort(keys, kind="stable")
+        cell_keys, counts = np.unique(keys[order], return_counts=True)
+        cell_offsets = np.zeros(len(cell_keys) + 1, dtype=np.int64)
+        np.cumsum(counts, out=cell_offsets[1:])
+
+        arrays = {
+            "latitudes": latitudes,
+            "longitudes": longitudes,
+            "cell_keys": cell_keys.astype(np.int64),
+            "cell_offsets": cell_offsets,
+            "cell_rows": rows[order].astype(np.int32)
+        }
+        return cls(arrays, cell_degrees)
+
+    @staticmethod
+    def _cell(degrees, origin: float, cell_degrees: float):
+        """Grid cell index of a latitude or longitude, counted from origin."""
+        return np.floor((np.asarray(degrees) - origin) / cell_degrees).astype(np.int64)
+
+    def __len__(self) -> int:
+        return len(self.latitudes)
+
+    @property
+    def located(self) -> int:
+        """Number of rows with coordinates."""
+        return len(self.cell_rows)
+
+    def _candidates(self, latitude: float, longitude: float, radius_km: float) -> np.ndarray:
+        """Rows in the grid cells overlapping the bounding box of a circle."""
+        dlat = radius_km / KM_PER_DEGREE
+        lat_lo = int(self._cell(max(latitude - dlat, -90.0), -90.0, self.cell_degrees))
+        lat_hi = int(self._cell(min(latitude + dlat, 90.0), -90.0, self.cell_degrees))
+
+        cos_lat = math.cos(math.radians(min(abs(latitude) + dlat, 90.0)))
+        dlon = 180.0 if cos_lat < 1e-6 else min(radius_km / (KM_PER_DEGREE * cos_lat), 180.0)
+        lon_ranges = []
+        lo = int(self._cell(longitude - dlon, -180.0, self.cell_degrees))
+        hi = int(self._cell(longitude + dlon, -180.0, self.cell_degrees))
+        if hi - lo + 1 >= self.lon_cells:
+            lon_ranges.append((0, self.lon_cells - 1))
+        else:
+            # Split ranges that cross the antimeridian
+            for start, end in ((lo, hi), (lo + self.lon_cells, hi + self.lon_cells), (lo - self.lon_cells, hi - self.lon_cells)):
+                start, end = max(start, 0), min(end, self.lon_cells - 1)
+                if start <= end:
+                    lon_ranges.append((start, end))
+
+        slices = []
+        for band in range(lat_lo, lat_hi + 1):
+            for start, end in lon_ranges:
+                first = np.searchsorted(self.cell_keys, band * self.lon_cells + start, side="left")
+                last = np.searchsorted(self.cell_keys, band * self.lon_cells + end, side="right")
+                if first < last:
+                    slices.append(self.cell_rows[self.cell_offsets[first]:self.cell_offsets[last]])
+        return np.concatenate(slices) if slices else np.zeros(0, dtype=np.int32)
+
+    def within(
+        self,
+        latitude: float,
+        longitude: float,
+        radius_km: float,
+        mask: Optional[np.ndarray] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Find all rows within radius_km of a point.
+
+        Args:
+            latitude: Query latitude
+            longitude: Query longitude
+            radius_km: Search radius in km
+            mask: Optional boolean array; only rows where it is True are returned
+
+        Returns:
+            Tuple of (row numbers, distances in km), nearest first
+        """
+        if mask is not None and np.count_nonzero(mask) <= BRUTE_FORCE_ROWS:
+            rows = np.flatnonzero(mask)
+            rows = rows[~np.isnan(self.latitudes[rows])]
+        else:
+            rows = self._candidates(latitude, longitude, radius_km)
+            if mask is not None:
+                rows = rows[mask[rows]]
+
+        distances = haversine_km(latitude, longitude, self.latitudes[rows], self.longitudes[rows])
+        inside = distances <= radius_km
+        rows, distances = rows[inside], distances[inside]
+        order = np.argsort(distances, kind="stable")
+        return rows[order], distances[order]
+
+    def nearest(
+        self,
+        latitude: float,
+        longitude: float,
+        k: int,
+        mask: Optional[np.ndarray] = None,
+        max_radius_km: float = math.pi * EARTH_RADIUS_KM
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Find the k rows nearest to a point.
+
+        The search radius starts at one grid cell and doubles until k rows are
+        inside it; rows within a searched radius are complete, so the result is
+        exact.
+
+        Returns:
+            Tuple of (row numbers, distances in km), nearest first
+        """
+        if mask is not None and np.count_nonzero(mask) <= BRUTE_FORCE_ROWS:
+            rows, distances = self.within(latitude, longitude, max_radius_km, mask)
+            return rows[:k], distances[:k]
+
+        radius = self.cell_degrees * KM_PER_DEGREE
+        while True:
+            radius = min(radius, max_radius_km)
+            rows, distances = self.within(latitude, longitude, radius, mask)
+            if len(rows) >= k or radius >= max_radius_km:
+                return rows[:k], distances[:k]
+            radius *= 2
+
+    def save(self, path: str, version: str) -> None:
+        """
+        Save the index into a directory as geo_*.npy arrays plus metadata.
+
+        Write into a new directory (see vector_index.staging_directory), never
+        one a running process has mapped: the arrays are overwritten in place.
+        """
+        os.makedirs(path, exist_ok=True)
+        for name in _GEO_ARRAYS:
+            np.save(os.path.join(path, f"geo_{name}.npy"), np.ascontiguousarray(getattr(self, name)))
+        tmp_path = os.path.join(path, "geo.json.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"version": version, "cell_degrees": self.cell_degrees, "located": self.located}, f)
+        os.replace(tmp_path, os.path.join(path, "geo.json"))
+        logger.info(f"Wrote geo index with {self.located} of {len(self)} providers located to {path}")
+
+    @classmethod
+    def load(cls, path: str) -> Tuple["GeoIndex", str]:
+        """
+        Memory-map an index saved by save.
+
+        Returns:
+            Tuple of (index, catalogue version it was built from)
+        """
+        with open(os.path.join(path, "geo.json"), encoding="utf-8") as f:
+            meta = json.load(f)
+        arrays = {name: np.load(os.path.join(path, f"geo_{name}.npy"), mmap_mode="r") for name in _GEO_ARRAYS}
+        return cls(arrays, meta["cell_degrees"]), meta["version"]
+
+
+def record_coordinates(record: Dict[str, Any]) -> Optional[Tuple[float, float]]:
+    """Coordinates of a normalised provider record, or None."""
+    if record.get("latitude") is None or record.get("longitude") is None:
+        return None
+    return float(record["latitude"]), float(record["longitude"])
@@ -0,0 +1,273 @@
+"""
+In-process metrics registry with Prometheus text exposition.
+
+Counters, gauges and histograms keep their values in plain dicts keyed by a
+tuple of label values. Updating one is a dict lookup and an addition, with no
+locks (everything runs on the event loop) and no client library. Every worker
+publishes snapshot() with its worker metrics (app/services/worker_metrics.py).
+/metrics merges the live workers' snapshots with render(). Counters and
+histograms are summed across workers. When a worker stops, its counters and
+histograms are added to a retired total (retired_fields()), which render()
+adds in, so totals do not drop when a worker exits. Gauges describe a single
+process, so each worker's value is reported with a worker label.
+"""
+
+import json
+import time
+from bisect import bisect_left
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+# Latency bucket upper bounds in seconds
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+# Joins label values into snapshot keys (JSON object keys must be strings)
+LABEL_SEPARATOR = "\x1f"
+
+
+def _key(label_values: Tuple[str, ...]) -> str:
+    return LABEL_SEPARATOR.join(label_values)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Iterable[str], values: Iterable[str]) -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if isinstance(value, int):
+        return str(value)
+    return repr(float(value))
+
+
+class Metric:
+    """Base class: a named metric family with fixed label names."""
+
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labels: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+        self.values: Dict[Tuple[str, ...], Any] = {}
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {_key(label_values): value for label_values, value in self.values.items()}
+
+
+class Counter(Metric):
+    """Monotonic count; summed across workers."""
+
+    kind = "counter"
+
+    def inc(self, *label_values: str, amount: int = 1) -> None:
+        self.values[label_values] = self.values.get(label_values, 0) + amount
+
+
+class Gauge(Metric):
+    """Current value of one process; reported per worker."""
+
+    kind = "gauge"
+
+    def set(self, value: float, *label_values: str) -> None:
+        self.values[label_values] = value
+
+
+class Histogram(Metric):
+    """Distribution of observed values; bucket counts and sums are summed across workers."""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labels: Tuple[str, ...] = (), buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        super().__init__(name, documentation, labels)
+        self.buckets = buckets
+
+    def observe(self, value: float, *label_values: str) -> None:
+        # Per label set: [count per bucket..., count above the last bucket, sum]
+        entry = self.values.get(label_values)
+        if entry is None:
+            entry = self.values[label_values] = [0] * (len(self.buckets) + 1) + [0.0]
+        entry[bisect_left(self.buckets, value)] += 1
+        entry[-1] += value
+
+    def time(self, *label_values: str) -> "_HistogramTimer":
+        """Context manager observing the seconds spent in its block."""
+        return _HistogramTimer(self, label_values)
+
+
+class _HistogramTimer:
+    __slots__ = ("histogram", "label_values", "start")
+
+    def __init__(self, histogram: Histogram, label_values: Tuple[str, ...]):
+        self.histogram = histogram
+        self.label_values = label_values
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.histogram.observe(time.perf_counter() - self.start, *self.label_values)
+        return False
+
+
+class MetricsRegistry:
+    """All metric families of the process."""
+
+    def __init__(self, prefix: str):
+        self.prefix = prefix
+        self._metrics: Dict[str, Metric] = {}
+
+    def _add(self, metric: Metric) -> Metric:
+        existing = self._metrics.get(metric.name)
+        if existing is not None:
+            # Modules may be imported more than once in tests or reloads; keep one family
+            return existing
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labels: Tuple[str, ...] = ()) -> Counter:
+        return self._add(Counter(self.prefix + name, documentation, labels))
+
+    def gauge(self, name: str, documentation: str, labels: Tuple[str, ...] = ()) -> Gauge:
+        return self._add(Gauge(self.prefix + name, documentation, labels))
+
+    def histogram(self, name: str, documentation: str, labels: Tuple[str, ...] = (), buckets: Tuple[float, ...] = LATENCY_BUCKETS) -> Histogram:
+        return self._add(Histogram(self.prefix + name, documentation, labels, buckets))
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """Values of every family, JSON-serialisable, for publishing to other workers."""
+        return {name: metric.snapshot() for name, metric in self._metrics.items() if metric.values}
+
+    def reset(self) -> None:
+        """Zero the counters and histograms once their values have been retired; gauges are kept."""
+        for metric in self._metrics.values():
+            if not isinstance(metric, Gauge):
+                metric.values.clear()
+
+    def retired_fields(self, snapshot: Dict[str, Dict[str, Any]]) -> Dict[str, float]:
+        """
+        Counters and histograms of a worker's snapshot as amounts to add to the retired total.
+
+        Args:
+            snapshot: snapshot() of a worker that stopped
+
+        Returns:
+            Field -> amount; a field is the JSON list [family, label key, histogram slot or -1]
+        """
+        fields = {}
+        for name, values in snapshot.items():
+            metric = self._metrics.get(name)
+            if metric is None or isinstance(metric, Gauge):
+                continue
+            for key, value in values.items():
+                if isinstance(metric, Histogram):
+                    for index, part in enumerate(value):
+                        if part:
+                            fields[json.dumps([name, key, index])] = part
+                elif value:
+                    fields[json.dumps([name, key, -1])] = value
+        return fields
+
+    def retired_snapshot(self, fields: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+        """The retired total, stored as retired_fields() amounts, back in the snapshot() format."""
+        snapshot: Dict[str, Dict[str, Any]] = {}
+        for field, amount in fields.items():
+            name, key, index = json.loads(field)
+            metric = self._metrics.get(name)
+            if metric is None:
+                continue
+            amount = float(amount)
+            if amount.is_integer():
+                amount = int(amount)
+            if isinstance(metric, Histogram):
+                entry = snapshot.setdefault(name, {}).setdefault(key, [0] * (len(metric.buckets) + 1) + [0.0])
+                entry[index] = amount
+            else:
+                snapshot.setdefault(name, {})[key] = amount
+        return snapshot
+
+    def render(
+        self,
+        workers: Optional[Dict[str, Dict[str, Any]]] = None,
+        stats: Optional[Dict[str, Any]] = None,
+        retired: Optional[Dict[str, Dict[str, Any]]] = None
+    ) -> str:
+        """
+        Prometheus text exposition of this registry's families.
+
+        Args:
+            workers: Worker ID -> snapshot() of every live worker; this process only when None
+            stats: Summed stats() counters of the services, exported as one untyped family
+            retired: retired_snapshot() of the workers that stopped, added to the counters and histograms
+
+        Returns:
+            Metrics in the Prometheus text format (version 0.0.4)
+        """
+        if workers is None:
+            workers = {"local": self.snapshot()}
+        lines: List[str] = []
+        for name, metric in self._metrics.items():
+            lines.append(f"# HELP {name} {metric.documentation}")
+            lines.append(f"# TYPE {name} {metric.kind}")
+            if isinstance(metric, Gauge):
+                label_names = metric.labels + ("worker",)
+                for worker_id, snapshot in workers.items():
+                    for key, value in snapshot.get(name, {}).items():
+                        label_values = (key.split(LABEL_SEPARATOR) if metric.labels else []) + [worker_id]
+                        lines.append(f"{name}{_format_labels(label_names, label_values)} {_format_value(value)}")
+                continue
+
+            merged: Dict[str, Any] = {}
+            for snapshot in [*workers.values(), retired or {}]:
+                for key, value in snapshot.get(name, {}).items():
+                    if isinstance(metric, Histogram):
+                        total = merged.setdefault(key, [0] * (len(metric.buckets) + 1) + [0.0])
+                        for index, part in enumerate(value):
+                            total[index] += part
+                    else:
+                        merged[key] = merged.get(key, 0) + value
+
+            for key, value in sorted(merged.items()):
+                label_values = key.split(LABEL_SEPARATOR) if metric.labels else []
+                if isinstance(metric, Histogram):
+                    cumulative = 0
+                    for bound, count in zip(metric.buckets, value):
+                        cumulative += count
+                        labels = _format_labels(metric.labels + ("le",), label_values + [repr(bound)])
+                        lines.append(f"{name}_bucket{labels} {cumulative}")
+                    count = cumulative + value[-2]
+                    labels = _format_labels(metric.labels + ("le",), label_values + ["+Inf"])
+                    lines.append(f"{name}_bucket{labels} {count}")
+                    labels = _format_labels(metric.labels, label_values)
+                    lines.append(f"{name}_count{labels} {count}")
+                    lines.append(f"{name}_sum{labels} {_format_value(value[-1])}")
+                else:
+                    lines.append(f"{name}{_format_labels(metric.labels, label_values)} {_format_value(value)}")
+
+        if stats:
+            name = self.prefix + "service_stat"
+            lines.append(f"# HELP {name} Integer counters from the services' stats(), summed across live workers")
+            lines.append(f"# TYPE {name} untyped")
+            for stat, value in _flatten(stats):
+                source, _, stat = stat.partition(".")
+                lines.append(f"{name}{_format_labels(('source', 'stat'), (source, stat))} {value}")
+        return "\n".join(lines) + "\n"
+
+
+def _flatten(stats: Dict[str, Any], prefix: str = "") -> List[Tuple[str, int]]:
+    """Nested stats dicts as (dotted path, value) pairs of their integer values."""
+    rows = []
+    for name, value in stats.items():
+        path = f"{prefix}{name}"
+        if isinstance(value, dict):
+            rows += _flatten(value, path + ".")
+        elif isinstance(value, int) and not isinstance(value, bool):
+            rows.append((path, value))
+    return rows
+
+
+# Create singleton instance
+metrics = MetricsRegistry("nivaran_")
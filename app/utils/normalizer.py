@@ -0,0 +1,317 @@
+"""
+Normaliser for get_service_info tool arguments.
+
+Maps free-text locations, specialties and symptoms (English, Hindi in Latin
+script, misspellings) onto the canonical IDs in app/config/vocabulary.py.
+Exact aliases are dictionary lookups; everything else goes through a
+character-trigram index scored with the Dice coefficient, so "dermatalogist",
+"bombay" and "twacha rog" all resolve without a model call.
+"""
+
+import logging
+import re
+from collections import defaultdict
+from functools import lru_cache
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from app.config.vocabulary import CITIES, LOCALITIES, SPECIALTIES, SYMPTOM_SPECIALTIES
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Minimum Dice similarity for a fuzzy match
+DEFAULT_THRESHOLD = 0.6
+# Phrases shorter than this only match exactly ("la", "cp", "bp")
+MIN_FUZZY_LENGTH = 4
+# Longest word span tried when scanning free text
+MAX_SPAN_WORDS = 3
+# Alias words that say nothing about the entry ("heart doctor", "dil ka doctor"),
+# so a fuzzy match does not have to match them word for word
+GENERIC_WORDS = frozenset({"doctor", "specialist", "ka", "ki", "ke", "mein"})
+
+_WORD_PATTERN = re.compile(r"[a-z0-9]+")
+# Phrases asking for the closest providers (English and Hindi in Latin script)
+_NEAREST_PATTERN = re.compile(r"\b(nearest|closest|nearby|near me|close to me|paas|pass mein|nazdeek|najdik|kareeb)\b")
+
+
+def canonical_text(text: Optional[str]) -> str:
+    """Lowercase text and reduce it to space-separated alphanumeric words."""
+    return " ".join(_WORD_PATTERN.findall((text or "").lower()))
+
+
+def trigrams(text: str) -> List[str]:
+    """Distinct character trigrams of canonical text, padded so word edges count."""
+    padded = f"  {text} "
+    return list({padded[i:i + 3] for i in range(len(padded) - 2)})
+
+
+def _dice(first: str, second: str) -> float:
+    """Dice coefficient of the trigram sets of two canonical strings."""
+    first_grams, second_grams = set(trigrams(first)), set(trigrams(second))
+    return 2.0 * len(first_grams & second_grams) / (len(first_grams) + len(second_grams))
+
+
+def _spans(words: List[str], max_words: int = MAX_SPAN_WORDS) -> Iterator[str]:
+    """Yield word spans, longest first, so multi-word phrases win over their parts."""
+    for size in range(min(max_words, len(words)), 0, -1):
+        for start in range(len(words) - size + 1):
+            yield " ".join(words[start:start + size])
+
+
+class TrigramIndex:
+    """Phrase -> ID lookup with exact matching and trigram fuzzy matching."""
+
+    def __init__(self, threshold: float = DEFAULT_THRESHOLD):
+        self.threshold = threshold
+        self._exact: Dict[str, str] = {}
+        self._phrases: List[Tuple[List[str], str, int]] = []
+        self._postings: Dict[str, List[int]] = defaultdict(list)
+
+    def add(self, phrase: str, entry_id: str) -> None:
+        """Register a phrase for an ID."""
+        phrase = canonical_text(phrase)
+        if not phrase or phrase in self._exact:
+            return
+        self._exact[phrase] = entry_id
+        grams = trigrams(phrase)
+        position = len(self._phrases)
+        self._phrases.append((phrase.split(), entry_id, len(grams)))
+        for gram in grams:
+            self._postings[gram].append(position)
+
+    def __len__(self) -> int:
+        return len(self._phrases)
+
+    def lookup(self, text: str) -> Optional[Tuple[str, float]]:
+        """
+        Find the ID of the phrase closest to canonical text.
+
+        Returns:
+            Tuple of (ID, similarity), or None if nothing reaches the threshold
+        """
+        entry_id = self._exact.get(text)
+        if entry_id is not None:
+            return entry_id, 1.0
+        if len(text) < MIN_FUZZY_LENGTH:
+            return None
+
+        grams = trigrams(text)
+        overlaps: Dict[int, int] = defaultdict(int)
+        for gram in grams:
+            for position in self._postings.get(gram, ()):
+                overlaps[position] += 1
+
+        words = text.split()
+        best: Optional[Tuple[str, float]] = None
+        for position, overlap in overlaps.items():
+            phrase_words, candidate_id, size = self._phrases[position]
+            score = 2.0 * overlap / (len(grams) + size)
+            if score >= self.threshold and (best is None or score > best[1]) and self._covers(words, phrase_words):
+                best = (candidate_id, score)
+        return best
+
+    def _covers(self, words: List[str], phrase_words: List[str]) -> bool:
+        """
+        Whether text words line up with the words of a phrase.
+
+        Overall similarity alone lets "doctor" match "heart doctor" and "book
+        doctor" match "bone doctor". Each text word must be close to the phrase
+        word in its position, either over the whole phrase (generic words may
+        differ) or over its distinctive words alone ("stomach" for "stomach
+        doctor"), so fuzzy matching stays limited to misspellings.
+        """
+        distinctive = [word for word in phrase_words if word not in GENERIC_WORDS]
+        for candidate in (phrase_words, distinctive):
+            if len(words) == len(candidate) and all(
+                word == phrase_word or phrase_word in GENERIC_WORDS or _dice(word, phrase_word) >= self.threshold
+                for word, phrase_word in zip(words, candidate)
+            ):
+                return True
+        return False
+
+    def scan(self, text: str) -> Optional[Tuple[str, float, str]]:
+        """
+        Find the best-matching phrase anywhere in free text.
+
+        The whole text is tried first, then word spans (longest first); an exact
+        span match ends the scan.
+
+        Returns:
+            Tuple of (ID, similarity, matched span), or None
+        """
+        text = canonical_text(text)
+        if not text:
+            return None
+        best: Optional[Tuple[str, float, str]] = None
+        for span in [text, *_spans(text.split())]:
+            match = self.lookup(span)
+            if match is None:
+                continue
+            if match[1] == 1.0:
+                return match[0], 1.0, span
+            if best is None or match[1] > best[1]:
+                best = (match[0], match[1], span)
+        return best
+
+
+class NormalisedArguments:
+    """Canonical form of the get_service_info location, specialty and symptoms."""
+
+    def __init__(
+        self,
+        specialty_id: Optional[str] = None,
+        city_id: Optional[str] = None,
+        locality_id: Optional[str] = None,
+        specialty_source: Optional[str] = None,
+        nearest: bool = False
+    ):
+        self.specialty_id = specialty_id
+        self.city_id = city_id
+        self.locality_id = locality_id
+        self.specialty_source = specialty_source
+        self.nearest = nearest
+
+    @property
+    def specialty(self) -> Optional[str]:
+        """Catalogue name of the specialty, e.g. "Dermatologist"."""
+        return SPECIALTIES[self.specialty_id]["name"] if self.specialty_id else None
+
+    @property
+    def city(self) -> Optional[str]:
+        return CITIES[self.city_id]["name"] if self.city_id else None
+
+    @property
+    def locality(self) -> Optional[str]:
+        return LOCALITIES[self.locality_id]["name"] if self.locality_id else None
+
+    @property
+    def location(self) -> Optional[str]:
+        """Display location, e.g. "Andheri, Mumbai"."""
+        parts = [part for part in (self.locality, self.city) if part]
+        return ", ".join(parts) if parts else None
+
+    @property
+    def coordinates(self) -> Optional[Tuple[float, float]]:
+        """Centre of the most specific place named (locality, else city)."""
+        if self.locality_id:
+            return LOCALITIES[self.locality_id]["coordinates"]
+        if self.city_id:
+            return CITIES[self.city_id]["coordinates"]
+        return None
+
+    @property
+    def cache_key(self) -> Tuple[Optional[str], Optional[str], Optional[str], bool]:
+        """Key that is identical for every phrasing of the same request."""
+        return self.specialty_id, self.city_id, self.locality_id, self.nearest
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "specialty_id": self.specialty_id,
+            "specialty": self.specialty,
+            "specialty_source": self.specialty_source,
+            "city_id": self.city_id,
+            "city": self.city,
+            "locality_id": self.locality_id,
+            "locality": self.locality,
+            "nearest": self.nearest
+        }
+
+
+class QueryNormalizer:
+    """Normalises tool arguments against the canonical vocabulary."""
+
+    def __init__(self, threshold: float = DEFAULT_THRESHOLD, cache_size: int = 4096):
+        self.cities = TrigramIndex(threshold)
+        self.localities = TrigramIndex(threshold)
+        self.specialties = TrigramIndex(threshold)
+        self.symptoms = TrigramIndex(threshold)
+
+        for city_id, entry in CITIES.items():
+            for phrase in [city_id, entry["name"], *entry["aliases"]]:
+                self.cities.add(phrase, city_id)
+        for locality_id, entry in LOCALITIES.items():
+            for phrase in [locality_id, entry["name"], *entry["aliases"]]:
+                self.localities.add(phrase, locality_id)
+        for specialty_id, entry in SPECIALTIES.items():
+            for phrase in [specialty_id, entry["name"], *entry["aliases"]]:
+                self.specialties.add(phrase, specialty_id)
+        for phrase, specialty_id in SYMPTOM_SPECIALTIES.items():
+            self.symptoms.add(phrase, specialty_id)
+
+        # Tool arguments and provider locations repeat heavily, so memoise whole calls
+        self.normalise = lru_cache(maxsize=cache_size)(self._normalise)
+        self.geocode = lru_cache(maxsize=cache_size)(self._geocode)
+
+    def normalise_location(self, text: str) -> Tuple[Optional[str], Optional[str]]:
+        """
+        Resolve a free-text location.
+
+        Returns:
+            Tuple of (city ID, locality ID); a matched locality implies its city
+        """
+        locality = self.localities.scan(text)
+        city = self.cities.scan(text)
+        locality_id = locality[0] if locality else None
+        city_id = city[0] if city else None
+
+        if locality_id:
+            locality_city = LOCALITIES[locality_id]["city"]
+            # A stronger city match elsewhere in the text contradicts the locality
+            if city_id and city_id != locality_city and city[1] > locality[1]:
+                locality_id = None
+            else:
+                city_id = locality_city
+        return city_id, locality_id
+
+    def _geocode(self, location: str) -> Optional[Tuple[float, float, str]]:
+        """
+        Approximate coordinates of a free-text location from the gazetteer.
+
+        Returns:
+            Tuple of (latitude, longitude, precision) where precision is
+            "locality" or "city", or None if the place is unknown
+        """
+        city_id, locality_id = self.normalise_location(location)
+        if locality_id:
+            return (*LOCALITIES[locality_id]["coordinates"], "locality")
+        if city_id:
+            return (*CITIES[city_id]["coordinates"], "city")
+        return None
+
+    def normalise_specialty(self, text: str) -> Optional[str]:
+        """Resolve a specialty name, alias or misspelling to its ID."""
+        match = self.specialties.scan(text)
+        return match[0] if match else None
+
+    def specialty_for_symptoms(self, text: str) -> Optional[str]:
+        """Look up the specialty that treats the symptoms described in text."""
+        match = self.symptoms.scan(text)
+        return match[0] if match else None
+
+    def _normalise(self, query: str = "", location: str = "", specialty: str = "", symptoms: str = "") -> NormalisedArguments:
+        specialty_id = None
+        source = None
+        for text, origin in ((specialty, "specialty"), (query, "query")):
+            if text:
+                specialty_id = self.normalise_specialty(text)
+                if specialty_id:
+                    source = origin
+                    break
+        if specialty_id is None:
+            for text in (symptoms, query):
+                if text:
+                    specialty_id = self.specialty_for_symptoms(text)
+                    if specialty_id:
+                        source = "symptoms"
+                        break
+
+        city_id, locality_id = self.normalise_location(location) if location else (None, None)
+        if city_id is None and query:
+            city_id, locality_id = self.normalise_location(query)
+
+        nearest = bool(_NEAREST_PATTERN.search(canonical_text(f"{query} {location}")))
+        return NormalisedArguments(specialty_id, city_id, locality_id, source, nearest)
+
+
+# Create singleton instance
+query_normalizer = QueryNormalizer()
@@ -0,0 +1,51 @@
+"""
+Precompiled prompt templates.
+
+System prompts contain literal JSON braces, so str.format cannot fill them.
+A PromptTemplate splits its text around the named placeholders once. Each
+render then joins the literal pieces with the values, instead of scanning the
+whole prompt once per placeholder on every request.
+"""
+
+import datetime
+import re
+from typing import Dict, Iterable
+
+# Placeholders filled with the request time
+DATETIME_FIELDS = ("current_date", "current_time", "current_day")
+
+
+def datetime_values(now: datetime.datetime) -> Dict[str, str]:
+    """Values of the date and time placeholders for a moment."""
+    return {
+        "current_date": now.strftime("%d-%m-%Y"),
+        "current_time": now.strftime("%H:%M"),
+        "current_day": now.strftime("%A")
+    }
+
+
+class PromptTemplate:
+    """Template text split around `{field}` placeholders."""
+
+    def __init__(self, template: str, fields: Iterable[str] = DATETIME_FIELDS):
+        pattern = re.compile(r"\{(" + "|".join(re.escape(field) for field in fields) + r")\}")
+        parts = pattern.split(template)
+        self.literals = parts[0::2]
+        self.fields = parts[1::2]
+        self.static_length = sum(len(literal) for literal in self.literals)
+
+    def render(self, **values: str) -> str:
+        """
+        Fill the placeholders.
+
+        Args:
+            **values: Value for each placeholder field
+
+        Returns:
+            Prompt text
+        """
+        pieces = [self.literals[0]]
+        for field, literal in zip(self.fields, self.literals[1:]):
+            pieces.append(values[field])
+            pieces.append(literal)
+        return "".join(pieces)
@@ -0,0 +1,85 @@
+"""
+Versioned provider catalogue snapshots.
+
+A snapshot is a gzip-compressed, compact JSON document holding the normalised
+provider records produced by the ingestion pipeline plus a content version.
+"""
+
+import gzip
+import hashlib
+import json
+import logging
+import os
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Tuple
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_FORMAT = "nivaran-providers"
+SNAPSHOT_FORMAT_VERSION = 1
+
+
+def compute_version(providers: List[Dict[str, Any]]) -> str:
+    """Compute a short content hash for a list of provider records (order-insensitive)."""
+    digest = hashlib.sha1()
+    for record in sorted(providers, key=lambda r: r["provider_id"]):
+        digest.update(json.dumps(record, sort_keys=True, separators=(",", ":")).encode("utf-8"))
+    return digest.hexdigest()[:16]
+
+
+def write_snapshot(providers: List[Dict[str, Any]], path: str) -> Dict[str, Any]:
+    """
+    Write provider records to a snapshot file atomically.
+
+    Args:
+        providers: Normalised provider records
+        path: Destination file path
+
+    Returns:
+        The snapshot metadata (format, version, created_at, count)
+    """
+    metadata = {
+        "format": SNAPSHOT_FORMAT,
+        "format_version": SNAPSHOT_FORMAT_VERSION,
+        "version": compute_version(providers),
+        "created_at": datetime.now(timezone.utc).replace(microsecond=0).isoformat(),
+        "count": len(providers)
+    }
+
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+
+    # Encode in one call so the C encoder is used instead of the streaming Python one
+    payload = json.dumps({**metadata, "providers": providers}, separators=(",", ":"))
+
+    # Write to a temporary file first so readers never see a half-written snapshot
+    tmp_path = f"{path}.tmp"
+    with gzip.open(tmp_path, "wt", encoding="utf-8", compresslevel=6) as f:
+        f.write(payload)
+    os.replace(tmp_path, path)
+
+    logger.info(f"Wrote snapshot {path} with {len(providers)} providers (version {metadata['version']})")
+    return metadata
+
+
+def read_snapshot(path: str) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+    """
+    Read a snapshot file.
+
+    Returns:
+        Tuple of (provider records, snapshot metadata)
+
+    Raises:
+        ValueError: If the file is not a supported snapshot
+    """
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        document = json.load(f)
+
+    if document.get("format") != SNAPSHOT_FORMAT:
+        raise ValueError(f"{path} is not a provider snapshot")
+    if document.get("format_version") != SNAPSHOT_FORMAT_VERSION:
+        raise ValueError(f"Unsupported snapshot format version: {document.get('format_version')}")
+
+    providers = document.pop("providers", [])
+    return providers, document
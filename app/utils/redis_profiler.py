@@ -0,0 +1,147 @@
+"""
+Redis command profiler.
+
+The shared Redis client (see MemoryService._create_client) reports every
+command and every pipeline here, attributed to its call site: the first
+function outside the redis package, e.g. "MemoryService.get_messages". A
+pipeline is one round trip carrying several commands. Per process, round
+trips and commands are counted by call site in redis_round_trips_total and
+redis_commands_total at /metrics.
+
+During an API request the timing middleware keeps a RedisProfile in a context
+variable, so tasks started by the request count into it too. The request's
+totals are sent as X-Redis-Round-Trips and X-Redis-Commands headers
+(REDIS_PROFILE_HEADERS) and observed in redis_round_trips_per_request by
+route. With DEVELOPMENT_MODE on, requests sent with "X-Redis-Trace: 1" (or
+every request, with REDIS_TRACE) also record each call and log the trace
+when they finish. The trace includes keys, so it is never recorded in
+production.
+"""
+
+import logging
+import time
+from contextvars import ContextVar, Token
+from types import CodeType, FrameType
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from app.utils.metrics import metrics
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Calls kept in one request's trace
+TRACE_MAX_ENTRIES = 1000
+ROUND_TRIP_BUCKETS = (1, 2, 5, 10, 20, 35, 50, 75, 100, 150, 250)
+
+redis_round_trips = metrics.counter("redis_round_trips_total", "Redis round trips (commands and pipelines), by call site", ("site",))
+redis_commands = metrics.counter("redis_commands_total", "Redis commands, including those sent in pipelines, by call site", ("site",))
+round_trips_per_request = metrics.histogram(
+    "redis_round_trips_per_request", "Redis round trips made while handling an API request, by route", ("route",),
+    buckets=ROUND_TRIP_BUCKETS
+)
+
+# Code object -> call site name, so frames are only formatted once
+_site_names: Dict[CodeType, str] = {}
+
+
+def call_site(frame: Optional[FrameType]) -> str:
+    """Name of the first function outside the redis package, starting at frame."""
+    while frame is not None and frame.f_globals.get("__name__", "").startswith("redis."):
+        frame = frame.f_back
+    if frame is None:
+        return "unknown"
+    code = frame.f_code
+    site = _site_names.get(code)
+    if site is None:
+        site = _site_names[code] = getattr(code, "co_qualname", code.co_name)
+    return site
+
+
+def _describe(command: str, args: Sequence[Any]) -> Tuple[str, str]:
+    """Command and key of a call for the trace; a pipeline's args are the args of its commands."""
+    if command == "PIPELINE":
+        names = [str(command_args[0]).upper() for command_args in args[:10]]
+        text = f"PIPELINE[{','.join(names)}{',...' if len(args) > 10 else ''}]"
+        return text, _describe(names[0], args[0])[1] if args else ""
+    if len(args) < 2:
+        return command, ""
+    if command in ("EVAL", "EVALSHA"):
+        # EVALSHA sha numkeys key...: the script's first key, if any
+        return command, str(args[3]) if len(args) > 3 and str(args[2]) != "0" else ""
+    return command, str(args[1])
+
+
+class RedisProfile:
+    """Redis calls made during one request."""
+
+    __slots__ = ("started", "round_trips", "commands", "duration_ms", "sites", "trace")
+
+    def __init__(self, trace: bool = False):
+        self.started = time.perf_counter()
+        self.round_trips = 0
+        self.commands = 0
+        self.duration_ms = 0.0
+        # site -> [round trips, commands, ms]
+        self.sites: Dict[str, List[float]] = {}
+        self.trace: Optional[List[Tuple[float, str, str, str, float]]] = [] if trace else None
+
+    def record(self, site: str, command: str, commands: int, duration_ms: float, args: Sequence[Any]) -> None:
+        self.round_trips += 1
+        self.commands += commands
+        self.duration_ms += duration_ms
+        entry = self.sites.get(site)
+        if entry is None:
+            self.sites[site] = [1, commands, duration_ms]
+        else:
+            entry[0] += 1
+            entry[1] += commands
+            entry[2] += duration_ms
+        if self.trace is not None and len(self.trace) < TRACE_MAX_ENTRIES:
+            offset_ms = (time.perf_counter() - self.started) * 1000 - duration_ms
+            self.trace.append((offset_ms, site, *_describe(command, args), duration_ms))
+
+    def format_trace(self, request: str) -> str:
+        """The trace as text: totals, calls by site, then every call in order."""
+        lines = [
+            f"Redis trace of {request}: {self.round_trips} round trips, {self.commands} commands, {self.duration_ms:.1f} ms"
+        ]
+        for site, (round_trips, commands, duration_ms) in sorted(self.sites.items(), key=lambda item: -item[1][0]):
+            lines.append(f"  {round_trips:>4} round trips {commands:>4} commands {duration_ms:>8.1f} ms  {site}")
+        for offset_ms, site, command, key, duration_ms in self.trace or ():
+            lines.append(f"  +{offset_ms:8.1f} ms {duration_ms:6.1f} ms  {site:<45} {command} {key}")
+        if self.trace is not None and len(self.trace) >= TRACE_MAX_ENTRIES:
+            lines.append(f"  (trace stopped after {TRACE_MAX_ENTRIES} calls)")
+        return "\n".join(lines)
+
+
+_current: ContextVar[Optional[RedisProfile]] = ContextVar("redis_profile", default=None)
+
+
+def begin_request(trace: bool = False) -> Token:
+    """Start profiling a request in the current context; pass the token to end_request()."""
+    return _current.set(RedisProfile(trace))
+
+
+def current() -> Optional[RedisProfile]:
+    """Profile of the request being handled, or None outside a request."""
+    return _current.get()
+
+
+def end_request(token: Token, route: str, request: str) -> None:
+    """Observe the request's round trips and log its trace, if one was recorded."""
+    profile = _current.get()
+    _current.reset(token)
+    if profile is None:
+        return
+    round_trips_per_request.observe(profile.round_trips, route)
+    if profile.trace is not None:
+        logger.info(profile.format_trace(request))
+
+
+def record(site: str, command: str, duration_seconds: float, commands: int = 1, args: Sequence[Any] = ()) -> None:
+    """Count one round trip: a single command, or a pipeline of commands (args: each command's args)."""
+    redis_round_trips.inc(site)
+    redis_commands.inc(site, amount=commands)
+    profile = _current.get()
+    if profile is not None:
+        profile.record(site, command, commands, duration_seconds * 1000, args)
@@ -0,0 +1,115 @@
+"""
+Request-scoped timing spans.
+
+The timing middleware starts a RequestTiming for each API request and stores
+it in a context variable. Code anywhere below the endpoint records spans into
+it with span() or @timed() without passing anything around. Tasks started
+during the request (asyncio.gather) inherit the context and record into the
+same request. When the response starts, the spans are written as a
+Server-Timing header (https://www.w3.org/TR/server-timing/). Every span is
+also observed in the stage_duration_seconds histogram, and spans that raise
+are counted in stage_errors_total. Both are exported at /metrics.
+"""
+
+import functools
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar, Token
+from typing import Callable, Dict, Iterator, List, Optional
+
+from app.utils.metrics import metrics
+
+
+class RequestTiming:
+    """Spans recorded during one request, summed per name."""
+
+    __slots__ = ("started", "spans")
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        # name -> [total ms, calls]
+        self.spans: Dict[str, List[float]] = {}
+
+    def record(self, name: str, duration_ms: float) -> None:
+        entry = self.spans.get(name)
+        if entry is None:
+            self.spans[name] = [duration_ms, 1]
+        else:
+            entry[0] += duration_ms
+            entry[1] += 1
+
+    def elapsed_ms(self) -> float:
+        return (time.perf_counter() - self.started) * 1000
+
+    def server_timing(self, total_ms: float) -> str:
+        """Format the spans and the total as a Server-Timing header value."""
+        entries = []
+        for name, (duration_ms, calls) in self.spans.items():
+            if calls > 1:
+                entries.append(f'{name};dur={duration_ms:.1f};desc="{calls} calls"')
+            else:
+                entries.append(f"{name};dur={duration_ms:.1f}")
+        entries.append(f"total;dur={total_ms:.1f}")
+        return ", ".join(entries)
+
+
+# Per-process stage metrics, exported at /metrics
+stage_duration = metrics.histogram(
+    "stage_duration_seconds", "Time spent in each request stage (memory, upstream API calls, serialisation)", ("stage",)
+)
+stage_errors = metrics.counter("stage_errors_total", "Request stages that ended with an exception", ("stage",))
+
+_current: ContextVar[Optional[RequestTiming]] = ContextVar("request_timing", default=None)
+
+
+def begin_request() -> Token:
+    """Start timing a request in the current context; pass the token to end_request()."""
+    return _current.set(RequestTiming())
+
+
+def current() -> Optional[RequestTiming]:
+    """Timing of the request being handled, or None outside a request."""
+    return _current.get()
+
+
+def end_request(token: Token) -> None:
+    _current.reset(token)
+
+
+def record(name: str, duration_ms: float, failed: bool = False) -> None:
+    """Record a span measured by the caller."""
+    stage_duration.observe(duration_ms / 1000, name)
+    if failed:
+        stage_errors.inc(name)
+    timing = _current.get()
+    if timing is not None:
+        timing.record(name, duration_ms)
+
+
+@contextmanager
+def span(name: str) -> Iterator[None]:
+    """Time the enclosed block as a span called name."""
+    start = time.perf_counter()
+    failed = True
+    try:
+        yield
+        failed = False
+    finally:
+        record(name, (time.perf_counter() - start) * 1000, failed)
+
+
+def timed(name: str) -> Callable:
+    """Decorator that times every call of an async function as a span called name."""
+    def decorator(func: Callable) -> Callable:
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            failed = True
+            try:
+                result = await func(*args, **kwargs)
+                failed = False
+                return result
+            finally:
+                record(name, (time.perf_counter() - start) * 1000, failed)
+        return wrapper
+    return decorator
@@ -0,0 +1,364 @@
+"""
+Local approximate nearest neighbour index for provider retrieval.
+
+Vectors are L2-normalised float32 rows, so inner product equals cosine
+similarity. Two index types are provided:
+
+* FlatIndex: exact brute-force search, best for small catalogues.
+* IVFIndex: inverted file index. Rows are clustered around k-means centroids
+  and a query only scans the `nprobe` closest clusters.
+
+Both support boolean row masks for metadata pre-filtering and can be saved to a
+directory of .npy files that is memory-mapped on load. Ingestion writes a new
+directory and publishes it by switching a symlink, so files a running process
+has mapped are never rewritten in place.
+"""
+
+import json
+import logging
+import os
+import re
+import shutil
+import tempfile
+import zlib
+from typing import Any, Dict, Iterable, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from app.utils.availability import provider_city
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+VECTOR_INDEX_FORMAT = "nivaran-vectors"
+VECTOR_INDEX_FORMAT_VERSION = 1
+DEFAULT_DIMENSIONS = 256
+
+_TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+
+def provider_document(record: Dict[str, Any]) -> str:
+    """Build the text that represents a provider in the vector index."""
+    parts = [record.get(field) or "" for field in ("name", "specialty", "hospital", "location")]
+    parts.append(provider_city(record))
+    return " ".join(part for part in parts if part)
+
+
+class HashingEmbedder:
+    """
+    Deterministic text embedder using hashed word and character n-gram features.
+
+    Needs no model download or network access. Character trigrams give
+    partial-word and misspelling tolerance ("dermatolgy" still lands near
+    "dermatology"). Anything with the same `embed` signature can be used
+    instead, for example a dense sentence-embedding model.
+    """
+
+    def __init__(self, dimensions: int = DEFAULT_DIMENSIONS, ngram: int = 3):
+        self.dimensions = dimensions
+        self.ngram = ngram
+
+    def _features(self, text: str) -> Iterable[Tuple[str, float]]:
+        for token in _TOKEN_PATTERN.findall(text.lower()):
+            yield f"w:{token}", 1.0
+            padded = f" {token} "
+            for i in range(len(padded) - self.ngram + 1):
+                yield padded[i:i + self.ngram], 0.5
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        """
+        Embed texts into L2-normalised vectors.
+
+        Returns:
+            Array of shape (len(texts), dimensions)
+        """
+        vectors = np.zeros((len(texts), self.dimensions), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for feature, weight in self._features(text or ""):
+                digest = zlib.crc32(feature.encode("utf-8"))
+                sign = 1.0 if digest & 0x80000000 else -1.0
+                vectors[row, digest % self.dimensions] += sign * weight
+        return normalise_rows(vectors)
+
+    def config(self) -> Dict[str, Union[str, int]]:
+        """Parameters needed to recreate this embedder."""
+        return {"type": "hashing", "dimensions": self.dimensions, "ngram": self.ngram}
+
+
+def normalise_rows(vectors: np.ndarray) -> np.ndarray:
+    """L2-normalise the rows of a matrix, leaving all-zero rows untouched."""
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return (vectors / norms).astype(np.float32, copy=False)
+
+
+def _top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """Positions of the k highest scores, best first."""
+    if k >= len(scores):
+        return np.argsort(-scores, kind="stable")
+    candidates = np.argpartition(-scores, k - 1)[:k]
+    return candidates[np.argsort(-scores[candidates], kind="stable")]
+
+
+class FlatIndex:
+    """Exact inner-product search over every row."""
+
+    kind = "flat"
+
+    def __init__(self, vectors: np.ndarray):
+        self.vectors = vectors
+
+    def __len__(self) -> int:
+        return len(self.vectors)
+
+    @property
+    def dimensions(self) -> int:
+        return self.vectors.shape[1]
+
+    def search(self, query: np.ndarray, k: int, mask: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Find the k rows most similar to a query vector.
+
+        Args:
+            query: Query vector of shape (dimensions,)
+            k: Number of results
+            mask: Optional boolean array; only rows where it is True are returned
+
+        Returns:
+            Tuple of (row numbers, scores), best first
+        """
+        if mask is not None:
+            rows = np.flatnonzero(mask)
+            scores = self.vectors[rows] @ query
+            best = _top_k(scores, k)
+            return rows[best], scores[best]
+
+        scores = self.vectors @ query
+        best = _top_k(scores, k)
+        return best, scores[best]
+
+    def arrays(self) -> Dict[str, np.ndarray]:
+        return {"vectors": self.vectors}
+
+
+class IVFIndex(FlatIndex):
+    """
+    Inverted file index over k-means clusters.
+
+    Rows are stored grouped by cluster (CSR layout: `list_offsets` into
+    `list_rows`), so probing a cluster is a contiguous slice.
+    """
+
+    kind = "ivf"
+
+    def __init__(
+        self,
+        vectors: np.ndarray,
+        centroids: np.ndarray,
+        list_offsets: np.ndarray,
+        list_rows: np.ndarray,
+        nprobe: int = 16
+    ):
+        super().__init__(vectors)
+        self.centroids = centroids
+        self.list_offsets = list_offsets
+        self.list_rows = list_rows
+        self.nprobe = nprobe
+
+    @classmethod
+    def build(
+        cls,
+        vectors: np.ndarray,
+        nlist: Optional[int] = None,
+        nprobe: int = 16,
+        iterations: int = 10,
+        sample_size: int = 20000,
+        seed: int = 0
+    ) -> "IVFIndex":
+        """
+        Cluster vectors with spherical k-means and build the inverted lists.
+
+        Args:
+            vectors: L2-normalised rows
+            nlist: Number of clusters; defaults to about 4 * sqrt(rows)
+            nprobe: Clusters scanned per query
+            iterations: k-means iterations
+            sample_size: Rows used to train the centroids
+            seed: Random seed for reproducible clustering
+        """
+        count = len(vectors)
+        nlist = max(1, min(nlist or int(4 * np.sqrt(count)), count))
+        rng = np.random.default_rng(seed)
+
+        sample = vectors if count <= sample_size else vectors[rng.choice(count, sample_size, replace=False)]
+        centroids = sample[rng.choice(len(sample), nlist, replace=False)].copy()
+        for _ in range(iterations):
+            assignment = np.argmax(sample @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assignment, sample)
+            empty = np.bincount(assignment, minlength=nlist) == 0
+            # Re-seed empty clusters so every list stays useful
+            sums[empty] = sample[rng.choice(len(sample), int(empty.sum()))]
+            centroids = normalise_rows(sums)
+
+        assignment = np.empty(count, dtype=np.int32)
+        for start in range(0, count, 65536):
+            assignment[start:start + 65536] = np.argmax(vectors[start:start + 65536] @ centroids.T, axis=1)
+
+        list_rows = np.argsort(assignment, kind="stable").astype(np.int32)
+        list_offsets = np.zeros(nlist + 1, dtype=np.int64)
+        np.cumsum(np.bincount(assignment, minlength=nlist), out=list_offsets[1:])
+        return cls(vectors, centroids, list_offsets, list_rows, nprobe)
+
+    def search(self, query: np.ndarray, k: int, mask: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Find approximately the k rows most similar to a query vector.
+
+        Selective masks (matching no more rows than a typical probe would scan)
+        are searched exactly, since scanning the masked rows is cheaper than
+        probing clusters that may not contain any of them.
+        """
+        nlist = len(self.centroids)
+        nprobe = min(self.nprobe, nlist)
+        if mask is not None and np.count_nonzero(mask) <= len(self) * nprobe / nlist:
+            return super().search(query, k, mask)
+
+        probes = _top_k(self.centroids @ query, nprobe)
+        rows = np.concatenate([self.list_rows[self.list_offsets[c]:self.list_offsets[c + 1]] for c in probes])
+        if mask is not None:
+            rows = rows[mask[rows]]
+            if len(rows) < k:
+                # The probed clusters hold too few matching rows; scan the mask exactly
+                return super().search(query, k, mask)
+        scores = self.vectors[rows] @ query
+        best = _top_k(scores, k)
+        return rows[best], scores[best]
+
+    def arrays(self) -> Dict[str, np.ndarray]:
+        return {
+            "vectors": self.vectors,
+            "centroids": self.centroids,
+            "list_offsets": self.list_offsets,
+            "list_rows": self.list_rows
+        }
+
+
+VectorIndex = Union[FlatIndex, IVFIndex]
+
+
+def build_index(vectors: np.ndarray, ivf_threshold: int = 50000, nprobe: int = 16) -> VectorIndex:
+    """Build a flat index for small collections and an IVF index above ivf_threshold rows."""
+    if len(vectors) >= ivf_threshold:
+        return IVFIndex.build(vectors, nprobe=nprobe)
+    return FlatIndex(vectors)
+
+
+def save_index(index: VectorIndex, ids: Sequence[str], path: str, version: str, embedder: HashingEmbedder) -> None:
+    """
+    Save an index and its row IDs to a directory of .npy files.
+
+    Args:
+        index: Index to save
+        ids: Identifier of every row, in row order
+        path: Destination directory
+        version: Content version of the catalogue the vectors were built from
+        embedder: Embedder used for the vectors
+    """
+    os.makedirs(path, exist_ok=True)
+    for name, array in index.arrays().items():
+        np.save(os.path.join(path, f"{name}.npy"), np.ascontiguousarray(array))
+    np.save(os.path.join(path, "ids.npy"), np.asarray(list(ids), dtype=np.str_))
+
+    meta = {
+        "format": VECTOR_INDEX_FORMAT,
+        "format_version": VECTOR_INDEX_FORMAT_VERSION,
+        "kind": index.kind,
+        "version": version,
+        "count": len(index),
+        "embedder": embedder.config(),
+        "nprobe": getattr(index, "nprobe", None)
+    }
+    # Written last so a reader never sees metadata for half-written arrays
+    tmp_path = os.path.join(path, "meta.json.tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(meta, f)
+    os.replace(tmp_path, os.path.join(path, "meta.json"))
+
+    logger.info(f"Wrote {index.kind} vector index with {len(index)} rows to {path}")
+
+
+def staging_directory(path: str) -> str:
+    """Create an empty directory next to path to write a complete index directory into."""
+    parent = os.path.dirname(os.path.abspath(path))
+    os.makedirs(parent, exist_ok=True)
+    staging = tempfile.mkdtemp(prefix=f"{os.path.basename(path)}.", dir=parent)
+    os.chmod(staging, 0o755)
+    return staging
+
+
+def publish_directory(staging: str, path: str) -> None:
+    """
+    Make a fully written staging directory the index directory at path.
+
+    path is a symlink to the current directory and is switched with a single
+    rename, so readers see either the old or the new directory, never a mix.
+    The previous directory is then removed; a process that has its arrays
+    mapped keeps reading them, since removing a file does not touch its pages.
+    A plain directory at path (written before symlinks were used) is moved
+    aside first.
+
+    Args:
+        staging: Directory from staging_directory() holding the complete index
+        path: Index directory readers open
+    """
+    previous = None
+    if os.path.islink(path):
+        previous = os.path.realpath(path)
+    elif os.path.isdir(path):
+        previous = f"{staging}.previous"
+        os.replace(path, previous)
+
+    link = f"{staging}.link"
+    os.symlink(os.path.basename(staging), link)
+    os.replace(link, path)
+    if previous and previous != os.path.realpath(path):
+        shutil.rmtree(previous, ignore_errors=True)
+    logger.info(f"Published index directory {staging} as {path}")
+
+
+def load_index(path: str) -> Tuple[VectorIndex, np.ndarray, Dict]:
+    """
+    Memory-map an index saved by save_index.
+
+    Resolve a published path with os.path.realpath first (and load the other
+    indexes in the directory from the same resolved path), so every file comes
+    from one version even if a new directory is published meanwhile.
+
+    Returns:
+        Tuple of (index, row IDs, metadata)
+
+    Raises:
+        ValueError: If the directory does not hold a supported index
+    """
+    with open(os.path.join(path, "meta.json"), encoding="utf-8") as f:
+        meta = json.load(f)
+    if meta.get("format") != VECTOR_INDEX_FORMAT:
+        raise ValueError(f"{path} is not a vector index")
+    if meta.get("format_version") != VECTOR_INDEX_FORMAT_VERSION:
+        raise ValueError(f"Unsupported vector index format version: {meta.get('format_version')}")
+
+    def array(name: str) -> np.ndarray:
+        return np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r")
+
+    if meta["kind"] == IVFIndex.kind:
+        index = IVFIndex(array("vectors"), array("centroids"), array("list_offsets"), array("list_rows"), meta["nprobe"])
+    else:
+        index = FlatIndex(array("vectors"))
+    return index, array("ids"), meta
+
+
+def embedder_from_config(config: Dict) -> HashingEmbedder:
+    """Recreate the embedder described by an index's metadata."""
+    if config.get("type") != "hashing":
+        raise ValueError(f"Unsupported embedder type: {config.get('type')}")
+    return HashingEmbedder(config["dimensions"], config["ngram"])
@@ -0,0 +1,92 @@
+"""
+Benchmark the availability index against re-parsing availability text per lookup.
+
+Usage:
+    python -m benchmarks.bench_availability --providers 50000 --queries 200
+"""
+
+import argparse
+import random
+import statistics
+import time
+from datetime import datetime, timedelta
+
+from app.utils.availability import (
+    AvailabilityIndex, DAYS_OF_WEEK, normalise_key, parse_time_range, provider_city
+)
+from benchmarks.synthetic_providers import CITIES, SPECIALTIES, generate_providers
+
+
+def naive_available_now(providers, when, specialty, city):
+    """Baseline: filter and re-parse every provider's text ranges on each lookup."""
+    day = DAYS_OF_WEEK[when.weekday()]
+    minute = when.hour * 60 + when.minute
+    matches = []
+    for record in providers:
+        if normalise_key(record["specialty"]) != specialty or provider_city(record) != city:
+            continue
+        for time_range in record["availability"].get(day, []):
+            start, end = parse_time_range(time_range)
+            if start <= minute < end:
+                matches.append(record["provider_id"])
+                break
+    return matches
+
+
+def timed(func, queries):
+    """Run func over queries and return per-query latencies in microseconds."""
+    latencies = []
+    for query in queries:
+        start = time.perf_counter()
+        func(*query)
+        latencies.append((time.perf_counter() - start) * 1e6)
+    return latencies
+
+
+def report(name, latencies):
+    latencies = sorted(latencies)
+    p95 = latencies[int(len(latencies) * 0.95) - 1]
+    print(f"{name:<28} mean {statistics.mean(latencies):10.1f} us   p50 {statistics.median(latencies):10.1f} us   p95 {p95:10.1f} us")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the provider availability index")
+    parser.add_argument("--providers", type=int, default=50000, help="Number of synthetic providers")
+    parser.add_argument("--queries", type=int, default=200, help="Number of queries per benchmark")
+    parser.add_argument("--k", type=int, default=10, help="Slots requested by the k-earliest query")
+    args = parser.parse_args()
+
+    providers = generate_providers(args.providers)
+
+    start = time.perf_counter()
+    index = AvailabilityIndex.from_providers(providers)
+    print(f"Built index over {len(index)} providers in {time.perf_counter() - start:.2f}s")
+
+    rng = random.Random(7)
+    base = datetime(2025, 1, 6)
+    queries = [
+        (
+            base + timedelta(minutes=rng.randrange(7 * 24 * 60)),
+            normalise_key(rng.choice(SPECIALTIES)),
+            normalise_key(rng.choice(CITIES)[0])
+        )
+        for _ in range(args.queries)
+    ]
+
+    # Sanity check that the index agrees with the baseline
+    for when, specialty, city in queries[:20]:
+        assert index.available_now(when, specialty, city) == naive_available_now(providers, when, specialty, city)
+
+    report("naive available_now", timed(lambda w, s, c: naive_available_now(providers, w, s, c), queries))
+    report("index available_now", timed(lambda w, s, c: index.available_now(w, s, c), queries))
+    report("index available_now (all)", timed(lambda w, s, c: index.available_now(w), queries))
+    report("index next_available", timed(lambda w, s, c: index.next_available(w, s, c), queries))
+    report(f"index earliest_slots k={args.k}", timed(lambda w, s, c: index.earliest_slots(args.k, w, s, c), queries))
+    report(
+        f"index earliest_slots k={args.k} city",
+        timed(lambda w, s, c: index.earliest_slots(args.k, w, city=c, max_per_provider=1), queries[:20])
+    )
+
+
+if __name__ == "__main__":
+    main()
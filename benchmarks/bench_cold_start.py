@@ -0,0 +1,135 @@
+"""
+Cold-start benchmark: import time of the API, per module.
+
+Runs `python -X importtime -c "import app.main"` in fresh interpreters, takes
+the median of each module's cumulative and self import time, and reports the
+slowest top-level packages and modules. Each run can be appended to a JSONL
+history file (with the git commit), so regressions show up as deltas against
+the previous entry. Exits non-zero when the median import time exceeds the
+budget, so it can gate CI.
+
+Usage:
+    python -m benchmarks.bench_cold_start --runs 7 --budget-ms 1000 --history benchmarks/importtime_history.jsonl
+"""
+
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from typing import Dict, List, Tuple
+
+IMPORTTIME_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|\s*(\S+)")
+
+
+def parse_importtime(stderr: str) -> List[Tuple[str, int, int]]:
+    """Parse -X importtime output into (module, self us, cumulative us) rows."""
+    rows = []
+    for line in stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if match:
+            self_us, cumulative_us, module = match.groups()
+            rows.append((module, int(self_us), int(cumulative_us)))
+    return rows
+
+
+def measure(module: str) -> Tuple[float, Dict[str, Tuple[int, int]]]:
+    """Import a module in a fresh interpreter; returns (wall ms, {module: (self us, cumulative us)})."""
+    env = dict(os.environ)
+    # Settings validation needs a key; nothing is called
+    env.setdefault("OPENAI_API_KEY", "cold-start-benchmark")
+    env["PYTHONDONTWRITEBYTECODE"] = "1"
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True, env=env
+    )
+    wall_ms = (time.perf_counter() - start) * 1000
+    if result.returncode != 0:
+        sys.exit(f"Importing {module} failed:\n{result.stderr[-2000:]}")
+    return wall_ms, {name: (self_us, cumulative_us) for name, self_us, cumulative_us in parse_importtime(result.stderr)}
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True).stdout.strip()
+    except OSError:
+        return ""
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure the API's cold-start import time per module")
+    parser.add_argument("--module", default="app.main", help="Module to import")
+    parser.add_argument("--runs", type=int, default=7, help="Fresh interpreters to measure")
+    parser.add_argument("--top", type=int, default=15, help="Modules to list")
+    parser.add_argument("--budget-ms", type=float, default=1000.0, help="Fail when the median import exceeds this")
+    parser.add_argument("--history", help="JSONL file to append this run to and compare against")
+    args = parser.parse_args()
+
+    # The first run warms the OS file cache and writes nothing to the history
+    measure(args.module)
+    walls, samples = [], defaultdict(list)
+    for _ in range(args.runs):
+        wall_ms, modules = measure(args.module)
+        walls.append(wall_ms)
+        for name, timing in modules.items():
+            samples[name].append(timing)
+
+    def median(name: str, index: int) -> float:
+        return statistics.median(timing[index] for timing in samples[name]) / 1000
+
+    import_ms = median(args.module, 1)
+    wall_ms = statistics.median(walls)
+    # Third-party and stdlib packages: the outermost import of a root package carries its whole cost
+    own_root = args.module.split(".")[0]
+    packages: Dict[str, float] = defaultdict(float)
+    for name in samples:
+        root = name.split(".")[0]
+        if root != own_root:
+            packages[root] = max(packages[root], median(name, 1))
+    top_packages = sorted(packages.items(), key=lambda item: -item[1])[:args.top]
+    top_self = sorted(((name, median(name, 0)) for name in samples), key=lambda item: -item[1])[:args.top]
+
+    print(f"import {args.module}: {import_ms:.0f} ms median over {args.runs} runs (interpreter wall {wall_ms:.0f} ms, budget {args.budget_ms:.0f} ms)")
+    print("\nslowest packages (cumulative ms):")
+    for name, value in top_packages:
+        print(f"  {name:<40} {value:8.1f}")
+    print("\nslowest modules (self ms):")
+    for name, value in top_self:
+        print(f"  {name:<60} {value:8.1f}")
+
+    if args.history:
+        entry = {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "commit": git_commit(),
+            "python": sys.version.split()[0],
+            "import_ms": round(import_ms, 1),
+            "wall_ms": round(wall_ms, 1),
+            "packages": {name: round(value, 1) for name, value in packages.items() if value >= 1}
+        }
+        previous = None
+        if os.path.exists(args.history):
+            with open(args.history, encoding="utf-8") as f:
+                lines = [line for line in f if line.strip()]
+            if lines:
+                previous = json.loads(lines[-1])
+        if previous:
+            print(f"\nsince {previous['commit'] or previous['timestamp']}: {import_ms - previous['import_ms']:+.0f} ms")
+            for name in sorted(set(entry["packages"]) | set(previous["packages"])):
+                delta = entry["packages"].get(name, 0.0) - previous["packages"].get(name, 0.0)
+                if abs(delta) >= 5:
+                    print(f"  {name:<40} {delta:+8.1f}")
+        with open(args.history, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry) + "\n")
+
+    if import_ms > args.budget_ms:
+        print(f"\nimport time {import_ms:.0f} ms exceeds the {args.budget_ms:.0f} ms budget")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Benchmark nearest-provider and radius queries on the geo grid index against a
+brute-force haversine scan, with and without specialty/availability filters.
+
+Usage:
+    python -m benchmarks.bench_geo --providers 100000 --queries 200
+"""
+
+import argparse
+import random
+import statistics
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from app.config.vocabulary import CITIES as CITY_VOCABULARY
+from app.utils.availability import AvailabilityIndex, normalise_key
+from app.utils.geo import GeoIndex, haversine_km, record_coordinates
+from benchmarks.synthetic_providers import CITIES, SPECIALTIES, generate_providers
+
+
+def brute_nearest(latitudes, longitudes, latitude, longitude, k, mask):
+    rows = np.flatnonzero(mask) if mask is not None else np.arange(len(latitudes))
+    distances = haversine_km(latitude, longitude, latitudes[rows], longitudes[rows])
+    order = np.argsort(distances, kind="stable")[:k]
+    return rows[order], distances[order]
+
+
+def brute_within(latitudes, longitudes, latitude, longitude, radius_km, mask):
+    rows = np.flatnonzero(mask) if mask is not None else np.arange(len(latitudes))
+    distances = haversine_km(latitude, longitude, latitudes[rows], longitudes[rows])
+    inside = distances <= radius_km
+    return rows[inside]
+
+
+def timed(func, queries):
+    results = []
+    latencies = []
+    for query in queries:
+        start = time.perf_counter()
+        results.append(func(*query))
+        latencies.append((time.perf_counter() - start) * 1e6)
+    return results, latencies
+
+
+def report(name, latencies):
+    latencies = sorted(latencies)
+    p95 = latencies[int(len(latencies) * 0.95) - 1]
+    print(f"{name:<36} mean {statistics.mean(latencies):9.1f} us   p95 {p95:9.1f} us")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the provider geo index")
+    parser.add_argument("--providers", type=int, default=100000, help="Number of synthetic providers")
+    parser.add_argument("--queries", type=int, default=200, help="Number of queries per benchmark")
+    parser.add_argument("--k", type=int, default=10, help="Neighbours per k-nearest query")
+    parser.add_argument("--radius", type=float, default=5.0, help="Radius in km for radius queries")
+    args = parser.parse_args()
+
+    providers = generate_providers(args.providers)
+    start = time.perf_counter()
+    geo = GeoIndex.build(record_coordinates(record) for record in providers)
+    print(f"Built geo index over {geo.located} providers in {time.perf_counter() - start:.2f}s")
+    availability = AvailabilityIndex.from_providers(providers)
+
+    rng = random.Random(5)
+    base = datetime(2025, 1, 6)
+    queries = []
+    for _ in range(args.queries):
+        centre = CITY_VOCABULARY[rng.choice(CITIES)[0].lower()]["coordinates"]
+        specialty = normalise_key(rng.choice(SPECIALTIES))
+        specialty_mask = np.unpackbits(
+            availability.filter_mask(specialty=specialty), count=len(availability), bitorder="little"
+        ).astype(bool)
+        available_mask = np.zeros(len(availability), dtype=bool)
+        available_mask[availability.available_ordinals(base + timedelta(minutes=rng.randrange(7 * 24 * 60)), specialty)] = True
+        point = (centre[0] + rng.uniform(-0.1, 0.1), centre[1] + rng.uniform(-0.1, 0.1))
+        queries.append((point, specialty_mask, available_mask))
+
+    latitudes, longitudes = np.asarray(geo.latitudes), np.asarray(geo.longitudes)
+    for label, pick in (("", lambda q: None), (" specialty", lambda q: q[1]), (" specialty+available", lambda q: q[2])):
+        nearest_queries = [(q[0][0], q[0][1], args.k, pick(q)) for q in queries]
+        expected, brute = timed(lambda la, lo, k, m: brute_nearest(latitudes, longitudes, la, lo, k, m), nearest_queries)
+        actual, indexed = timed(lambda la, lo, k, m: geo.nearest(la, lo, k, m), nearest_queries)
+        for (e_rows, e_dist), (a_rows, a_dist) in zip(expected, actual):
+            assert np.allclose(e_dist, a_dist), "geo index disagrees with brute force"
+        report(f"brute k-nearest{label}", brute)
+        report(f"index k-nearest{label}", indexed)
+
+        radius_queries = [(q[0][0], q[0][1], args.radius, pick(q)) for q in queries]
+        expected, brute = timed(lambda la, lo, r, m: brute_within(latitudes, longitudes, la, lo, r, m), radius_queries)
+        actual, indexed = timed(lambda la, lo, r, m: geo.within(la, lo, r, m)[0], radius_queries)
+        for e_rows, a_rows in zip(expected, actual):
+            assert set(e_rows.tolist()) == set(a_rows.tolist()), "geo index radius query disagrees with brute force"
+        report(f"brute radius {args.radius:g} km{label}", brute)
+        report(f"index radius {args.radius:g} km{label}", indexed)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,371 @@
+"""
+Microbenchmarks of the pure-Python code that runs on every request.
+
+Covers message preparation for OpenAI, structured response creation, JSON
+extraction from a completion, Gemini response cleaning, conversation state
+updates and the response models' model_dump. Fixtures are fixed: short, long
+and tool-heavy conversation histories, and one response of each type.
+
+Each case is timed like timeit: garbage collection off, the iteration count
+calibrated so a repeat takes at least --min-time seconds, and the best per-call
+time over --repeat repeats is kept (slower repeats measure interference from
+the rest of the machine, not the code). Repeats are interleaved across cases,
+so a slow spell of the machine does not land on a single case. A fixed
+reference workload is timed before and after the cases, and baselines are
+compared relative to it, so a machine that is uniformly faster or slower (CPU
+frequency, a noisy neighbour) does not read as a change in the code.
+Application logging is silenced so console I/O does not add noise.
+
+The conversation state cases need the fakeredis package (an in-process Redis)
+and are skipped without it. The fake's command handling takes most of their
+time, so they are reported against the baseline but never fail the run.
+
+--save writes the results as a baseline. --baseline compares against one and
+exits with status 1 when any other case is slower by more than --threshold.
+Timings depend on the machine, so keep one baseline per machine (e.g. the CI
+runner) rather than comparing across machines.
+
+Usage:
+    python -m benchmarks.bench_hot_paths --save benchmarks/hot_paths_baseline.json
+    python -m benchmarks.bench_hot_paths --baseline benchmarks/hot_paths_baseline.json --threshold 0.2
+    python -m benchmarks.bench_hot_paths --filter prepare_messages --repeat 11
+"""
+
+import argparse
+import asyncio
+import gc
+import json
+import logging
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# Settings require an OpenAI key; no request is made
+os.environ.setdefault("OPENAI_API_KEY", "bench-hot-paths")
+
+from openai.types.chat import ChatCompletion
+
+from app.models.response_models import ListResponse, TextResponse
+from app.services.ai_service import ai_service
+from app.services.gemini_service import gemini_service
+from app.services.memory_service import MemoryService
+
+# Cases reported against the baseline without failing the run: their timings are mostly fakeredis
+UNGATED_PREFIXES = ("update_conversation_state",)
+
+SYMPTOMS = [
+    "I have had a fever and a bad cough since Monday. The pain in my chest gets worse at night.",
+    "My knee hurts when I climb stairs, there is some swelling and a dull ache.",
+    "There is an itchy rash on both arms. It started after I changed soap."
+]
+
+
+def _provider(index: int) -> Dict[str, Any]:
+    return {
+        "id": f"prov-{index:03d}",
+        "name": f"Dr. Provider {index}",
+        "specialty": "Dermatologist",
+        "hospital": f"City Care Hospital {index % 4}",
+        "city": "Mumbai",
+        "locality": "Andheri West",
+        "fee": 500 + 50 * index,
+        "timings": "Mon-Sat 10:00-13:00, 17:00-20:00",
+        "next_available": "2026-10-21 10:30",
+        "distance_km": round(1.2 + index * 0.7, 1)
+    }
+
+
+def _list_content(rows: int) -> Dict[str, Any]:
+    return {
+        "type": "list",
+        "content": {
+            "body": {"text": "Here are dermatologists near Andheri West with slots this week:"},
+            "action": {
+                "button": "View doctors",
+                "sections": [{
+                    "title": "Dermatologists",
+                    "rows": [
+                        {"id": f"prov-{i:03d}", "title": f"Dr. Provider {i}", "description": f"City Care Hospital {i % 4}, Rs {500 + 50 * i}"}
+                        for i in range(rows)
+                    ]
+                }]
+            }
+        }
+    }
+
+
+def _text(text: str) -> str:
+    return json.dumps({"type": "text", "content": {"text": text}})
+
+
+def build_histories() -> Dict[str, List[Dict[str, Any]]]:
+    """Conversation histories as stored in memory: short, long, and tool-heavy."""
+    short = [
+        {"role": "system", "content": "New conversation started"},
+        {"role": "user", "content": "Hi"},
+        {"role": "assistant", "content": _text("Hello! How can I help you with your health today?")},
+        {"role": "user", "content": SYMPTOMS[0]}
+    ]
+
+    long = list(short)
+    for turn in range(28):
+        long.append({"role": "user", "content": f"{SYMPTOMS[turn % 3]} Also, question {turn}: is that normal?"})
+        long.append({"role": "assistant", "content": _text(f"Thanks for the details. Answer {turn}: " + "It is worth seeing a doctor. " * 6)})
+
+    tool_heavy = list(short)
+    for turn in range(6):
+        call_id = f"call_{turn:024d}"
+        service_info = {
+            "success": True,
+            "service_info": "Doctors matching your request:\n" + "\n".join(json.dumps(_provider(i)) for i in range(8)),
+            "providers": [_provider(i) for i in range(8)]
+        }
+        tool_heavy += [
+            {"role": "user", "content": f"Find a dermatologist in Mumbai, option {turn}"},
+            {"role": "assistant", "content": None, "tool_calls": [{
+                "id": call_id,
+                "type": "function",
+                "function": {
+                    "name": "get_service_info",
+                    "arguments": json.dumps({"query": "dermatologist in Mumbai", "specialty": "Dermatologist", "location": "Mumbai"})
+                }
+            }]},
+            {"role": "tool", "content": json.dumps(service_info), "tool_call_id": call_id},
+            {"role": "assistant", "content": json.dumps(_list_content(8))}
+        ]
+    return {"short": short, "long": long, "tool_heavy": tool_heavy}
+
+
+def build_contents() -> Dict[str, Dict[str, Any]]:
+    """Parsed model output of each response type."""
+    return {
+        "text": {"type": "text", "content": {"text": "Please share your age and the date you would like to visit."}},
+        "button": {
+            "type": "button",
+            "content": {
+                "body": {"text": "Which slot suits you?"},
+                "action": {"buttons": [{"reply": {"id": f"slot_{i}", "title": f"{10 + i}:00"}} for i in range(3)]}
+            }
+        },
+        "list": _list_content(10),
+        "call_to_action": {
+            "type": "call_to_action",
+            "content": {"parameters": {"display_text": "Open booking", "url": "https://example.com/book/prov-001"}}
+        }
+    }
+
+
+def _completion(content: str) -> ChatCompletion:
+    return ChatCompletion.model_validate({
+        "id": "chatcmpl-bench",
+        "object": "chat.completion",
+        "created": 0,
+        "model": "gpt-4.1-mini",
+        "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+        "usage": {"prompt_tokens": 1500, "completion_tokens": 200, "total_tokens": 1700}
+    })
+
+
+def reference_workload() -> None:
+    """Fixed mix of dict building, string formatting and JSON, used to normalise timings."""
+    rows = [{"id": i, "name": f"row {i}", "tags": [str(i % 7), str(i % 11)]} for i in range(40)]
+    json.loads(json.dumps(rows))
+    sorted(rows, key=lambda row: row["name"])
+
+
+def build_cases() -> List[Tuple[str, Callable[[], Any], bool]]:
+    """(name, call, is_async) for every benchmark case."""
+    histories = build_histories()
+    contents = build_contents()
+    cases: List[Tuple[str, Callable[[], Any], bool]] = []
+
+    for name, history in histories.items():
+        cases.append((f"prepare_messages[{name}]", lambda history=history: ai_service._prepare_messages(history), False))
+
+    for name, content in contents.items():
+        cases.append((
+            f"create_structured_response[{name}]",
+            lambda content=content: ai_service._create_structured_response(content, "conv-bench", "resp-bench"),
+            False
+        ))
+
+    for name, content in (("text", contents["text"]), ("list", contents["list"])):
+        completion = _completion(json.dumps(content))
+        cases.append((
+            f"extract_json_content[{name}]",
+            lambda completion=completion: ai_service._extract_json_content_from_response(completion),
+            False
+        ))
+
+    gemini_texts = {
+        "plain": "Doctors matching your request:\n" + "\n".join(json.dumps(_provider(i)) for i in range(10)),
+        "fenced_json": "```json\n" + json.dumps({"providers": [_provider(i) for i in range(10)]}, indent=2) + "\n```"
+    }
+    for name, text in gemini_texts.items():
+        cases.append((f"clean_response_text[{name}]", lambda text=text: gemini_service._clean_response_text(text), False))
+
+    responses = {
+        "text": TextResponse(response_id="resp-bench", conversation_id="conv-bench", content={"text": contents["text"]["content"]["text"]}),
+        "list": ListResponse(response_id="resp-bench", conversation_id="conv-bench", content=contents["list"]["content"])
+    }
+    for name, response in responses.items():
+        cases.append((f"model_dump[{name}]", lambda response=response: response.model_dump(mode="json"), False))
+
+    try:
+        import fakeredis
+    except ImportError:
+        fakeredis = None
+    if fakeredis is not None:
+        memory = MemoryService()
+        memory.redis = fakeredis.FakeAsyncRedis(decode_responses=True)
+        counter = iter(range(10 ** 9))
+
+        for name, history in histories.items():
+            async def update_state(history=history):
+                # A fresh conversation per call, so the state does not grow between calls
+                conversation_id = f"bench-{next(counter)}"
+                for message in history:
+                    await memory._update_conversation_state(conversation_id, message)
+                await memory.redis.delete(memory._get_conv_state_key(conversation_id))
+            cases.append((f"update_conversation_state[{name}]", update_state, True))
+    return cases
+
+
+def timer(call: Callable[[], Any], is_async: bool, loop: asyncio.AbstractEventLoop) -> Callable[[int], float]:
+    """Function timing number calls of call, in seconds."""
+    if is_async:
+        async def batch(number: int) -> float:
+            start = time.perf_counter()
+            for _ in range(number):
+                await call()
+            return time.perf_counter() - start
+
+        return lambda number: loop.run_until_complete(batch(number))
+
+    def run(number: int) -> float:
+        start = time.perf_counter()
+        for _ in range(number):
+            call()
+        return time.perf_counter() - start
+
+    return run
+
+
+def measure(cases: List[Tuple[str, Callable[[], Any], bool]], loop: asyncio.AbstractEventLoop, min_time: float, repeat: int) -> Dict[str, Dict[str, Any]]:
+    """
+    Best and median time per call of every case.
+
+    The repeats are interleaved: each round times every case once, so slow
+    periods of the machine are spread over all cases instead of hitting one.
+    """
+    runs, numbers = {}, {}
+    for name, call, is_async in cases:
+        runs[name] = timer(call, is_async, loop)
+        # Calibrate: double the calls until one loop takes min_time
+        numbers[name] = 1
+        while runs[name](numbers[name]) < min_time and numbers[name] < 10 ** 7:
+            numbers[name] *= 2
+
+    timings: Dict[str, List[float]] = {name: [] for name in runs}
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for _ in range(repeat):
+            for name, run in runs.items():
+                timings[name].append(run(numbers[name]) / numbers[name])
+    finally:
+        if gc_enabled:
+            gc.enable()
+    return {
+        name: {
+            "best_us": round(min(values) * 1e6, 3),
+            "median_us": round(statistics.median(values) * 1e6, 3),
+            "iterations": numbers[name]
+        }
+        for name, values in timings.items()
+    }
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True).stdout.strip()
+    except OSError:
+        return ""
+
+
+def compare(results: Dict[str, Dict[str, Any]], reference: float, baseline: Dict[str, Any], threshold: float) -> List[str]:
+    """Print each case against the baseline, relative to the reference; returns the cases slower than the threshold."""
+    regressions = []
+    print(
+        f"\nagainst {baseline.get('commit') or baseline.get('timestamp')} (threshold {threshold:.0%}, "
+        f"reference {baseline['reference_us']:.2f} -> {reference:.2f} us, changes are relative to it):"
+    )
+    for name, result in results.items():
+        old: Optional[Dict[str, Any]] = baseline["cases"].get(name)
+        if old is None:
+            print(f"  {name:<42} new")
+            continue
+        change = (result["best_us"] / reference) / (old["best_us"] / baseline["reference_us"]) - 1
+        flag = ""
+        if name.startswith(UNGATED_PREFIXES):
+            flag = "(not gated)"
+        elif change > threshold:
+            flag = "REGRESSION"
+            regressions.append(name)
+        print(f"  {name:<42} {old['best_us']:>10.2f} -> {result['best_us']:<10.2f} {change:+7.1%} {flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Microbenchmark the per-request pure-Python hot paths")
+    parser.add_argument("--filter", help="Only run cases whose name contains this")
+    parser.add_argument("--repeat", type=int, default=15, help="Timed loops per case")
+    parser.add_argument("--min-time", type=float, default=0.02, help="Minimum seconds per timed loop")
+    parser.add_argument("--save", help="Write the results as a baseline to this JSON file")
+    parser.add_argument("--baseline", help="Baseline JSON file to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Allowed slowdown against the baseline (0.2 = 20%%)")
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+    loop = asyncio.new_event_loop()
+    cases = [case for case in build_cases() if not args.filter or args.filter in case[0]]
+    if not any(name.startswith("update_conversation_state") for name, _, _ in cases) and not args.filter:
+        print("fakeredis is not installed; skipping update_conversation_state")
+
+    results = measure([("reference", reference_workload, False), *cases], loop, args.min_time, args.repeat)
+    loop.close()
+    reference = results.pop("reference")["best_us"]
+
+    print(f"{'case':<42} {'best us':>10} {'median us':>10} {'calls':>8}")
+    for name, result in results.items():
+        print(f"{name:<42} {result['best_us']:>10.2f} {result['median_us']:>10.2f} {result['iterations']:>8}")
+    print(f"{'reference workload':<42} {reference:>10.2f}")
+
+    regressions = []
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            regressions = compare(results, reference, json.load(f), args.threshold)
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump({
+                "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "commit": git_commit(),
+                "python": sys.version.split()[0],
+                "machine": platform.machine(),
+                "reference_us": reference,
+                "cases": results
+            }, f, indent=2)
+        print(f"\nbaseline written to {args.save}")
+
+    if regressions:
+        print(f"\n{len(regressions)} case(s) slower than the baseline by more than {args.threshold:.0%}: {', '.join(regressions)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,424 @@
+"""
+End-to-end load test of /api/generate with multi-turn conversations.
+
+Virtual users hold WhatsApp-style conversations against a running instance:
+greeting, symptoms, doctor search, slot hold and confirmation, with a think
+time between turns. Each conversation books its own slot. Run the instance
+against the offline stand-ins (benchmarks/upstream_stub.py) so the numbers
+measure the API rather than the LLM providers, and turn off the rate limits.
+Otherwise users that think faster than RATE_LIMIT_PER_MINUTE allows, or more
+users than RATE_LIMIT_PER_CALLER_PER_MINUTE allows together, get 429s.
+
+A turn counts as failed when the status is not 200 and also when the answer
+is not what the turn needs: a response type the turn does not expect, one of
+the service's fallback texts (an error or the request deadline), or a booking
+turn whose answer is not a held slot or a confirmed booking. The booking
+checks match the tool result messages, which the stand-in's follow-up answer
+repeats; against real models, whose answers paraphrase them, pass
+--no-booking-checks. A failed turn ends its conversation, so only bookings
+that went through count as completed conversations.
+
+The run reports throughput, latency percentiles overall and per turn, errors
+by status and failure kind, and server-side numbers taken from /metrics
+before and after (summed across workers). Those cover Redis commands per request, tool calls,
+deadline cut-offs, estimated LLM cost and worker memory growth. Redis
+commands include background work in the same window (worker metrics
+publishing, the confirmation outbox). --report writes the result as JSON, and
+--compare prints the change against an earlier report.
+
+Usage:
+    python -m benchmarks.upstream_stub --port 8090 --openai-latency lognormal:700:2500 --gemini-latency lognormal:1200:4000
+    METRICS_TOKEN=load RATE_LIMIT_PER_MINUTE=0 RATE_LIMIT_PER_CALLER_PER_MINUTE=0 OPENAI_BASE_URL=http://localhost:8090/v1 GEMINI_BASE_URL=http://localhost:8090 GEMINI_API_KEY=stub \\
+        CONFIRMATION_WEBHOOK_URL=http://localhost:8090/webhook/appointment/confirmation gunicorn -c gunicorn.conf.py app.main:app
+    METRICS_TOKEN=load python -m benchmarks.bench_load --url http://localhost:8000 --users 50 --duration 60 --report load.json
+    METRICS_TOKEN=load python -m benchmarks.bench_load --url http://localhost:8000 --users 50 --duration 60 --compare load.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import re
+import statistics
+import subprocess
+import time
+from datetime import date, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+import aiohttp
+
+# One conversation; {placeholders} are filled per conversation
+CONVERSATION = [
+    ("greeting", "Hi"),
+    ("symptoms", "I have had an itchy skin rash and a mild fever for three days"),
+    ("doctor_search", "Can you find a dermatologist in Mumbai for me?"),
+    ("hold_slot", "Please book {doctor_id} on {date} at {time}"),
+    ("confirmation", "Confirm {doctor_id} on {date} at {time} for {name}, {age}, {gender}, {phone}")
+]
+# Response types each turn may answer with
+EXPECTED_TYPES = {
+    "greeting": {"text", "button"},
+    "symptoms": {"text", "button", "list"},
+    "doctor_search": {"text", "button", "list"},
+    "hold_slot": {"text", "button"},
+    "confirmation": {"text", "button"}
+}
+# Answers the service gives when a turn failed (ai_service: DEADLINE_MESSAGE and the error fallbacks)
+DEADLINE_MESSAGE = "This is taking longer than usual. Please try again in a moment."
+FALLBACK_PREFIX = "I'm sorry"
+# Tool result messages of a successful booking turn (ai_service: SLOT_HOLD_RESULTS and get_confirmation)
+BOOKING_MESSAGES = {
+    "hold_slot": ("The slot is reserved for", "The slot could not be reserved right now, but the booking can continue"),
+    "confirmation": ("Appointment confirmation received and is being processed", "Appointment confirmed successfully")
+}
+NAMES = ["Asha Rao", "Vikram Singh", "Meera Iyer", "Rahul Das", "Fatima Khan", "Arjun Nair"]
+
+# Prometheus sample: name{labels} value
+_SAMPLE = re.compile(r'^(\w+)(?:\{(.*)\})?\s+(\S+)$')
+_LABEL = re.compile(r'(\w+)="((?:[^"\\]|\\.)*)"')
+
+# Report fields compared by --compare: (path, label, lower is better)
+COMPARED = [
+    ("summary.throughput_rps", "throughput req/s", False),
+    ("summary.latency_ms.p50", "p50 ms", True),
+    ("summary.latency_ms.p95", "p95 ms", True),
+    ("summary.latency_ms.p99", "p99 ms", True),
+    ("summary.error_rate", "error rate", True),
+    ("server.redis_commands_per_request", "Redis commands/request", True),
+    ("server.llm_cost_usd_per_conversation", "LLM cost USD/conversation", True),
+    ("server.memory.growth_mb", "memory growth MB", True),
+    ("server.memory.peak_mb", "peak memory MB", True)
+]
+
+
+def classify(turn: str, payload: Any, booking_checks: bool = True) -> Optional[str]:
+    """Why a 200 answer fails the turn, or None when it is what the turn needs."""
+    if not isinstance(payload, dict) or payload.get("type") not in EXPECTED_TYPES[turn]:
+        return "unexpected_type"
+    content = payload.get("content")
+    text = content.get("text") if isinstance(content, dict) else None
+    if not isinstance(text, str):
+        # Interactive answers carry their text in a body
+        body = content.get("body") if isinstance(content, dict) else None
+        text = body.get("text", "") if isinstance(body, dict) else ""
+    if text == DEADLINE_MESSAGE:
+        return "deadline"
+    if text.startswith(FALLBACK_PREFIX):
+        return "fallback"
+    if booking_checks and turn in BOOKING_MESSAGES and not any(message in text for message in BOOKING_MESSAGES[turn]):
+        return "not_booked"
+    return None
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True).stdout.strip()
+    except OSError:
+        return ""
+
+
+def percentiles(values: List[float]) -> Dict[str, float]:
+    """p50/p95/p99, mean and max of latencies in ms."""
+    if not values:
+        return {"p50": 0.0, "p95": 0.0, "p99": 0.0, "mean": 0.0, "max": 0.0}
+    ordered = sorted(values)
+
+    def at(share: float) -> float:
+        return ordered[min(int(len(ordered) * share), len(ordered) - 1)]
+
+    return {
+        "p50": round(statistics.median(ordered), 1),
+        "p95": round(at(0.95), 1),
+        "p99": round(at(0.99), 1),
+        "mean": round(statistics.fmean(ordered), 1),
+        "max": round(ordered[-1], 1)
+    }
+
+
+def parse_metrics(text: str) -> Dict[Tuple[str, Tuple[Tuple[str, str], ...]], float]:
+    """Prometheus text format into (name, labels) -> value."""
+    samples = {}
+    for line in text.splitlines():
+        match = _SAMPLE.match(line)
+        if not match or line.startswith("#"):
+            continue
+        name, labels, value = match.groups()
+        try:
+            samples[(name, tuple(_LABEL.findall(labels or "")))] = float(value)
+        except ValueError:
+            continue
+    return samples
+
+
+def metric_sum(samples: Dict, name: str, by: Optional[str] = None, **where: str) -> Any:
+    """Sum of a metric's samples matching the label filter, or per value of label by."""
+    totals: Dict[str, float] = {}
+    for (sample_name, labels), value in samples.items():
+        if sample_name != name:
+            continue
+        labels = dict(labels)
+        if any(labels.get(key) != wanted for key, wanted in where.items()):
+            continue
+        key = labels.get(by, "") if by else ""
+        totals[key] = totals.get(key, 0.0) + value
+    return totals if by else totals.get("", 0.0)
+
+
+def delta(before: Dict, after: Dict, name: str, by: Optional[str] = None, **where: str) -> Any:
+    """Increase of a counter between two scrapes."""
+    if by is None:
+        return metric_sum(after, name, **where) - metric_sum(before, name, **where)
+    start = metric_sum(before, name, by, **where)
+    end = metric_sum(after, name, by, **where)
+    return {key: int(value - start.get(key, 0.0)) for key, value in sorted(end.items()) if value - start.get(key, 0.0)}
+
+
+class LoadRun:
+    """Virtual users, their conversations and the samples they collect."""
+
+    def __init__(self, args):
+        self.args = args
+        self.run_id = format(int(time.time()), "x")
+        self.rng = random.Random(args.seed)
+        self.latencies: Dict[str, List[float]] = {name: [] for name, _ in CONVERSATION}
+        self.errors: Dict[str, Dict[str, int]] = {name: {} for name, _ in CONVERSATION}
+        self.conversations_started = 0
+        self.conversations_completed = 0
+        self.memory_samples: List[float] = []
+        self.headers = {"Content-Type": "application/json"}
+        if args.api_key:
+            self.headers[args.api_key_header] = args.api_key
+        self.metrics_headers = dict(self.headers)
+        if args.admin_key:
+            self.metrics_headers[args.admin_key_header] = args.admin_key
+        if args.metrics_token:
+            self.metrics_headers["Authorization"] = f"Bearer {args.metrics_token}"
+
+    def values(self, number: int) -> Dict[str, str]:
+        """Slot and patient details of one conversation; the slot is unique to the run."""
+        slot_day = date.today() + timedelta(days=1 + number // 480 % 28)
+        minutes = number % 480
+        return {
+            "doctor_id": f"LOAD-{self.run_id}-{number % 200:03d}",
+            "date": slot_day.isoformat(),
+            "time": f"{9 + minutes // 60:02d}:{minutes % 60:02d}",
+            "name": NAMES[number % len(NAMES)],
+            "age": str(20 + number % 50),
+            "gender": "female" if number % 2 else "male",
+            "phone": f"98{number:08d}"
+        }
+
+    async def think(self) -> None:
+        if self.args.think_ms > 0:
+            await asyncio.sleep(self.rng.expovariate(1000 / self.args.think_ms))
+
+    async def conversation(self, session: aiohttp.ClientSession, user: int, stop_at: float) -> None:
+        """One conversation; stops early on an error, since later turns depend on earlier ones."""
+        number = self.conversations_started
+        self.conversations_started += 1
+        values = self.values(number)
+        conversation_id = None
+        for turn, template in CONVERSATION:
+            if time.perf_counter() >= stop_at:
+                return
+            body = {"text": template.format(**values), "user_id": f"load-{self.run_id}-{user}"}
+            if conversation_id:
+                body["conversation_id"] = conversation_id
+            start = time.perf_counter()
+            try:
+                async with session.post(f"{self.args.url}/api/generate", json=body, headers=self.headers) as response:
+                    payload = await response.json(content_type=None)
+                    status = str(response.status)
+            except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+                payload, status = None, type(e).__name__
+            elapsed = (time.perf_counter() - start) * 1000
+            if status == "200":
+                status = classify(turn, payload, self.args.booking_checks) or status
+            if status != "200":
+                self.errors[turn][status] = self.errors[turn].get(status, 0) + 1
+                return
+            self.latencies[turn].append(elapsed)
+            conversation_id = payload.get("conversation_id") or conversation_id
+            await self.think()
+        self.conversations_completed += 1
+
+    async def user(self, session: aiohttp.ClientSession, user: int, stop_at: float) -> None:
+        # Spread the start of the users over the ramp-up
+        await asyncio.sleep(self.args.ramp_up * user / self.args.users)
+        while time.perf_counter() < stop_at:
+            await self.conversation(session, user, stop_at)
+
+    async def scrape(self, session: aiohttp.ClientSession) -> Dict:
+        async with session.get(f"{self.args.url}/metrics", headers=self.metrics_headers) as response:
+            response.raise_for_status()
+            return parse_metrics(await response.text())
+
+    async def sample_memory(self, session: aiohttp.ClientSession) -> None:
+        """Record the workers' summed resident memory every --sample-seconds."""
+        while True:
+            try:
+                samples = await self.scrape(session)
+                self.memory_samples.append(metric_sum(samples, "nivaran_process_resident_memory_bytes") / 2 ** 20)
+            except (aiohttp.ClientError, asyncio.TimeoutError):
+                pass
+            await asyncio.sleep(self.args.sample_seconds)
+
+    async def run(self) -> Dict[str, Any]:
+        timeout = aiohttp.ClientTimeout(total=self.args.timeout)
+        connector = aiohttp.TCPConnector(limit=self.args.users + 2)
+        async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+            before = await self.scrape(session)
+            sampler = asyncio.create_task(self.sample_memory(session))
+            started = time.perf_counter()
+            stop_at = started + self.args.duration
+            await asyncio.gather(*[self.user(session, user, stop_at) for user in range(self.args.users)])
+            duration = time.perf_counter() - started
+            sampler.cancel()
+            after = await self.scrape(session)
+        self.memory_samples.append(metric_sum(after, "nivaran_process_resident_memory_bytes") / 2 ** 20)
+        return self.report(before, after, duration)
+
+    def report(self, before: Dict, after: Dict, duration: float) -> Dict[str, Any]:
+        all_latencies = [value for values in self.latencies.values() for value in values]
+        successes = len(all_latencies)
+        failures = sum(sum(errors.values()) for errors in self.errors.values())
+        errors_by_status: Dict[str, int] = {}
+        for errors in self.errors.values():
+            for status, count in errors.items():
+                errors_by_status[status] = errors_by_status.get(status, 0) + count
+
+        # Server-side numbers, for /api/generate requests seen by the server in this window
+        requests = delta(before, after, "nivaran_http_requests_total", route="/api/generate") or 1
+        redis_commands = delta(before, after, "nivaran_redis_command_duration_seconds_count", by="command")
+        cost = delta(before, after, "nivaran_llm_cost_micro_usd_total") / 1_000_000
+        memory = self.memory_samples or [0.0]
+
+        return {
+            "version": 1,
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "commit": git_commit(),
+            "config": {
+                "url": self.args.url,
+                "users": self.args.users,
+                "duration_s": self.args.duration,
+                "think_ms": self.args.think_ms,
+                "seed": self.args.seed
+            },
+            "summary": {
+                "requests": successes + failures,
+                "throughput_rps": round(successes / duration, 2),
+                "conversations_started": self.conversations_started,
+                "conversations_completed": self.conversations_completed,
+                "conversations_per_minute": round(self.conversations_completed * 60 / duration, 1),
+                "latency_ms": percentiles(all_latencies),
+                "error_rate": round(failures / max(successes + failures, 1), 4),
+                "errors": errors_by_status
+            },
+            "turns": {
+                turn: {
+                    "requests": len(self.latencies[turn]) + sum(self.errors[turn].values()),
+                    "errors": self.errors[turn],
+                    "latency_ms": percentiles(self.latencies[turn])
+                }
+                for turn, _ in CONVERSATION
+            },
+            "server": {
+                "generate_requests": int(requests),
+                "redis_commands_per_request": round(sum(redis_commands.values()) / requests, 2),
+                "redis_commands": redis_commands,
+                "redis_errors": delta(before, after, "nivaran_redis_command_errors_total", by="command"),
+                "tool_calls": delta(before, after, "nivaran_tool_calls_total", by="function"),
+                "stage_errors": delta(before, after, "nivaran_stage_errors_total", by="stage"),
+                "deadline_exceeded": delta(before, after, "nivaran_deadline_exceeded_total", by="stage"),
+                "deadline_degraded": delta(before, after, "nivaran_deadline_degraded_total", by="action"),
+                "llm_cost_usd_per_conversation": round(cost / max(self.conversations_started, 1), 6),
+                "memory": {
+                    "start_mb": round(memory[0], 1),
+                    "end_mb": round(memory[-1], 1),
+                    "peak_mb": round(max(memory), 1),
+                    "growth_mb": round(memory[-1] - memory[0], 1)
+                }
+            }
+        }
+
+
+def lookup(report: Dict[str, Any], path: str) -> Optional[float]:
+    value: Any = report
+    for part in path.split("."):
+        if not isinstance(value, dict) or part not in value:
+            return None
+        value = value[part]
+    return value
+
+
+def print_report(report: Dict[str, Any]) -> None:
+    summary, server = report["summary"], report["server"]
+    latency = summary["latency_ms"]
+    print(
+        f"{summary['requests']} requests, {summary['throughput_rps']:.1f} req/s, "
+        f"{summary['conversations_completed']}/{summary['conversations_started']} conversations completed, "
+        f"error rate {summary['error_rate']:.2%} {summary['errors'] or ''}"
+    )
+    print(f"latency ms: p50 {latency['p50']:.0f}  p95 {latency['p95']:.0f}  p99 {latency['p99']:.0f}  max {latency['max']:.0f}")
+    print(f"\n{'turn':<14} {'requests':>9} {'errors':>7} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    for turn, stats in report["turns"].items():
+        print(
+            f"{turn:<14} {stats['requests']:>9} {sum(stats['errors'].values()):>7} "
+            f"{stats['latency_ms']['p50']:>8.0f} {stats['latency_ms']['p95']:>8.0f} {stats['latency_ms']['p99']:>8.0f}"
+        )
+    memory = server["memory"]
+    print(f"\nRedis commands/request {server['redis_commands_per_request']:.1f}  errors {server['redis_errors'] or 0}")
+    print(f"tool calls {server['tool_calls']}  deadline cut-offs {server['deadline_exceeded'] or 0}")
+    print(f"LLM cost/conversation ${server['llm_cost_usd_per_conversation']:.6f}")
+    print(f"memory MB: start {memory['start_mb']:.0f}  end {memory['end_mb']:.0f}  peak {memory['peak_mb']:.0f}  growth {memory['growth_mb']:+.1f}")
+
+
+def print_comparison(report: Dict[str, Any], baseline: Dict[str, Any]) -> None:
+    print(f"\nagainst {baseline.get('commit') or baseline['timestamp']}:")
+    for path, label, lower_is_better in COMPARED:
+        new, old = lookup(report, path), lookup(baseline, path)
+        if new is None or old is None:
+            continue
+        change = f"{(new - old) / old:+.1%}" if old else ""
+        worse = (new > old) if lower_is_better else (new < old)
+        print(f"  {label:<28} {old:>12.4g} -> {new:<12.4g} {change:>8} {'worse' if worse and new != old else ''}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test /api/generate with multi-turn conversations")
+    parser.add_argument("--url", default="http://localhost:8000", help="Base URL of the running API")
+    parser.add_argument("--users", type=int, default=20, help="Concurrent virtual users")
+    parser.add_argument("--duration", type=float, default=60.0, help="Seconds of load")
+    parser.add_argument("--ramp-up", type=float, default=5.0, help="Seconds over which users start")
+    parser.add_argument("--think-ms", type=float, default=1000.0, help="Mean think time between turns (exponential)")
+    parser.add_argument("--timeout", type=float, default=60.0, help="Client timeout per request")
+    parser.add_argument("--sample-seconds", type=float, default=5.0, help="Interval of worker memory samples")
+    parser.add_argument("--api-key", default=os.environ.get("API_KEY"), help="API key, if the instance requires one")
+    parser.add_argument("--api-key-header", default="X-API-Key", help="Header carrying the API key")
+    parser.add_argument("--admin-key", default=os.environ.get("ADMIN_API_KEY"), help="Admin key, for /metrics")
+    parser.add_argument("--admin-key-header", default="X-Admin-Key", help="Header carrying the admin key")
+    parser.add_argument("--metrics-token", default=os.environ.get("METRICS_TOKEN"), help="Bearer token for /metrics")
+    parser.add_argument("--seed", type=int, default=7, help="Random seed for think times")
+    parser.add_argument(
+        "--no-booking-checks", dest="booking_checks", action="store_false",
+        help="Do not require the booking turns to answer with a held slot or a confirmed booking (for real models)"
+    )
+    parser.add_argument("--report", help="Write the report to this JSON file")
+    parser.add_argument("--compare", help="Earlier JSON report to compare against")
+    args = parser.parse_args()
+
+    print(f"{args.users} users for {args.duration:.0f}s against {args.url}")
+    report = asyncio.run(LoadRun(args).run())
+    print_report(report)
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            print_comparison(report, json.load(f))
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nreport written to {args.report}")
+
+
+if __name__ == "__main__":
+    main()
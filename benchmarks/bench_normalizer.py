@@ -0,0 +1,84 @@
+"""
+Benchmark the tool argument normaliser.
+
+Generates noisy get_service_info arguments (aliases, Hindi in Latin script,
+typos, casing) for a small set of real intents, then reports per-call latency
+and the cache hit ratio of keys built from raw versus normalised arguments.
+
+Usage:
+    python -m benchmarks.bench_normalizer --requests 5000
+"""
+
+import argparse
+import random
+import statistics
+import time
+
+from app.config.vocabulary import CITIES, LOCALITIES, SPECIALTIES
+from app.utils.normalizer import QueryNormalizer
+
+
+def typo(rng: random.Random, text: str) -> str:
+    """Apply one random deletion, duplication or transposition to a longer word."""
+    if len(text) < 6:
+        return text
+    i = rng.randrange(1, len(text) - 2)
+    operation = rng.choice(("delete", "double", "swap"))
+    if operation == "delete":
+        return text[:i] + text[i + 1:]
+    if operation == "double":
+        return text[:i] + text[i] + text[i:]
+    return text[:i] + text[i + 1] + text[i] + text[i + 2:]
+
+
+def variant(rng: random.Random, canonical: dict) -> str:
+    phrase = rng.choice([canonical["name"], *canonical["aliases"]])
+    if rng.random() < 0.3:
+        phrase = typo(rng, phrase)
+    return rng.choice((phrase, phrase.lower(), phrase.title(), f" {phrase} "))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the tool argument normaliser")
+    parser.add_argument("--requests", type=int, default=5000, help="Number of generated requests")
+    parser.add_argument("--intents", type=int, default=50, help="Distinct (specialty, locality) intents")
+    args = parser.parse_args()
+
+    rng = random.Random(11)
+    specialty_ids = list(SPECIALTIES)
+    locality_ids = list(LOCALITIES)
+    intents = [(rng.choice(specialty_ids), rng.choice(locality_ids)) for _ in range(args.intents)]
+
+    requests = []
+    for _ in range(args.requests):
+        specialty_id, locality_id = rng.choice(intents)
+        locality = LOCALITIES[locality_id]
+        location = variant(rng, locality)
+        if rng.random() < 0.5:
+            location = f"{location}, {variant(rng, CITIES[locality['city']])}"
+        requests.append((specialty_id, locality_id, variant(rng, SPECIALTIES[specialty_id]), location))
+
+    normalizer = QueryNormalizer()
+    latencies = []
+    correct = 0
+    for specialty_id, locality_id, specialty, location in requests:
+        start = time.perf_counter()
+        result = normalizer._normalise(location=location, specialty=specialty)
+        latencies.append((time.perf_counter() - start) * 1e6)
+        correct += result.specialty_id == specialty_id and result.locality_id == locality_id
+
+    latencies.sort()
+    print(
+        f"normalise (uncached)  mean {statistics.mean(latencies):7.1f} us   "
+        f"p50 {statistics.median(latencies):7.1f} us   p99 {latencies[int(len(latencies) * 0.99) - 1]:7.1f} us"
+    )
+    print(f"resolved to the intended specialty and locality: {correct / len(requests):.1%}")
+
+    raw_keys = {(specialty, location) for _, _, specialty, location in requests}
+    canonical_keys = {normalizer.normalise("", location, specialty, "").cache_key for _, _, specialty, location in requests}
+    print(f"cache hit ratio with raw keys:        {1 - len(raw_keys) / len(requests):.1%} ({len(raw_keys)} distinct)")
+    print(f"cache hit ratio with normalised keys: {1 - len(canonical_keys) / len(requests):.1%} ({len(canonical_keys)} distinct)")
+
+
+if __name__ == "__main__":
+    main()
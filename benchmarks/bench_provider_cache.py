@@ -0,0 +1,86 @@
+"""
+Benchmark the get_service_info result cache hit ratio.
+
+Replays noisy tool calls from many conversations over a simulated day and
+compares the old per-conversation cache keyed on raw strings with the global
+cache keyed on normalised arguments and the availability slot. Redis is not
+needed: the in-process tier serves every lookup.
+
+Usage:
+    python -m benchmarks.bench_provider_cache --requests 20000 --conversations 2000
+"""
+
+import argparse
+import asyncio
+import random
+import statistics
+import time
+from datetime import datetime, timedelta
+
+from app.config.vocabulary import CITIES, LOCALITIES, SPECIALTIES
+from app.services.provider_cache import ProviderResultCache
+from app.services.provider_store import provider_store
+from app.utils.normalizer import QueryNormalizer
+from benchmarks.bench_normalizer import variant
+
+
+class _NoRedis:
+    """MemoryService stand-in whose Redis connection always fails."""
+
+    async def _setup_redis_connection(self):
+        raise ConnectionError("Redis disabled for the benchmark")
+
+
+async def replay(args):
+    rng = random.Random(3)
+    intents = [(rng.choice(list(SPECIALTIES)), rng.choice(list(LOCALITIES))) for _ in range(args.intents)]
+    start = datetime(2025, 1, 6, 8, 0)
+    requests = []
+    for i in range(args.requests):
+        specialty_id, locality_id = rng.choice(intents)
+        locality = LOCALITIES[locality_id]
+        location = variant(rng, locality)
+        if rng.random() < 0.5:
+            location = f"{location}, {variant(rng, CITIES[locality['city']])}"
+        moment = start + timedelta(seconds=args.hours * 3600 * i / args.requests)
+        requests.append((rng.randrange(args.conversations), variant(rng, SPECIALTIES[specialty_id]), location, moment))
+
+    # Old scheme: per conversation, raw strings, no expiry
+    seen = set()
+    raw_hits = 0
+    for conversation, specialty, location, _ in requests:
+        key = (conversation, f"{location}:{specialty}:".lower())
+        raw_hits += key in seen
+        seen.add(key)
+
+    normalizer = QueryNormalizer()
+    provider_store.ensure_loaded()
+    cache = ProviderResultCache(_NoRedis(), provider_store, max_local_entries=args.requests)
+    latencies = []
+    for _, specialty, location, moment in requests:
+        normalised = normalizer.normalise("", location, specialty, "")
+        lookup_start = time.perf_counter()
+        key, ttl = cache.key(normalised, now=moment)
+        if await cache.get(key) is None:
+            # Simulated time moves faster than the TTL; the slot in the key retires old entries
+            await cache.set(key, {"providers": []}, ttl)
+        latencies.append((time.perf_counter() - lookup_start) * 1e6)
+
+    print(f"per-conversation raw keys:      hit ratio {raw_hits / len(requests):.1%}")
+    stats = cache.stats()
+    print(f"global normalised + slot keys:  hit ratio {stats['hit_ratio']:.1%} ({stats['local_entries']} entries over {args.hours} h)")
+    print(f"key + local lookup mean {statistics.mean(latencies):.1f} us")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the provider result cache hit ratio")
+    parser.add_argument("--requests", type=int, default=20000, help="Number of tool calls")
+    parser.add_argument("--conversations", type=int, default=2000, help="Number of conversations")
+    parser.add_argument("--intents", type=int, default=200, help="Distinct (specialty, locality) intents")
+    parser.add_argument("--hours", type=float, default=12, help="Simulated period")
+    args = parser.parse_args()
+    asyncio.run(replay(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+"""
+Concurrent booking load test for appointment slot holds.
+
+Many conversations race for a small set of slots through the
+hold_appointment_slot and get_confirmation tool handlers. The test checks
+that every slot is booked at most once and that every conversation that
+booked also holds its slot. It also checks that an abandoned hold expires and
+the slot becomes bookable again.
+
+Runs against the configured Redis by default; --fakeredis uses an in-process
+fake (requires the fakeredis and lupa packages). The confirmation webhook is
+replaced by the local stub from benchmarks.webhook_stub.
+
+Usage:
+    python -m benchmarks.bench_slot_holds --conversations 500 --slots 20
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+from aiohttp import web
+
+from app.config.settings import settings
+from app.services.ai_service import FUNCTION_GET_CONFIRMATION, FUNCTION_HOLD_SLOT, ai_service
+from app.services.confirmation_outbox import confirmation_outbox
+from app.services.http_client import http_client
+from app.services.provider_store import provider_store
+from app.services.slot_reservations import slot_reservations
+from benchmarks.webhook_stub import WEBHOOK_PATH, create_app
+
+
+class _FakeMemory:
+    """MemoryService stand-in that hands out one shared fake Redis client."""
+
+    def __init__(self, client):
+        self.client = client
+
+    async def _setup_redis_connection(self):
+        return self.client
+
+
+def _call(name, arguments):
+    return SimpleNamespace(name=name, arguments=json.dumps(arguments))
+
+
+def _slots(count):
+    """Bookable slots of the seed providers over the next week."""
+    provider_store.ensure_loaded()
+    day = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0) + timedelta(days=1)
+    slots = []
+    while len(slots) < count:
+        for provider_id in provider_store.availability.provider_ids:
+            for minute in range(0, 24 * 60, 30):
+                start = day + timedelta(minutes=minute)
+                if provider_store.availability.is_available(str(provider_id), start):
+                    slots.append((str(provider_id), f"{start:%Y-%m-%d}", f"{start:%H:%M}"))
+        day += timedelta(days=1)
+    return slots[:count]
+
+
+async def book(conversation_id, slot, latencies):
+    doctor_id, date, time_of_day = slot
+    start = time.perf_counter()
+    hold = json.loads(await ai_service._handle_tool_call(
+        _call(FUNCTION_HOLD_SLOT, {"doctor_id": doctor_id, "appointment_date": date, "appointment_time": time_of_day}),
+        conversation_id=conversation_id
+    ))
+    latencies["hold"].append((time.perf_counter() - start) * 1000)
+    if not hold.get("success"):
+        return conversation_id, slot, "lost_hold"
+
+    # Collecting patient details takes a moment
+    await asyncio.sleep(random.uniform(0, 0.01))
+    start = time.perf_counter()
+    confirmation = json.loads(await ai_service._handle_tool_call(
+        _call(FUNCTION_GET_CONFIRMATION, {
+            "patient_details": {"name": "Load Test", "age": 30, "gender": "female", "phone": "0000000000"},
+            "appointment_details": {
+                "doctor_id": doctor_id, "doctor_name": "", "hospital_name": "",
+                "appointment_date": date, "appointment_time": time_of_day, "symptoms": "load test"
+            }
+        }),
+        user_id=f"user-{conversation_id}",
+        conversation_id=conversation_id
+    ))
+    latencies["confirm"].append((time.perf_counter() - start) * 1000)
+    return conversation_id, slot, "booked" if confirmation.get("success") else confirmation.get("error")
+
+
+async def run(args):
+    if args.fakeredis:
+        import fakeredis
+        import redis.asyncio as redis
+        memory = _FakeMemory(fakeredis.FakeAsyncRedis(
+            decode_responses=True,
+            connection_pool_class=redis.BlockingConnectionPool,
+            max_connections=settings.REDIS_MAX_CONNECTIONS
+        ))
+        slot_reservations.memory = memory
+        confirmation_outbox.memory = memory
+
+    stub = web.AppRunner(create_app())
+    await stub.setup()
+    await web.TCPSite(stub, "127.0.0.1", args.webhook_port).start()
+    settings.CONFIRMATION_WEBHOOK_URL = f"http://127.0.0.1:{args.webhook_port}{WEBHOOK_PATH}"
+    await http_client.start()
+    confirmation_outbox.start()
+
+    redis_client = await slot_reservations.memory._setup_redis_connection()
+    slots = _slots(args.slots)
+    for doctor_id, date, time_of_day in slots:
+        await redis_client.delete(slot_reservations.slot_key(doctor_id, slot_reservations.slot_start(date, time_of_day)))
+
+    rng = random.Random(1)
+    latencies = {"hold": [], "confirm": []}
+    start = time.perf_counter()
+    outcomes = await asyncio.gather(*[
+        book(f"load-{i}", rng.choice(slots), latencies) for i in range(args.conversations)
+    ])
+    elapsed = time.perf_counter() - start
+
+    booked = Counter(slot for _, slot, outcome in outcomes if outcome == "booked")
+    double_booked = [slot for slot, count in booked.items() if count > 1]
+    for conversation_id, (doctor_id, date, time_of_day), outcome in outcomes:
+        if outcome == "booked":
+            value = await redis_client.get(slot_reservations.slot_key(doctor_id, slot_reservations.slot_start(date, time_of_day)))
+            assert value == f"booked|{conversation_id}", f"slot booked by {conversation_id} is held as {value!r}"
+    assert not double_booked, f"double-booked slots: {double_booked}"
+
+    print(f"{args.conversations} conversations raced for {len(slots)} slots in {elapsed:.2f}s")
+    print(f"outcomes: {dict(Counter(outcome for _, _, outcome in outcomes))}")
+    print(f"slots booked: {len(booked)} of {len(slots)}, double bookings: {len(double_booked)}")
+    for name, values in latencies.items():
+        if values:
+            values.sort()
+            print(f"{name:<8} mean {statistics.mean(values):7.2f} ms   p95 {values[int(len(values) * 0.95) - 1]:7.2f} ms")
+
+    # An abandoned hold expires and the slot can be held again
+    settings.SLOT_HOLD_TTL_SECONDS = 0.2
+    free_slot = next(slot for slot in _slots(args.slots * 4) if slot not in booked)
+    assert await slot_reservations.hold(*free_slot, "abandoned") == "held"
+    assert await slot_reservations.hold(*free_slot, "waiting") == "taken"
+    await asyncio.sleep(0.3)
+    assert await slot_reservations.hold(*free_slot, "waiting") == "held"
+    print("abandoned hold expired and the slot was held again")
+
+    await confirmation_outbox.stop()
+    await http_client.close()
+    await stub.cleanup()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent booking load test for slot holds")
+    parser.add_argument("--conversations", type=int, default=500, help="Concurrent conversations")
+    parser.add_argument("--slots", type=int, default=20, help="Distinct slots they compete for")
+    parser.add_argument("--webhook-port", type=int, default=8082, help="Port for the stub confirmation webhook")
+    parser.add_argument("--fakeredis", action="store_true", help="Use an in-process fake Redis")
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Compare provider catalogue cold start from the JSON snapshot and the columnar mmap snapshot.
+
+Each load runs in a fresh interpreter so module import and page cache effects
+match a worker cold start.
+
+Usage:
+    python -m benchmarks.bench_snapshot_load --providers 10000 100000
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+from app.utils.columnar_snapshot import write_columnar_snapshot
+from app.utils.provider_snapshot import write_snapshot
+from benchmarks.synthetic_providers import generate_providers
+
+_LOAD_SCRIPT = """
+import json, sys, time
+def rss_mb():
+    # ru_maxrss survives exec on Linux, so read the current RSS instead
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+start = time.perf_counter()
+from app.services.provider_store import ProviderStore
+store = ProviderStore()
+getattr(store, sys.argv[1])(sys.argv[2])
+loaded = time.perf_counter()
+store.get("syn-000001")
+store.availability.available_now()
+first = time.perf_counter()
+print(json.dumps({
+    "load_ms": (loaded - start) * 1000,
+    "first_query_ms": (first - loaded) * 1000,
+    "rss_mb": rss_mb()
+}))
+"""
+
+
+def measure(loader: str, path: str) -> dict:
+    output = subprocess.run(
+        [sys.executable, "-c", _LOAD_SCRIPT, loader, path],
+        capture_output=True, text=True, check=True,
+        env={**os.environ, "OPENAI_API_KEY": os.environ.get("OPENAI_API_KEY", "benchmark")}
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark provider snapshot cold start")
+    parser.add_argument("--providers", type=int, nargs="+", default=[10000, 100000], help="Catalogue sizes to test")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        for count in args.providers:
+            providers = generate_providers(count)
+            json_path = os.path.join(directory, f"{count}.json.gz")
+            columnar_path = os.path.join(directory, f"{count}.columns")
+            metadata = write_snapshot(providers, json_path)
+            write_columnar_snapshot(providers, columnar_path, metadata["version"])
+
+            for name, loader, path in (("json", "load_snapshot", json_path), ("columnar", "load_columnar", columnar_path)):
+                result = measure(loader, path)
+                print(
+                    f"{count:>8} providers  {name:<9} load {result['load_ms']:9.1f} ms   "
+                    f"first query {result['first_query_ms']:7.2f} ms   RSS {result['rss_mb']:7.1f} MB"
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Benchmark recall and latency of the IVF vector index against brute-force search.
+
+Usage:
+    python -m benchmarks.bench_vector_index --providers 100000 --queries 200
+"""
+
+import argparse
+import random
+import statistics
+import time
+
+import numpy as np
+
+from app.utils.availability import normalise_key, provider_city
+from app.utils.vector_index import FlatIndex, HashingEmbedder, IVFIndex, provider_document
+from benchmarks.synthetic_providers import CITIES, SPECIALTIES, generate_providers
+
+_SYMPTOMS = ["chest pain", "skin rash", "fever", "back pain", "headache", "blurred vision", "toothache", "anxiety"]
+
+
+def timed(index, vectors, k, masks):
+    """Search every query vector and return (results, per-query latencies in microseconds)."""
+    results = []
+    latencies = []
+    for vector, mask in zip(vectors, masks):
+        start = time.perf_counter()
+        rows, _ = index.search(vector, k, mask)
+        latencies.append((time.perf_counter() - start) * 1e6)
+        results.append(rows)
+    return results, latencies
+
+
+def recall(expected, actual):
+    hits = sum(len(set(e.tolist()) & set(a.tolist())) for e, a in zip(expected, actual))
+    return hits / max(1, sum(len(e) for e in expected))
+
+
+def report(name, latencies, value=None):
+    latencies = sorted(latencies)
+    p95 = latencies[int(len(latencies) * 0.95) - 1]
+    suffix = f"   recall {value:.3f}" if value is not None else ""
+    print(f"{name:<32} mean {statistics.mean(latencies):9.1f} us   p95 {p95:9.1f} us{suffix}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the provider vector index")
+    parser.add_argument("--providers", type=int, default=100000, help="Number of synthetic providers")
+    parser.add_argument("--queries", type=int, default=200, help="Number of queries per benchmark")
+    parser.add_argument("--k", type=int, default=10, help="Results per query")
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[4, 8, 16, 32], help="IVF probe counts to test")
+    args = parser.parse_args()
+
+    providers = generate_providers(args.providers)
+    embedder = HashingEmbedder()
+
+    start = time.perf_counter()
+    vectors = embedder.embed([provider_document(record) for record in providers])
+    print(f"Embedded {len(vectors)} providers in {time.perf_counter() - start:.2f}s")
+
+    start = time.perf_counter()
+    ivf = IVFIndex.build(vectors)
+    print(f"Built IVF index with {len(ivf.centroids)} lists in {time.perf_counter() - start:.2f}s")
+    flat = FlatIndex(vectors)
+
+    rng = random.Random(7)
+    query_cities = [rng.choice(CITIES)[0] for _ in range(args.queries)]
+    texts = [f"{rng.choice(SPECIALTIES)} for {rng.choice(_SYMPTOMS)} in {city}" for city in query_cities]
+    query_vectors = embedder.embed(texts)
+
+    cities = np.array([provider_city(record) for record in providers])
+    city_masks = [cities == normalise_key(city) for city in query_cities]
+    no_masks = [None] * args.queries
+
+    for label, masks in (("", no_masks), (" city filter", city_masks)):
+        expected, latencies = timed(flat, query_vectors, args.k, masks)
+        report(f"flat{label}", latencies, 1.0)
+        for nprobe in args.nprobe:
+            ivf.nprobe = nprobe
+            actual, latencies = timed(ivf, query_vectors, args.k, masks)
+            report(f"ivf nprobe={nprobe}{label}", latencies, recall(expected, actual))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+"""
+Throughput of the multi-worker serving mode at different worker counts.
+
+Starts `gunicorn -c gunicorn.conf.py app.main:app` with WEB_CONCURRENCY set to
+each requested count and drives it with concurrent keep-alive clients for a
+fixed duration. For each count it reports requests per second, latency
+percentiles and the proportional memory (PSS) of the master plus workers. PSS
+counts pages shared copy-on-write once, so it shows what preloading saves. The
+default target is a catalogue-only endpoint, so the numbers measure the
+server rather than Redis or the LLM APIs.
+
+The load generator shares the machine with the server, so leave it at least
+one spare core. Otherwise the numbers flatten out at the CPU count.
+
+Usage:
+    python -m benchmarks.bench_workers --workers 1 2 4 --duration 10 --concurrency 64
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import subprocess
+import sys
+import time
+from typing import Dict, List
+
+import aiohttp
+
+
+def _pss_mb(pid: int) -> float:
+    """Proportional set size of a process and its children, in MB."""
+    total = 0
+    pids = [pid]
+    try:
+        with open(f"/proc/{pid}/task/{pid}/children") as f:
+            pids += [int(child) for child in f.read().split()]
+    except OSError:
+        pass
+    for process in pids:
+        try:
+            with open(f"/proc/{process}/smaps_rollup") as f:
+                for line in f:
+                    if line.startswith("Pss:"):
+                        total += int(line.split()[1])
+        except OSError:
+            pass
+    return total / 1024
+
+
+async def _wait_until_up(url: str, timeout: float) -> None:
+    deadline = time.time() + timeout
+    async with aiohttp.ClientSession() as session:
+        while time.time() < deadline:
+            try:
+                async with session.get(url) as response:
+                    if response.status == 200:
+                        return
+            except aiohttp.ClientError:
+                pass
+            await asyncio.sleep(0.2)
+    raise RuntimeError(f"Server at {url} did not come up within {timeout:.0f}s")
+
+
+async def _drive(url: str, duration: float, concurrency: int) -> List[float]:
+    """Send requests from concurrent clients for duration seconds; returns latencies in ms."""
+    latencies: List[float] = []
+    errors = 0
+    deadline = time.perf_counter() + duration
+    connector = aiohttp.TCPConnector(limit=concurrency)
+    async with aiohttp.ClientSession(connector=connector) as session:
+        async def client() -> None:
+            nonlocal errors
+            while time.perf_counter() < deadline:
+                start = time.perf_counter()
+                try:
+                    async with session.get(url) as response:
+                        await response.read()
+                        if response.status != 200:
+                            errors += 1
+                            continue
+                except aiohttp.ClientError:
+                    errors += 1
+                    continue
+                latencies.append((time.perf_counter() - start) * 1000)
+
+        await asyncio.gather(*[client() for _ in range(concurrency)])
+    if errors:
+        print(f"  {errors} failed requests")
+    return latencies
+
+
+def run(workers: int, args) -> Dict[str, float]:
+    env = dict(os.environ)
+    env.update({
+        "WEB_CONCURRENCY": str(workers),
+        "PORT": str(args.port),
+        # Keep outbound warm-up out of the measurement
+        "LLM_WARMUP_CONNECTIONS": "0",
+        "LOG_LEVEL": "WARNING"
+    })
+    env.setdefault("OPENAI_API_KEY", "bench-workers")
+    server = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "app.main:app"],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    base = f"http://127.0.0.1:{args.port}"
+    try:
+        asyncio.run(_wait_until_up(f"{base}/api/health", args.startup_timeout))
+        # Short warm-up so every worker has served requests before measuring
+        asyncio.run(_drive(f"{base}{args.path}", 1.0, args.concurrency))
+        latencies = asyncio.run(_drive(f"{base}{args.path}", args.duration, args.concurrency))
+        pss = _pss_mb(server.pid)
+    finally:
+        server.terminate()
+        server.wait(timeout=60)
+
+    latencies.sort()
+    return {
+        "rps": len(latencies) / args.duration,
+        "p50": statistics.median(latencies),
+        "p99": latencies[int(len(latencies) * 0.99) - 1],
+        "pss_mb": pss
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare throughput across gunicorn worker counts")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4], help="Worker counts to compare")
+    parser.add_argument("--path", default="/api/doctor/availability/prov-001", help="Endpoint to request")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds of load per worker count")
+    parser.add_argument("--concurrency", type=int, default=64, help="Concurrent keep-alive clients")
+    parser.add_argument("--port", type=int, default=8090, help="Port for the server under test")
+    parser.add_argument("--startup-timeout", type=float, default=60.0, help="Seconds to wait for the server")
+    args = parser.parse_args()
+
+    print(f"{os.cpu_count()} CPUs, {args.concurrency} clients, {args.duration:.0f}s per run, GET {args.path}")
+    print(f"{'workers':>8} {'req/s':>10} {'p50 ms':>8} {'p99 ms':>8} {'PSS MB':>8} {'speedup':>8}")
+    baseline = None
+    for workers in args.workers:
+        result = run(workers, args)
+        baseline = baseline or result["rps"]
+        print(
+            f"{workers:>8} {result['rps']:>10.0f} {result['p50']:>8.2f} {result['p99']:>8.2f} "
+            f"{result['pss_mb']:>8.0f} {result['rps'] / baseline:>7.2f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
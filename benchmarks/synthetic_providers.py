@@ -0,0 +1,73 @@
+"""
+Synthetic provider catalogue generator shared by the benchmarks.
+
+Records follow the same shape as HEALTHCARE_PROVIDERS_DATA so they can be fed
+into any of the provider indexes.
+"""
+
+import random
+from typing import Any, Dict, List
+
+from app.config.vocabulary import CITIES as CITY_VOCABULARY
+
+SPECIALTIES = [
+    "Cardiologist", "Pediatrician", "Dermatologist", "Neurologist", "Orthopedist",
+    "Gynecologist", "ENT Specialist", "Ophthalmologist", "Psychiatrist", "Dentist",
+    "General Physician", "Gastroenterologist", "Pulmonologist", "Urologist",
+    "Endocrinologist", "Nephrologist", "Oncologist", "Rheumatologist"
+]
+
+CITIES = [
+    ("Mumbai", "MH"), ("Delhi", "DL"), ("Bengaluru", "KA"), ("Hyderabad", "TG"),
+    ("Chennai", "TN"), ("Kolkata", "WB"), ("Pune", "MH"), ("Ahmedabad", "GJ"),
+    ("Jaipur", "RJ"), ("Lucknow", "UP"), ("Chicago", "IL"), ("New York", "NY"),
+    ("Los Angeles", "CA"), ("San Francisco", "CA"), ("Indore", "MP"), ("Nagpur", "MH")
+]
+
+DAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+
+_FIRST_NAMES = ["Aarav", "Priya", "Rohan", "Ananya", "Vikram", "Sneha", "Arjun", "Kavya", "John", "Emily"]
+_LAST_NAMES = ["Sharma", "Patel", "Iyer", "Reddy", "Gupta", "Khan", "Mehta", "Das", "Doe", "Brown"]
+
+
+def _format_time(minutes: int) -> str:
+    hour, minute = divmod(minutes, 60)
+    return f"{hour % 12 or 12}:{minute:02d} {'AM' if hour < 12 else 'PM'}"
+
+
+def _random_schedule(rng: random.Random) -> Dict[str, List[str]]:
+    schedule = {}
+    for day in DAYS:
+        if rng.random() < 0.2:
+            continue
+        ranges = []
+        start = rng.choice([7, 8, 9, 10]) * 60 + rng.choice([0, 30])
+        for _ in range(rng.choice([1, 2])):
+            end = start + rng.choice([120, 180, 240])
+            if end >= 23 * 60:
+                break
+            ranges.append(f"{_format_time(start)} - {_format_time(end)}")
+            start = end + rng.choice([60, 90, 120])
+        if ranges:
+            schedule[day] = ranges
+    return schedule
+
+
+def generate_providers(count: int, seed: int = 42) -> List[Dict[str, Any]]:
+    """Generate `count` deterministic synthetic provider records."""
+    rng = random.Random(seed)
+    providers = []
+    for i in range(count):
+        city, state = rng.choice(CITIES)
+        providers.append({
+            "provider_id": f"syn-{i:06d}",
+            "name": f"Dr. {rng.choice(_FIRST_NAMES)} {rng.choice(_LAST_NAMES)}",
+            "specialty": rng.choice(SPECIALTIES),
+            "location": f"{city}, {state}",
+            "hospital": f"{city} {rng.choice(['City', 'Care', 'Life', 'Apollo', 'Sunrise'])} Hospital",
+            "availability": _random_schedule(rng),
+            # Scatter providers around the city centre (roughly within 20 km)
+            "latitude": round(CITY_VOCABULARY[city.lower()]["coordinates"][0] + rng.uniform(-0.18, 0.18), 6),
+            "longitude": round(CITY_VOCABULARY[city.lower()]["coordinates"][1] + rng.uniform(-0.18, 0.18), 6)
+        })
+    return providers
@@ -0,0 +1,409 @@
+"""
+Offline stand-in for every upstream the API calls: OpenAI chat completions,
+Gemini generateContent and the appointment confirmation webhook.
+
+Answers are deterministic. The first completion of a turn follows scripted
+scenarios: a rule's regex is matched against the last user message and it
+answers with tool calls or a reply. The follow-up completion (after tool
+results) summarises the tool results. Gemini answers from a template.
+Responses carry token usage (about 4 characters per token; a repeated system
+prompt of 1024+ tokens is reported as cached), so usage accounting works too.
+Each upstream has its own latency distribution and error injection, drawn
+from a seeded random generator:
+
+    --openai-latency fixed:MS | uniform:LOW:HIGH | lognormal:P50:P99
+    --openai-errors 429:0.02,500:0.01,timeout:0.005
+
+A "timeout" fault holds the request open until the client gives up.
+
+Usage:
+    python -m benchmarks.upstream_stub --port 8090 --openai-latency lognormal:700:2500 --gemini-latency lognormal:1200:4000
+    python -m benchmarks.upstream_stub --scenarios scenarios.json --openai-errors 429:0.05 --seed 3
+    OPENAI_BASE_URL=http://localhost:8090/v1 GEMINI_BASE_URL=http://localhost:8090 GEMINI_API_KEY=stub \\
+        CONFIRMATION_WEBHOOK_URL=http://localhost:8090/webhook/appointment/confirmation uvicorn app.main:app
+
+A scenario file is JSON with "rules" (tried in order, first match wins),
+and optional "followup" and "gemini" templates replacing the defaults below.
+String values are formatted with {prompt}, {0} (whole match) and {1}... (groups);
+the followup also gets {tool_results}:
+
+    {"rules": [{"name": "book", "match": "book (\\\\S+)", "tool_calls": [
+        {"name": "hold_appointment_slot", "arguments": {"doctor_id": "{1}", ...}}]},
+               {"name": "hello", "match": "", "reply": {"type": "text", "content": {"text": "Hi"}}}]}
+
+GET /stats returns request, fault and scenario counts; GET /received the
+webhook payloads accepted so far.
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import math
+import random
+import re
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from aiohttp import web
+
+from benchmarks.webhook_stub import WEBHOOK_PATH
+
+# How long a "timeout" fault holds the request before answering 504
+TIMEOUT_HOLD_SECONDS = 600
+# Prompts shorter than this are never cached by OpenAI
+MIN_CACHED_TOKENS = 1024
+
+DEFAULT_SCENARIOS = {
+    "rules": [
+        {
+            "name": "confirm",
+            "match": r"(?i)\bconfirm\s+(\S+)\s+on\s+(\d{4}-\d{2}-\d{2})\s+at\s+(\d{1,2}:\d{2})\s+for\s+([^,]+),\s*(\d+),\s*(\w+),\s*(\+?\d+)",
+            "tool_calls": [{
+                "name": "get_confirmation",
+                "arguments": {
+                    "user_id": "",
+                    "conversation_id": "",
+                    "patient_details": {"name": "{4}", "age": "{5}", "gender": "{6}", "phone": "{7}"},
+                    "appointment_details": {
+                        "doctor_id": "{1}", "doctor_name": "{1}", "hospital_name": "Stub Hospital",
+                        "appointment_date": "{2}", "appointment_time": "{3}", "symptoms": "not stated"
+                    }
+                }
+            }]
+        },
+        {
+            "name": "hold_slot",
+            "match": r"(?i)\bbook\s+(\S+)\s+on\s+(\d{4}-\d{2}-\d{2})\s+at\s+(\d{1,2}:\d{2})",
+            "tool_calls": [{
+                "name": "hold_appointment_slot",
+                "arguments": {"doctor_id": "{1}", "appointment_date": "{2}", "appointment_time": "{3}"}
+            }]
+        },
+        {
+            "name": "doctor_search",
+            "match": r"(?i)doctor|specialist|clinic|hospital|appointment|logist\b|pain|fever|rash",
+            "tool_calls": [{"name": "get_service_info", "arguments": {"query": "{prompt}"}}]
+        },
+        {
+            "name": "small_talk",
+            "match": "",
+            "reply": {"type": "text", "content": {"text": "I can help you find a doctor or book an appointment. You said: {prompt}"}}
+        }
+    ],
+    "followup": {"type": "text", "content": {"text": "{tool_results}"}},
+    "gemini": "Providers matching \"{prompt}\" are listed below with their specialties, timings and fees."
+}
+
+OPENAI_ERRORS = {429: "rate_limit_exceeded", 500: "server_error", 503: "server_error"}
+GEMINI_ERRORS = {429: "RESOURCE_EXHAUSTED", 500: "INTERNAL", 503: "UNAVAILABLE"}
+
+
+class Latency:
+    """Delay distribution parsed from "fixed:MS", "uniform:LOW:HIGH" or "lognormal:P50:P99" (milliseconds)."""
+
+    def __init__(self, spec: str = "fixed:0"):
+        kind, *values = spec.split(":")
+        params = [float(value) for value in values]
+        if kind == "fixed" and len(params) == 1:
+            self.sample_ms = lambda rng: params[0]
+        elif kind == "uniform" and len(params) == 2:
+            self.sample_ms = lambda rng: rng.uniform(params[0], params[1])
+        elif kind == "lognormal" and len(params) == 2 and 0 < params[0] < params[1]:
+            # The 99th percentile of a lognormal is exp(mu + 2.326 sigma)
+            mu, sigma = math.log(params[0]), math.log(params[1] / params[0]) / 2.326
+            self.sample_ms = lambda rng: rng.lognormvariate(mu, sigma)
+        else:
+            raise ValueError(f"Invalid latency spec: {spec}")
+        self.spec = spec
+
+
+class Faults:
+    """Error injection parsed from "429:0.02,500:0.01,timeout:0.005" (fault: share of requests)."""
+
+    def __init__(self, spec: str = ""):
+        self.spec = spec
+        self.rates: List[Tuple[str, float]] = []
+        for part in filter(None, spec.split(",")):
+            fault, _, rate = part.partition(":")
+            if fault != "timeout" and not fault.isdigit():
+                raise ValueError(f"Invalid fault: {fault}")
+            self.rates.append((fault, float(rate)))
+        if sum(rate for _, rate in self.rates) > 1:
+            raise ValueError(f"Fault rates add up to more than 1: {spec}")
+
+    def pick(self, rng: random.Random) -> Optional[str]:
+        """The fault to inject into one request, if any."""
+        draw = rng.random()
+        for fault, rate in self.rates:
+            if draw < rate:
+                return fault
+            draw -= rate
+        return None
+
+
+class Upstream:
+    """Latency, faults and counters of one stubbed upstream."""
+
+    def __init__(self, name: str, latency: Latency, faults: Faults, seed: int):
+        self.name = name
+        self.latency = latency
+        self.faults = faults
+        self.rng = random.Random(f"{seed}:{name}")
+        self.requests = 0
+        self.injected: Dict[str, int] = {}
+
+    async def delay_or_fault(self) -> Optional[str]:
+        """Wait out the sampled latency; returns the fault to answer with, if any."""
+        self.requests += 1
+        # Draw both values up front so the sequence only depends on the request order
+        delay_ms = self.latency.sample_ms(self.rng)
+        fault = self.faults.pick(self.rng)
+        if fault is not None:
+            self.injected[fault] = self.injected.get(fault, 0) + 1
+        if fault == "timeout":
+            await asyncio.sleep(TIMEOUT_HOLD_SECONDS)
+            return "504"
+        if delay_ms > 0:
+            await asyncio.sleep(delay_ms / 1000)
+        return fault
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "latency": self.latency.spec,
+            "faults": self.faults.spec,
+            "requests": self.requests,
+            "injected": self.injected
+        }
+
+
+def _tokens(text: str) -> int:
+    """Rough token count (about 4 characters per token)."""
+    return len(text) // 4 + 1
+
+
+def _format(template: Any, match: Optional["re.Match"], **values: str) -> Any:
+    """Fill {prompt}, {0}, {1}... into every string of a template."""
+    if isinstance(template, str):
+        groups = [match.group(0), *(group or "" for group in match.groups())] if match else []
+        return template.format(*groups, **values)
+    if isinstance(template, dict):
+        return {key: _format(value, match, **values) for key, value in template.items()}
+    if isinstance(template, list):
+        return [_format(value, match, **values) for value in template]
+    return template
+
+
+def _tool_results_text(messages: List[Dict[str, Any]]) -> str:
+    """What the tool results of the current turn say, as the follow-up answer."""
+    texts = []
+    for message in reversed(messages):
+        if message.get("role") == "tool":
+            try:
+                data = json.loads(message.get("content") or "")
+            except ValueError:
+                data = None
+            if isinstance(data, dict) and (data.get("service_info") or data.get("message")):
+                texts.append(str(data.get("service_info") or data.get("message")))
+            else:
+                texts.append(str(message.get("content"))[:500])
+        elif message.get("role") != "system":
+            break
+    return "\n\n".join(reversed(texts)) or "Done."
+
+
+def create_app(
+    scenarios: Optional[Dict[str, Any]] = None,
+    openai: Optional[Tuple[Latency, Faults]] = None,
+    gemini: Optional[Tuple[Latency, Faults]] = None,
+    webhook: Optional[Tuple[Latency, Faults]] = None,
+    seed: int = 7
+) -> web.Application:
+    """
+    Build the stub upstream application.
+
+    Args:
+        scenarios: Scenario rules and templates (DEFAULT_SCENARIOS when omitted)
+        openai: Latency and faults of the chat completions endpoint
+        gemini: Latency and faults of the generateContent endpoint
+        webhook: Latency and faults of the confirmation webhook
+        seed: Random seed for latencies and faults
+    """
+    scenarios = {**DEFAULT_SCENARIOS, **(scenarios or {})}
+    rules = [(rule, re.compile(rule.get("match", ""))) for rule in scenarios["rules"]]
+    upstreams = {
+        name: Upstream(name, *(model or (Latency(), Faults())), seed=seed)
+        for name, model in (("openai", openai), ("gemini", gemini), ("webhook", webhook))
+    }
+
+    app = web.Application(client_max_size=16 * 1024 * 1024)
+    app["received"] = []
+    app["scenario_hits"] = {}
+    # System prompt prefixes seen so far, to report cached tokens like the prompt cache would
+    cached_prefixes = set()
+
+    def openai_error(status: int) -> web.Response:
+        return web.json_response(
+            {"error": {"message": f"Injected {status}", "type": OPENAI_ERRORS.get(status, "server_error"), "code": None}},
+            status=status
+        )
+
+    async def chat_completions(request: web.Request) -> web.Response:
+        body = await request.json()
+        fault = await upstreams["openai"].delay_or_fault()
+        if fault is not None:
+            return openai_error(int(fault))
+
+        messages = body.get("messages", [])
+        prompt_text = json.dumps(messages)
+        last = next((m for m in reversed(messages) if m.get("role") != "system"), {})
+        prompt = str(last.get("content") or "") if last.get("role") == "user" else ""
+
+        message: Dict[str, Any] = {"role": "assistant", "content": None}
+        if last.get("role") == "tool" or not body.get("tools"):
+            scenario = "followup"
+            reply = _format(scenarios["followup"], None, prompt=prompt, tool_results=_tool_results_text(messages))
+            message["content"] = json.dumps(reply)
+        else:
+            rule, match = next(((rule, m) for rule, pattern in rules if (m := pattern.search(prompt))), (None, None))
+            if rule is None:
+                return openai_error(500)
+            scenario = rule.get("name", rule.get("match", ""))
+            if rule.get("tool_calls"):
+                message["tool_calls"] = [
+                    {
+                        "id": "call_" + hashlib.sha1(f"{prompt_text}:{index}".encode()).hexdigest()[:24],
+                        "type": "function",
+                        "function": {
+                            "name": call["name"],
+                            "arguments": json.dumps(_format(call.get("arguments", {}), match, prompt=prompt))
+                        }
+                    }
+                    for index, call in enumerate(rule["tool_calls"])
+                ]
+            else:
+                message["content"] = json.dumps(_format(rule.get("reply", {}), match, prompt=prompt))
+        app["scenario_hits"][scenario] = app["scenario_hits"].get(scenario, 0) + 1
+
+        prompt_tokens = _tokens(prompt_text)
+        system_prompt = (messages[0].get("content") or "") if messages and messages[0].get("role") == "system" else ""
+        system_tokens = _tokens(system_prompt) if system_prompt else 0
+        cached_tokens = 0
+        if system_tokens >= MIN_CACHED_TOKENS:
+            prefix = hashlib.sha1(system_prompt.encode()).hexdigest()
+            if prefix in cached_prefixes:
+                # Cache hits come in 128-token increments
+                cached_tokens = system_tokens // 128 * 128
+            cached_prefixes.add(prefix)
+        completion_tokens = _tokens(json.dumps(message))
+
+        return web.json_response({
+            "id": "chatcmpl-" + hashlib.sha1(prompt_text.encode()).hexdigest()[:24],
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "stub"),
+            "choices": [{
+                "index": 0,
+                "message": message,
+                "finish_reason": "tool_calls" if message.get("tool_calls") else "stop",
+                "logprobs": None
+            }],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+                "prompt_tokens_details": {"cached_tokens": cached_tokens}
+            }
+        })
+
+    async def generate_content(request: web.Request) -> web.Response:
+        body = await request.json()
+        fault = await upstreams["gemini"].delay_or_fault()
+        if fault is not None:
+            status = int(fault)
+            return web.json_response(
+                {"error": {"code": status, "message": f"Injected {status}", "status": GEMINI_ERRORS.get(status, "INTERNAL")}},
+                status=status
+            )
+
+        texts = [
+            part.get("text", "")
+            for content in [body.get("systemInstruction") or {}, *body.get("contents", [])]
+            for part in content.get("parts", [])
+        ]
+        prompt = texts[-1] if texts else ""
+        text = _format(scenarios["gemini"], None, prompt=prompt)
+        app["scenario_hits"]["gemini"] = app["scenario_hits"].get("gemini", 0) + 1
+        prompt_tokens, completion_tokens = _tokens("".join(texts)), _tokens(text)
+        return web.json_response({
+            "candidates": [{"content": {"role": "model", "parts": [{"text": text}]}, "finishReason": "STOP", "index": 0}],
+            "usageMetadata": {
+                "promptTokenCount": prompt_tokens,
+                "candidatesTokenCount": completion_tokens,
+                "totalTokenCount": prompt_tokens + completion_tokens
+            },
+            "modelVersion": request.match_info["model"]
+        })
+
+    async def confirm(request: web.Request) -> web.Response:
+        payload = await request.json()
+        fault = await upstreams["webhook"].delay_or_fault()
+        if fault is not None:
+            return web.json_response({"message": "temporarily unavailable"}, status=int(fault))
+        app["received"].append(payload)
+        return web.json_response({"message": "confirmed", "conversation_id": payload.get("conversation_id")})
+
+    async def models(request: web.Request) -> web.Response:
+        # Target of the OpenAI connection warm-up
+        return web.json_response({"object": "list", "data": [{"id": "stub", "object": "model"}]})
+
+    async def root(request: web.Request) -> web.Response:
+        # Target of the Gemini connection warm-up
+        return web.json_response({"status": "ok"})
+
+    async def stats(request: web.Request) -> web.Response:
+        return web.json_response({
+            "upstreams": {name: upstream.stats() for name, upstream in upstreams.items()},
+            "scenario_hits": app["scenario_hits"],
+            "webhooks_received": len(app["received"])
+        })
+
+    async def received(request: web.Request) -> web.Response:
+        return web.json_response({"attempts": upstreams["webhook"].requests, "received": app["received"]})
+
+    app.router.add_post("/v1/chat/completions", chat_completions)
+    app.router.add_get("/v1/models", models)
+    app.router.add_post("/v1beta/models/{model}:generateContent", generate_content)
+    app.router.add_get("/", root)
+    app.router.add_post(WEBHOOK_PATH, confirm)
+    app.router.add_get("/stats", stats)
+    app.router.add_get("/received", received)
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run offline stand-ins for OpenAI, Gemini and the confirmation webhook")
+    parser.add_argument("--port", type=int, default=8090, help="Port to listen on")
+    parser.add_argument("--scenarios", help="JSON file with scenario rules (built-in scenarios when omitted)")
+    parser.add_argument("--seed", type=int, default=7, help="Random seed for latencies and faults")
+    for name in ("openai", "gemini", "webhook"):
+        parser.add_argument(f"--{name}-latency", type=Latency, default=Latency(), help=f"{name} latency distribution")
+        parser.add_argument(f"--{name}-errors", type=Faults, default=Faults(), help=f"{name} faults and their shares")
+    args = parser.parse_args()
+
+    scenarios = None
+    if args.scenarios:
+        with open(args.scenarios) as f:
+            scenarios = json.load(f)
+    app = create_app(
+        scenarios,
+        openai=(args.openai_latency, args.openai_errors),
+        gemini=(args.gemini_latency, args.gemini_errors),
+        webhook=(args.webhook_latency, args.webhook_errors),
+        seed=args.seed
+    )
+    web.run_app(app, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
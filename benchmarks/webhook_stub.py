@@ -0,0 +1,66 @@
+"""
+Local stand-in for the appointment confirmation webhook.
+
+Accepts confirmation posts, optionally delays or fails a share of them, and
+records what it received, so the outbox can be exercised without n8n. Point
+the API at it with CONFIRMATION_WEBHOOK_URL.
+
+Usage:
+    python -m benchmarks.webhook_stub --port 8081 --fail-rate 0.3 --latency-ms 50
+    CONFIRMATION_WEBHOOK_URL=http://localhost:8081/webhook/appointment/confirmation uvicorn app.main:app
+
+GET /received returns the payloads accepted so far.
+"""
+
+import argparse
+import asyncio
+import random
+
+from aiohttp import web
+
+WEBHOOK_PATH = "/webhook/appointment/confirmation"
+
+
+def create_app(fail_rate: float = 0.0, latency_ms: float = 0.0, seed: int = 7) -> web.Application:
+    """
+    Build the stub webhook application.
+
+    Args:
+        fail_rate: Share of posts answered with HTTP 503
+        latency_ms: Delay before each answer
+        seed: Random seed for failures
+    """
+    rng = random.Random(seed)
+    app = web.Application()
+    app["received"] = []
+    app["attempts"] = 0
+
+    async def confirm(request: web.Request) -> web.Response:
+        app["attempts"] += 1
+        payload = await request.json()
+        if latency_ms:
+            await asyncio.sleep(latency_ms / 1000)
+        if rng.random() < fail_rate:
+            return web.json_response({"message": "temporarily unavailable"}, status=503)
+        app["received"].append(payload)
+        return web.json_response({"message": "confirmed", "conversation_id": payload.get("conversation_id")})
+
+    async def received(request: web.Request) -> web.Response:
+        return web.json_response({"attempts": app["attempts"], "received": app["received"]})
+
+    app.router.add_post(WEBHOOK_PATH, confirm)
+    app.router.add_get("/received", received)
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a local appointment confirmation webhook")
+    parser.add_argument("--port", type=int, default=8081, help="Port to listen on")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="Share of posts answered with HTTP 503")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Delay before each answer")
+    args = parser.parse_args()
+    web.run_app(create_app(args.fail_rate, args.latency_ms), port=args.port)
+
+
+if __name__ == "__main__":
+    main()
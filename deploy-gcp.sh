@@ -23,7 +23,7 @@ gcloud run deploy $SERVICE_NAME \
   --region $REGION \
   --allow-unauthenticated \
   --memory 512Mi \
-  --set-env-vars="LOG_LEVEL=INFO"
+  --set-env-vars="LOG_LEVEL=INFO,SHUTDOWN_READINESS_DELAY_SECONDS=0,SHUTDOWN_DRAIN_SECONDS=5"
 
 echo "Deployment complete!"
 echo "Your service will be available at the URL shown above." 
\ No newline at end of file
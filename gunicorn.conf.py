@@ -0,0 +1,76 @@
+"""
+Gunicorn configuration for the multi-worker serving mode.
+
+    gunicorn -c gunicorn.conf.py app.main:app
+
+Runs one uvicorn worker per available CPU. The count comes from the container's
+cgroup CPU quota, not the host's core count; WEB_CONCURRENCY overrides it. The
+app is imported once in the master process, and the provider catalogue,
+search indexes and compiled prompts are loaded there before forking. Workers
+then share those pages copy-on-write instead of each loading its own copy.
+State that must be global (conversation memory, the result cache's shared
+tier, slot holds, the confirmation outbox, worker metrics) lives in Redis.
+"""
+
+import gc
+import math
+import os
+import sys
+
+# The app is imported from here too (see shutdown_timeout), also when gunicorn runs with --chdir
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+
+def available_cpus() -> int:
+    """CPUs this container may use: the cgroup quota if set, else the host's CPUs."""
+    try:
+        # cgroup v2: "<quota> <period>" or "max <period>"
+        with open("/sys/fs/cgroup/cpu.max") as f:
+            quota, period = f.read().split()
+        if quota != "max":
+            return max(1, math.ceil(int(quota) / int(period)))
+    except (OSError, ValueError):
+        pass
+    try:
+        # cgroup v1
+        with open("/sys/fs/cgroup/cpu/cpu.cfs_quota_us") as f:
+            quota = int(f.read())
+        with open("/sys/fs/cgroup/cpu/cpu.cfs_period_us") as f:
+            period = int(f.read())
+        if quota > 0:
+            return max(1, math.ceil(quota / period))
+    except (OSError, ValueError):
+        pass
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8000')}"
+workers = int(os.environ.get("WEB_CONCURRENCY") or available_cpus())
+worker_class = "uvicorn_worker.UvicornWorker"
+preload_app = True
+
+
+def shutdown_timeout() -> int:
+    """Seconds a worker may take to stop after SIGTERM: the readiness delay, the drain and closing down."""
+    from app.services.lifecycle import shutdown_seconds
+
+    return math.ceil(shutdown_seconds())
+
+
+# Workers still running after this are killed, so leave room for the whole drain
+graceful_timeout = int(os.environ.get("GRACEFUL_TIMEOUT") or shutdown_timeout())
+timeout = int(os.environ.get("WORKER_TIMEOUT", "120"))
+keepalive = 5
+accesslog = "-" if os.environ.get("ACCESS_LOG") else None
+
+
+def when_ready(server):
+    """Load read-only data in the master, after the app is imported and before workers fork."""
+    from app.services.lifecycle import lifecycle
+
+    lifecycle.preload()
+    # Keep the collector from touching (and so copying) the preloaded objects in every worker
+    gc.freeze()
+    server.log.info(f"Starting {workers} workers")
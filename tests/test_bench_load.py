@@ -0,0 +1,37 @@
+"""The load test's answer checks must follow the texts the service answers with."""
+
+import pytest
+
+from app.services import ai_service
+from benchmarks.bench_load import BOOKING_MESSAGES, DEADLINE_MESSAGE, classify
+
+
+def text(value: str) -> dict:
+    return {"type": "text", "content": {"text": value}}
+
+
+def test_messages_match_the_service():
+    assert DEADLINE_MESSAGE == ai_service.DEADLINE_MESSAGE
+    held = ai_service.SLOT_HOLD_RESULTS[ai_service.HELD]["message"]
+    unavailable = ai_service.SLOT_HOLD_RESULTS[ai_service.UNAVAILABLE]["message"]
+    assert any(message in held for message in BOOKING_MESSAGES["hold_slot"])
+    assert any(message in unavailable for message in BOOKING_MESSAGES["hold_slot"])
+
+
+@pytest.mark.parametrize("turn, payload, failure", [
+    ("greeting", text("Hi, how can I help?"), None),
+    ("greeting", {"type": "call_to_action", "content": {}}, "unexpected_type"),
+    ("symptoms", text(DEADLINE_MESSAGE), "deadline"),
+    ("doctor_search", text("I'm sorry, I encountered an error processing your request."), "fallback"),
+    ("doctor_search", {"type": "list", "content": {"body": {"text": "Dermatologists in Mumbai"}}}, None),
+    ("hold_slot", text(ai_service.SLOT_HOLD_RESULTS[ai_service.HELD]["message"]), None),
+    ("hold_slot", text(ai_service.SLOT_HOLD_RESULTS[ai_service.TAKEN]["message"]), "not_booked"),
+    ("confirmation", text("Appointment confirmation received and is being processed"), None),
+    ("confirmation", text("Failed to confirm appointment. Status: 500"), "not_booked"),
+])
+def test_classify(turn, payload, failure):
+    assert classify(turn, payload) == failure
+
+
+def test_booking_checks_can_be_skipped():
+    assert classify("confirmation", text("Your appointment is booked."), booking_checks=False) is None
@@ -0,0 +1,63 @@
+"""Totals exported at /metrics must not drop when a worker's values are retired."""
+
+from app.utils.metrics import LABEL_SEPARATOR, MetricsRegistry
+
+
+def make_registry():
+    registry = MetricsRegistry("test_")
+    requests = registry.counter("requests_total", "Requests", ("route",))
+    duration = registry.histogram("duration_seconds", "Duration", ("route",), buckets=(0.1, 1.0))
+    memory = registry.gauge("memory_bytes", "Memory")
+    return registry, requests, duration, memory
+
+
+def retire(registry, snapshot):
+    """The retired total as Redis returns it: HINCRBYFLOAT amounts as strings."""
+    return registry.retired_snapshot({field: str(float(amount)) for field, amount in registry.retired_fields(snapshot).items()})
+
+
+def test_retired_snapshot_round_trips_counters_and_histograms():
+    registry, requests, duration, memory = make_registry()
+    requests.inc("/a", amount=3)
+    duration.observe(0.05, "/a")
+    duration.observe(5.0, "/a")
+    memory.set(100)
+
+    retired = retire(registry, registry.snapshot())
+
+    assert retired["test_requests_total"] == {"/a": 3}
+    assert retired["test_duration_seconds"] == {"/a": [1, 0, 1, 5.05]}
+    assert "test_memory_bytes" not in retired
+
+
+def test_render_adds_the_retired_total():
+    registry, requests, duration, _ = make_registry()
+    requests.inc("/a", amount=3)
+    duration.observe(0.5, "/a")
+    retired = retire(registry, registry.snapshot())
+    registry.reset()
+    requests.inc("/a")
+
+    text = registry.render({"live": registry.snapshot()}, retired=retired)
+
+    assert 'test_requests_total{route="/a"} 4' in text
+    assert 'test_duration_seconds_count{route="/a"} 1' in text
+
+
+def test_reset_keeps_gauges():
+    registry, requests, _, memory = make_registry()
+    requests.inc("/a")
+    memory.set(100)
+
+    registry.reset()
+
+    assert registry.snapshot() == {"test_memory_bytes": {"": 100}}
+
+
+def test_label_keys_survive_the_field_encoding():
+    registry = MetricsRegistry("test_")
+    registry.counter("calls_total", "Calls", ("method", "route")).inc("GET", "/a")
+
+    retired = retire(registry, registry.snapshot())
+
+    assert retired["test_calls_total"] == {f"GET{LABEL_SEPARATOR}/a": 1}
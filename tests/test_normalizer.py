@@ -0,0 +1,62 @@
+"""Regression tests for the get_service_info argument normaliser."""
+
+import pytest
+
+from app.utils.normalizer import QueryNormalizer
+
+
+@pytest.fixture(scope="module")
+def normalizer() -> QueryNormalizer:
+    return QueryNormalizer()
+
+
+@pytest.mark.parametrize("query", [
+    "I need a doctor",
+    "book doctor appointment",
+    "need a doctor appointment",
+    "doctor near me",
+    "doctor ka appointment",
+    "I want to see a doctor",
+    "specialist",
+])
+def test_generic_queries_have_no_specialty(normalizer, query):
+    arguments = normalizer.normalise(query, "", "", "")
+    assert arguments.specialty_id is None
+    assert arguments.specialty_source is None
+
+
+def test_generic_query_keeps_its_location(normalizer):
+    arguments = normalizer.normalise("find a specialist in mumbai", "", "", "")
+    assert arguments.specialty_id is None
+    assert arguments.city_id == "mumbai"
+
+
+@pytest.mark.parametrize("query, specialty_id", [
+    ("dermatalogist", "dermatologist"),
+    ("twacha rog", "dermatologist"),
+    ("skin doctr", "dermatologist"),
+    ("heart doctr", "cardiologist"),
+    ("dimag ka doktor", "neurologist"),
+    ("eye specalist", "ophthalmologist"),
+    ("kidny doctor", "nephrologist"),
+    ("stomach", "gastroenterologist"),
+    ("dentist appointment", "dentist"),
+])
+def test_misspelled_specialties_still_match(normalizer, query, specialty_id):
+    assert normalizer.normalise(query, "", "", "").specialty_id == specialty_id
+
+
+def test_symptoms_map_to_specialty(normalizer):
+    arguments = normalizer.normalise("chest pain", "", "", "")
+    assert arguments.specialty_id == "cardiologist"
+    assert arguments.specialty_source == "symptoms"
+
+
+@pytest.mark.parametrize("location, expected", [
+    ("bombay", ("mumbai", None)),
+    ("banglore", ("bengaluru", None)),
+    ("bandra west", ("mumbai", "bandra")),
+    ("conaught place", ("delhi", "connaught place")),
+])
+def test_locations(normalizer, location, expected):
+    assert normalizer.normalise_location(location) == expected
@@ -0,0 +1,99 @@
+"""Rate limits on /api/generate must hold against callers that vary what they send."""
+
+import asyncio
+import json
+import uuid
+
+import pytest
+from starlette.requests import Request
+from starlette.responses import Response
+
+from app.config.settings import settings
+from app.routers import generate
+from app.services.rate_limiter import RateLimiter
+from app.utils.error_handlers import APIError
+
+fakeredis = pytest.importorskip("fakeredis")
+pytest.importorskip("lupa")
+
+
+class FakeMemory:
+    """MemoryService stand-in handing out one fake Redis client."""
+
+    def __init__(self):
+        self.client = fakeredis.FakeAsyncRedis(decode_responses=True)
+
+    async def _setup_redis_connection(self):
+        return self.client
+
+
+@pytest.fixture
+def limiter(monkeypatch):
+    limiter = RateLimiter(FakeMemory())
+    monkeypatch.setattr(generate, "rate_limiter", limiter)
+    monkeypatch.setattr(settings, "API_KEY", None)
+    monkeypatch.setattr(settings, "RATE_LIMIT_PER_MINUTE", 3)
+    monkeypatch.setattr(settings, "RATE_LIMIT_BURST", 3)
+    monkeypatch.setattr(settings, "RATE_LIMIT_PER_CALLER_PER_MINUTE", 5)
+    monkeypatch.setattr(settings, "RATE_LIMIT_LOCAL_LEASE", 1)
+    monkeypatch.setattr(settings, "TRUSTED_PROXY_HOPS", 0)
+    return limiter
+
+
+def make_request(user_id, api_key=None, address="203.0.113.5"):
+    headers = [(b"content-type", b"application/json")]
+    if api_key:
+        headers.append((settings.API_KEY_HEADER.lower().encode(), api_key.encode()))
+    body = json.dumps({"text": "hi", "user_id": user_id}).encode()
+
+    async def receive():
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    scope = {
+        "type": "http", "method": "POST", "path": "/api/generate", "query_string": b"",
+        "headers": headers, "client": (address, 50000)
+    }
+    return Request(scope, receive)
+
+
+def allowed(requests):
+    """How many of the requests pass before the first 429, and that 429."""
+
+    async def run():
+        for count, request in enumerate(requests):
+            try:
+                await generate.enforce_rate_limit(request, Response())
+            except APIError as e:
+                return count, e
+        return len(requests), None
+
+    return asyncio.run(run())
+
+
+def test_gcra_denies_past_the_burst_with_retry_after(limiter):
+    count, error = allowed([make_request("user-1") for _ in range(5)])
+    assert count == 3
+    assert error.status_code == 429
+    assert int(error.headers["Retry-After"]) >= 1
+    assert error.headers["X-RateLimit-Remaining"] == "0"
+
+
+def test_random_api_keys_do_not_reset_the_limit_without_api_key(limiter):
+    count, error = allowed([make_request("user-1", api_key=uuid.uuid4().hex) for _ in range(5)])
+    assert count == 3
+    assert error is not None
+
+
+def test_caller_bucket_catches_user_id_rotation(limiter):
+    count, error = allowed([make_request(f"user-{i}") for i in range(10)])
+    assert count == 5
+    assert error.headers["X-RateLimit-Limit"] == "5"
+
+
+def test_configured_api_key_names_the_caller(limiter, monkeypatch):
+    monkeypatch.setattr(settings, "API_KEY", "secret")
+    # One integration spread over several addresses shares its caller bucket
+    requests = [make_request(f"user-{i}", api_key="secret", address=f"198.51.100.{i}") for i in range(10)]
+    count, error = allowed(requests)
+    assert count == 5
+    assert error is not None
@@ -0,0 +1,73 @@
+"""Concurrent holds on one availability slot: exactly one conversation may get it."""
+
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.services.provider_store import provider_store
+from app.services.slot_reservations import BOOKED, HELD, TAKEN, SlotReservationService
+
+fakeredis = pytest.importorskip("fakeredis")
+pytest.importorskip("lupa")
+
+
+class FakeMemory:
+    """MemoryService stand-in handing out one fake Redis client."""
+
+    def __init__(self):
+        self.client = fakeredis.FakeAsyncRedis(decode_responses=True)
+
+    async def _setup_redis_connection(self):
+        return self.client
+
+
+@pytest.fixture
+def slot():
+    """A doctor and a date on which the doctor works at 10:00-10:15."""
+    provider_store.ensure_loaded()
+    day = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0) + timedelta(days=1)
+    for offset in range(7):
+        start = day + timedelta(days=offset, hours=10)
+        for provider_id in provider_store.availability.provider_ids:
+            if provider_store.availability.is_available(str(provider_id), start):
+                return str(provider_id), f"{start:%Y-%m-%d}"
+    pytest.skip("No seed provider works at 10:00 in the next week")
+
+
+async def race(first, second):
+    service = SlotReservationService(FakeMemory(), provider_store)
+    doctor_id, date = first[0], first[1]
+    holds = await asyncio.gather(
+        service.hold(doctor_id, date, first[2], "conv-A"),
+        service.hold(doctor_id, date, second[2], "conv-B")
+    )
+    confirms = await asyncio.gather(
+        service.confirm(doctor_id, date, first[2], "conv-A"),
+        service.confirm(doctor_id, date, second[2], "conv-B")
+    )
+    return sorted(holds), sorted(confirms)
+
+
+@pytest.mark.parametrize("first_time, second_time", [
+    ("10:00", "10:01"),
+    ("10:00", "10:00 AM"),
+    ("10:14", "10:00"),
+])
+def test_one_hold_per_slot(slot, first_time, second_time):
+    doctor_id, date = slot
+    holds, confirms = asyncio.run(race((doctor_id, date, first_time), (doctor_id, date, second_time)))
+    assert holds == sorted([HELD, TAKEN])
+    assert confirms == sorted([BOOKED, TAKEN])
+
+
+def test_release_frees_the_slot_for_any_time_in_it(slot):
+    doctor_id, date = slot
+
+    async def run():
+        service = SlotReservationService(FakeMemory(), provider_store)
+        assert await service.hold(doctor_id, date, "10:00", "conv-A") == HELD
+        assert await service.release(doctor_id, date, "10:05", "conv-A")
+        return await service.hold(doctor_id, date, "10:10", "conv-B")
+
+    assert asyncio.run(run()) == HELD